@@ -16,6 +16,14 @@ class Settings(BaseSettings):
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     JWT_REFRESH_TOKEN_EXPIRE_DAYS:   int = 30
 
+    # ── Auth performance ──────────────────────────────────────────────────
+    PASSWORD_HASH_WORKERS:  int   = 4      # bcrypt threads; bounds concurrent hashes
+    USER_CACHE_TTL_SECONDS: float = 30.0   # how long a verified (user, token version) is trusted
+    USER_CACHE_MAX_ENTRIES: int   = 10_000
+
+    # ── Listings ──────────────────────────────────────────────────────────
+    LIST_TOTAL_CACHE_SECONDS: float = 60.0  # how long an include_total count is reused
+
     # ── Database (individual fields — assembled into URL) ──────────────────
     DB_DRIVER:   str = "sqlite+aiosqlite"
     DB_NAME:     str = "lms.db"
@@ -1,5 +1,8 @@
 """
 FastAPI Depends()-based authentication.
+
+get_current_principal — the caller as described by the token claims;
+                        database is only consulted on a user-cache miss.
 """
 
 import jwt as pyjwt
@@ -12,18 +15,12 @@ from lms.app.database.session import get_db
 from lms.app.models.user import User
 from lms.app.config import settings
 from lms.app.core.jwt_utils import decode_token
+from lms.app.core.auth_cache import Principal, principal_from_claims, user_cache
 
 bearer_scheme = HTTPBearer()
 
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db: AsyncSession = Depends(get_db),
-) -> User:
-    """
-    Validates the JWT token and returns the current user.
-    """
-    token = credentials.credentials
+def _decode_access_token(token: str) -> dict:
     try:
         payload = decode_token(token)
     except pyjwt.ExpiredSignatureError:
@@ -35,23 +32,51 @@ async def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token"
         )
 
-    user_id = payload.get("sub")
-    if not user_id:
+    if not payload.get("sub"):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token: sub missing"
         )
+    if payload.get("type") != "access":
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Access token required"
+        )
+    return payload
 
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
 
+def _check_user(user: User | None, token_version: int) -> None:
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
         )
-
     if not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN, detail="Inactive user"
         )
+    if user.token_version != token_version:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked"
+        )
+
+
+async def get_current_principal(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    db: AsyncSession = Depends(get_db),
+) -> Principal:
+    """
+    Validates the JWT token and returns the caller from its claims.
+    """
+    payload = _decode_access_token(credentials.credentials)
+    principal = principal_from_claims(payload)
+    if principal is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token: claims missing"
+        )
 
-    return user
\ No newline at end of file
+    if not user_cache.is_valid(principal.id, principal.token_version):
+        generation = user_cache.generation
+        row = (await db.execute(
+            select(User.id, User.is_active, User.token_version).where(User.id == principal.id)
+        )).one_or_none()
+        _check_user(row, principal.token_version)
+        user_cache.mark_valid(principal.id, row.token_version, generation)
+    return principal
@@ -13,12 +13,12 @@ def create_access_token(user_id: int, expires_delta: timedelta | None = None, ex
     encoded_jwt = pyjwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
-def create_refresh_token(user_id: int, expires_delta: timedelta | None = None) -> str:
+def create_refresh_token(user_id: int, expires_delta: timedelta | None = None, version: int = 0) -> str:
     if expires_delta:
         expire = datetime.now(timezone.utc) + expires_delta
     else:
         expire = datetime.now(timezone.utc) + settings.refresh_token_ttl
-    to_encode = {"sub": str(user_id), "exp": expire, "type": "refresh"}
+    to_encode = {"sub": str(user_id), "exp": expire, "type": "refresh", "ver": version}
     encoded_jwt = pyjwt.encode(to_encode, settings.JWT_SECRET_KEY, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
@@ -30,4 +30,8 @@ def extract_bearer(token: str) -> str:
     # For HTTPBearer, it's usually just the token itself.
     if token.startswith("Bearer "):
         return token.split(" ")[1]
-    return token
\ No newline at end of file
+    return token
+
+def user_claims(user) -> dict:
+    # Fields endpoints authorise on, so they can be served from the token.
+    return {"username": user.username, "email": user.email, "ver": user.token_version}
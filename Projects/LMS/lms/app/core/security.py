@@ -1,11 +1,32 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
+from lms.app.config import settings
+
 _pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt takes ~250 ms of CPU per call. Run it on a small, bounded pool so
+# a burst of logins queues here instead of blocking the event loop.
+_hash_pool = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="pwd-hash"
+)
+
 
 def get_password_hash(password: str) -> str:
     return _pwd_context.hash(password)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return _pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+    return _pwd_context.verify(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, get_password_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_pool, verify_password, plain_password, hashed_password)
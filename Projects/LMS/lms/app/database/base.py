@@ -1,4 +1,5 @@
-from sqlalchemy.orm import DeclarativeBase, AsyncAttrs
+from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.ext.asyncio import AsyncAttrs
 
 
 class Base(AsyncAttrs, DeclarativeBase):
@@ -1,6 +1,5 @@
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from ..config import settings
-from contextlib import asynccontextmanager
 
 
 engine = create_async_engine(
@@ -17,7 +16,6 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
-@asynccontextmanager
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
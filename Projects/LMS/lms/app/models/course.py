@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, Boolean, DateTime
+from sqlalchemy import Integer, String, Boolean, DateTime, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from lms.app.database.base import Base
@@ -6,6 +6,14 @@ from lms.app.database.base import Base
 
 class Course(Base):
     __tablename__ = "courses"
+    # One index per (filter, sort) pair the listing supports, each ending in
+    # id so keyset pages are a range scan: see core/pagination.py.
+    __table_args__ = (
+        Index("ix_courses_name_id", "name", "id"),
+        Index("ix_courses_created_at_id", "created_at", "id"),
+        Index("ix_courses_is_active_name_id", "is_active", "name", "id"),
+        Index("ix_courses_is_active_created_at_id", "is_active", "created_at", "id"),
+    )
 
     id:          Mapped[int]        = mapped_column(Integer, primary_key=True, index=True)
     name:        Mapped[str]        = mapped_column(String(100), nullable=False)
@@ -13,6 +21,10 @@ class Course(Base):
     is_active:   Mapped[bool]       = mapped_column(Boolean, default=True)
     created_at:  Mapped[datetime]   = mapped_column(DateTime, default=datetime.utcnow)
 
+    # Never loaded implicitly: endpoints that need enrolled users ask for
+    # them with selectinload(Course.users). Enrollment rows are written and
+    # deleted through the Enrollment model, not through this collection.
     users: Mapped[list["User"]] = relationship(
-        secondary="enrollments", back_populates="courses", lazy="selectin"
+        secondary="enrollments", back_populates="courses",
+        lazy="raise", passive_deletes=True,
     )
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, UniqueConstraint
+from sqlalchemy import Column, ForeignKey, Index, Integer, UniqueConstraint
 from lms.app.database.base import Base
 
 
@@ -8,4 +8,9 @@ class Enrollment(Base):
     user_id: int = Column(Integer, ForeignKey("users.id"), primary_key=True)
     course_id: int = Column(Integer, ForeignKey("courses.id"), primary_key=True)
 
-    __table_args__ = (UniqueConstraint("user_id", "course_id", name="uq_user_course"),)
\ No newline at end of file
+    # The primary key (user_id, course_id) serves per-user lookups and the
+    # enrollment EXISTS check; course_id needs its own index for per-course ones.
+    __table_args__ = (
+        UniqueConstraint("user_id", "course_id", name="uq_user_course"),
+        Index("ix_enrollments_course_id", "course_id"),
+    )
\ No newline at end of file
@@ -20,9 +20,13 @@ class User(Base):
     is_verified:   Mapped[bool]         = mapped_column(Boolean, default=False)
     created_at:    Mapped[datetime]     = mapped_column(DateTime, default=datetime.utcnow)
     last_login:    Mapped[datetime | None] = mapped_column(DateTime)
+    # Embedded in every token as "ver"; bumping it revokes all issued tokens.
+    token_version: Mapped[int]          = mapped_column(Integer, default=0, server_default="0", nullable=False)
 
+    # See Course.users — load explicitly with selectinload(User.courses).
     courses: Mapped[list["Course"]] = relationship(
-        secondary="enrollments", back_populates="users", lazy="selectin"
+        secondary="enrollments", back_populates="users",
+        lazy="raise", passive_deletes=True,
     )
 
     def set_password(self, plain: str):
@@ -10,9 +10,11 @@ from lms.app.models.user         import User
 from lms.app.schemas.auth        import RegisterRequest, LoginRequest, TokenResponse, RefreshRequest
 from lms.app.core.jwt_utils      import (
     create_access_token, create_refresh_token,
-    decode_token, extract_bearer
+    decode_token, extract_bearer, user_claims
 )
-from lms.app.core.dependencies   import get_current_user
+from lms.app.core.security       import get_password_hash_async, verify_password_async
+from lms.app.core.auth_cache     import Principal
+from lms.app.core.dependencies   import get_current_principal
 
 router       = APIRouter(prefix="/auth", tags=["Authentication"])
 bearer_scheme = HTTPBearer()
@@ -34,7 +36,7 @@ async def register(payload: RegisterRequest, db: AsyncSession = Depends(get_db))
         first_name = payload.first_name,
         last_name  = payload.last_name,
     )
-    user.set_password(payload.password)
+    user.password_hash = await get_password_hash_async(payload.password)
     db.add(user)
     await db.flush()
     return {"success": True, "message": "Registered", "data": {"id": user.id, "email": user.email}}
@@ -45,18 +47,15 @@ async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User).where(User.email == payload.email))
     user   = result.scalar_one_or_none()
 
-    if not user or not user.verify_password(payload.password):
+    if not user or not await verify_password_async(payload.password, user.password_hash):
         raise HTTPException(status.HTTP_401_UNAUTHORIZED, "Invalid credentials")
     if not user.is_active:
         raise HTTPException(status.HTTP_403_FORBIDDEN, "Account is disabled")
 
     user.last_login = datetime.now(timezone.utc)
 
-    extra = {
-        "username":    user.username,
-    }
-    access_token  = create_access_token(user.id, extra=extra)
-    refresh_token = create_refresh_token(user.id)
+    access_token  = create_access_token(user.id, extra=user_claims(user))
+    refresh_token = create_refresh_token(user.id, version=user.token_version)
 
     return TokenResponse(
         access_token=access_token,
@@ -81,15 +80,16 @@ async def refresh(payload: RefreshRequest, db: AsyncSession = Depends(get_db)):
     user   = result.scalar_one_or_none()
     if not user:
         raise HTTPException(404, "User not found")
+    if not user.is_active:
+        raise HTTPException(403, "Account is disabled")
+    if token_data.get("ver") != user.token_version:
+        raise HTTPException(401, "Refresh token has been revoked")
 
-    extra = {
-        "username":    user.username,
-    }
-    return {"success": True, "data": {"access_token": create_access_token(user.id, extra=extra), "token_type": "Bearer"}}
+    return {"success": True, "data": {"access_token": create_access_token(user.id, extra=user_claims(user)), "token_type": "Bearer"}}
 
 
 @router.get("/me")
-async def me(current_user: User = Depends(get_current_user)):
+async def me(current_user: Principal = Depends(get_current_principal)):
     return {
         "success": True,
         "data": {
@@ -1,22 +1,37 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import List
+from sqlalchemy import select, exists, delete
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
 
 from lms.app.database.session import get_db
 from lms.app.models.course import Course
+from lms.app.models.enrollment import Enrollment
 from lms.app.schemas.course import CourseCreate, CourseUpdate, CourseResponse
+from lms.app.schemas.user import UserResponse
 from lms.app.models.user import User
-from lms.app.core.dependencies import get_current_user
+from lms.app.core.auth_cache import Principal
+from lms.app.core.dependencies import get_current_principal
+from lms.app.core.pagination import SortKey, TotalCache, datetime_key, keyset_page, set_page_headers
+from lms.app.config import settings
 
 router = APIRouter(prefix="/courses", tags=["Courses"])
 
+# Every sort is backed by an index on (sort, id) and (is_active, sort, id).
+COURSE_SORTS = {
+    "id": SortKey(Course.id),
+    "name": SortKey(Course.name),
+    "created_at": datetime_key(Course.created_at),
+}
+
+course_totals = TotalCache(settings.LIST_TOTAL_CACHE_SECONDS)
+
 
 @router.post("/", response_model=CourseResponse, status_code=201)
 async def create_course(
     course_data: CourseCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """
     Create a new course.
@@ -25,6 +40,7 @@ async def create_course(
     db.add(course)
     await db.flush()
     await db.refresh(course)
+    course_totals.clear()
     return CourseResponse.model_validate(course)
 
 
@@ -32,7 +48,7 @@ async def create_course(
 async def get_course(
     course_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """
     Retrieve a course by ID.
@@ -49,7 +65,7 @@ async def update_course(
     course_id: int,
     course_data: CourseUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """
     Update a course.
@@ -59,8 +75,11 @@ async def update_course(
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
 
-    for key, value in course_data.model_dump(exclude_unset=True).items():
+    changes = course_data.model_dump(exclude_unset=True)
+    for key, value in changes.items():
         setattr(course, key, value)
+    if "is_active" in changes:
+        course_totals.clear()
 
     await db.flush()
     await db.refresh(course)
@@ -71,7 +90,7 @@ async def update_course(
 async def delete_course(
     course_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """
     Delete a course.
@@ -80,48 +99,91 @@ async def delete_course(
     course = result.scalar_one_or_none()
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
+    await db.execute(delete(Enrollment).where(Enrollment.course_id == course_id))
     await db.delete(course)
+    course_totals.clear()
 
 
 @router.get("/", response_model=List[CourseResponse])
 async def list_courses(
-    page: int = Query(1, ge=1),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     per_page: int = Query(10, ge=1, le=100),
+    sort: str = Query("id", description="id, name or created_at; prefix '-' for descending"),
+    is_active: Optional[bool] = Query(None),
+    include_total: bool = Query(False, description="Return X-Total-Count (cached, may lag briefly)"),
+    page: Optional[int] = Query(None, ge=1, description="Deprecated offset paging; use cursor"),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """
-    List courses with pagination.
+    List courses, one keyset page at a time.
+
+    The next page's cursor is returned in the X-Next-Cursor header (absent
+    on the last page). Each page is a single indexed range query, however
+    deep the client pages.
     """
     query = select(Course)
-    total = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar()
-    result = await db.execute(query.offset((page - 1) * per_page).limit(per_page))
-    courses = result.scalars().all()
+    if is_active is not None:
+        query = query.where(Course.is_active == is_active)
+
+    offset = (page - 1) * per_page if page and not cursor else 0
+    courses, next_cursor = await keyset_page(
+        db, query, Course.id, sort, COURSE_SORTS, per_page, cursor=cursor, offset=offset
+    )
+    total = await course_totals.get(db, ("courses", is_active), query) if include_total else None
+    set_page_headers(response, next_cursor, total)
     return [CourseResponse.model_validate(course) for course in courses]
 
 
-@router.post("/{course_id}/enroll/{user_id}")
-async def enroll_user(
+@router.get("/{course_id}/users", response_model=List[UserResponse])
+async def list_course_users(
     course_id: int,
-    user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
-    """Enrolls a user in a course."""
-    course_result = await db.execute(select(Course).where(Course.id == course_id))
-    course = course_result.scalar_one_or_none()
+    """
+    List the users enrolled in a course.
+    """
+    result = await db.execute(
+        select(Course).where(Course.id == course_id).options(selectinload(Course.users))
+    )
+    course = result.scalar_one_or_none()
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
+    return [UserResponse.model_validate(user) for user in course.users]
+
+
+async def _is_enrolled(db: AsyncSession, course_id: int, user_id: int) -> bool:
+    # Answered from the enrollments primary key; no collection is loaded.
+    return bool(await db.scalar(
+        select(exists().where(
+            Enrollment.user_id == user_id, Enrollment.course_id == course_id
+        ))
+    ))
 
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
-    if not user:
+
+async def _ensure_course_and_user(db: AsyncSession, course_id: int, user_id: int) -> None:
+    if await db.scalar(select(Course.id).where(Course.id == course_id)) is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    if await db.scalar(select(User.id).where(User.id == user_id)) is None:
         raise HTTPException(status_code=404, detail="User not found")
 
-    if user in course.users:
+
+@router.post("/{course_id}/enroll/{user_id}")
+async def enroll_user(
+    course_id: int,
+    user_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_principal),
+):
+    """Enrolls a user in a course."""
+    await _ensure_course_and_user(db, course_id, user_id)
+
+    if await _is_enrolled(db, course_id, user_id):
         raise HTTPException(status_code=400, detail="User already enrolled in course")
 
-    course.users.append(user)
+    db.add(Enrollment(user_id=user_id, course_id=course_id))
     await db.flush()
     return {"message": f"User {user_id} enrolled in course {course_id}"}
 
@@ -131,22 +193,16 @@ async def unenroll_user(
     course_id: int,
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Unenrolls a user from a course."""
-    course_result = await db.execute(select(Course).where(Course.id == course_id))
-    course = course_result.scalar_one_or_none()
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
-
-    user_result = await db.execute(select(User).where(User.id == user_id))
-    user = user_result.scalar_one_or_none()
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-
-    if user not in course.users:
+    await _ensure_course_and_user(db, course_id, user_id)
+
+    result = await db.execute(
+        delete(Enrollment).where(
+            Enrollment.user_id == user_id, Enrollment.course_id == course_id
+        )
+    )
+    if not result.rowcount:
         raise HTTPException(status_code=400, detail="User not enrolled in course")
-
-    course.users.remove(user)
-    await db.flush()
     return {"message": f"User {user_id} unenrolled from course {course_id}"}
\ No newline at end of file
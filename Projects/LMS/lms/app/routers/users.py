@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, delete
 
 from lms.app.database.session   import get_db
 from lms.app.models.user         import User
+from lms.app.models.enrollment   import Enrollment
 from lms.app.schemas.user        import UserCreate, UserUpdate, UserResponse
-from lms.app.core.security      import get_password_hash
-from lms.app.core.dependencies   import get_current_user
+from lms.app.core.security      import get_password_hash_async
+from lms.app.core.auth_cache     import Principal, invalidate_on_commit
+from lms.app.core.dependencies   import get_current_principal
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
@@ -17,7 +19,7 @@ async def list_users(
     per_page: int = Query(10, ge=1, le=100),
     search:   str = Query(""),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """
     Lists users with pagination and optional search.
@@ -37,7 +39,7 @@ async def list_users(
 async def get_user(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """
     Retrieves a specific user by ID.
@@ -53,7 +55,7 @@ async def get_user(
 async def create_user(
     payload: UserCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """
     Creates a new user.
@@ -62,7 +64,7 @@ async def create_user(
     if existing_user.scalar_one_or_none():
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = get_password_hash(payload.password)
+    hashed_password = await get_password_hash_async(payload.password)
     user = User(
         username=payload.username,
         email=payload.email,
@@ -80,7 +82,7 @@ async def update_user(
     user_id: int,
     payload: UserUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """
     Updates an existing user.
@@ -92,12 +94,23 @@ async def update_user(
 
     update_data = payload.model_dump(exclude_unset=True)
     if "password" in update_data:
-        update_data["password_hash"] = get_password_hash(update_data.pop("password"))
+        update_data["password_hash"] = await get_password_hash_async(update_data.pop("password"))
+
+    # A password change or deactivation revokes every token issued so far,
+    # and so does a new username or email: tokens carry both as claims
+    # that /auth/me returns without reading the row.
+    identity_changed = any(
+        key in update_data and update_data[key] != getattr(user, key)
+        for key in ("username", "email")
+    )
+    if "password_hash" in update_data or update_data.get("is_active") is False or identity_changed:
+        user.token_version += 1
 
     for key, value in update_data.items():
         setattr(user, key, value)
 
     await db.flush()
+    invalidate_on_commit(db, user.id)
     return UserResponse.model_validate(user)
 
 
@@ -105,7 +118,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """
     Deletes a user.
@@ -114,4 +127,6 @@ async def delete_user(
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    await db.delete(user)
\ No newline at end of file
+    await db.execute(delete(Enrollment).where(Enrollment.user_id == user_id))
+    await db.delete(user)
+    invalidate_on_commit(db, user_id)
\ No newline at end of file
@@ -0,0 +1,24 @@
+from pydantic import BaseModel, EmailStr
+
+
+class RegisterRequest(BaseModel):
+    username:   str
+    email:      EmailStr
+    password:   str
+    first_name: str | None = None
+    last_name:  str | None = None
+
+
+class LoginRequest(BaseModel):
+    email:    EmailStr
+    password: str
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class TokenResponse(BaseModel):
+    access_token:  str
+    refresh_token: str
+    token_type:    str = "Bearer"
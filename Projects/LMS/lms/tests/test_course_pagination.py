@@ -0,0 +1,262 @@
+"""
+Keyset pagination for GET /api/courses/.
+
+The functional tests walk every sort/filter combination and check that
+cursors visit each course exactly once, in order. The benchmark seeds
+500k courses and checks that a page deep in the listing costs about the
+same as the first one; it is slow to seed, so it only runs with
+LMS_PAGINATION_BENCHMARK=1:
+
+    LMS_PAGINATION_BENCHMARK=1 python -m pytest lms/tests/test_course_pagination.py -o asyncio_mode=auto -s
+"""
+
+import os
+import time
+import statistics
+from datetime import datetime, timedelta
+
+import pytest
+import httpx
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from lms.app.main import app
+from lms.app.database.base import Base
+from lms.app.database.session import get_db
+from lms.app.models.user import User
+from lms.app.models.course import Course
+from lms.app.core.jwt_utils import create_access_token
+from lms.app.core.auth_cache import user_cache
+from lms.app.core.pagination import encode_cursor
+from lms.app.routers.courses import course_totals
+
+_EPOCH = datetime(2026, 1, 1)
+
+
+def _course_rows(count: int):
+    # names repeat and timestamps collide so ties must be broken by id
+    return [
+        {
+            "id": i,
+            "name": f"Course {i % 97:02d}",
+            "is_active": i % 3 != 0,
+            "created_at": _EPOCH + timedelta(minutes=i // 4),
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+async def _make_engine(course_count: int):
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [
+            {"id": 1, "username": "user1", "email": "user1@example.com", "password_hash": "x"}
+        ])
+        rows = _course_rows(course_count)
+        for start in range(0, len(rows), 50_000):
+            await conn.execute(insert(Course), rows[start:start + 50_000])
+        await conn.execute(text("ANALYZE"))
+    return engine
+
+
+async def _client_for(engine):
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+            await session.commit()
+
+    app.dependency_overrides[get_db] = override_get_db
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.fixture
+async def engine():
+    engine = await _make_engine(250)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(engine):
+    user_cache.clear()
+    course_totals.clear()
+    async with await _client_for(engine) as client:
+        yield client
+    app.dependency_overrides.clear()
+    user_cache.clear()
+    course_totals.clear()
+
+
+@pytest.fixture
+def headers():
+    claims = {"username": "user1", "email": "user1@example.com", "ver": 0}
+    return {"Authorization": f"Bearer {create_access_token(1, extra=claims)}"}
+
+
+async def _walk(client, headers, **params):
+    seen, cursor, pages = [], None, 0
+    while True:
+        query = dict(params, per_page=params.get("per_page", 40))
+        if cursor:
+            query["cursor"] = cursor
+        response = await client.get("/api/courses/", params=query, headers=headers)
+        assert response.status_code == 200, response.text
+        seen.extend(response.json())
+        pages += 1
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            return seen, pages
+
+
+def _expected(sort: str, is_active=None):
+    rows = _course_rows(250)
+    if is_active is not None:
+        rows = [r for r in rows if r["is_active"] == is_active]
+    name = sort.lstrip("-")
+    return [r["id"] for r in sorted(rows, key=lambda r: (r[name], r["id"]), reverse=sort.startswith("-"))]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort", ["id", "-id", "name", "-name", "created_at", "-created_at"])
+@pytest.mark.parametrize("is_active", [None, True, False])
+async def test_cursor_walk_visits_every_course_once(client, headers, sort, is_active):
+    params = {"sort": sort}
+    if is_active is not None:
+        params["is_active"] = str(is_active).lower()
+    seen, _ = await _walk(client, headers, **params)
+    assert [c["id"] for c in seen] == _expected(sort, is_active)
+
+
+@pytest.mark.asyncio
+async def test_total_is_opt_in_and_cached(client, headers):
+    response = await client.get("/api/courses/", headers=headers)
+    assert "X-Total-Count" not in response.headers
+
+    response = await client.get("/api/courses/?include_total=true&is_active=true", headers=headers)
+    assert response.headers["X-Total-Count"] == str(len(_expected("id", True)))
+
+    created = await client.post("/api/courses/", json={"name": "New course"}, headers=headers)
+    assert created.status_code == 201
+    response = await client.get("/api/courses/?include_total=true&is_active=true", headers=headers)
+    assert response.headers["X-Total-Count"] == str(len(_expected("id", True)) + 1)
+
+
+@pytest.mark.asyncio
+async def test_bad_cursors_are_rejected(client, headers):
+    first = await client.get("/api/courses/?sort=name", headers=headers)
+    cursor = first.headers["X-Next-Cursor"]
+
+    response = await client.get(f"/api/courses/?sort=created_at&cursor={cursor}", headers=headers)
+    assert response.status_code == 400
+    response = await client.get("/api/courses/?cursor=not-a-cursor", headers=headers)
+    assert response.status_code == 400
+    response = await client.get("/api/courses/?sort=description", headers=headers)
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort,fields", [
+    ("created_at", ["created_at", "not-a-date", 5]),
+    ("id", ["id", 5, "five"]),
+    ("id", ["id", "five", 5]),
+    ("name", ["name", ["a"], 5]),
+])
+async def test_tampered_cursors_are_client_errors(client, headers, sort, fields):
+    response = await client.get(
+        "/api/courses/", params={"sort": sort, "cursor": encode_cursor(*fields)}, headers=headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_legacy_page_parameter_still_works(client, headers):
+    response = await client.get("/api/courses/?page=3&per_page=10", headers=headers)
+    assert [c["id"] for c in response.json()] == list(range(21, 31))
+    assert response.headers["X-Next-Cursor"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort,is_active,index", [
+    ("name", None, "ix_courses_name_id"),
+    ("-created_at", None, "ix_courses_created_at_id"),
+    ("name", True, "ix_courses_is_active_name_id"),
+    ("created_at", False, "ix_courses_is_active_created_at_id"),
+])
+async def test_pages_are_served_from_composite_indexes(client, headers, engine, sort, is_active, index):
+    params = {"sort": sort}
+    if is_active is not None:
+        params["is_active"] = str(is_active).lower()
+    first = await client.get("/api/courses/", params=params, headers=headers)
+    params["cursor"] = first.headers["X-Next-Cursor"]
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if "FROM courses" in statement:
+            captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        response = await client.get("/api/courses/", params=params, headers=headers)
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+    assert response.status_code == 200
+
+    # EXPLAIN the statement the endpoint actually ran
+    statement, parameters = captured[-1]
+    async with engine.connect() as conn:
+        plan = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert index in details, details
+    assert "TEMP B-TREE" not in details, details
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not os.getenv("LMS_PAGINATION_BENCHMARK"), reason="set LMS_PAGINATION_BENCHMARK=1 to run")
+async def test_page_latency_is_flat_over_500k_courses(headers):
+    engine = await _make_engine(500_000)
+    user_cache.clear()
+    course_totals.clear()
+    try:
+        async with await _client_for(engine) as client:
+            async def timed_page(params):
+                samples = []
+                for _ in range(5):
+                    t0 = time.perf_counter()
+                    response = await client.get("/api/courses/", params=params, headers=headers)
+                    samples.append(time.perf_counter() - t0)
+                    assert response.status_code == 200
+                return statistics.median(samples), response
+
+            for sort in ("name", "-created_at"):
+                first_latency, _ = await timed_page({"sort": sort, "per_page": 50})
+                deep = {"sort": sort, "per_page": 50, "cursor": _deep_cursor(sort, 400_000)}
+                deep_latency, _ = await timed_page(deep)
+                offset_latency, _ = await timed_page({"sort": sort, "per_page": 50, "page": 8_000})
+                print(
+                    f"\n{sort:12} first {first_latency * 1000:6.1f} ms   "
+                    f"cursor@400k {deep_latency * 1000:6.1f} ms   offset@400k {offset_latency * 1000:6.1f} ms"
+                )
+                assert deep_latency < first_latency * 3 + 0.005
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+def _deep_cursor(sort: str, position: int) -> str:
+    expected = sorted(
+        ((r[sort.lstrip("-")], r["id"]) for r in _course_rows(500_000)),
+        reverse=sort.startswith("-"),
+    )
+    value, row_id = expected[position]
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return encode_cursor(sort, value, row_id)
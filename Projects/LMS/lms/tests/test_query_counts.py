@@ -0,0 +1,227 @@
+"""
+Query-count regression tests.
+
+Runs the app in-process against an in-memory SQLite database and counts
+the SQL statements each endpoint issues, so a relationship that starts
+loading implicitly again (or an N+1 loop) fails here instead of in
+production. Run from Projects/LMS:
+
+    python -m pytest lms/tests/test_query_counts.py -o asyncio_mode=auto
+"""
+
+import pytest
+import httpx
+from contextlib import contextmanager
+from typing import Dict, List
+
+from sqlalchemy import event, insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from lms.app.main import app
+from lms.app.database.base import Base
+from lms.app.database.session import get_db
+from lms.app.models.user import User
+from lms.app.models.course import Course
+from lms.app.models.enrollment import Enrollment
+from lms.app.core.jwt_utils import create_access_token
+from lms.app.core.auth_cache import invalidate_on_commit, user_cache
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.statements: List[str] = []
+        self._active = False
+        event.listen(engine.sync_engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        if self._active:
+            self.statements.append(statement)
+
+    @contextmanager
+    def count(self):
+        self.statements.clear()
+        self._active = True
+        try:
+            yield self
+        finally:
+            self._active = False
+
+    @property
+    def total(self) -> int:
+        return len(self.statements)
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [
+            {"id": i, "username": f"user{i}", "email": f"user{i}@example.com", "password_hash": "x"}
+            for i in range(1, 6)
+        ])
+        await conn.execute(insert(Course), [
+            {"id": i, "name": f"Course {i}"} for i in range(1, 16)
+        ])
+        # user 1 is enrolled in every course, every user in course 1
+        await conn.execute(insert(Enrollment), [{"user_id": 1, "course_id": i} for i in range(1, 16)])
+        await conn.execute(insert(Enrollment), [{"user_id": i, "course_id": 1} for i in range(2, 6)])
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def counter(engine):
+    return QueryCounter(engine)
+
+
+@pytest.fixture
+async def client(engine):
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+            await session.commit()
+
+    app.dependency_overrides[get_db] = override_get_db
+    user_cache.clear()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+    user_cache.clear()
+
+
+def _token(user_id: int, version: int = 0) -> str:
+    claims = {"username": f"user{user_id}", "email": f"user{user_id}@example.com", "ver": version}
+    return create_access_token(user_id, extra=claims)
+
+
+@pytest.fixture
+def headers() -> Dict[str, str]:
+    return {"Authorization": f"Bearer {_token(1)}"}
+
+
+# (method, path, expected status, expected statements)
+# The caller comes from token claims and the user cache is warmed first,
+# so these are the endpoint's own statements only.
+QUERY_BUDGETS = [
+    ("GET",    "/api/auth/me",              200, 0),
+    ("GET",    "/api/users/",               200, 2),  # count, page
+    ("GET",    "/api/users/2",              200, 1),
+    ("GET",    "/api/courses/",             200, 1),  # keyset page, no count
+    ("GET",    "/api/courses/1",            200, 1),
+    ("GET",    "/api/courses/1/users",      200, 2),  # course, selectinload
+    ("POST",   "/api/courses/2/enroll/3",   200, 4),  # course, user, EXISTS, INSERT
+    ("POST",   "/api/courses/1/enroll/3",   400, 3),  # already enrolled: no INSERT
+    ("DELETE", "/api/courses/1/enroll/3",   200, 3),  # course, user, DELETE
+    ("DELETE", "/api/courses/3",            204, 3),  # course, enrollments, course
+    ("DELETE", "/api/users/4",              204, 3),  # user, enrollments, user
+]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("method,path,expected_status,budget", QUERY_BUDGETS)
+async def test_endpoint_query_count(client, counter, headers, method, path, expected_status, budget):
+    await client.get("/api/auth/me", headers=headers)
+    with counter.count():
+        response = await client.request(method, path, headers=headers)
+    assert response.status_code == expected_status, response.text
+    assert counter.total == budget, "\n".join(counter.statements)
+
+
+@pytest.mark.asyncio
+async def test_query_count_independent_of_enrollments(client, counter, headers, engine):
+    # user 1 is enrolled in 15 courses; loading them must not cost extra queries
+    await client.get("/api/auth/me", headers=headers)
+    with counter.count():
+        response = await client.get("/api/courses/?per_page=15", headers=headers)
+    assert response.status_code == 200
+    assert len(response.json()) == 15
+    assert counter.total == 1, "\n".join(counter.statements)
+
+
+@pytest.mark.asyncio
+async def test_course_users_lists_enrolled_users(client, headers):
+    response = await client.get("/api/courses/1/users", headers=headers)
+    assert response.status_code == 200
+    assert sorted(u["id"] for u in response.json()) == [1, 2, 3, 4, 5]
+
+
+@pytest.mark.asyncio
+async def test_user_cache_miss_costs_one_query(client, counter, headers):
+    with counter.count():
+        assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+    assert counter.total == 1, "\n".join(counter.statements)
+    with counter.count():
+        assert (await client.get("/api/auth/me", headers=headers)).status_code == 200
+    assert counter.total == 0, "\n".join(counter.statements)
+
+
+@pytest.mark.asyncio
+async def test_deactivation_rejects_cached_tokens(client, headers):
+    user2 = {"Authorization": f"Bearer {_token(2)}"}
+    assert (await client.get("/api/auth/me", headers=user2)).status_code == 200
+
+    response = await client.put("/api/users/2", json={"is_active": False}, headers=headers)
+    assert response.status_code == 200
+
+    response = await client.get("/api/auth/me", headers=user2)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_password_change_revokes_cached_tokens(client, headers):
+    user2 = {"Authorization": f"Bearer {_token(2)}"}
+    assert (await client.get("/api/auth/me", headers=user2)).status_code == 200
+
+    response = await client.put("/api/users/2", json={"password": "n3w-password"}, headers=headers)
+    assert response.status_code == 200
+
+    response = await client.get("/api/auth/me", headers=user2)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Token has been revoked"
+    assert (await client.get("/api/auth/me", headers={"Authorization": f"Bearer {_token(2, 1)}"})).status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_a_check_that_read_the_old_row_is_not_cached(client, headers):
+    """A concurrent request that read token_version before the revocation committed."""
+    generation = user_cache.generation
+    response = await client.put("/api/users/2", json={"password": "n3w-password"}, headers=headers)
+    assert response.status_code == 200
+
+    user_cache.mark_valid(2, 0, generation)
+    response = await client.get("/api/auth/me", headers={"Authorization": f"Bearer {_token(2)}"})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_revocation_drops_the_cache_again_on_commit(engine):
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    user_cache.clear()
+    async with session_factory() as session:
+        invalidate_on_commit(session, 2)
+        user_cache.mark_valid(2, 0)  # re-cached between the flush and the commit
+        assert user_cache.is_valid(2, 0)
+        await session.commit()
+    assert not user_cache.is_valid(2, 0)
+    user_cache.clear()
+
+@pytest.mark.asyncio
+async def test_me_claims_stay_in_sync_with_the_user_row(client, headers):
+    """/auth/me answers from claims, so username and email must not change under a live token."""
+    user2 = {"Authorization": f"Bearer {_token(2)}"}
+    response = await client.put(
+        "/api/users/2", json={"username": "renamed", "email": "renamed@example.com"}, headers=headers
+    )
+    assert response.status_code == 200
+
+    row = (await client.get("/api/users/2", headers=headers)).json()
+    me = (await client.get("/api/auth/me", headers=user2)).json()["data"]
+    assert (me["username"], me["email"]) == (row["username"], row["email"])
@@ -0,0 +1,131 @@
+"""
+Concurrent-login load test (httpx + asyncio, no extra dependencies).
+
+Start the API first, e.g.
+
+    uvicorn lms.app.main:app --port 8000
+
+then
+
+    python load_test_auth.py --base-url http://localhost:8000 --concurrency 32 --duration 20
+
+Three things run at the same time:
+
+  login  — `concurrency` workers looping POST /api/auth/login (bcrypt verify)
+  me     — workers looping GET /api/auth/me with a token (the hot read path)
+  probe  — GET /health every 50 ms; its latency shows how long the event
+           loop is blocked. With bcrypt on the loop the probe stalls for
+           ~250 ms per hash in flight; with the hashing pool it stays flat.
+"""
+
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Dict, List
+
+import httpx
+
+
+def _pct(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _line(name: str, samples: List[float], duration: float, errors: int) -> str:
+    return (
+        f"{name:6} {len(samples) / duration:9.1f} req/s   "
+        f"p50 {_pct(samples, 50) * 1000:8.1f} ms   p95 {_pct(samples, 95) * 1000:8.1f} ms   "
+        f"max {(max(samples) if samples else 0) * 1000:8.1f} ms   errors {errors}"
+    )
+
+
+async def _register(client: httpx.AsyncClient, api: str, users: int, password: str) -> List[Dict[str, str]]:
+    accounts = []
+    for i in range(users):
+        account = {"username": f"loadtest{i}", "email": f"loadtest{i}@example.com", "password": password}
+        response = await client.post(f"{api}/auth/register", json=account)
+        if response.status_code not in (200, 201, 409):
+            response.raise_for_status()
+        accounts.append({"email": account["email"], "password": password})
+    return accounts
+
+
+async def _login_worker(client, api, account, deadline, samples, errors):
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        response = await client.post(f"{api}/auth/login", json=account)
+        if response.status_code == 200:
+            samples.append(time.perf_counter() - t0)
+        else:
+            errors.append(response.status_code)
+
+
+async def _me_worker(client, api, token, deadline, samples, errors):
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        response = await client.get(f"{api}/auth/me", headers=headers)
+        if response.status_code == 200:
+            samples.append(time.perf_counter() - t0)
+        else:
+            errors.append(response.status_code)
+
+
+async def _probe(client, deadline, samples, errors):
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        response = await client.get("/health")
+        if response.status_code == 200:
+            samples.append(time.perf_counter() - t0)
+        else:
+            errors.append(response.status_code)
+        await asyncio.sleep(0.05)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--api-prefix", default="/api")
+    parser.add_argument("--users", type=int, default=8, help="accounts to register and log in as")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent login workers")
+    parser.add_argument("--me-workers", type=int, default=8, help="concurrent GET /auth/me workers")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--password", default="load-test-password")
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency + args.me_workers + 4)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        accounts = await _register(client, args.api_prefix, args.users, args.password)
+        first = await client.post(f"{args.api_prefix}/auth/login", json=accounts[0])
+        first.raise_for_status()
+        token = first.json()["access_token"]
+
+        results = {name: ([], []) for name in ("login", "me", "probe")}
+        deadline = time.perf_counter() + args.duration
+        tasks = [
+            _login_worker(client, args.api_prefix, accounts[i % len(accounts)], deadline, *results["login"])
+            for i in range(args.concurrency)
+        ]
+        tasks += [
+            _me_worker(client, args.api_prefix, token, deadline, *results["me"])
+            for _ in range(args.me_workers)
+        ]
+        tasks.append(_probe(client, deadline, *results["probe"]))
+
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - started
+
+    print(f"{args.base_url}  concurrency={args.concurrency}  me_workers={args.me_workers}  duration={elapsed:.1f}s")
+    for name, (samples, errors) in results.items():
+        print(_line(name, samples, elapsed, len(errors)))
+    probe = results["probe"][0]
+    if probe:
+        print(f"event-loop stall (probe mean): {statistics.mean(probe) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
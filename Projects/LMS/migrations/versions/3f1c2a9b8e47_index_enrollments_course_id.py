@@ -0,0 +1,26 @@
+"""Index enrollments.course_id
+
+Revision ID: 3f1c2a9b8e47
+Revises: 7d7e8d459651
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9b8e47'
+down_revision: Union[str, None] = '7d7e8d459651'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_enrollments_course_id', 'enrollments', ['course_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_enrollments_course_id', table_name='enrollments')
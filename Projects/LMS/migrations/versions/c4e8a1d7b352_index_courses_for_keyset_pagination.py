@@ -0,0 +1,32 @@
+"""Index courses for keyset pagination
+
+Revision ID: c4e8a1d7b352
+Revises: 9b4e6d1f2a83
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e8a1d7b352'
+down_revision: Union[str, None] = '9b4e6d1f2a83'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_courses_name_id', 'courses', ['name', 'id'], unique=False)
+    op.create_index('ix_courses_created_at_id', 'courses', ['created_at', 'id'], unique=False)
+    op.create_index('ix_courses_is_active_name_id', 'courses', ['is_active', 'name', 'id'], unique=False)
+    op.create_index('ix_courses_is_active_created_at_id', 'courses', ['is_active', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_courses_is_active_created_at_id', table_name='courses')
+    op.drop_index('ix_courses_is_active_name_id', table_name='courses')
+    op.drop_index('ix_courses_created_at_id', table_name='courses')
+    op.drop_index('ix_courses_name_id', table_name='courses')
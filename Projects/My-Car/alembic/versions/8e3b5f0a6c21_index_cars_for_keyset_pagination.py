@@ -0,0 +1,37 @@
+"""Index cars for keyset pagination
+
+Revision ID: 8e3b5f0a6c21
+Revises: 5d2a7c3e9f10
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e3b5f0a6c21'
+down_revision: Union[str, None] = '5d2a7c3e9f10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INDEXES = [
+    ('ix_cars_price_id', ['price', 'id']),
+    ('ix_cars_year_id', ['year', 'id']),
+    ('ix_cars_created_at_id', ['created_at', 'id']),
+    ('ix_cars_is_available_price_id', ['is_available', 'price', 'id']),
+    ('ix_cars_is_available_created_at_id', ['is_available', 'created_at', 'id']),
+    ('ix_cars_make_price_id', ['make', 'price', 'id']),
+]
+
+
+def upgrade() -> None:
+    for name, columns in _INDEXES:
+        op.create_index(name, 'cars', columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, _ in reversed(_INDEXES):
+        op.drop_index(name, table_name='cars')
@@ -0,0 +1,101 @@
+"""
+Short-lived cache of verified token subjects.
+
+Access tokens carry the fields endpoints authorise on (user id, username,
+email, token version), so a request can be served from its claims. The
+one thing claims cannot tell us is whether the user was deactivated or
+had their tokens revoked since the token was issued; that check is
+cached here per (user id, token version) for USER_CACHE_TTL_SECONDS.
+
+Revocation = bump users.token_version. Tokens carrying the old version
+stop matching the cache key and fail the database check on their next
+miss. The changing request drops the user's entry when it commits
+(invalidate_on_commit), and a check that read the row before that is
+not cached (UserCache.generation). Each process keeps its own cache, so
+another worker may keep accepting a revoked token for at most one TTL.
+"""
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated caller, built from token claims."""
+    id:            int
+    username:      str
+    email:         str
+    token_version: int
+
+
+class UserCache:
+    """
+    user id → (current token version, expiry); LRU-bounded.
+
+    `generation` counts invalidations. A caller reads it before its
+    database check and passes it to mark_valid(), which ignores the mark
+    if an invalidation happened meanwhile: the row it read may be older.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Tuple[int, float]]" = OrderedDict()
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    def is_valid(self, user_id: int, token_version: int) -> bool:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[0] != token_version or entry[1] < time.monotonic():
+            self.misses += 1
+            return False
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return True
+
+    def mark_valid(self, user_id: int, token_version: int, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        self._entries[user_id] = (token_version, time.monotonic() + self.ttl_seconds)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+        self.generation += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+user_cache = UserCache(settings.USER_CACHE_TTL_SECONDS, settings.USER_CACHE_MAX_ENTRIES)
+
+
+def invalidate_on_commit(db: AsyncSession, user_id: int) -> None:
+    """
+    Drop the user's entry now and again once `db` commits: until then
+    other requests still read the old row and may re-cache it.
+    """
+    user_cache.invalidate(user_id)
+    event.listen(db.sync_session, "after_commit", lambda _session: user_cache.invalidate(user_id), once=True)
+
+
+def principal_from_claims(payload: dict) -> Optional[Principal]:
+    try:
+        return Principal(
+            id=int(payload["sub"]),
+            username=payload["username"],
+            email=payload["email"],
+            token_version=int(payload["ver"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        return None
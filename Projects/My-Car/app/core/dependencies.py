@@ -1,17 +1,65 @@
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from jose import jwt, JWTError
-from pydantic import ValidationError
 
 from app.database.base import get_db
 from app.models.user import User
-from app.schemas.auth import TokenPayload
-from app.config import settings
+from app.core.security import decode_token
+from app.core.auth_cache import Principal, principal_from_claims, user_cache
 
 # This URL should match the endpoint that provides the token
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/token")
+
+
+def _credentials_exception(detail: str = "Could not validate credentials") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail=detail,
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+def _decode_access_token(token: str) -> dict:
+    try:
+        payload = decode_token(token)
+    except jwt.InvalidTokenError:
+        raise _credentials_exception()
+    if not payload.get("sub") or payload.get("type") != "access":
+        raise _credentials_exception()
+    return payload
+
+
+def _check_user(user, token_version: int) -> None:
+    if user is None or not user.is_active:
+        raise _credentials_exception()
+    if user.token_version != token_version:
+        raise _credentials_exception("Token has been revoked")
+
+
+async def get_current_principal(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """
+    Returns the caller as described by the JWT claims.
+
+    - Raises HTTPException 401 for any token validation errors.
+    - Only queries the database when (user id, token version) is not in
+      the user cache, i.e. at most once per USER_CACHE_TTL_SECONDS.
+    """
+    principal = principal_from_claims(_decode_access_token(token))
+    if principal is None:
+        raise _credentials_exception()
+
+    if not user_cache.is_valid(principal.id, principal.token_version):
+        generation = user_cache.generation
+        row = (await db.execute(
+            select(User.id, User.is_active, User.token_version).where(User.id == principal.id)
+        )).one_or_none()
+        _check_user(row, principal.token_version)
+        user_cache.mark_valid(principal.id, row.token_version, generation)
+    return principal
 
 
 async def get_current_user(
@@ -23,31 +71,11 @@ async def get_current_user(
     - Raises HTTPException 401 for any token validation errors.
     - Fetches and returns the user from the database.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        # The 'sub' (subject) of the token is expected to be the username
-        username: str = payload.get("sub")
-        if username is None:
-            raise credentials_exception
-
-        # Validate payload structure
-        token_data = TokenPayload(username=username)
-
-    except (JWTError, ValidationError):
-        raise credentials_exception
-
-    # Fetch user from the database
-    result = await db.execute(select(User).where(User.username == token_data.username))
-    user = result.scalar_one_or_none()
-
-    if user is None:
-        raise credentials_exception
+    payload = _decode_access_token(token)
 
+    generation = user_cache.generation
+    result = await db.execute(select(User).where(User.id == int(payload["sub"])))
+    user = result.scalar_one_or_none()
+    _check_user(user, int(payload.get("ver", -1)))
+    user_cache.mark_valid(user.id, user.token_version, generation)
     return user
@@ -0,0 +1,160 @@
+"""
+Keyset (cursor) pagination.
+
+A page is fetched with
+
+    WHERE (sort_col, id) > (:last_sort_value, :last_id)     -- "<" when descending
+    ORDER BY sort_col, id
+    LIMIT :limit + 1
+
+so page N costs the same as page 1 as long as an index on
+(<equality filters>, sort_col, id) exists. The extra row tells us whether
+there is a next page, so no COUNT(*) is needed.
+
+The cursor handed to the client is an opaque, URL-safe token holding the
+last row's (sort value, id) plus the sort it belongs to; a cursor from a
+different sort is rejected.
+
+Totals are optional and come from TotalCache: an exact COUNT(*) reused
+for LIST_TOTAL_CACHE_SECONDS per filter combination, i.e. approximate
+while rows are being added or removed.
+"""
+
+import json
+import time
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _column_parser(column) -> Callable[[Any], Any]:
+    """Coerce a cursor value to the column's Python type (int, float, str, ...)."""
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return lambda v: v
+    return python_type if python_type in (int, float, str) else (lambda v: v)
+
+
+class SortKey:
+    """A sortable column plus how its values round-trip through a cursor."""
+
+    def __init__(self, column, parse: Optional[Callable[[Any], Any]] = None, dump: Callable[[Any], Any] = lambda v: v):
+        self.column = column
+        self.parse = parse or _column_parser(column)
+        self.dump = dump
+
+
+def datetime_key(column) -> SortKey:
+    return SortKey(column, parse=datetime.fromisoformat, dump=lambda v: v.isoformat())
+
+
+def encode_cursor(sort: str, value: Any, row_id: int) -> str:
+    raw = json.dumps([sort, value, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, parse: Callable[[Any], Any] = lambda v: v) -> Tuple[Any, int]:
+    """
+    (sort value, id) from a cursor; `parse` turns the stored value back
+    into the column's type. A tampered or malformed cursor is a 400.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_sort != sort:
+            raise HTTPException(status_code=400, detail="Cursor does not match the requested sort")
+        if isinstance(value, (list, dict)) or isinstance(row_id, bool):
+            raise ValueError("cursor fields must be scalars")
+        return parse(value), int(row_id)
+    except (ValueError, TypeError, ArithmeticError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def parse_sort(sort: str, allowed: Dict[str, SortKey]) -> Tuple[str, bool]:
+    """"price" → ("price", False); "-price" → ("price", True)."""
+    descending = sort.startswith("-")
+    name = sort.lstrip("-")
+    if name not in allowed:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported sort '{sort}'. Use one of: {', '.join(sorted(allowed))} (prefix '-' for descending)",
+        )
+    return name, descending
+
+
+async def keyset_page(
+    db: AsyncSession,
+    query: Select,
+    id_column,
+    sort: str,
+    allowed: Dict[str, SortKey],
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0,
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Run one page of `query` (a select of a single entity) and return
+    (rows, next_cursor). next_cursor is None on the last page.
+
+    `offset` only exists for the legacy ?page= parameter; it still costs a
+    scan of every skipped row, so clients should follow next_cursor instead.
+    """
+    name, descending = parse_sort(sort, allowed)
+    key = allowed[name]
+    sort_col = key.column
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, key.parse)
+        boundary = tuple_(sort_col, id_column)
+        after = (value, last_id)
+        query = query.where(boundary < after if descending else boundary > after)
+
+    order = (sort_col.desc(), id_column.desc()) if descending else (sort_col.asc(), id_column.asc())
+    query = query.order_by(*order).limit(limit + 1)
+    if offset:
+        query = query.offset(offset)
+    rows = list((await db.execute(query)).scalars().all())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, key.dump(getattr(last, sort_col.key)), getattr(last, id_column.key))
+    return rows, next_cursor
+
+
+class TotalCache:
+    """COUNT(*) results per filter combination, reused for `ttl_seconds`."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[int, float]] = {}
+
+    async def get(self, db: AsyncSession, key: Hashable, query: Select) -> int:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and entry[1] > now:
+            return entry[0]
+        total = (await db.execute(select(func.count()).select_from(query.subquery()))).scalar_one()
+        if len(self._entries) >= self.max_entries:
+            self._entries.clear()
+        self._entries[key] = (total, now + self.ttl_seconds)
+        return total
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def set_page_headers(response: Response, next_cursor: Optional[str], total: Optional[int] = None) -> None:
+    """Pagination metadata travels in headers so list bodies stay plain arrays."""
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
@@ -24,3 +24,4 @@ class Base(AsyncAttrs, DeclarativeBase):
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+        await session.commit()
@@ -1,4 +1,4 @@
-from sqlalchemy import Integer, String, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Integer, String, Float, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from datetime import datetime
 from app.database.base import Base
@@ -6,6 +6,16 @@ from app.database.base import Base
 
 class Car(Base):
     __tablename__ = "cars"
+    # One index per (filter, sort) pair the listing supports, each ending in
+    # id so keyset pages are a range scan: see core/pagination.py.
+    __table_args__ = (
+        Index("ix_cars_price_id", "price", "id"),
+        Index("ix_cars_year_id", "year", "id"),
+        Index("ix_cars_created_at_id", "created_at", "id"),
+        Index("ix_cars_is_available_price_id", "is_available", "price", "id"),
+        Index("ix_cars_is_available_created_at_id", "is_available", "created_at", "id"),
+        Index("ix_cars_make_price_id", "make", "price", "id"),
+    )
 
     id:          Mapped[int]           = mapped_column(Integer, primary_key=True, index=True)
     owner_id:    Mapped[int]           = mapped_column(Integer, ForeignKey("users.id", ondelete="CASCADE"))
@@ -1,39 +1,122 @@
+import jwt
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from datetime import timedelta
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-# These imports assume helper functions exist in app/core based on standard
-# FastAPI project structure and the existing file tree.
 from app.core import security
-from app.core.dependencies import get_db
-from app.schemas.auth import Token
+from app.core.auth_cache import Principal
+from app.core.dependencies import get_db, get_current_principal
+from app.models.user import User
+from app.schemas.auth import RegisterRequest, LoginRequest, RefreshRequest, Token, TokenResponse
 
 router = APIRouter(
     prefix="/auth",
     tags=["Authentication"]
 )
 
-@router.post("/token", response_model=Token)
-async def login_for_access_token(
-    db: Session = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
-):
-    """
-    Provides a JWT token for a given username and password.
-    """
-    # This function authenticates the user against the database.
-    user = security.authenticate_user(db, form_data.username, form_data.password)
-    if not user:
+
+async def _authenticate(db: AsyncSession, email: str, password: str) -> User:
+    result = await db.execute(select(User).where(User.email == email))
+    user = result.scalar_one_or_none()
+    # bcrypt runs on the hashing pool, never on the event loop
+    if not user or not await security.verify_password_async(password, user.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password",
+            detail="Invalid credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    # This function creates the JWT.
-    access_token_expires = timedelta(minutes=security.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = security.create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+    if not user.is_active:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is disabled")
+    user.last_login = datetime.now(timezone.utc)
+    return user
+
+
+@router.post("/register", status_code=status.HTTP_201_CREATED)
+async def register(payload: RegisterRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Registers a new user.
+    """
+    dup_email = await db.execute(select(User.id).where(User.email == payload.email))
+    if dup_email.scalar_one_or_none():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Email already registered")
+
+    dup_user = await db.execute(select(User.id).where(User.username == payload.username))
+    if dup_user.scalar_one_or_none():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Username already taken")
+
+    user = User(
+        username=payload.username,
+        email=payload.email,
+        first_name=payload.first_name,
+        last_name=payload.last_name,
+        password_hash=await security.hash_password_async(payload.password),
     )
-    
+    db.add(user)
+    await db.flush()
+    return {"success": True, "message": "Registered", "data": {"id": user.id, "email": user.email}}
+
+
+@router.post("/login", response_model=TokenResponse)
+async def login(payload: LoginRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Returns an access / refresh token pair for an email and password.
+    """
+    user = await _authenticate(db, payload.email, payload.password)
+    return TokenResponse(
+        access_token=security.create_access_token(user.id, extra=security.user_claims(user)),
+        refresh_token=security.create_refresh_token(user.id, version=user.token_version),
+        token_type="Bearer",
+    )
+
+
+@router.post("/token", response_model=Token)
+async def login_for_access_token(
+    db: AsyncSession = Depends(get_db), form_data: OAuth2PasswordRequestForm = Depends()
+):
+    """
+    OAuth2 password flow (used by the docs UI); `username` is the email.
+    """
+    user = await _authenticate(db, form_data.username, form_data.password)
+    access_token = security.create_access_token(user.id, extra=security.user_claims(user))
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.post("/refresh")
+async def refresh(payload: RefreshRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Issues a new access token for a valid refresh token.
+    """
+    try:
+        token_data = security.decode_token(payload.refresh_token)
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token has expired")
+    except jwt.InvalidTokenError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+    if token_data.get("type") != "refresh":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token required")
+
+    result = await db.execute(select(User).where(User.id == int(token_data["sub"])))
+    user = result.scalar_one_or_none()
+    if not user or not user.is_active or token_data.get("ver") != user.token_version:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+    access_token = security.create_access_token(user.id, extra=security.user_claims(user))
+    return {"success": True, "data": {"access_token": access_token, "token_type": "Bearer"}}
+
+
+@router.get("/me")
+async def me(current_user: Principal = Depends(get_current_principal)):
+    """
+    Returns the current user straight from the token claims.
+    """
+    return {
+        "success": True,
+        "data": {
+            "id":       current_user.id,
+            "username": current_user.username,
+            "email":    current_user.email,
+        },
+    }
@@ -1,16 +1,30 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from typing import List, Optional
 
 from app.database.base import get_db
 from app.models.car import Car
 from app.schemas.car import CarCreate, CarUpdate, CarResponse
-from app.models.user import User
-from app.core.dependencies import get_current_user
+from app.core.auth_cache import Principal
+from app.core.dependencies import get_current_principal
+from app.core.pagination import SortKey, TotalCache, datetime_key, keyset_page, set_page_headers
+from app.config import settings
 
 router = APIRouter(prefix="/cars", tags=["Cars"])
 
+# Indexed combinations: any sort on its own, is_available with price or
+# created_at, make with price. Other combinations still work, just with
+# a less selective index.
+CAR_SORTS = {
+    "id": SortKey(Car.id),
+    "price": SortKey(Car.price),
+    "year": SortKey(Car.year),
+    "created_at": datetime_key(Car.created_at),
+}
+
+car_totals = TotalCache(settings.LIST_TOTAL_CACHE_SECONDS)
+
 
 def _car_dict(car: Car) -> dict:
     return {
@@ -30,7 +44,7 @@ def _car_dict(car: Car) -> dict:
 async def create_car(
     payload: CarCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Creates a new car listing."""
     try:
@@ -45,6 +59,7 @@ async def create_car(
         db.add(car)
         await db.flush()
         await db.refresh(car)
+        car_totals.clear()
         return car
     except Exception as e:
         await db.rollback()
@@ -55,17 +70,36 @@ async def create_car(
 
 @router.get("/", response_model=List[CarResponse])
 async def list_cars(
-    page: int = Query(1, ge=1),
+    response: Response,
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor from the previous page"),
     per_page: int = Query(10, ge=1, le=100),
+    sort: str = Query("id", description="id, price, year or created_at; prefix '-' for descending"),
+    make: Optional[str] = Query(None),
+    is_available: Optional[bool] = Query(None),
+    include_total: bool = Query(False, description="Return X-Total-Count (cached, may lag briefly)"),
+    page: Optional[int] = Query(None, ge=1, description="Deprecated offset paging; use cursor"),
     db: AsyncSession = Depends(get_db),
 ):
-    """Lists all car listings with pagination."""
+    """
+    Lists car listings one keyset page at a time; the next page's cursor
+    is returned in the X-Next-Cursor header (absent on the last page).
+    """
     try:
         q = select(Car)
-        total = (await db.execute(select(func.count()).select_from(q.subquery()))).scalar()
-        result = await db.execute(q.offset((page - 1) * per_page).limit(per_page))
-        cars = result.scalars().all()
+        if make is not None:
+            q = q.where(Car.make == make)
+        if is_available is not None:
+            q = q.where(Car.is_available == is_available)
+
+        offset = (page - 1) * per_page if page and not cursor else 0
+        cars, next_cursor = await keyset_page(
+            db, q, Car.id, sort, CAR_SORTS, per_page, cursor=cursor, offset=offset
+        )
+        total = await car_totals.get(db, ("cars", make, is_available), q) if include_total else None
+        set_page_headers(response, next_cursor, total)
         return cars
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e)
@@ -96,7 +130,7 @@ async def update_car(
     car_id: int,
     payload: CarUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Updates a specific car listing by ID."""
     try:
@@ -116,6 +150,8 @@ async def update_car(
         update_data = payload.model_dump(exclude_unset=True)
         for k, v in update_data.items():
             setattr(car, k, v)
+        if update_data.keys() & {"make", "is_available"}:
+            car_totals.clear()
 
         await db.flush()
         await db.refresh(car)
@@ -134,7 +170,7 @@ async def update_car(
 async def delete_car(
     car_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Deletes a specific car listing by ID."""
     try:
@@ -153,6 +189,7 @@ async def delete_car(
 
         await db.delete(car)
         await db.flush()
+        car_totals.clear()
     except HTTPException as e:
         await db.rollback()
         raise e
@@ -6,8 +6,9 @@ from typing import List, Optional
 from app.database.base import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
-from app.core.dependencies import get_current_user
-from app.core.security import hash_password
+from app.core.auth_cache import Principal, invalidate_on_commit
+from app.core.dependencies import get_current_principal
+from app.core.security import hash_password_async
 
 
 router = APIRouter(prefix="/users", tags=["Users"])
@@ -31,7 +32,7 @@ async def list_users(
     page: int = Query(1, ge=1),
     per_page: int = Query(10, ge=1, le=100),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Lists all users with pagination."""
     try:
@@ -50,7 +51,7 @@ async def list_users(
 async def get_user(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Retrieves a specific user by ID."""
     try:
@@ -73,7 +74,7 @@ async def get_user(
 async def create_user(
     payload: UserCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Creates a new user."""
     try:
@@ -88,7 +89,7 @@ async def create_user(
             email=payload.email,
             first_name=payload.first_name,
             last_name=payload.last_name,
-            password_hash=hash_password(payload.password),
+            password_hash=await hash_password_async(payload.password),
         )
         db.add(user)
         await db.flush()
@@ -108,7 +109,7 @@ async def update_user(
     user_id: int,
     payload: UserUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Updates an existing user."""
     try:
@@ -122,12 +123,23 @@ async def update_user(
         update_data = payload.model_dump(exclude_unset=True)
 
         if "password" in update_data:
-            update_data["password_hash"] = hash_password(update_data.pop("password"))
+            update_data["password_hash"] = await hash_password_async(update_data.pop("password"))
+
+        # A password change or deactivation revokes every token issued so far,
+        # and so does a new username or email: tokens carry both as claims
+        # that /auth/me returns without reading the row.
+        identity_changed = any(
+            key in update_data and update_data[key] != getattr(user, key)
+            for key in ("username", "email")
+        )
+        if "password_hash" in update_data or update_data.get("is_active") is False or identity_changed:
+            user.token_version += 1
 
         for k, v in update_data.items():
             setattr(user, k, v)
 
         await db.flush()
+        invalidate_on_commit(db, user.id)
         await db.refresh(user)
         return UserResponse.model_validate(user)
     except HTTPException as e:
@@ -143,7 +155,7 @@ async def update_user(
 async def delete_user(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
 ):
     """Deletes a user."""
     try:
@@ -155,6 +167,7 @@ async def delete_user(
             )
         await db.delete(user)
         await db.flush()
+        invalidate_on_commit(db, user_id)
     except HTTPException as e:
         raise e
     except Exception as e:
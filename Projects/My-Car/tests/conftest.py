@@ -1,3 +1,14 @@
+import os
+import tempfile
+
+# Tests must never run against the tracked app.db (it predates newer
+# columns such as users.token_version, and drop_all below would empty it).
+# Point the app at a scratch database before app.config builds settings.
+os.environ["DATABASE_URL"] = os.getenv(
+    "TEST_DATABASE_URL",
+    f"sqlite+aiosqlite:///{os.path.join(tempfile.mkdtemp(prefix='mycar-tests-'), 'test.db')}",
+)
+
 import pytest
 import asyncio
 import httpx
@@ -5,7 +16,7 @@ from typing import AsyncGenerator, Generator, Dict
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import insert
-from app.database.base import Base
+from app.database.base import Base, get_db
 from app.config import settings
 from app.models.user import User
 from app.core.security import hash_password
@@ -55,8 +66,22 @@ async def async_session(async_engine):
 
 @pytest.fixture(scope="function")
 async def async_db(async_session: AsyncSession):
-    """Provide a dependency injection point for the database session."""
+    """
+    Provide a dependency injection point for the database session.
+
+    The app shares this session for the duration of the test, so rows
+    created by fixtures are visible to the endpoints and everything the
+    test wrote is rolled back afterwards.
+    """
+    from app.main import app
+
+    async def override_get_db():
+        yield async_session
+        await async_session.flush()
+
+    app.dependency_overrides[get_db] = override_get_db
     yield async_session
+    app.dependency_overrides.pop(get_db, None)
 
 
 @pytest.fixture(scope="function")
@@ -31,11 +31,11 @@ async def test_register_user(async_client: httpx.AsyncClient, async_db: AsyncSes
 
 
 @pytest.mark.asyncio
-async def test_register_duplicate_email(async_client: httpx.AsyncClient):
+async def test_register_duplicate_email(async_client: httpx.AsyncClient, test_user: User):
     """Tests registration with a duplicate email."""
     payload = {
         "username": "testuser2",
-        "email": "test@example.com",  # Using same email as above
+        "email": test_user.email,
         "password": "testpassword",
         "first_name": "Test",
         "last_name": "User",
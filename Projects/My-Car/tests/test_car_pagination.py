@@ -0,0 +1,147 @@
+import pytest
+import httpx
+from datetime import datetime, timedelta
+from sqlalchemy import event, insert, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.database.base import Base, get_db
+from app.models.user import User
+from app.models.car import Car
+from app.routers.cars import car_totals
+from app.core.pagination import encode_cursor
+
+MAKES = ["Toyota", "Honda", "Ford", "BMW"]
+
+
+def _car_rows(count: int):
+    # prices and timestamps repeat so ties must be broken by id
+    return [
+        {
+            "id": i,
+            "owner_id": 1,
+            "make": MAKES[i % len(MAKES)],
+            "model": f"Model {i}",
+            "year": 2000 + i % 25,
+            "price": float(5000 + (i * 37) % 50 * 500),
+            "is_available": i % 5 != 0,
+            "created_at": datetime(2026, 1, 1) + timedelta(hours=i // 3),
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [
+            {"id": 1, "username": "seller", "email": "seller@example.com", "password_hash": "x"}
+        ])
+        await conn.execute(insert(Car), _car_rows(300))
+        await conn.execute(text("ANALYZE"))
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+async def client(engine):
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    car_totals.clear()
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+    car_totals.clear()
+
+
+def _expected(sort, make=None, is_available=None):
+    rows = _car_rows(300)
+    if make is not None:
+        rows = [r for r in rows if r["make"] == make]
+    if is_available is not None:
+        rows = [r for r in rows if r["is_available"] == is_available]
+    name = sort.lstrip("-")
+    return [r["id"] for r in sorted(rows, key=lambda r: (r[name], r["id"]), reverse=sort.startswith("-"))]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort", ["price", "-price", "year", "-created_at"])
+@pytest.mark.parametrize("filters", [{}, {"make": "Honda"}, {"is_available": "true"}])
+async def test_cursor_walk_visits_every_car_once(client, sort, filters):
+    seen, cursor = [], None
+    while True:
+        params = dict(filters, sort=sort, per_page=35)
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/cars/", params=params)
+        assert response.status_code == 200, response.text
+        seen.extend(car["id"] for car in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    is_available = {"true": True}.get(filters.get("is_available"))
+    assert seen == _expected(sort, filters.get("make"), is_available)
+
+
+@pytest.mark.asyncio
+async def test_total_count_is_opt_in(client):
+    response = await client.get("/api/cars/?make=BMW")
+    assert "X-Total-Count" not in response.headers
+    response = await client.get("/api/cars/?make=BMW&include_total=true")
+    assert response.headers["X-Total-Count"] == str(len(_expected("id", "BMW")))
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_and_sort_are_client_errors(client):
+    assert (await client.get("/api/cars/?cursor=garbage")).status_code == 400
+    assert (await client.get("/api/cars/?sort=model")).status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("sort,fields", [
+    ("created_at", ["created_at", "not-a-date", 5]),
+    ("price", ["price", "cheap", 5]),
+    ("year", ["year", 2001, "five"]),
+])
+async def test_tampered_cursors_are_client_errors(client, sort, fields):
+    response = await client.get("/api/cars/", params={"sort": sort, "cursor": encode_cursor(*fields)})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("params,index", [
+    ({"sort": "price"}, "ix_cars_price_id"),
+    ({"sort": "-created_at", "is_available": "true"}, "ix_cars_is_available_created_at_id"),
+    ({"sort": "price", "make": "Ford"}, "ix_cars_make_price_id"),
+])
+async def test_next_page_is_an_index_range_scan(client, engine, params, index):
+    first = await client.get("/api/cars/", params=params)
+    params = dict(params, cursor=first.headers["X-Next-Cursor"])
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", capture)
+    try:
+        assert (await client.get("/api/cars/", params=params)).status_code == 200
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", capture)
+
+    statement, parameters = captured[-1]
+    async with engine.connect() as conn:
+        plan = (await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert index in details, details
+    assert "TEMP B-TREE" not in details, details
@@ -1,8 +1,12 @@
 # app.py
+import asyncio
 import logging
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict
+from typing import Callable, Dict, List
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
@@ -10,11 +14,23 @@ from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 import json
 
+from engine import Engine
+from rooms import InMemoryBackend, Room, RoomBackend, make_backend
 from tictactoe import TicTacToe, setup_logger
 
 logger = setup_logger("fastapi")
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await game_manager.start()
+    sweeper = asyncio.create_task(game_manager.run_sweeper())
+    yield
+    sweeper.cancel()
+    await game_manager.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Mount static files to serve index.html
 app.mount("/static", StaticFiles(directory="."), name="static")
@@ -34,67 +50,312 @@ app.add_middleware(
     allow_headers=["*"],  # Allows all headers
 )
 
+# ── Game lifetime / fan-out limits ─────────────────────────────────────
+IDLE_GAME_TTL = 30 * 60        # seconds without a move
+FINISHED_GAME_TTL = 5 * 60     # seconds a finished game waits for a reset
+SWEEP_INTERVAL = 30            # seconds between checks for expired games
+SEND_QUEUE_SIZE = 16           # pending messages per connection before it is dropped
+SEND_TIMEOUT = 5               # seconds a single send may take
+
+# ── Computer opponent ("?mode=cpu") ────────────────────────────────────
+CPU_PLAYER = "O"               # the human always moves first as X
+CPU_TIME_LIMIT = 1.0           # seconds of search per move (3×3 is solved well within it)
+CPU_WORKERS = 2                # concurrent searches; each holds a thread
+MAX_BOARD_SIZE = 7             # boards up to 7×7 fit comfortably in the bitboards
+
+# ── Room backend ───────────────────────────────────────────────────────
+# "memory" keeps rooms in this process (single worker only); "redis" shares
+# them between uvicorn workers / hosts through REDIS_URL (see rooms.py).
+ROOM_BACKEND = os.getenv("ROOM_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+MAX_COMMIT_ATTEMPTS = 5        # retries when another worker commits first
+
+cpu_pool = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu")
+
+
+class Connection:
+    """
+    One websocket plus its outbound queue. A sender task drains the queue,
+    so a broadcast never waits on the network; a client that falls
+    SEND_QUEUE_SIZE messages behind (or stalls a send past SEND_TIMEOUT)
+    is closed instead of holding up the rest of the room.
+    """
+
+    def __init__(self, websocket: WebSocket, queue_size: int = SEND_QUEUE_SIZE):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+        self._sender = asyncio.create_task(self._send_loop())
+
+    async def _send_loop(self):
+        try:
+            while True:
+                message = await self.queue.get()
+                if message is None:  # close() sentinel
+                    break
+                await asyncio.wait_for(self.websocket.send_text(message), SEND_TIMEOUT)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.warning(f"Dropping connection after failed send: {e}")
+            await self.close(code=1011)
+
+    def offer(self, message: str) -> bool:
+        """Queue `message` without waiting; False if the client is too far behind."""
+        if self.closed:
+            return False
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def enqueue(self, message: str) -> bool:
+        """Queue `message`, closing the connection if the client is too far behind."""
+        if self.offer(message):
+            return True
+        if not self.closed:
+            logger.warning("Dropping slow consumer: send queue full")
+            await self.close(code=1013)
+        return False
+
+    async def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self.closed = True
+        if self._sender is not asyncio.current_task():
+            # The sentinel stops the sender even if wait_for swallows the
+            # cancel (it can when a send finishes at the same moment).
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)
+            self._sender.cancel()
+            await asyncio.gather(self._sender, return_exceptions=True)
+        try:
+            await self.websocket.close(code=code)
+        except Exception:
+            pass
+
+
 class GameManager:
-    def __init__(self):
-        self.games: Dict[str, TicTacToe] = {}
-        self.connections: Dict[str, WebSocket] = {}  # Store WebSocket connections
+    """
+    Local websockets for this process plus game state in a RoomBackend
+    (rooms.py). Every state change is a load → validate → commit at the
+    loaded version loop, then a publish; each process subscribed to the
+    room fans the message out to its own connections.
+    """
 
-    def create_game(self, game_id: str) -> TicTacToe:
-        """Create a new game with the given ID."""
-        game = TicTacToe()
-        self.games[game_id] = game
-        return game
+    def __init__(
+        self,
+        backend: RoomBackend | None = None,
+        queue_size: int = SEND_QUEUE_SIZE,
+    ):
+        self.backend = backend or InMemoryBackend(IDLE_GAME_TTL, FINISHED_GAME_TTL)
+        self.connections: Dict[str, List[Connection]] = {}  # Store WebSocket connections
+        self.engines: Dict[str, Engine] = {}  # transposition tables for local vs-cpu games
+        self.cpu_turns: Dict[str, asyncio.Lock] = {}  # one computer search per game at a time
+        self.queue_size = queue_size
+        self._closing: set = set()
 
-    def get_game(self, game_id: str) -> TicTacToe | None:
+    async def start(self):
+        await self.backend.start(self.deliver)
+
+    async def close(self):
+        await self.backend.close()
+
+    async def open_game(self, game_id: str, size: int = 3, k: int | None = None, vs_cpu: bool = False) -> Room:
+        """Load the game, creating it with the given settings if it does not exist yet."""
+        room = await self.backend.load(game_id)
+        if room is None:
+            await self.backend.create(game_id, TicTacToe(size, k), vs_cpu)
+            room = await self.backend.load(game_id)
+        return room
+
+    async def get_game(self, game_id: str) -> TicTacToe | None:
         """Retrieve a game by its ID."""
-        return self.games.get(game_id)
+        room = await self.backend.load(game_id)
+        return room.game if room else None
 
-    def add_connection(self, game_id: str, websocket: WebSocket):
-         """Add a WebSocket connection to a game."""
-         if game_id not in self.connections:
-             self.connections[game_id] = []
-         self.connections[game_id].append(websocket)
+    async def add_connection(self, game_id: str, websocket: WebSocket) -> Connection:
+        """Add a WebSocket connection to a game."""
+        connection = Connection(websocket, self.queue_size)
+        if game_id not in self.connections:
+            self.connections[game_id] = []
+            await self.backend.subscribe(game_id)
+        self.connections[game_id].append(connection)
+        return connection
 
-    def remove_connection(self, game_id: str, websocket: WebSocket):
+    async def remove_connection(self, game_id: str, connection: Connection):
         """Remove a WebSocket connection from a game."""
-        if game_id in self.connections:
-            self.connections[game_id].remove(websocket)
-            if not self.connections[game_id]:
+        await connection.close()
+        connections = self.connections.get(game_id)
+        if connections and connection in connections:
+            connections.remove(connection)
+            if not connections:
                 del self.connections[game_id]
+                self.engines.pop(game_id, None)
+                self.cpu_turns.pop(game_id, None)
+                await self.backend.unsubscribe(game_id)
+
+    # ── state changes ──────────────────────────────────────────
+    async def update(self, game_id: str, change: Callable[[Room], str | None]) -> tuple[Room | None, str | None]:
+        """
+        Apply `change` (mutates room.game; returns an error or None) and
+        commit it at the version it was loaded at. On a version conflict
+        another worker got there first: reload and re-validate.
+        Returns (committed room, error).
+        """
+        for _ in range(MAX_COMMIT_ATTEMPTS):
+            room = await self.backend.load(game_id)
+            if room is None:
+                return None, "Game not found"
+            error = change(room)
+            if error:
+                return None, error
+            version = await self.backend.commit(game_id, room.game, room.version)
+            if version is not None:
+                room.version = version
+                await self.broadcast_state(game_id, room)
+                return room, None
+        return None, "Game is busy, try again"
+
+    async def make_move(self, game_id: str, position: int) -> str | None:
+        """Play `position` for whoever's turn it is; an error message, or None."""
+
+        def move(room: Room) -> str | None:
+            game = room.game
+            if room.vs_cpu and game.current_player == CPU_PLAYER and not game.game_over:
+                return "Wait for the computer's move"
+            player = game.get_current_player()
+            if not game.make_move(position, player):
+                return "Invalid move"
+            if game.check_winner():
+                logger.info(f"Player {player} won game {game_id}")
+            elif game.check_draw():
+                logger.info(f"Game {game_id} ended in a draw")
+            else:
+                game.switch_player()
+
+        room, error = await self.update(game_id, move)
+        if room and room.vs_cpu and not room.game.game_over:
+            await self.play_cpu_move(game_id, room)
+        return error
+
+    async def reset(self, game_id: str) -> str | None:
+        def reset(room: Room) -> None:
+            room.game.reset_game()
 
+        _, error = await self.update(game_id, reset)
+        if not error:
+            logger.info(f"Game {game_id} reset by client")
+        return error
 
-    async def broadcast_state(self, game_id: str):
-        """Broadcast the current game state to all connected clients."""
-        game = self.get_game(game_id)
-        if not game:
+    async def play_cpu_move(self, game_id: str, room: Room):
+        """
+        Search for the computer's reply off the event loop and commit it at
+        the version it was computed for; if the room moved on meanwhile
+        (e.g. a reset), the reply is discarded.
+
+        Searches for one game run one at a time, so a reset-and-move from
+        another socket waits for the search in flight (bounded by
+        CPU_TIME_LIMIT) and then searches the room as it is by then.
+        """
+        lock = self.cpu_turns.setdefault(game_id, asyncio.Lock())
+        waited = lock.locked()
+        async with lock:
+            if waited:
+                room = await self.backend.load(game_id)
+                if room is None:
+                    return
+            game = room.game
+            if game.game_over or game.current_player != CPU_PLAYER:
+                return
+            geo = game.geo
+            engine = self.engines.get(game_id)
+            if engine is None or engine.geo is not geo:
+                engine = self.engines[game_id] = Engine(geo.size, geo.k)
+            me, opp = game.bits_for(CPU_PLAYER)
+            loop = asyncio.get_running_loop()
+            position, _ = await loop.run_in_executor(cpu_pool, engine.best_move, me, opp, None, CPU_TIME_LIMIT)
+            if game.make_move(position, CPU_PLAYER):
+                if game.check_winner():
+                    logger.info(f"Computer won game {game_id}")
+                elif not game.check_draw():
+                    game.switch_player()
+                if await self.backend.commit(game_id, game, room.version) is not None:
+                    await self.broadcast_state(game_id, room)
+
+    # ── fan-out ────────────────────────────────────────────────
+    async def broadcast_state(self, game_id: str, room: Room | None = None):
+        """Broadcast the current game state to all connected clients, on every worker."""
+        room = room or await self.backend.load(game_id)
+        if not room:
             logger.warning(f"Game not found: {game_id}")
             return
-
+        game = room.game
         state = {
             "board": game.get_board_state(),
             "currentPlayer": game.get_current_player(),
             "winner": game.get_winner(),
             "gameOver": game.game_over,
+            "size": game.geo.size,
+            "k": game.geo.k,
+            "mode": "cpu" if room.vs_cpu else "pvp",
         }
-        message = json.dumps(state)
+        await self.backend.publish(game_id, json.dumps(state))
+
+    def deliver(self, game_id: str, message: str):
+        """
+        Backend callback: queue a published message for this process's
+        clients in the room without awaiting the network; clients whose
+        queue is full are closed concurrently in the background.
+        """
+        slow = [c for c in self.connections.get(game_id, ()) if not c.offer(message) and not c.closed]
+        if slow:
+            logger.warning(f"Dropping {len(slow)} slow consumer(s) from game {game_id}")
+            task = asyncio.ensure_future(asyncio.gather(*(c.close(code=1013) for c in slow)))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
 
-        if game_id in self.connections:
-            for connection in self.connections[game_id]:
-                try:
-                    await connection.send_text(message)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to {connection}: {e}")
+    # ── expiry ─────────────────────────────────────────────────
+    async def sweep(self) -> int:
+        """Close local connections to rooms the backend has expired."""
+        expired = await self.backend.sweep(list(self.connections))
+        for game_id in expired:
+            connections = self.connections.pop(game_id, [])
+            self.engines.pop(game_id, None)
+            self.cpu_turns.pop(game_id, None)
+            await self.backend.unsubscribe(game_id)
+            await asyncio.gather(*(c.close(code=1001) for c in connections))
+        if expired:
+            logger.info(f"Closed {len(expired)} expired games; {len(self.connections)} open here")
+        return len(expired)
+
+    async def run_sweeper(self, interval: float = SWEEP_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Game sweep failed")
 
 
-game_manager = GameManager()
+game_manager = GameManager(make_backend(ROOM_BACKEND, IDLE_GAME_TTL, FINISHED_GAME_TTL, REDIS_URL))
 
 @app.websocket("/ws/{game_id}")
-async def websocket_endpoint(websocket: WebSocket, game_id: str):
+async def websocket_endpoint(websocket: WebSocket, game_id: str, mode: str = "pvp", size: int = 3, k: int | None = None):
+    """
+    `mode=cpu` plays against the computer (which answers as O).
+    `size`/`k` pick an N×N board with k-in-a-row; they only apply when
+    the game is created, later connections join it as it is.
+    """
     await websocket.accept()
-    game = game_manager.get_game(game_id)
-    if not game:
-        game = game_manager.create_game(game_id)
-    game_manager.add_connection(game_id, websocket)
+    if mode not in ("pvp", "cpu") or not 3 <= size <= MAX_BOARD_SIZE or not 3 <= (k or size) <= size:
+        await websocket.send_text(json.dumps({"error": "Invalid mode, size or k"}))
+        await websocket.close(code=1008)
+        return
+    await game_manager.open_game(game_id, size, k, vs_cpu=mode == "cpu")
+    connection = await game_manager.add_connection(game_id, websocket)
 
     try:
         await game_manager.broadcast_state(game_id)
@@ -103,31 +364,16 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str):
             try:
                 payload = json.loads(data)
                 position = payload.get("position")
-                if position is not None and 0 <= position < 9:
-                    game = game_manager.get_game(game_id)
-                    if not game:
-                        logger.error(f"Game {game_id} not found")
-                        continue
-
-                    player = game.get_current_player()
-                    if game.make_move(position, player):
-                        if game.check_winner():
-                             logger.info(f"Player {player} won game {game_id}")
-                        elif game.check_draw():
-                            logger.info(f"Game {game_id} ended in a draw")
-                        else:
-                            game.switch_player()
-                        await game_manager.broadcast_state(game_id)
-                    else:
-                        await websocket.send_text(json.dumps({"error": "Invalid move"}))
+                if isinstance(position, int):
+                    error = await game_manager.make_move(game_id, position)
                 elif payload.get("action") == "reset":
-                    game.reset_game()
-                    logger.info(f"Game {game_id} reset by client")
-                    await game_manager.broadcast_state(game_id)
+                    error = await game_manager.reset(game_id)
                 else:
-                    await websocket.send_text(json.dumps({"error": "Invalid position or action"}))
+                    error = "Invalid position or action"
+                if error:
+                    await connection.enqueue(json.dumps({"error": error}))
             except json.JSONDecodeError:
-                await websocket.send_text(json.dumps({"error": "Invalid JSON"}))
+                await connection.enqueue(json.dumps({"error": "Invalid JSON"}))
 
 
     except WebSocketDisconnect:
@@ -135,5 +381,4 @@ async def websocket_endpoint(websocket: WebSocket, game_id: str):
     except Exception as e:
         logger.exception("An error occurred:")
     finally:
-        game_manager.remove_connection(game_id, websocket)
-    
+        await game_manager.remove_connection(game_id, connection)
@@ -0,0 +1,106 @@
+# bench_engine.py
+"""
+Positions-per-second benchmark for the bitboard engine.
+
+    python bench_engine.py
+
+1. Solving 3×3 from the empty board: the bitboard negamax (alpha-beta +
+   transposition table) against a plain minimax over a Python list, the
+   way the board used to be stored and checked.
+2. Depth-limited searches on larger N×N / k-in-a-row boards, where the
+   solver is actually CPU-bound.
+3. Whole random games through TicTacToe.make_move (move validation and
+   winner checks as the server does them per message).
+"""
+
+import argparse
+import random
+import time
+
+from engine import Engine
+from tictactoe import TicTacToe
+
+LIST_LINES = [
+    [0, 1, 2], [3, 4, 5], [6, 7, 8],
+    [0, 3, 6], [1, 4, 7], [2, 5, 8],
+    [0, 4, 8], [2, 4, 6],
+]
+
+
+def list_minimax(board, player, counter):
+    """Reference: full minimax on a list board, scanning every line per node."""
+    counter[0] += 1
+    for a, b, c in LIST_LINES:
+        if board[a] == board[b] == board[c] != "":
+            return -1  # the previous mover won
+    if "" not in board:
+        return 0
+    other = "O" if player == "X" else "X"
+    best = -2
+    for i in range(9):
+        if board[i] == "":
+            board[i] = player
+            best = max(best, -list_minimax(board, other, counter))
+            board[i] = ""
+    return best
+
+
+def bench_list_3x3():
+    counter = [0]
+    t0 = time.perf_counter()
+    list_minimax([""] * 9, "X", counter)
+    return counter[0], time.perf_counter() - t0
+
+
+def bench_engine(size, k, depth=None, time_limit=None):
+    engine = Engine(size, k)
+    t0 = time.perf_counter()
+    move, score = engine.best_move(0, 0, max_depth=depth, time_limit=time_limit)
+    return engine.nodes, time.perf_counter() - t0, move, score, len(engine.tt)
+
+
+def bench_games(games, size=3, k=None):
+    rng = random.Random(1)
+    moves = 0
+    t0 = time.perf_counter()
+    for _ in range(games):
+        game = TicTacToe(size, k)
+        squares = list(range(game.geo.cells))
+        rng.shuffle(squares)
+        for sq in squares:
+            if not game.make_move(sq, game.current_player):
+                break
+            moves += 1
+            if game.game_over:
+                break
+            game.switch_player()
+    return moves, time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--time-limit", type=float, default=3.0, help="seconds for the timed large-board search")
+    args = parser.parse_args()
+
+    print("3×3 full solve from the empty board")
+    nodes, elapsed = bench_list_3x3()
+    print(f"  list minimax      {nodes:>10,} positions  {elapsed:7.3f} s  {nodes / elapsed:>12,.0f} pos/s")
+    nodes, elapsed, move, score, tt = bench_engine(3, 3)
+    print(f"  bitboard negamax  {nodes:>10,} positions  {elapsed:7.3f} s  {nodes / elapsed:>12,.0f} pos/s"
+          f"  (move {move}, score {score}, tt {tt:,})")
+
+    print("\nLarger boards (first move, empty board)")
+    for size, k, depth, limit in ((4, 4, 16, None), (5, 4, 6, None), (6, 4, 5, None), (7, 5, None, args.time_limit)):
+        nodes, elapsed, move, score, tt = bench_engine(size, k, depth, limit)
+        label = f"{size}×{size} k={k} " + (f"depth {depth}" if depth else f"{limit:.0f} s")
+        print(f"  {label:17} {nodes:>10,} positions  {elapsed:7.3f} s  {nodes / elapsed:>12,.0f} pos/s"
+              f"  (move {move}, tt {tt:,})")
+
+    print("\nRandom games through TicTacToe.make_move")
+    for size, k in ((3, 3), (7, 5)):
+        moves, elapsed = bench_games(20_000 if size == 3 else 2_000, size, k)
+        print(f"  {size}×{size} k={k:<3}         {moves:>10,} moves      {elapsed:7.3f} s  {moves / elapsed:>12,.0f} moves/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+# engine.py
+"""
+Bitboard engine for N×N boards with k-in-a-row.
+
+A position is two ints, one bit per square (bit i = square i, row-major):
+`me` for the side to move and `opp` for the other side. Every winning
+line is precomputed as a mask, and `lines_through[i]` lists only the
+masks containing square i, so checking a move is a handful of ANDs.
+
+Engine.best_move() runs negamax with alpha-beta pruning and a
+transposition table keyed on (me, opp). On 3×3 it searches to the end
+of the game (perfect play); on larger boards it deepens iteratively
+until `time_limit` and scores unfinished positions by open lines.
+"""
+
+import threading
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+WIN = 1_000_000
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Geometry:
+    """Win masks and move ordering for one (size, k) pair; shared, never mutated."""
+
+    def __init__(self, size: int, k: int):
+        if not 1 <= k <= size:
+            raise ValueError(f"k must be between 1 and size ({size}), got {k}")
+        self.size = size
+        self.k = k
+        self.cells = size * size
+        self.full = (1 << self.cells) - 1
+
+        masks = []
+        for row in range(size):
+            for col in range(size):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_r, end_c = row + dr * (k - 1), col + dc * (k - 1)
+                    if 0 <= end_r < size and 0 <= end_c < size:
+                        mask = 0
+                        for step in range(k):
+                            mask |= 1 << ((row + dr * step) * size + col + dc * step)
+                        masks.append(mask)
+        self.win_masks: Tuple[int, ...] = tuple(masks)
+        self.lines_through: Tuple[Tuple[int, ...], ...] = tuple(
+            tuple(m for m in masks if m >> square & 1) for square in range(self.cells)
+        )
+        # Squares on more lines first (centre before corners before edges on 3×3)
+        centre = (size - 1) / 2
+        self.order: Tuple[int, ...] = tuple(sorted(
+            range(self.cells),
+            key=lambda sq: (-len(self.lines_through[sq]), abs(sq // size - centre) + abs(sq % size - centre)),
+        ))
+
+    def wins(self, bits: int, square: int) -> bool:
+        """Does `bits` (which includes `square`) complete a line through it?"""
+        for mask in self.lines_through[square]:
+            if bits & mask == mask:
+                return True
+        return False
+
+
+@lru_cache(maxsize=None)
+def geometry(size: int = 3, k: Optional[int] = None) -> Geometry:
+    return Geometry(size, k or size)
+
+
+class Engine:
+    """
+    Negamax searcher for one geometry. Keep one per game: the
+    transposition table carries over from move to move. Searches on
+    one engine run one at a time (they share the table).
+    """
+
+    def __init__(self, size: int = 3, k: Optional[int] = None, tt_max_entries: int = 1_000_000):
+        self.geo = geometry(size, k)
+        self.tt: Dict[Tuple[int, int], Tuple[int, int, int, int]] = {}  # (me, opp) -> (depth, flag, value, move)
+        self.tt_max_entries = tt_max_entries
+        self.nodes = 0
+        self._lock = threading.Lock()
+
+    # ── evaluation ─────────────────────────────────────────────
+    def evaluate(self, me: int, opp: int) -> int:
+        """Heuristic for depth-limited leaves: lines still open to me minus to opp, weighted by progress."""
+        score = 0
+        for mask in self.geo.win_masks:
+            mine, theirs = me & mask, opp & mask
+            if mine and not theirs:
+                score += 1 << mine.bit_count()
+            elif theirs and not mine:
+                score -= 1 << theirs.bit_count()
+        return score
+
+    # ── search ─────────────────────────────────────────────────
+    def negamax(self, me: int, opp: int, depth: int, alpha: int, beta: int, deadline: Optional[float] = None) -> int:
+        self.nodes += 1
+        if deadline is not None and not self.nodes & 1023 and time.perf_counter() > deadline:
+            raise SearchTimeout
+
+        geo = self.geo
+        empty = geo.full & ~(me | opp)
+        if not empty:
+            return 0
+        if depth == 0:
+            return self.evaluate(me, opp)
+
+        key = (me, opp)
+        entry = self.tt.get(key)
+        tt_move = -1
+        if entry is not None:
+            entry_depth, flag, value, tt_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    return value
+                if flag == LOWER and value >= beta:
+                    return value
+                if flag == UPPER and value <= alpha:
+                    return value
+
+        alpha_orig = alpha
+        best, best_move = -WIN * 2, -1
+        remaining = empty.bit_count() - 1
+        moves = [sq for sq in geo.order if empty >> sq & 1]
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        # An immediate win ends the search at this node
+        for sq in moves:
+            if geo.wins(me | 1 << sq, sq):
+                best, best_move = WIN + remaining, sq
+                break
+        else:
+            for sq in moves:
+                score = -self.negamax(opp, me | 1 << sq, depth - 1, -beta, -alpha, deadline)
+                if score > best:
+                    best, best_move = score, sq
+                if best > alpha:
+                    alpha = best
+                if alpha >= beta:
+                    break
+
+        if len(self.tt) >= self.tt_max_entries:
+            self.tt.clear()
+        flag = UPPER if best <= alpha_orig else LOWER if best >= beta else EXACT
+        self.tt[key] = (depth, flag, best, best_move)
+        return best
+
+    def best_move(
+        self,
+        me: int,
+        opp: int,
+        max_depth: Optional[int] = None,
+        time_limit: Optional[float] = None,
+    ) -> Tuple[int, int]:
+        """
+        (square, score) for the side to move. Deepens one ply at a time up
+        to max_depth (default: to the end of the game) and returns the
+        result of the deepest search finished within time_limit.
+        """
+        empty = self.geo.full & ~(me | opp)
+        if not empty:
+            raise ValueError("No legal moves")
+        limit = empty.bit_count() if max_depth is None else min(max_depth, empty.bit_count())
+        best = (next(sq for sq in self.geo.order if empty >> sq & 1), 0)
+        with self._lock:
+            # The clock starts once the search does, not while it waits its turn
+            deadline = None if time_limit is None else time.perf_counter() + time_limit
+            try:
+                for depth in range(1, limit + 1):
+                    score = self.negamax(me, opp, depth, -WIN * 2, WIN * 2, deadline)
+                    best = (self.tt[(me, opp)][3], score)
+                    if abs(score) >= WIN:
+                        break  # forced result found; deeper search cannot change it
+            except SearchTimeout:
+                pass
+        return best
+
@@ -0,0 +1,138 @@
+# load_test_games.py
+"""
+Simulated load on GameManager: thousands of concurrent games, no server.
+
+    python load_test_games.py --games 2000 --rounds 10
+
+Each round starts `--games` games at once. Every game gets two players
+and a spectator, plays random moves to the end and then either
+disconnects, or is abandoned with its sockets still open (`--abandon`
+fraction). A `--slow` fraction of spectators never read, so their send
+queues fill and they must be dropped without delaying the players.
+
+After each round the sweeper runs with short TTLs. The table shows games
+still held, open connections and traced Python memory; with eviction
+working all three return to the same baseline every round instead of
+growing with the number of games played. "starved" counts games where a
+player was dropped; it should stay 0 however many spectators stall.
+
+`--workers N` runs N GameManagers over one FakeRedisServer (rooms.py),
+with each game's two players and spectator on different "workers", so
+every move goes through the versioned commit and the cross-worker
+publish path that RedisBackend provides across processes.
+"""
+
+import argparse
+import asyncio
+import gc
+import random
+import time
+import tracemalloc
+
+import app as tictactoe_app
+from app import GameManager
+from rooms import FakeRedisServer, FakeRedisBackend
+
+
+class FakeWebSocket:
+    """Stands in for a starlette WebSocket; `delay` simulates a slow reader."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = 0
+        self.closed_with = None
+
+    async def send_text(self, message: str):
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.sent += 1
+
+    async def close(self, code: int = 1000):
+        self.closed_with = code
+
+
+async def play_game(managers, game_id: str, slow: bool, abandon: bool, think: float, stats: dict):
+    # players and spectator deliberately land on different workers
+    seats = [managers[(hash(game_id) + seat) % len(managers)] for seat in range(3)]
+    await seats[0].open_game(game_id)
+    players = [await seats[i].add_connection(game_id, FakeWebSocket()) for i in range(2)]
+    spectator = await seats[2].add_connection(game_id, FakeWebSocket(delay=3600 if slow else 0))
+
+    for position in random.sample(range(9), 9):
+        await asyncio.sleep(random.uniform(0, think))  # interleave with every other game
+        mover = seats[stats["moves"] % 2]
+        error = await mover.make_move(game_id, position)
+        if error is None:
+            stats["moves"] += 1
+        elif error == "Game is busy, try again":
+            stats["conflicts"] += 1
+        game = await mover.get_game(game_id)
+        if game is None or game.game_over:
+            break
+    if any(p.closed for p in players):
+        stats["starved"] += 1
+    if spectator.closed:
+        stats["dropped"] += 1
+
+    if not abandon:
+        for seat, connection in zip(seats, players + [spectator]):
+            await seat.remove_connection(game_id, connection)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--games", type=int, default=2000, help="concurrent games per round")
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--slow", type=float, default=0.1, help="fraction of games with a stalled spectator")
+    parser.add_argument("--abandon", type=float, default=0.3, help="fraction of games left with sockets open")
+    parser.add_argument("--queue-size", type=int, default=4)
+    parser.add_argument("--think", type=float, default=0.01, help="max seconds between moves")
+    parser.add_argument("--workers", type=int, default=1, help="GameManagers sharing one fake Redis")
+    parser.add_argument("--idle-ttl", type=float, default=0.5, help="seconds before an abandoned game expires")
+    args = parser.parse_args()
+
+    tictactoe_app.logger.disabled = True  # one warning per dropped consumer is noise here
+    server = FakeRedisServer()
+    managers = [
+        GameManager(FakeRedisBackend(server, idle_ttl=args.idle_ttl, finished_ttl=0.01), queue_size=args.queue_size)
+        for _ in range(args.workers)
+    ]
+    for manager in managers:
+        await manager.start()
+    tracemalloc.start()
+    gc.collect()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    print(f"{'round':>5} {'games held':>10} {'conns':>6} {'dropped':>8} {'starved':>8} {'conflicts':>9} "
+          f"{'round s':>8} {'moves/s':>9} {'traced KiB':>11}")
+    for round_no in range(1, args.rounds + 1):
+        stats = {"moves": 0, "dropped": 0, "starved": 0, "conflicts": 0}
+        t0 = time.perf_counter()
+        await asyncio.gather(*(
+            play_game(
+                managers,
+                f"r{round_no}-g{i}",
+                slow=random.random() < args.slow,
+                abandon=random.random() < args.abandon,
+                think=args.think,
+                stats=stats,
+            )
+            for i in range(args.games)
+        ))
+        elapsed = time.perf_counter() - t0
+        await asyncio.sleep(args.idle_ttl + 0.05)
+        for manager in managers:
+            await manager.sweep()
+
+        gc.collect()
+        current = tracemalloc.get_traced_memory()[0] - baseline
+        open_conns = sum(len(c) for m in managers for c in m.connections.values())
+        print(
+            f"{round_no:>5} {len(server.rooms):>10} {open_conns:>6} {stats['dropped']:>8} {stats['starved']:>8} "
+            f"{stats['conflicts']:>9} "
+            f"{elapsed:>8.2f} {stats['moves'] / elapsed:>9.0f} {current / 1024:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
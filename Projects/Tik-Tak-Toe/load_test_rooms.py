@@ -0,0 +1,151 @@
+# load_test_rooms.py
+"""
+Multi-worker throughput test against real uvicorn processes.
+
+    ROOM_BACKEND=redis python load_test_rooms.py --workers 1 2 4 --games 200 --duration 20
+
+For each worker count the script starts `uvicorn app:app --workers N`
+(with the room backend from the environment; REDIS_URL defaults to
+redis://localhost:6379/0), opens `--games` concurrent games with two
+player sockets each, and plays moves for `--duration` seconds. A move
+counts once both players have received the new state, so the number
+includes the commit and the cross-worker publish. The two players of a
+game usually land on different workers.
+
+ROOM_BACKEND=memory only works with one worker (each worker would hold
+its own rooms); use it to measure the single-process baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+import websockets
+
+
+class Player:
+    def __init__(self, ws):
+        self.ws = ws
+        self.state = None
+        self.changed = asyncio.Event()
+        self.reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        async for raw in self.ws:
+            message = json.loads(raw)
+            if "board" in message:
+                self.state = message
+                self.changed.set()
+
+    async def wait_for(self, predicate, timeout=10.0):
+        deadline = time.perf_counter() + timeout
+        while not (self.state and predicate(self.state)):
+            self.changed.clear()
+            await asyncio.wait_for(self.changed.wait(), max(0.0, deadline - time.perf_counter()))
+        return self.state
+
+
+def _filled(state):
+    return sum(1 for cell in state["board"] if cell)
+
+
+async def play_session(base_url, game_id, deadline, stats):
+    async with websockets.connect(f"{base_url}/ws/{game_id}") as ws1, \
+            websockets.connect(f"{base_url}/ws/{game_id}") as ws2:
+        players = [Player(ws1), Player(ws2)]
+        await asyncio.gather(*(p.wait_for(lambda s: True) for p in players))
+        while time.perf_counter() < deadline:
+            state = players[0].state
+            if state["gameOver"]:
+                await ws1.send(json.dumps({"action": "reset"}))
+                await asyncio.gather(*(p.wait_for(lambda s: _filled(s) == 0) for p in players))
+                continue
+            empty = [i for i, cell in enumerate(state["board"]) if not cell]
+            target = _filled(state) + 1
+            mover = players[0] if state["currentPlayer"] == "X" else players[1]
+            t0 = time.perf_counter()
+            await mover.ws.send(json.dumps({"position": random.choice(empty)}))
+            try:
+                await asyncio.gather(*(p.wait_for(lambda s: _filled(s) >= target) for p in players))
+            except asyncio.TimeoutError:
+                stats["timeouts"] += 1
+                continue
+            stats["latency"].append(time.perf_counter() - t0)
+        for p in players:
+            p.reader.cancel()
+
+
+def start_server(workers, port):
+    cmd = [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port),
+           "--workers", str(workers), "--log-level", "warning"]
+    return subprocess.Popen(cmd, env=dict(os.environ), cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+async def wait_until_up(base_url, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            async with websockets.connect(f"{base_url}/ws/__ping__"):
+                return
+        except OSError:
+            await asyncio.sleep(0.3)
+    raise RuntimeError("server did not start")
+
+
+async def run(workers, args):
+    port = args.port
+    server = start_server(workers, port)
+    base_url = f"ws://127.0.0.1:{port}"
+    try:
+        await wait_until_up(base_url)
+        stats = {"latency": [], "timeouts": 0}
+        deadline = time.perf_counter() + args.duration
+        started = time.perf_counter()
+        prefix = f"load-{workers}-{int(time.time())}"
+        await asyncio.gather(*(
+            play_session(base_url, f"{prefix}-{i}", deadline, stats) for i in range(args.games)
+        ))
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    latency = sorted(stats["latency"]) or [0.0]
+    return {
+        "workers": workers,
+        "moves_per_s": len(stats["latency"]) / elapsed,
+        "p50_ms": statistics.median(latency) * 1000,
+        "p95_ms": latency[min(len(latency) - 1, int(len(latency) * 0.95))] * 1000,
+        "timeouts": stats["timeouts"],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--games", type=int, default=200, help="concurrent games (2 sockets each)")
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    backend = os.getenv("ROOM_BACKEND", "memory")
+    if backend == "memory" and any(w > 1 for w in args.workers):
+        parser.error("ROOM_BACKEND=memory cannot share rooms between workers; set ROOM_BACKEND=redis")
+
+    print(f"backend={backend} games={args.games} duration={args.duration:.0f}s cpus={os.cpu_count()}")
+    print(f"{'workers':>7} {'moves/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'timeouts':>9}")
+    baseline = None
+    for workers in args.workers:
+        result = await run(workers, args)
+        baseline = baseline or result["moves_per_s"]
+        print(f"{workers:>7} {result['moves_per_s']:>9.0f} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+              f"{result['timeouts']:>9}   x{result['moves_per_s'] / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
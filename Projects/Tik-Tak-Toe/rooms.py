@@ -0,0 +1,323 @@
+# rooms.py
+"""
+Room backends: where game state lives and how state updates reach every
+process that has players in a room.
+
+GameManager (app.py) only talks to a RoomBackend:
+
+- create / load / commit game snapshots. Every room carries a version
+  number, and commit(expected_version) succeeds only if nobody committed
+  in between (optimistic concurrency). Two workers racing to accept a
+  move for the same room cannot both win; the loser reloads and
+  re-validates the move.
+- publish / subscribe state messages. Each process subscribes to rooms
+  it has local websockets for and fans messages out to them itself.
+- expiry. Rooms expire after idle_ttl since the last commit, or after
+  finished_ttl once the game is over. sweep() reports which of this
+  process's rooms are gone so their sockets can be closed.
+
+Backends:
+
+    InMemoryBackend   single process (the default)
+    FakeRedisBackend  several in-process "workers" sharing one FakeRedisServer;
+                      same semantics as Redis, for tests and load simulations
+    RedisBackend      Redis hash per room + pub/sub channel; any number of
+                      uvicorn workers / hosts (needs `pip install redis`)
+"""
+
+import asyncio
+import json
+import time
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from tictactoe import TicTacToe, setup_logger
+
+logger = setup_logger("rooms")
+
+MessageHandler = Callable[[str, str], None]  # (game_id, message)
+
+
+@dataclass
+class Room:
+    game: TicTacToe
+    version: int
+    vs_cpu: bool = False
+
+
+class RoomBackend(ABC):
+    def __init__(self, idle_ttl: float, finished_ttl: float):
+        self.idle_ttl = idle_ttl
+        self.finished_ttl = finished_ttl
+        self._handler: Optional[MessageHandler] = None
+
+    def ttl_for(self, game: TicTacToe) -> float:
+        return self.finished_ttl if game.game_over else self.idle_ttl
+
+    async def start(self, handler: MessageHandler) -> None:
+        """Begin delivering published messages for subscribed rooms to `handler`."""
+        self._handler = handler
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def create(self, game_id: str, game: TicTacToe, vs_cpu: bool = False) -> bool:
+        """Store a new room at version 1; False if the room already exists."""
+
+    @abstractmethod
+    async def load(self, game_id: str) -> Optional[Room]:
+        """Current snapshot and version, or None if the room does not exist."""
+
+    @abstractmethod
+    async def commit(self, game_id: str, game: TicTacToe, expected_version: int) -> Optional[int]:
+        """Store `game` if the room is still at expected_version; the new version, or None on conflict."""
+
+    @abstractmethod
+    async def publish(self, game_id: str, message: str) -> None:
+        pass
+
+    @abstractmethod
+    async def subscribe(self, game_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def unsubscribe(self, game_id: str) -> None:
+        pass
+
+    @abstractmethod
+    async def sweep(self, local_rooms: Iterable[str]) -> List[str]:
+        """Expire what is due; return which of `local_rooms` no longer exist."""
+
+
+# ── in-process ─────────────────────────────────────────────────────────
+class FakeRedisServer:
+    """What several in-process backends share: room hashes, expiry and the pub/sub bus."""
+
+    def __init__(self):
+        # game_id -> (snapshot json, version, vs_cpu, expires_at)
+        self.rooms: Dict[str, Tuple[str, int, bool, float]] = {}
+        self.subscribers: Dict[str, List["InMemoryBackend"]] = {}
+
+    def expire(self) -> None:
+        now = time.monotonic()
+        for game_id in [g for g, room in self.rooms.items() if room[3] <= now]:
+            del self.rooms[game_id]
+
+
+class InMemoryBackend(RoomBackend):
+    """
+    Rooms in this process. Snapshots are stored serialised, exactly as
+    the Redis backend stores them, so a caller mutating a loaded game
+    never changes the stored room before commit().
+    """
+
+    def __init__(self, idle_ttl: float, finished_ttl: float, server: Optional[FakeRedisServer] = None):
+        super().__init__(idle_ttl, finished_ttl)
+        self.server = server or FakeRedisServer()
+        self.subscribed: set = set()
+
+    async def create(self, game_id: str, game: TicTacToe, vs_cpu: bool = False) -> bool:
+        rooms = self.server.rooms
+        room = rooms.get(game_id)
+        if room is not None and room[3] > time.monotonic():
+            return False
+        rooms[game_id] = (json.dumps(game.to_dict()), 1, vs_cpu, time.monotonic() + self.ttl_for(game))
+        return True
+
+    async def load(self, game_id: str) -> Optional[Room]:
+        room = self.server.rooms.get(game_id)
+        if room is None or room[3] <= time.monotonic():
+            return None
+        snapshot, version, vs_cpu, _ = room
+        return Room(TicTacToe.from_dict(json.loads(snapshot)), version, vs_cpu)
+
+    async def commit(self, game_id: str, game: TicTacToe, expected_version: int) -> Optional[int]:
+        room = self.server.rooms.get(game_id)
+        if room is None or room[1] != expected_version or room[3] <= time.monotonic():
+            return None
+        version = expected_version + 1
+        self.server.rooms[game_id] = (
+            json.dumps(game.to_dict()), version, room[2], time.monotonic() + self.ttl_for(game)
+        )
+        return version
+
+    async def publish(self, game_id: str, message: str) -> None:
+        for backend in list(self.server.subscribers.get(game_id, ())):
+            if backend._handler is not None:
+                backend._handler(game_id, message)
+
+    async def subscribe(self, game_id: str) -> None:
+        if game_id not in self.subscribed:
+            self.subscribed.add(game_id)
+            self.server.subscribers.setdefault(game_id, []).append(self)
+
+    async def unsubscribe(self, game_id: str) -> None:
+        if game_id in self.subscribed:
+            self.subscribed.discard(game_id)
+            backends = self.server.subscribers.get(game_id, [])
+            if self in backends:
+                backends.remove(self)
+            if not backends:
+                self.server.subscribers.pop(game_id, None)
+
+    async def sweep(self, local_rooms: Iterable[str]) -> List[str]:
+        self.server.expire()
+        return [game_id for game_id in local_rooms if game_id not in self.server.rooms]
+
+
+class FakeRedisBackend(InMemoryBackend):
+    """
+    Stand-in for RedisBackend: give several instances the same
+    FakeRedisServer and they behave like workers sharing one Redis
+    (shared versioned state, cross-worker publish). `latency` adds a
+    simulated round trip to every call.
+    """
+
+    def __init__(self, server: FakeRedisServer, idle_ttl: float, finished_ttl: float, latency: float = 0.0):
+        super().__init__(idle_ttl, finished_ttl, server)
+        self.latency = latency
+
+    async def _round_trip(self):
+        await asyncio.sleep(self.latency)
+
+    async def create(self, game_id, game, vs_cpu=False):
+        await self._round_trip()
+        return await super().create(game_id, game, vs_cpu)
+
+    async def load(self, game_id):
+        await self._round_trip()
+        return await super().load(game_id)
+
+    async def commit(self, game_id, game, expected_version):
+        await self._round_trip()
+        return await super().commit(game_id, game, expected_version)
+
+    async def publish(self, game_id, message):
+        await self._round_trip()
+        await super().publish(game_id, message)
+
+
+# ── Redis ──────────────────────────────────────────────────────────────
+# Both scripts run atomically inside Redis, so check-and-set needs no WATCH loop.
+_CREATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+redis.call('HSET', KEYS[1], 'state', ARGV[1], 'version', 1, 'vs_cpu', ARGV[2])
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return 1
+"""
+
+_COMMIT_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'version') ~= ARGV[1] then return 0 end
+local version = redis.call('HINCRBY', KEYS[1], 'version', 1)
+redis.call('HSET', KEYS[1], 'state', ARGV[2])
+redis.call('PEXPIRE', KEYS[1], ARGV[3])
+return version
+"""
+
+
+class RedisBackend(RoomBackend):
+    """
+    One hash per room ({prefix}:room:{id} -> state, version, vs_cpu) with a
+    TTL, and one pub/sub channel per room ({prefix}:chan:{id}). Each
+    process holds a single pub/sub connection and subscribes only to
+    rooms it has sockets for.
+    """
+
+    def __init__(self, url: str, idle_ttl: float, finished_ttl: float, prefix: str = "ttt"):
+        super().__init__(idle_ttl, finished_ttl)
+        try:
+            import redis.asyncio as aioredis
+        except ImportError as e:
+            raise RuntimeError("ROOM_BACKEND=redis needs the redis package: pip install redis") from e
+        self.redis = aioredis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._create = self.redis.register_script(_CREATE_SCRIPT)
+        self._commit = self.redis.register_script(_COMMIT_SCRIPT)
+        self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+        self._reader: Optional[asyncio.Task] = None
+        self._channels: set = set()
+
+    def _key(self, game_id: str) -> str:
+        return f"{self.prefix}:room:{game_id}"
+
+    def _channel(self, game_id: str) -> str:
+        return f"{self.prefix}:chan:{game_id}"
+
+    async def start(self, handler: MessageHandler) -> None:
+        await super().start(handler)
+        self._reader = asyncio.create_task(self._read_loop())
+
+    async def close(self) -> None:
+        if self._reader:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+        await self._pubsub.aclose()
+        await self.redis.aclose()
+
+    async def _read_loop(self):
+        offset = len(self._channel(""))
+        while True:
+            try:
+                if not self._channels:
+                    await asyncio.sleep(0.05)
+                    continue
+                message = await self._pubsub.get_message(timeout=1.0)
+                if message and message["type"] == "message" and self._handler:
+                    self._handler(message["channel"][offset:], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Redis pub/sub reader failed; retrying")
+                await asyncio.sleep(1)
+
+    async def create(self, game_id: str, game: TicTacToe, vs_cpu: bool = False) -> bool:
+        ttl_ms = int(self.ttl_for(game) * 1000)
+        created = await self._create(keys=[self._key(game_id)], args=[json.dumps(game.to_dict()), int(vs_cpu), ttl_ms])
+        return bool(created)
+
+    async def load(self, game_id: str) -> Optional[Room]:
+        room = await self.redis.hgetall(self._key(game_id))
+        if not room:
+            return None
+        return Room(TicTacToe.from_dict(json.loads(room["state"])), int(room["version"]), room["vs_cpu"] == "1")
+
+    async def commit(self, game_id: str, game: TicTacToe, expected_version: int) -> Optional[int]:
+        ttl_ms = int(self.ttl_for(game) * 1000)
+        version = await self._commit(
+            keys=[self._key(game_id)], args=[expected_version, json.dumps(game.to_dict()), ttl_ms]
+        )
+        return int(version) or None
+
+    async def publish(self, game_id: str, message: str) -> None:
+        await self.redis.publish(self._channel(game_id), message)
+
+    async def subscribe(self, game_id: str) -> None:
+        if game_id not in self._channels:
+            self._channels.add(game_id)
+            await self._pubsub.subscribe(self._channel(game_id))
+
+    async def unsubscribe(self, game_id: str) -> None:
+        if game_id in self._channels:
+            self._channels.discard(game_id)
+            await self._pubsub.unsubscribe(self._channel(game_id))
+
+    async def sweep(self, local_rooms: Iterable[str]) -> List[str]:
+        # Redis expires the hashes itself; find which local rooms went with them.
+        local_rooms = list(local_rooms)
+        if not local_rooms:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for game_id in local_rooms:
+                pipe.exists(self._key(game_id))
+            found = await pipe.execute()
+        return [game_id for game_id, exists in zip(local_rooms, found) if not exists]
+
+
+def make_backend(kind: str, idle_ttl: float, finished_ttl: float, redis_url: str = "") -> RoomBackend:
+    if kind == "memory":
+        return InMemoryBackend(idle_ttl, finished_ttl)
+    if kind == "redis":
+        return RedisBackend(redis_url, idle_ttl, finished_ttl)
+    raise ValueError(f"Unknown ROOM_BACKEND {kind!r}; use 'memory' or 'redis'")
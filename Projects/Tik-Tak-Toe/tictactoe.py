@@ -3,6 +3,8 @@ import logging
 import sys
 from pathlib import Path
 
+from engine import geometry
+
 # Setup logger
 def setup_logger(name: str, log_dir: Path = Path("logs")) -> logging.Logger:
     log_dir.mkdir(exist_ok=True)
@@ -30,55 +32,75 @@ def setup_logger(name: str, log_dir: Path = Path("logs")) -> logging.Logger:
 logger = setup_logger("tictactoe")
 
 class TicTacToe:
-    def __init__(self):
-        self.board = [""] * 9
+    """
+    Board stored as two bitmasks (see engine.py). `size`/`k` give an N×N
+    board with k-in-a-row; the default is the classic 3×3.
+    """
+
+    def __init__(self, size: int = 3, k: int | None = None):
+        self.geo = geometry(size, k)
+        self.x_bits = 0
+        self.o_bits = 0
         self.current_player = "X"
         self.winner = None
         self.game_over = False
+        self.moves = 0
+
+    @property
+    def board(self) -> list[str]:
+        return [
+            "X" if self.x_bits >> i & 1 else "O" if self.o_bits >> i & 1 else ""
+            for i in range(self.geo.cells)
+        ]
 
     def display_board(self):
-        row1 = " {} | {} | {} ".format(self.board[0], self.board[1], self.board[2])
-        row2 = " {} | {} | {} ".format(self.board[3], self.board[4], self.board[5])
-        row3 = " {} | {} | {} ".format(self.board[6], self.board[7], self.board[8])
-        separator = "-----------"
-        print(row1)
-        print(separator)
-        print(row2)
-        print(separator)
-        print(row3)
+        size = self.geo.size
+        board = [cell or " " for cell in self.board]
+        rows = [" " + " | ".join(board[r * size:(r + 1) * size]) + " " for r in range(size)]
+        print(("\n" + "-" * (4 * size - 1) + "\n").join(rows))
 
     def make_move(self, position: int, player: str) -> bool:
-        if self.game_over or self.board[position] != "":
+        if self.game_over or not 0 <= position < self.geo.cells:
+            return False
+        bit = 1 << position
+        if (self.x_bits | self.o_bits) & bit:
             return False
-        self.board[position] = player
-        if self.check_winner() or self.check_draw():
+        if player == "X":
+            self.x_bits |= bit
+            bits = self.x_bits
+        else:
+            self.o_bits |= bit
+            bits = self.o_bits
+        self.moves += 1
+        # Only a line through the square just played can have been completed by it
+        if self.geo.wins(bits, position):
+            self.winner = player
+        if self.winner is not None or self.moves == self.geo.cells:
             self.game_over = True
         return True
 
     def check_winner(self) -> bool:
-        winning_combinations = [
-            [0, 1, 2], [3, 4, 5], [6, 7, 8],  # rows
-            [0, 3, 6], [1, 4, 7], [2, 5, 8],  # columns
-            [0, 4, 8], [2, 4, 6]               # diagonals
-        ]
-        for combo in winning_combinations:
-            if (self.board[combo[0]] == self.board[combo[1]] == self.board[combo[2]] != ""):
-                self.winner = self.board[combo[0]]
-                return True
-        return False
+        # Kept up to date by make_move; no board scan needed.
+        return self.winner is not None
 
     def check_draw(self) -> bool:
-        return all(cell != "" for cell in self.board) and not self.check_winner()
+        return self.moves == self.geo.cells and self.winner is None
 
     def reset_game(self):
-        self.board = [""] * 9
+        self.x_bits = 0
+        self.o_bits = 0
         self.current_player = "X"
         self.winner = None
         self.game_over = False
+        self.moves = 0
 
     def get_board_state(self) -> list[str]:
         return self.board
 
+    def bits_for(self, player: str) -> tuple[int, int]:
+        """(player's squares, opponent's squares) for the engine."""
+        return (self.x_bits, self.o_bits) if player == "X" else (self.o_bits, self.x_bits)
+
     def get_current_player(self) -> str:
         return self.current_player
 
@@ -88,3 +110,27 @@ class TicTacToe:
     def get_winner(self) -> str | None:
         return self.winner
 
+    def to_dict(self) -> dict:
+        """Compact, JSON-safe snapshot (what a room backend stores)."""
+        return {
+            "size": self.geo.size,
+            "k": self.geo.k,
+            "x": self.x_bits,
+            "o": self.o_bits,
+            "turn": self.current_player,
+            "winner": self.winner,
+            "over": self.game_over,
+            "moves": self.moves,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TicTacToe":
+        game = cls(data["size"], data["k"])
+        game.x_bits = data["x"]
+        game.o_bits = data["o"]
+        game.current_player = data["turn"]
+        game.winner = data["winner"]
+        game.game_over = data["over"]
+        game.moves = data["moves"]
+        return game
+
@@ -14,6 +14,7 @@ import os
 import logging
 import asyncio
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 
 from dotenv import load_dotenv, find_dotenv
@@ -115,13 +116,19 @@ def find_shopping_items(
 
     Given a list of search queries, retrieves matching
     items from the e-commerce vector search backend.
+    The queries are sent in parallel, so the tool takes one
+    round trip instead of one per query.
     """
 
     url = "https://www.ac0.cloudadvocacyorg.joonix.net/api/query"
     items: List[Dict[str, Any]] = []
 
-    for query in queries:
-        result = call_vector_search(url, query)
+    if not queries:
+        return items
+    with ThreadPoolExecutor(max_workers=min(len(queries), 8)) as executor:
+        results = list(executor.map(lambda query: call_vector_search(url, query), queries))
+
+    for result in results:
         if "items" in result:
             items.extend(result["items"])
 
@@ -0,0 +1,141 @@
+"""
+Latency of the local product search (product_search.py) on a synthetic
+catalogue.
+
+    python bench_search.py                       # 100k products, hashing embedder
+    python bench_search.py --model all-MiniLM-L6-v2 --rerank cross-encoder/ms-marco-MiniLM-L-6-v2
+
+Writes a synthetic .jsonl catalogue, builds the engine (BM25 postings,
+product embeddings, FAISS), then reopens it from the cached vectors.
+Queries are built from the attributes of a random product, so
+"found@3" (the product is among the top 3) is a rough quality check.
+It reports single-query latency for sparse, dense and hybrid search, and
+for a 5-query tool call (what the research agent hands the shop agent)
+served one query at a time and through search_many().
+
+Without --model the embedder is a hashing bag-of-words: no download,
+far cheaper per text than a transformer, and no better than BM25 at
+matching. Model timings need --model.
+"""
+
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from product_search import ProductSearch, cross_encoder_rerank, sentence_transformer_embed
+
+CATEGORIES = ["toys", "books", "outdoor", "kitchen", "electronics", "sports", "garden", "crafts",
+              "games", "music", "baby", "pets", "office", "tools", "travel", "fashion"]
+NOUNS = ["robot", "kit", "puzzle", "ball", "bike", "helmet", "drone", "camera", "speaker", "lamp",
+         "backpack", "tent", "blender", "mug", "guitar", "keyboard", "watch", "scooter", "telescope",
+         "microscope", "board game", "sketchbook", "paint set", "skateboard", "headphones", "blocks"]
+ADJECTIVES = ["red", "blue", "green", "wooden", "electric", "waterproof", "foldable", "wireless", "mini",
+              "deluxe", "classic", "magnetic", "glow-in-the-dark", "solar", "portable", "rechargeable"]
+AUDIENCES = ["kids", "teens", "adults", "beginners", "families", "10 year old boys", "toddlers", "gamers"]
+BRANDS = [f"brand{i}" for i in range(300)]
+
+
+def synthetic_catalog(path, n, rng):
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(n):
+            adjective, noun = rng.choice(ADJECTIVES), rng.choice(NOUNS)
+            item = {
+                "id": f"p{i:06d}",
+                "name": f"{rng.choice(BRANDS).title()} {adjective} {noun} {rng.randint(1, 999)}",
+                "description": f"A {rng.choice(ADJECTIVES)} {adjective} {noun} for {rng.choice(AUDIENCES)}, "
+                               f"great for {rng.choice(CATEGORIES)} and {rng.choice(CATEGORIES)}.",
+                "category": rng.choice(CATEGORIES),
+                "brand": rng.choice(BRANDS),
+                "price": round(rng.uniform(5, 500), 2),
+                "img_url": f"https://example.com/img/p{i:06d}.jpg",
+            }
+            f.write(json.dumps(item) + "\n")
+
+
+def queries_for(items, count, rng):
+    picked = [rng.choice(items) for _ in range(count)]
+    queries = []
+    for item in picked:
+        words = (item["name"] + " " + item["description"]).replace(",", "").replace(".", "").split()
+        queries.append(" ".join(rng.sample(words, min(6, len(words)))))
+    return queries, [item["id"] for item in picked]
+
+
+def hashing_embed(texts, dim=256):
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        ids = [zlib.crc32(w.encode()) % dim for w in text.lower().split()]
+        vectors[row] = np.bincount(ids, minlength=dim)
+    return vectors
+
+
+def timed(fn, rounds):
+    ms = []
+    for args in rounds:
+        started = time.perf_counter()
+        fn(*args)
+        ms.append((time.perf_counter() - started) * 1000)
+    return np.percentile(ms, 50), np.percentile(ms, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--model", help="sentence-transformers model instead of the hashing embedder")
+    parser.add_argument("--rerank", help="cross-encoder model for re-ranking")
+    parser.add_argument("--index", default="Flat", help="faiss index spec for the dense side, e.g. HNSW32")
+    args = parser.parse_args()
+
+    embed = sentence_transformer_embed(args.model) if args.model else hashing_embed
+    rerank = cross_encoder_rerank(args.rerank) if args.rerank else None
+    rng = random.Random(3)
+    work = tempfile.mkdtemp(prefix="bench_search_")
+    try:
+        path = os.path.join(work, "catalog.jsonl")
+        synthetic_catalog(path, args.products, rng)
+
+        started = time.perf_counter()
+        ProductSearch.from_catalog(path, embed, args.model or "hashing", rerank=rerank, index_spec=args.index)
+        cold = time.perf_counter() - started
+        started = time.perf_counter()
+        engine = ProductSearch.from_catalog(path, embed, args.model or "hashing", rerank=rerank, index_spec=args.index)
+        warm = time.perf_counter() - started
+        print(f"{args.products} products, embedder: {args.model or 'hashing'}, index: {args.index}, "
+              f"rerank: {args.rerank or 'off'}")
+        print(f"build {cold:.1f}s (embeds the catalogue), reopen {warm:.1f}s (cached vectors)\n")
+
+        queries, targets = queries_for(engine.items, args.queries, rng)
+        modes = {
+            "sparse (BM25)": dict(use_dense=False),
+            "dense (FAISS)": dict(use_sparse=False),
+            "hybrid (RRF)": dict(),
+        }
+        if rerank:
+            modes["hybrid + rerank"] = dict()
+        print(f"{'one query':20} {'p50 ms':>8} {'p99 ms':>8} {'found@3':>8}")
+        for label, options in modes.items():
+            options = {"use_rerank": label.endswith("rerank"), **options}
+            p50, p99 = timed(lambda q: engine.search(q, rows=3, **options), [(q,) for q in queries])
+            found = sum(t in {i["id"] for i in engine.search(q, rows=3, **options)} for q, t in zip(queries, targets))
+            print(f"{label:20} {p50:>8.2f} {p99:>8.2f} {found / len(queries):>8.2f}")
+
+        calls = [queries[i:i + 5] for i in range(0, len(queries) - 4, 5)]
+        print(f"\n{'5-query tool call':20} {'p50 ms':>8} {'p99 ms':>8}")
+        p50, p99 = timed(lambda qs: [engine.search(q, rows=3) for q in qs], [(qs,) for qs in calls])
+        print(f"{'one at a time':20} {p50:>8.2f} {p99:>8.2f}")
+        p50, p99 = timed(lambda qs: engine.search_many(qs, rows=3), [(qs,) for qs in calls])
+        print(f"{'search_many':20} {p50:>8.2f} {p99:>8.2f}")
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+"""
+Local hybrid product search for the shopping tools.
+
+Replaces the remote vector search endpoint with an in-process engine
+over a catalogue file (.jsonl, .json or .csv; one product per row with
+at least `name` and `description`; every other field is passed through):
+
+    sparse  BM25 over name, description, category and brand
+    dense   normalised embeddings in a FAISS inner-product index
+    fusion  reciprocal rank fusion: alpha / (rrf_k + dense rank)
+            + (1 - alpha) / (rrf_k + sparse rank)
+    rerank  optional cross-encoder over the best `depth` fused hits
+
+search_many() serves several queries at once: the queries are embedded
+in one model call and searched in one FAISS call, the BM25 lookups run
+on a thread pool, and the re-ranker scores every (query, product) pair
+in one batch.
+
+Product embeddings are computed once and saved next to the catalogue
+(<catalogue>.vectors.npy plus a .json stamp). They are reused while the
+catalogue file and the embedder are unchanged.
+"""
+
+import csv
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import faiss
+import numpy as np
+
+Embed = Callable[[List[str]], Any]
+Rerank = Callable[[List[Tuple[str, str]]], Sequence[float]]
+
+_TOKEN = re.compile(r"\w+")
+TEXT_FIELDS = ("name", "description", "category", "brand")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def product_text(item: Dict[str, Any]) -> str:
+    return " ".join(str(item[field]) for field in TEXT_FIELDS if item.get(field))
+
+
+def load_catalog(path: str) -> List[Dict[str, Any]]:
+    if path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    if path.endswith(".json"):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            return list(csv.DictReader(f))
+    raise ValueError(f"Unsupported catalogue format: {path}")
+
+
+# ── sparse ─────────────────────────────────────────────────────────────
+class BM25:
+    """
+    Okapi BM25 with precomputed per-term postings: a query touches only
+    the documents containing its terms.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        vocabulary: Dict[str, int] = {}
+        term_ids, doc_ids, lengths = [], [], np.zeros(len(documents), dtype=np.float32)
+        for doc, text in enumerate(documents):
+            tokens = tokenize(text)
+            lengths[doc] = len(tokens)
+            term_ids.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokens)
+            doc_ids.extend([doc] * len(tokens))
+        self.vocabulary = vocabulary
+        self.size = len(documents)
+
+        # (term, doc) -> tf, sorted by term so each term's postings are one slice
+        pairs = np.asarray(term_ids, dtype=np.int64) * self.size + np.asarray(doc_ids, dtype=np.int64)
+        pairs, tf = np.unique(pairs, return_counts=True)
+        terms, docs = np.divmod(pairs, self.size)
+        df = np.bincount(terms, minlength=len(vocabulary))
+        idf = np.log(1.0 + (self.size - df + 0.5) / (df + 0.5)).astype(np.float32)
+        norm = k1 * (1.0 - b + b * lengths / max(float(lengths.mean()), 1.0))
+        self.weights = (idf[terms] * tf * (k1 + 1.0) / (tf + norm[docs])).astype(np.float32)
+        self.docs = docs.astype(np.int32)
+        self.offsets = np.concatenate([[0], np.cumsum(df)])
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.size, dtype=np.float32)
+        for token in tokenize(query):
+            term = self.vocabulary.get(token)
+            if term is not None:
+                start, end = self.offsets[term], self.offsets[term + 1]
+                scores[self.docs[start:end]] += self.weights[start:end]
+        return scores
+
+    def top(self, query: str, k: int) -> np.ndarray:
+        """Ids of the best `k` documents with a non-zero score, best first."""
+        scores = self.scores(query)
+        k = min(k, self.size)
+        candidates = np.argpartition(-scores, k - 1)[:k] if k < self.size else np.arange(self.size)
+        candidates = candidates[scores[candidates] > 0]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+# ── dense ──────────────────────────────────────────────────────────────
+def _normalise(vectors: Any) -> np.ndarray:
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def embed_catalog(texts: List[str], embed: Embed, batch_size: int = 256) -> np.ndarray:
+    return np.concatenate([_normalise(embed(texts[i:i + batch_size])) for i in range(0, len(texts), batch_size)])
+
+
+def cached_vectors(catalog_path: str, texts: List[str], embed: Embed, embed_id: str) -> np.ndarray:
+    """Product embeddings from <catalogue>.vectors.npy, recomputed if the catalogue or embedder changed."""
+    vectors_path = catalog_path + ".vectors.npy"
+    stamp_path = catalog_path + ".vectors.json"
+    stamp = {"catalog_sha256": _file_hash(catalog_path), "embedder": embed_id, "count": len(texts)}
+    if os.path.exists(vectors_path) and os.path.exists(stamp_path):
+        with open(stamp_path, encoding="utf-8") as f:
+            if json.load(f) == stamp:
+                return np.load(vectors_path)
+    vectors = embed_catalog(texts, embed)
+    np.save(vectors_path, vectors)
+    with open(stamp_path, "w", encoding="utf-8") as f:
+        json.dump(stamp, f)
+    return vectors
+
+
+# ── engine ─────────────────────────────────────────────────────────────
+class ProductSearch:
+    def __init__(self, items: List[Dict[str, Any]], embed: Embed, vectors: Optional[np.ndarray] = None,
+                 rerank: Optional[Rerank] = None, rrf_k: int = 60, workers: int = 4, index_spec: str = "Flat"):
+        """
+        index_spec: a faiss index_factory string for the dense side; "Flat"
+        is exact, "HNSW32" answers in well under a millisecond at 100k+ products.
+        """
+        self.items = items
+        self.embed = embed
+        self.rerank = rerank
+        self.rrf_k = rrf_k
+        self.texts = [product_text(item) for item in items]
+        self.bm25 = BM25(self.texts)
+        vectors = _normalise(vectors) if vectors is not None else embed_catalog(self.texts, embed)
+        self.index = faiss.index_factory(vectors.shape[1], index_spec, faiss.METRIC_INNER_PRODUCT)
+        if not self.index.is_trained:
+            self.index.train(vectors)
+        self.index.add(vectors)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bm25")
+
+    @classmethod
+    def from_catalog(cls, path: str, embed: Embed, embed_id: str = "", **kwargs) -> "ProductSearch":
+        items = load_catalog(path)
+        vectors = cached_vectors(path, [product_text(item) for item in items], embed, embed_id)
+        return cls(items, embed, vectors, **kwargs)
+
+    def search(self, query: str, rows: int = 3, **options) -> List[Dict[str, Any]]:
+        return self.search_many([query], rows, **options)[0]
+
+    def search_many(
+        self,
+        queries: Sequence[str],
+        rows: int = 3,
+        use_dense: bool = True,
+        use_sparse: bool = True,
+        rrf_alpha: float = 0.5,
+        use_rerank: bool = True,
+        depth: int = 50,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Best `rows` products per query, each a copy of the catalogue row
+        plus its "score" (fused, or the cross-encoder's when re-ranked).
+        """
+        queries = list(queries)
+        if not queries:
+            return []
+        depth = max(depth, rows)
+        sparse = self.pool.map(lambda q: self.bm25.top(q, depth), queries) if use_sparse else None
+        if use_dense:
+            _, dense = self.index.search(_normalise(self.embed(queries)), depth)
+        sparse = list(sparse) if sparse is not None else None
+
+        fused: List[List[Tuple[int, float]]] = []
+        for n in range(len(queries)):
+            scores: Dict[int, float] = {}
+            if use_dense:
+                for rank, doc in enumerate(d for d in dense[n] if d >= 0):
+                    scores[doc] = scores.get(doc, 0.0) + rrf_alpha / (self.rrf_k + rank + 1)
+            if use_sparse:
+                for rank, doc in enumerate(sparse[n].tolist()):
+                    scores[doc] = scores.get(doc, 0.0) + (1.0 - rrf_alpha) / (self.rrf_k + rank + 1)
+            fused.append(sorted(scores.items(), key=lambda hit: -hit[1])[:depth])
+
+        if use_rerank and self.rerank is not None:
+            pairs = [(query, self.texts[doc]) for query, hits in zip(queries, fused) for doc, _ in hits]
+            rescored = iter(np.asarray(self.rerank(pairs), dtype=np.float32).tolist()) if pairs else iter(())
+            fused = [sorted(((doc, next(rescored)) for doc, _ in hits), key=lambda hit: -hit[1]) for hits in fused]
+
+        return [[{**self.items[doc], "score": round(float(score), 6)} for doc, score in hits[:rows]] for hits in fused]
+
+
+# ── models ─────────────────────────────────────────────────────────────
+def sentence_transformer_embed(model_name: str = "all-MiniLM-L6-v2") -> Embed:
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name)
+    return lambda texts: model.encode(list(texts), batch_size=64, convert_to_numpy=True)
+
+
+def cross_encoder_rerank(model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2") -> Rerank:
+    from sentence_transformers import CrossEncoder
+
+    model = CrossEncoder(model_name)
+    return lambda pairs: model.predict(pairs, batch_size=64)
@@ -3,11 +3,29 @@ Reusable tools for the e-commerce agents.
 
 This file contains ONLY pure functions or ADK tools.
 No sessions, no agents, no async code.
+
+Product search runs locally (product_search.py) when PRODUCT_CATALOG
+points at a catalogue file; otherwise it calls the remote vector search
+endpoint, one request per query, all queries in parallel.
 """
 
-import requests
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 
+import requests
+
+VECTOR_SEARCH_URL = "https://www.ac0.cloudadvocacyorg.joonix.net/api/query"
+
+# Local hybrid search (BM25 + dense + RRF) over a .jsonl/.json/.csv catalogue
+PRODUCT_CATALOG = os.getenv("PRODUCT_CATALOG", "")
+PRODUCT_EMBED_MODEL = os.getenv("PRODUCT_EMBED_MODEL", "all-MiniLM-L6-v2")
+# e.g. cross-encoder/ms-marco-MiniLM-L-6-v2; empty = fused ranking only
+PRODUCT_RERANK_MODEL = os.getenv("PRODUCT_RERANK_MODEL", "")
+
+ROWS_PER_QUERY = 3
+
 
 def call_vector_search(
     url: str,
@@ -41,6 +59,27 @@ def call_vector_search(
     return response.json()
 
 
+@functools.lru_cache(maxsize=None)
+def local_search_engine():
+    """
+    The catalogue index, built on first use and kept for the process.
+
+    Returns:
+        A ProductSearch over PRODUCT_CATALOG
+    """
+
+    # Imported here so the remote mode needs neither faiss nor a model
+    from product_search import ProductSearch, cross_encoder_rerank, sentence_transformer_embed
+
+    rerank = cross_encoder_rerank(PRODUCT_RERANK_MODEL) if PRODUCT_RERANK_MODEL else None
+    return ProductSearch.from_catalog(
+        PRODUCT_CATALOG,
+        sentence_transformer_embed(PRODUCT_EMBED_MODEL),
+        embed_id=PRODUCT_EMBED_MODEL,
+        rerank=rerank,
+    )
+
+
 def find_shopping_items(
     queries: List[str],
 ) -> List[Dict[str, Any]]:
@@ -54,11 +93,17 @@ def find_shopping_items(
         Flattened list of product items
     """
 
-    url = "https://www.ac0.cloudadvocacyorg.joonix.net/api/query"
-    items: List[Dict[str, Any]] = []
+    if PRODUCT_CATALOG:
+        results = local_search_engine().search_many(queries, rows=ROWS_PER_QUERY)
+        return [item for items in results for item in items]
 
-    for query in queries:
-        result = call_vector_search(url, query)
+    if not queries:
+        return []
+    with ThreadPoolExecutor(max_workers=min(len(queries), 8)) as executor:
+        results = list(executor.map(lambda query: call_vector_search(VECTOR_SEARCH_URL, query, ROWS_PER_QUERY), queries))
+
+    items: List[Dict[str, Any]] = []
+    for result in results:
         if "items" in result:
             items.extend(result["items"])
 
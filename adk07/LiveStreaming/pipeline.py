@@ -0,0 +1,278 @@
+"""
+Downstream pipeline for a live session: model events -> bounded queue -> websocket.
+
+The task reading events from the runner (producer) and the task writing
+to the socket (sender) are joined by an OutboundQueue instead of
+awaiting each send inline:
+
+- Control messages (text, tool calls, transcriptions, turn markers) and
+  audio are never dropped. When the queue is full the producer waits,
+  so a slow client stops us pulling events from the model rather than
+  piling them up in memory.
+- Video/image frames go stale. A new frame replaces one of the same kind
+  still waiting in the queue, and is dropped if the queue is full.
+- Audio chunks waiting back to back are sent as one packet of up to
+  `audio_packet_ms`. An idle socket still gets every chunk at once; a
+  busy one gets fewer, larger sends instead of falling further behind.
+
+SessionMetrics keeps per-session latency histograms (first audio byte,
+whole turn) and queue counters. SampledLogger replaces logging every
+event at INFO.
+"""
+
+import asyncio
+import bisect
+import logging
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, NamedTuple, Optional, Union
+
+from frames import (
+    KIND_AUDIO_PCM_16K,
+    KIND_AUDIO_PCM_24K,
+    KIND_IMAGE_JPEG,
+    KIND_IMAGE_PNG,
+    FrameWriter,
+)
+
+# 16-bit mono PCM
+AUDIO_BYTES_PER_MS = {KIND_AUDIO_PCM_16K: 32, KIND_AUDIO_PCM_24K: 48}
+IMAGE_KINDS = frozenset({KIND_IMAGE_JPEG, KIND_IMAGE_PNG})
+
+TURN_COMPLETE = "complete"
+TURN_INTERRUPTED = "interrupted"
+
+
+class Outbound(NamedTuple):
+    kind: Optional[int]          # frame kind, or None for a JSON text message
+    payload: Union[bytes, str]
+    turn: Optional[str] = None   # set on the message that ends a model turn
+
+
+class PipelineClosed(Exception):
+    pass
+
+
+class OutboundQueue:
+    def __init__(self, maxsize: int = 64, audio_packet_ms: int = 40):
+        self.maxsize = maxsize
+        self.audio_packet_ms = audio_packet_ms
+        self._items: Deque[Outbound] = deque()
+        self._ready = asyncio.Event()
+        self._space = asyncio.Event()
+        self._closed = False
+        self.high_water = 0
+        self.dropped = 0      # image frames dropped on a full queue
+        self.coalesced = 0    # image frames replaced by a newer one
+        self.merged = 0       # audio chunks folded into an earlier packet
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    async def put(self, item: Outbound) -> bool:
+        """Queue `item`; False if it was an image frame dropped as stale. Raises PipelineClosed."""
+        if self._closed:
+            raise PipelineClosed()
+        if item.kind in IMAGE_KINDS:
+            for i in range(len(self._items) - 1, -1, -1):
+                if self._items[i].kind == item.kind:
+                    self._items[i] = item
+                    self.coalesced += 1
+                    return True
+            if len(self._items) >= self.maxsize:
+                self.dropped += 1
+                return False
+        else:
+            while len(self._items) >= self.maxsize:
+                self._space.clear()
+                await self._space.wait()
+                if self._closed:
+                    raise PipelineClosed()
+        self._items.append(item)
+        self.high_water = max(self.high_water, len(self._items))
+        self._ready.set()
+        return True
+
+    async def get(self) -> Optional[Outbound]:
+        """Next message to send, with queued audio merged; None once closed and drained."""
+        while not self._items:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        item = self._items.popleft()
+        bytes_per_ms = AUDIO_BYTES_PER_MS.get(item.kind)
+        if bytes_per_ms and self._items and self._items[0].kind == item.kind:
+            limit = self.audio_packet_ms * bytes_per_ms
+            parts, size = [item.payload], len(item.payload)
+            while (self._items and self._items[0].kind == item.kind
+                   and size + len(self._items[0].payload) <= limit):
+                chunk = self._items.popleft().payload
+                parts.append(chunk)
+                size += len(chunk)
+            if len(parts) > 1:
+                self.merged += len(parts) - 1
+                item = item._replace(payload=b"".join(parts))
+        self._space.set()
+        return item
+
+    def close(self) -> None:
+        """No more puts. The sender drains what is queued; a waiting producer is released."""
+        self._closed = True
+        self._ready.set()
+        self._space.set()
+
+
+async def run_sender(
+    queue: OutboundQueue,
+    send_bytes: Callable[[bytes], Awaitable[None]],
+    send_text: Callable[[str], Awaitable[None]],
+    metrics: "SessionMetrics",
+    close_queue: bool = True,
+) -> None:
+    """
+    Write queued messages to the socket until the queue is closed and drained.
+    With close_queue=False a failed socket leaves the queue open for the
+    next socket of a resumable session.
+    """
+    writer = FrameWriter()
+    try:
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            if item.kind is None:
+                await send_text(item.payload)
+            else:
+                await send_bytes(writer.pack(item.kind, item.payload))
+            metrics.sent(item)
+    finally:
+        # Socket gone: make a blocked producer stop instead of waiting forever
+        if close_queue:
+            queue.close()
+
+
+# ── metrics ────────────────────────────────────────────────────────────
+class LatencyHistogram:
+    """Log-spaced buckets from 1 ms to ~65 s, two per doubling; percentiles interpolate within a bucket."""
+
+    BOUNDS_MS = tuple(2 ** (i / 2) for i in range(33))
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, p: float) -> float:
+        if not self.count:
+            return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = self.BOUNDS_MS[i - 1] if i else 0.0
+                high = min(self.BOUNDS_MS[i], self.max_ms) if i < len(self.BOUNDS_MS) else self.max_ms
+                return low + (max(high, low) - low) * (rank - seen) / n
+            seen += n
+        return self.max_ms
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 1),
+            "p90_ms": round(self.percentile(90), 1),
+            "p99_ms": round(self.percentile(99), 1),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+class SessionMetrics:
+    """
+    Latency of each model turn, measured where the client sees it (when
+    the sender writes to the socket).
+
+    A turn starts when the user finishes speaking or typing: a text
+    message, an upstream frame flagged end-of-turn, or a finished input
+    transcription. Without any of those, the first user input after the
+    previous turn counts as the start. first_audio_byte runs to the first
+    audio frame sent; turn_latency to the message carrying turn_complete.
+    Interrupted turns reset the clock without a turn_latency sample.
+    """
+
+    def __init__(self, queue: Optional[OutboundQueue] = None):
+        self.queue = queue
+        self.started = time.monotonic()
+        self.first_audio = LatencyHistogram()
+        self.turn_latency = LatencyHistogram()
+        self.events = 0
+        self.interrupted = 0
+        self.turn_started: Optional[float] = None
+        self._audio_sent = False
+
+    def user_input(self, end_of_turn: bool = False) -> None:
+        if end_of_turn or self.turn_started is None:
+            self.turn_started = time.monotonic()
+            self._audio_sent = False
+
+    def sent(self, item: Outbound) -> None:
+        if self.turn_started is None:
+            return
+        if not self._audio_sent and item.kind in AUDIO_BYTES_PER_MS:
+            self._audio_sent = True
+            self.first_audio.record(time.monotonic() - self.turn_started)
+        if item.turn is not None:
+            if item.turn == TURN_COMPLETE:
+                self.turn_latency.record(time.monotonic() - self.turn_started)
+            else:
+                self.interrupted += 1
+            self.turn_started = None
+            self._audio_sent = False
+
+    def snapshot(self) -> dict:
+        snapshot = {
+            "uptime_s": round(time.monotonic() - self.started, 1),
+            "events": self.events,
+            "turns": self.turn_latency.count,
+            "interrupted": self.interrupted,
+            "first_audio_byte": self.first_audio.snapshot(),
+            "turn_latency": self.turn_latency.snapshot(),
+        }
+        if self.queue is not None:
+            snapshot["queue"] = {
+                "depth": len(self.queue),
+                "high_water": self.queue.high_water,
+                "dropped_frames": self.queue.dropped,
+                "coalesced_frames": self.queue.coalesced,
+                "merged_audio_chunks": self.queue.merged,
+            }
+        return snapshot
+
+
+class SampledLogger:
+    """Logs the first `first` events and then one in `every`; all of them when DEBUG is on."""
+
+    def __init__(self, logger: logging.Logger, every: int = 100, first: int = 5):
+        self.logger = logger
+        self.every = max(1, every)
+        self.first = first
+        self.seen = 0
+
+    def log(self, event) -> None:
+        self.seen += 1
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("event #%d: %s", self.seen, event)
+        elif self.seen <= self.first or self.seen % self.every == 0:
+            self.logger.info("event #%d (1 in %d logged): %s", self.seen, self.every, event)
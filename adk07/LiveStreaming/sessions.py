@@ -0,0 +1,287 @@
+"""
+Registry of live sessions for the websocket handler.
+
+A live session (model connection, LiveRequestQueue, outbound queue) can
+outlive the websocket that started it:
+
+    admit()    new session; refused with SessionLimitError once
+               max_sessions are open, unless a detached session can be
+               evicted to make room
+    serve()    attach a websocket and send it the session's queued
+               messages until the socket goes away; then the session is
+               detached (model still connected, events buffered in the
+               bounded outbound queue)
+    resume()   a reconnecting client presents its resume token and gets
+               the same session back, so no new model session is opened
+    discard()  close the model side for good
+
+A reaper task closes sockets that have sent nothing (no audio, no ping)
+for idle_timeout, and discards sessions that stay detached for longer
+than resume_grace, so a client that vanishes without a clean close does
+not leak its LiveRequestQueue and model connection.
+"""
+
+import asyncio
+import json
+import logging
+import secrets
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from pipeline import OutboundQueue, PipelineClosed, SessionMetrics, run_sender
+
+logger = logging.getLogger(__name__)
+
+IDLE_CLOSE_CODE = 1001  # going away
+
+
+class SessionLimitError(RuntimeError):
+    """Raised by admit() when the process already has max_sessions live sessions."""
+
+
+@dataclass(eq=False)
+class LiveSession:
+    session_id: str
+    state: Any                       # the caller's session object (runner, live_request_queue, ...)
+    on_close: Callable[[], None]     # releases the model side, e.g. LiveRequestQueue.close
+    outbound: OutboundQueue
+    metrics: SessionMetrics
+    resume_token: str
+    pump: Optional[asyncio.Task] = None
+    sender: Optional[asyncio.Task] = None
+    websocket: Any = None
+    attachments: int = 0
+    last_seen: float = field(default_factory=time.monotonic)
+    detached_at: Optional[float] = field(default_factory=time.monotonic)
+    closed: bool = False
+
+    @property
+    def attached(self) -> bool:
+        return self.websocket is not None
+
+
+class SessionRegistry:
+    def __init__(
+        self,
+        max_sessions: int = 50,
+        idle_timeout: float = 60.0,
+        resume_grace: float = 30.0,
+        reap_interval: float = 5.0,
+        queue_size: int = 64,
+        audio_packet_ms: int = 40,
+    ):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.resume_grace = resume_grace
+        self.reap_interval = reap_interval
+        self.queue_size = queue_size
+        self.audio_packet_ms = audio_packet_ms
+        self.sessions: Dict[str, LiveSession] = {}
+        self._tokens: Dict[str, LiveSession] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self._closing: Set[asyncio.Task] = set()
+        self.counters = {
+            "admitted": 0, "rejected": 0, "evicted": 0, "resumed": 0,
+            "idle_closed": 0, "reaped": 0, "finished": 0,
+        }
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    # ── admission ──────────────────────────────────────────────────────
+    def admit(self, session_id: str, state: Any, on_close: Callable[[], None]) -> LiveSession:
+        existing = self.sessions.get(session_id)
+        if existing is not None:
+            self.discard(existing, "replaced by a new session with the same id")
+        if len(self.sessions) >= self.max_sessions:
+            detached = [live for live in self.sessions.values() if not live.attached]
+            if not detached:
+                self.counters["rejected"] += 1
+                raise SessionLimitError(f"{self.max_sessions} live sessions already open")
+            oldest = min(detached, key=lambda live: live.detached_at)
+            self.discard(oldest, "evicted to admit a new session")
+            self.counters["evicted"] += 1
+
+        outbound = OutboundQueue(self.queue_size, self.audio_packet_ms)
+        live = LiveSession(
+            session_id=session_id,
+            state=state,
+            on_close=on_close,
+            outbound=outbound,
+            metrics=SessionMetrics(outbound),
+            resume_token=secrets.token_urlsafe(18),
+        )
+        self.sessions[session_id] = live
+        self._tokens[live.resume_token] = live
+        self.counters["admitted"] += 1
+        return live
+
+    def get(self, session_id: str) -> LiveSession:
+        live = self.sessions.get(session_id)
+        if live is None:
+            raise KeyError(f"Session not found: {session_id}")
+        return live
+
+    def resume(self, resume_token: str) -> LiveSession:
+        live = self._tokens.get(resume_token)
+        if live is None:
+            raise KeyError("Unknown or expired resume token")
+        self.counters["resumed"] += 1
+        return live
+
+    # ── attachment ─────────────────────────────────────────────────────
+    def start_pump(self, live: LiveSession, pump: Callable[[], Awaitable[None]]) -> None:
+        """Run `pump` (model events -> live.outbound) once for the life of the session."""
+        if live.pump is None and not live.closed:
+            live.pump = asyncio.create_task(self._run_pump(live, pump))
+
+    async def _run_pump(self, live: LiveSession, pump: Callable[[], Awaitable[None]]) -> None:
+        try:
+            await pump()
+        except PipelineClosed:
+            pass
+        except Exception:
+            logger.exception(f"Live session {live.session_id}: event stream failed")
+        finally:
+            # The sender drains what is left; then the session is finished
+            live.outbound.close()
+
+    async def serve(
+        self,
+        live: LiveSession,
+        websocket: Any,
+        send_bytes: Callable[[bytes], Awaitable[None]],
+        send_text: Callable[[str], Awaitable[None]],
+    ) -> None:
+        """Attach `websocket` and send it the session's messages until it is hung up."""
+        if live.closed:
+            raise KeyError(f"Session closed: {live.session_id}")
+        self._ensure_reaper()
+        if live.sender is not None:
+            # Reconnected before we noticed the old socket was gone
+            live.sender.cancel()
+            self._close_socket(live.websocket, 1000, "replaced by a newer connection")
+
+        hello = json.dumps({
+            "type": "session",
+            "data": {
+                "session_id": live.session_id,
+                "resume_token": live.resume_token,
+                "resumed": live.attachments > 0,
+                "heartbeat_interval": self.idle_timeout / 3,
+            },
+        })
+
+        async def send_all():
+            await send_text(hello)
+            await run_sender(live.outbound, send_bytes, send_text, live.metrics, close_queue=False)
+
+        # No await until the attachment is recorded: a replaced serve() must
+        # see it is no longer current when it cleans up
+        sender = asyncio.create_task(send_all())
+        live.sender = sender
+        live.websocket = websocket
+        live.attachments += 1
+        live.detached_at = None
+        live.last_seen = time.monotonic()
+        try:
+            await asyncio.wait([sender])
+        finally:
+            if not sender.done():
+                sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+            if live.sender is sender:
+                live.sender = None
+                live.websocket = None
+                live.detached_at = time.monotonic()
+                if live.pump is not None and live.pump.done():
+                    self.discard(live, "event stream finished")
+                    self.counters["finished"] += 1
+
+    def touch(self, live: LiveSession) -> None:
+        """Any client message (audio, text, ping) counts as a heartbeat."""
+        live.last_seen = time.monotonic()
+
+    def hang_up(self, live: LiveSession, websocket: Any) -> None:
+        """The client side of `websocket` ended; stop sending to it."""
+        if live.websocket is websocket and live.sender is not None:
+            live.sender.cancel()
+
+    def discard(self, live: LiveSession, reason: str) -> None:
+        if live.closed:
+            return
+        live.closed = True
+        logger.info(f"Live session {live.session_id} closed: {reason}")
+        if self.sessions.get(live.session_id) is live:
+            del self.sessions[live.session_id]
+        self._tokens.pop(live.resume_token, None)
+        live.outbound.close()
+        for task in (live.pump, live.sender):
+            if task is not None:
+                task.cancel()
+        if live.websocket is not None:
+            self._close_socket(live.websocket, 1000, "session closed")
+        try:
+            live.on_close()
+        except Exception:
+            logger.exception(f"Live session {live.session_id}: close failed")
+
+    # ── reaping ────────────────────────────────────────────────────────
+    def reap(self) -> None:
+        now = time.monotonic()
+        for live in list(self.sessions.values()):
+            if live.attached:
+                if now - live.last_seen > self.idle_timeout:
+                    logger.info(f"Live session {live.session_id}: no heartbeat for {self.idle_timeout:.0f}s")
+                    self.counters["idle_closed"] += 1
+                    self._close_socket(live.websocket, IDLE_CLOSE_CODE, "idle timeout")
+                    self.hang_up(live, live.websocket)
+            elif now - live.detached_at > self.resume_grace:
+                self.discard(live, f"not resumed within {self.resume_grace:.0f}s")
+                self.counters["reaped"] += 1
+
+    async def _reap_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            try:
+                self.reap()
+            except Exception:
+                logger.exception("Live session reaper failed")
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_forever())
+
+    def _close_socket(self, websocket: Any, code: int, reason: str) -> None:
+        # In the background: a close handshake with a dead peer can take seconds
+        async def close():
+            try:
+                await websocket.close(code=code, reason=reason)
+            except Exception:
+                pass
+
+        task = asyncio.create_task(close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def close(self) -> None:
+        """Discard every session and stop the reaper (application shutdown)."""
+        for live in list(self.sessions.values()):
+            self.discard(live, "server shutting down")
+        if self._reaper is not None:
+            self._reaper.cancel()
+            await asyncio.gather(self._reaper, return_exceptions=True)
+            self._reaper = None
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        attached = sum(1 for live in self.sessions.values() if live.attached)
+        return {
+            "active": len(self.sessions),
+            "attached": attached,
+            "detached": len(self.sessions) - attached,
+            "max_sessions": self.max_sessions,
+            **self.counters,
+        }
@@ -0,0 +1,261 @@
+"""
+Soak test for the live session registry: flapping clients must not leak.
+
+    python soak_sessions.py                      # 60 clients for 30 s
+    python soak_sessions.py --clients 100 --duration 120 --max-sessions 80
+
+Runs a real websocket server (the `websockets` package) wired to a
+SessionRegistry the same way websocket_handler.py wires it: one pump
+task per session feeding the outbound queue, serve() for the sending
+side and a reader that touches/hangs up. The model is faked: a stream
+of 100 ms PCM chunks that runs until its LiveRequestQueue is closed,
+so open model streams can be counted.
+
+Each client loops through random behaviours:
+
+    flap    talk, drop the TCP connection, resume within the grace period
+    clean   talk, close normally, resume
+    vanish  talk, drop the connection and never come back (must be reaped)
+    silent  connect and send nothing (must be closed by the idle timeout)
+
+The run is split into two phases. Every window prints asyncio tasks,
+traced Python memory, open model streams and registry counters. After
+each phase the clients stop and the grace period passes; then no session,
+model stream or task may be left (bar the reaper), and memory after
+phase 2 must be where it was after phase 1 (phase 1 absorbs one-off
+allocations: lazy imports, dict capacity).
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+
+import websockets
+
+from frames import KIND_AUDIO_PCM_16K, KIND_AUDIO_PCM_24K, FrameWriter
+from pipeline import Outbound, PipelineClosed
+from sessions import SessionLimitError, SessionRegistry
+
+MIC_CHUNK = os.urandom(3200)      # 100 ms at 16 kHz
+MODEL_CHUNK = os.urandom(4800)    # 100 ms at 24 kHz
+REJECTED = 1013                   # try again later
+
+
+class FakeLiveRequestQueue:
+    open_streams = 0
+
+    def __init__(self):
+        self.closed = asyncio.Event()
+
+    def close(self):
+        self.closed.set()
+
+    async def events(self):
+        """A model answering forever, until the queue is closed."""
+        FakeLiveRequestQueue.open_streams += 1
+        try:
+            while not self.closed.is_set():
+                await asyncio.sleep(0.1)
+                yield MODEL_CHUNK
+        finally:
+            FakeLiveRequestQueue.open_streams -= 1
+
+
+# ── server ─────────────────────────────────────────────────────────────
+def make_handler(registry: SessionRegistry):
+    async def pump(live):
+        async for chunk in live.state.events():
+            await live.outbound.put(Outbound(KIND_AUDIO_PCM_24K, chunk))
+
+    async def client_messages(ws, live):
+        try:
+            async for message in ws:
+                registry.touch(live)
+                if isinstance(message, str) and json.loads(message).get("type") == "ping":
+                    await live.outbound.put(Outbound(None, json.dumps({"type": "pong"})))
+        except (websockets.ConnectionClosed, PipelineClosed):
+            pass
+        finally:
+            registry.hang_up(live, ws)
+
+    async def handler(ws):
+        kind, _, key = ws.request.path.strip("/").partition("/")
+        try:
+            if kind == "resume":
+                live = registry.resume(key)
+            else:
+                queue = FakeLiveRequestQueue()
+                live = registry.admit(key, queue, queue.close)
+        except SessionLimitError as e:
+            await ws.close(code=REJECTED, reason=str(e))
+            return
+        except KeyError as e:
+            await ws.close(code=4404, reason=str(e))
+            return
+        registry.start_pump(live, lambda: pump(live))
+        try:
+            await asyncio.gather(registry.serve(live, ws, ws.send, ws.send), client_messages(ws, live))
+        except KeyError:
+            pass  # reaped between resume() and serve()
+
+    return handler
+
+
+# ── clients ────────────────────────────────────────────────────────────
+async def talk(ws, seconds, ping_every, send_audio=True):
+    writer = FrameWriter()
+    end = time.monotonic() + seconds
+    next_ping = time.monotonic() + ping_every
+
+    async def read():
+        async for _ in ws:
+            pass
+
+    reader = asyncio.create_task(read())
+    try:
+        while time.monotonic() < end and not reader.done():
+            if send_audio:
+                await ws.send(writer.pack(KIND_AUDIO_PCM_16K, MIC_CHUNK))
+                if time.monotonic() >= next_ping:
+                    await ws.send(json.dumps({"type": "ping"}))
+                    next_ping += ping_every
+            await asyncio.sleep(0.1)
+    finally:
+        reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+
+
+async def client(n, base_url, stop_at, args, stats):
+    rng = random.Random(n)
+    token, sessions = None, 0
+    while time.monotonic() < stop_at:
+        if token:
+            path = f"/resume/{token}"
+        else:
+            sessions += 1
+            path = f"/new/client{n}-{sessions}"
+        behaviour = rng.choices(["flap", "clean", "vanish", "silent"], weights=[5, 2, 2, 1])[0]
+        try:
+            ws = await websockets.connect(base_url + path, max_size=None, close_timeout=1)
+        except OSError:
+            await asyncio.sleep(0.2)
+            continue
+        try:
+            hello = json.loads(await ws.recv())
+            token = hello["data"]["resume_token"]
+            stats["resumed" if hello["data"]["resumed"] else "started"] += 1
+            if behaviour == "silent":
+                await talk(ws, args.idle_timeout * 3, args.idle_timeout / 3, send_audio=False)
+                if ws.close_code == 1001:
+                    stats["idle_closed_seen"] += 1
+            else:
+                await talk(ws, rng.uniform(0.2, 1.5), args.idle_timeout / 3)
+            if behaviour == "clean":
+                await ws.close()
+            else:
+                ws.transport.abort()
+            if behaviour == "vanish":
+                token = None
+            stats[behaviour] += 1
+        except websockets.ConnectionClosed as e:
+            code = e.rcvd.code if e.rcvd else None
+            if code == REJECTED:
+                stats["rejected"] += 1
+                await asyncio.sleep(rng.uniform(0.2, 1.0))
+            elif code == 4404:
+                token = None
+        finally:
+            ws.transport.abort()
+        await asyncio.sleep(rng.uniform(0, args.resume_grace * 0.6))
+
+
+# ── measurement ────────────────────────────────────────────────────────
+def sample(registry, baseline_tasks):
+    gc.collect()
+    return {
+        "tasks": len(asyncio.all_tasks()) - baseline_tasks,
+        "memory_kib": tracemalloc.get_traced_memory()[0] / 1024,
+        "streams": FakeLiveRequestQueue.open_streams,
+        **registry.stats(),
+    }
+
+
+def print_row(label, row):
+    print(f"{label:>8} {row['tasks']:>6} {row['memory_kib']:>9.0f} {row['streams']:>8} {row['active']:>7} "
+          f"{row['attached']:>9} {row['admitted']:>9} {row['resumed']:>8} {row['rejected']:>9} "
+          f"{row['evicted']:>8} {row['reaped']:>7} {row['idle_closed']:>5}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=60)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--max-sessions", type=int, default=50)
+    parser.add_argument("--idle-timeout", type=float, default=1.0)
+    parser.add_argument("--resume-grace", type=float, default=1.0)
+    parser.add_argument("--window", type=float, default=5.0, help="seconds between samples")
+    args = parser.parse_args()
+
+    registry = SessionRegistry(
+        max_sessions=args.max_sessions,
+        idle_timeout=args.idle_timeout,
+        resume_grace=args.resume_grace,
+        reap_interval=0.2,
+    )
+    tracemalloc.start()
+    async with websockets.serve(make_handler(registry), "127.0.0.1", 0, max_size=None) as server:
+        base_url = f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+        baseline_tasks = len(asyncio.all_tasks())
+        start = sample(registry, baseline_tasks)
+
+        print(f"{args.clients} clients, max {args.max_sessions} sessions, idle {args.idle_timeout}s, "
+              f"grace {args.resume_grace}s, {args.duration:.0f}s")
+        print(f"{'t':>8} {'tasks':>6} {'mem KiB':>9} {'streams':>8} {'active':>7} {'attached':>9} "
+              f"{'admitted':>9} {'resumed':>8} {'rejected':>9} {'evicted':>8} {'reaped':>7} {'idle':>5}")
+        print_row("start", start)
+
+        stats = {k: 0 for k in ("started", "resumed", "rejected", "flap", "clean", "vanish", "silent",
+                                "idle_closed_seen")}
+        peaks, drained = [], []
+        t0 = time.monotonic()
+        for _ in range(2):
+            stop_at = time.monotonic() + args.duration / 2
+            clients = [asyncio.create_task(client(n, base_url, stop_at, args, stats)) for n in range(args.clients)]
+            peak = 0.0
+            while time.monotonic() < stop_at:
+                await asyncio.sleep(args.window)
+                row = sample(registry, baseline_tasks)
+                peak = max(peak, row["memory_kib"])
+                print_row(f"{time.monotonic() - t0:.0f}s", row)
+            await asyncio.gather(*clients)
+
+            # Everything still open is now orphaned; the reaper must clean it up
+            await asyncio.sleep(args.resume_grace + args.idle_timeout + 1.0)
+            end = sample(registry, baseline_tasks)
+            print_row("drained", end)
+            peaks.append(peak)
+            drained.append(end)
+        await registry.close()
+
+    print(f"\nclient view: {stats}")
+    checks = {
+        "no sessions left": all(d["active"] == 0 for d in drained),
+        "no model streams left": all(d["streams"] == 0 for d in drained),
+        "no tasks left but the reaper": all(d["tasks"] <= 1 for d in drained),
+        "peak memory flat (phase 2 within 10% of phase 1)": peaks[1] <= peaks[0] * 1.10,
+        "drained memory flat (phase 2 within 128 KiB of phase 1)":
+            drained[1]["memory_kib"] <= drained[0]["memory_kib"] + 128,
+    }
+    for name, ok in checks.items():
+        print(f"  {'ok  ' if ok else 'FAIL'} {name}")
+    if not all(checks.values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
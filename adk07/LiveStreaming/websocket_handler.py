@@ -1,4 +1,3 @@
-import asyncio
 import base64
 import json
 import logging
@@ -8,6 +7,17 @@ from typing import Any, Dict
 from google.genai import types
 from google.genai.live import RunConfig
 
+from frames import FLAG_END_OF_TURN, FrameError, FrameReader, kind_for_mime
+from pipeline import (
+    TURN_COMPLETE,
+    TURN_INTERRUPTED,
+    Outbound,
+    OutboundQueue,
+    PipelineClosed,
+    SampledLogger,
+)
+from sessions import SessionLimitError, SessionRegistry
+
 # ---------------------------------------------------------------------
 # Logging
 # ---------------------------------------------------------------------
@@ -19,13 +29,35 @@ logging.basicConfig(level=logging.INFO)
 # Globals
 # ---------------------------------------------------------------------
 
-ACTIVE_SESSIONS: Dict[str, "SessionState"] = {}
+# Downstream pipeline (see pipeline.py)
+OUTBOUND_QUEUE_SIZE = 64   # messages buffered between the live runner and the socket
+AUDIO_PACKET_MS = 40       # queued audio chunks are merged up to this duration
+LOG_EVERY = 100            # log one event in this many at INFO
+
+# Live session limits (see sessions.py)
+MAX_LIVE_SESSIONS = 50     # model sessions open at once in this process
+IDLE_TIMEOUT = 60.0        # close a socket that sent nothing, not even a ping, for this long
+RESUME_GRACE = 30.0        # keep a dropped session this long for its client to reconnect
+REAP_INTERVAL = 5.0
+
+SESSIONS = SessionRegistry(
+    max_sessions=MAX_LIVE_SESSIONS,
+    idle_timeout=IDLE_TIMEOUT,
+    resume_grace=RESUME_GRACE,
+    reap_interval=REAP_INTERVAL,
+    queue_size=OUTBOUND_QUEUE_SIZE,
+    audio_packet_ms=AUDIO_PACKET_MS,
+)
 
 # ---------------------------------------------------------------------
 # Session helpers
 # ---------------------------------------------------------------------
 
 def create_session(session: "SessionState") -> "SessionState":
+    """Open the model session. Raises SessionLimitError when the process is full."""
+    # Admit before run_live so a refused client never opens a model connection
+    live = SESSIONS.admit(session.session_id, session, session.live_request_queue.close)
+
     print(f"Voice: {CONFIG['generation_config']['speech_config']}")
     print(f"Modalities: {CONFIG['generation_config']['response_modalities']}")
 
@@ -49,64 +81,100 @@ def create_session(session: "SessionState") -> "SessionState":
         run_config=run_config,
     )
 
-    ACTIVE_SESSIONS[session.session_id] = session
+    session.metrics = live.metrics
+    session.resume_token = live.resume_token
     return session
 
 
 def get_session(session_id: str) -> "SessionState":
-    session = ACTIVE_SESSIONS.get(session_id)
-    if not session:
-        raise KeyError(f"Session not found: {session_id}")
-    return session
+    return SESSIONS.get(session_id).state
+
+
+def resume_session(resume_token: str) -> "SessionState":
+    """The still-open session of a reconnecting client; KeyError once it has been reaped."""
+    return SESSIONS.resume(resume_token).state
+
+
+def close_session(session_id: str) -> None:
+    """Close the model session now instead of waiting for RESUME_GRACE."""
+    live = SESSIONS.sessions.get(session_id)
+    if live is not None:
+        SESSIONS.discard(live, "closed by the application")
+
+
+def get_session_metrics(session_id: str) -> Dict[str, Any]:
+    """First-audio-byte and turn latency histograms plus queue counters."""
+    return SESSIONS.get(session_id).metrics.snapshot()
+
+
+def get_registry_stats() -> Dict[str, int]:
+    return SESSIONS.stats()
 
 # ---------------------------------------------------------------------
 # Agent → Client
 # ---------------------------------------------------------------------
 
 async def handle_agent_responses(websocket: Any, session: "SessionState") -> None:
+    """
+    Send the session's output to `websocket` until it disconnects. The
+    model events are read by one pump task per session, which keeps
+    running (into the bounded queue) while the client reconnects.
+    """
+    live = SESSIONS.get(session.session_id)
+    SESSIONS.start_pump(live, lambda: pump_agent_events(session, live.outbound))
+    await SESSIONS.serve(live, websocket, websocket.send, websocket.send)
+
+
+async def pump_agent_events(session: "SessionState", outbound: OutboundQueue) -> None:
+    # Events are queued for the sender instead of awaiting each send here;
+    # a slow socket makes put() wait, which pauses reading events.
+    event_log = SampledLogger(logger, every=LOG_EVERY)
+
     try:
         full_text = ""
 
         async for event in session.events:
-            logger.info(event)
+            session.metrics.events += 1
+            event_log.log(event)
 
             # --- Interruption ---
             if getattr(event, "interrupted", False):
                 session.log_event_output("Interrupted event detected")
-                await websocket.send(json.dumps({
+                await outbound.put(Outbound(None, json.dumps({
                     "type": "interruption",
                     "data": "Response stream interrupted by user."
-                }))
+                }), TURN_INTERRUPTED))
                 continue
 
             if not event.content or not event.content.parts:
-                logger.debug(
-                    f"No content - turn_complete={getattr(event, 'turn_complete', False)}"
-                )
+                if getattr(event, "turn_complete", False):
+                    await outbound.put(Outbound(None, json.dumps({
+                        "type": "turn_complete"
+                    }), TURN_COMPLETE))
                 continue
 
             part = event.content.parts[0]
 
             # --- Tool call ---
             if part.function_call:
-                await websocket.send(json.dumps({
+                await outbound.put(Outbound(None, json.dumps({
                     "type": "tool_call",
                     "data": {
                         "name": part.function_call.name,
                         "args": part.function_call.args,
                     }
-                }))
+                })))
                 continue
 
             # --- Tool response ---
             if part.function_response:
-                await websocket.send(json.dumps({
+                await outbound.put(Outbound(None, json.dumps({
                     "type": "tool_result",
                     "data": {
                         "name": part.function_response.name,
                         "output": part.function_response.response,
                     }
-                }))
+                })))
                 continue
 
             # --- Text ---
@@ -114,50 +182,70 @@ async def handle_agent_responses(websocket: Any, session: "SessionState") -> Non
                 full_text += part.text
 
                 if not getattr(event, "partial", False):
-                    await websocket.send(json.dumps({
+                    await outbound.put(Outbound(None, json.dumps({
                         "type": "text",
                         "data": full_text
-                    }))
+                    })))
                     full_text = ""
                 continue
 
             # --- Inline data (image / audio) ---
+            # Sent as a binary frame (see frames.py); no base64, no JSON.
+            # Stale video frames are replaced or dropped by the queue.
             inline_data = part.inline_data
             if inline_data:
-                encoded = base64.b64encode(inline_data.data).decode("utf-8")
-
-                if inline_data.mime_type.startswith("image/"):
-                    await websocket.send(json.dumps({
-                        "type": "image",
-                        "data": f"data:{inline_data.mime_type};base64,{encoded}"
-                    }))
+                kind = kind_for_mime(inline_data.mime_type)
+                if kind is not None:
+                    await outbound.put(Outbound(kind, inline_data.data))
                     continue
 
-                if inline_data.mime_type.startswith("audio/pcm"):
-                    await websocket.send(json.dumps({
-                        "type": "audio",
+                # Media type without a frame kind: fall back to base64 JSON
+                if inline_data.mime_type.startswith(("image/", "audio/")):
+                    encoded = base64.b64encode(inline_data.data).decode("utf-8")
+                    await outbound.put(Outbound(None, json.dumps({
+                        "type": inline_data.mime_type.split("/")[0],
                         "data": f"data:{inline_data.mime_type};base64,{encoded}"
-                    }))
+                    })))
                     continue
 
-            await asyncio.sleep(0.05)
-
-    except Exception as e:
-        logger.error(f"Error handling agent responses: {e}")
-        logger.error(traceback.format_exc())
+    finally:
+        logger.info(f"Session {session.session_id} metrics: {session.metrics.snapshot()}")
 
 # ---------------------------------------------------------------------
 # Client → Agent
 # ---------------------------------------------------------------------
 
 async def handle_client_messages(websocket: Any, session: "SessionState") -> None:
+    live = SESSIONS.get(session.session_id)
+    reader = FrameReader()
     try:
         async for message in websocket:
+            SESSIONS.touch(live)
+
+            # --- Binary frame: microphone PCM / camera JPEG ---
+            if isinstance(message, (bytes, bytearray)):
+                try:
+                    frame = reader.parse(message)
+                except FrameError as e:
+                    logger.warning(f"Dropping malformed frame: {e}")
+                    continue
+                session.metrics.user_input(end_of_turn=bool(frame.flags & FLAG_END_OF_TURN))
+                session.live_request_queue.send_realtime(
+                    types.Blob(data=frame.payload, mime_type=frame.mime_type)
+                )
+                continue
+
+            # --- JSON: control messages (and base64 media from older clients) ---
             data = json.loads(message)
             msg_type = data.get("type")
 
-            if msg_type == "audio":
+            # --- Heartbeat ---
+            if msg_type == "ping":
+                await live.outbound.put(Outbound(None, json.dumps({"type": "pong"})))
+
+            elif msg_type == "audio":
                 logger.debug("Client -> Gemini: audio")
+                session.metrics.user_input()
                 session.live_request_queue.send_realtime(
                     types.Blob(
                         data=data.get("data"),
@@ -167,6 +255,7 @@ async def handle_client_messages(websocket: Any, session: "SessionState") -> Non
 
             elif msg_type == "image":
                 logger.debug("Client -> Gemini: image")
+                session.metrics.user_input()
                 session.live_request_queue.send_realtime(
                     types.Blob(
                         data=data.get("data"),
@@ -176,6 +265,7 @@ async def handle_client_messages(websocket: Any, session: "SessionState") -> Non
 
             elif msg_type == "text":
                 logger.debug("Client -> Gemini: text")
+                session.metrics.user_input(end_of_turn=True)
                 session.live_request_queue.send_realtime(
                     types.Content(
                         role="user",
@@ -183,10 +273,15 @@ async def handle_client_messages(websocket: Any, session: "SessionState") -> Non
                     )
                 )
 
+    except PipelineClosed:
+        logger.info(f"Session {session.session_id} ended while the client was connected.")
     except Exception as e:
         if "connection closed" in str(e).lower():
-            logger.info("WebSocket connection closed by client.")
+            logger.info(f"WebSocket connection closed by client ({reader.gaps} frames missing upstream).")
         else:
             logger.error(f"Error handling client messages: {e}")
             logger.error(traceback.format_exc())
+    finally:
+        # Detach; the session stays resumable for RESUME_GRACE seconds
+        SESSIONS.hang_up(live, websocket)
 
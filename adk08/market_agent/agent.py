@@ -6,7 +6,7 @@ from market_agent.tools.bigquery_tool import (
     product_tool,
     sale_tool,
     market_growth_tool,
-    get_cloud_security_performance,
+    get_category_performance,
 )
 
 # ------------------------------------------------------------
@@ -28,7 +28,7 @@ market_intelligence_agent = LlmAgent(
         market_growth_tool,
 
         # Internal analytics
-        get_cloud_security_performance,
+        get_category_performance,
     ],
 )
 
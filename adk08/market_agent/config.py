@@ -10,3 +10,14 @@ BQ_PROJECT_ID = os.getenv("BQ_PROJECT_ID")
 BQ_DATASET = os.getenv("BQ_DATASET")
 SERVICE_ACCOUNT_FILE = os.getenv("SERVICE_ACCOUNT_FILE")
 
+# Category analytics: result cache + optional rollup table
+ANALYTICS_CACHE_TTL_SECONDS = float(os.getenv("ANALYTICS_CACHE_TTL_SECONDS", "900"))
+ANALYTICS_USE_ROLLUPS = os.getenv("ANALYTICS_USE_ROLLUPS", "false").lower() in ("1", "true", "yes")
+ANALYTICS_ROLLUP_REFRESH_SECONDS = float(os.getenv("ANALYTICS_ROLLUP_REFRESH_SECONDS", "3600"))
+ANALYTICS_ROLLUP_LOOKBACK_DAYS = int(os.getenv("ANALYTICS_ROLLUP_LOOKBACK_DAYS", "3"))
+
+# Ingest: streaming inserts for small batches, load jobs above the threshold
+BQ_STREAM_MAX_ROWS = int(os.getenv("BQ_STREAM_MAX_ROWS", "500"))
+BQ_LOAD_FORMAT = os.getenv("BQ_LOAD_FORMAT", "ndjson")
+BQ_LOAD_MAX_RETRIES = int(os.getenv("BQ_LOAD_MAX_RETRIES", "3"))
+BQ_LOAD_JOB_TIMEOUT = float(os.getenv("BQ_LOAD_JOB_TIMEOUT", "300"))
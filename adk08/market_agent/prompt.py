@@ -17,7 +17,8 @@ AVAILABLE TOOLS:
 2. sale_tool - Manage sales records (create, read, update, delete)
 3. market_growth_tool - Manage market growth benchmarks (create, read, update, delete)
 4. google_search - Search external market trends and competitor information
-5. get_cloud_security_performance - Analyze Cloud Security product performance
+5. get_category_performance - Analyze any product category's performance over a period
+   (e.g. category="Cloud Security", period="30d" / "6m" / "ytd")
 
 CORE RESPONSIBILITIES:
 
@@ -44,7 +45,7 @@ WORKFLOW GUIDELINES:
 When analyzing performance:
 1. First, check existing data using read operations (product_tool, sale_tool, market_growth_tool)
 2. Use google_search to get latest external market trends
-3. Use get_cloud_security_performance for specialized Cloud Security analytics
+3. Use get_category_performance for internal revenue, growth and the latest benchmark
 4. Compare internal vs external data
 5. Provide clear, actionable insights
 
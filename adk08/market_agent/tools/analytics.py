@@ -0,0 +1,512 @@
+"""
+Category Performance Analytics
+
+Backend-agnostic analytics behind get_category_performance():
+
+1. Parameterised Query - one query for any category / period instead of
+   one hardcoded function per category
+   - Internal revenue for the period vs the previous equal-length period
+   - Sale count, average sale, growth % and the latest market benchmark
+
+2. Result Cache - in-process TTL cache in front of the warehouse
+   - Key = sha256(normalised SQL + sorted parameters)
+   - Repeated agent questions skip the query entirely (no bytes billed)
+   - Cleared whenever the tool layer writes data
+
+3. Optional Rollups - materialised category x day table
+   - category_daily_rollup(category, sale_date, revenue, sales_count)
+   - Refreshed incrementally: only days >= (watermark - lookback) are
+     recomputed, so late-arriving sales for recent days are picked up
+   - Writes report the sale dates they touch; those days are recomputed
+     before the next rollup read, however old they are
+   - Performance queries then scan the rollup instead of the sales fact
+
+4. Pluggable Backends - the same SQL runs on
+   - BigQueryBackend (production)
+   - SQLiteBackend   (local stand-in for development and tests)
+"""
+
+import re
+import abc
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+ALL_METRICS = (
+    "revenue",
+    "previous_revenue",
+    "growth_percent",
+    "sales_count",
+    "avg_sale",
+    "market_growth",
+)
+
+ROLLUP_TABLE = "category_daily_rollup"
+
+# ================================================================
+# PERIODS
+# ================================================================
+
+_PERIOD_PATTERN = re.compile(r"^(\d+)\s*([dwmy])$")
+_UNIT_DAYS = {"d": 1, "w": 7, "m": 30, "y": 365}
+
+
+def parse_period(period: str, today: Optional[date] = None) -> Tuple[date, date, date]:
+    """
+    Resolve a period string to (previous_start, start, end_exclusive).
+
+    Accepted: "30d", "12w", "6m", "1y" (rolling windows ending today),
+    "mtd", "qtd", "ytd" (calendar period to date). The previous period is
+    the equal-length window immediately before `start`.
+    """
+    today = today or date.today()
+    end = today + timedelta(days=1)
+    p = (period or "30d").strip().lower()
+
+    if p == "mtd":
+        start = today.replace(day=1)
+    elif p == "qtd":
+        start = date(today.year, 3 * ((today.month - 1) // 3) + 1, 1)
+    elif p == "ytd":
+        start = date(today.year, 1, 1)
+    else:
+        match = _PERIOD_PATTERN.match(p)
+        if not match:
+            raise ValueError(f"Unknown period '{period}'. Use e.g. 30d, 12w, 6m, 1y, mtd, qtd, ytd")
+        start = end - timedelta(days=int(match.group(1)) * _UNIT_DAYS[match.group(2)])
+
+    return start - (end - start), start, end
+
+
+# ================================================================
+# RESULT CACHE
+# ================================================================
+
+def normalise_sql(sql: str) -> str:
+    """Collapse whitespace so formatting differences share a cache key."""
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+class ResultCache:
+    """Thread-safe TTL cache of query results keyed by SQL + parameters."""
+
+    def __init__(self, ttl_seconds: float = 900, max_entries: int = 512):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: Dict[str, Tuple[float, List[dict]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(sql: str, params: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            [normalise_sql(sql), sorted(params.items())], default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry[0] > self.ttl_seconds:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, rows: List[dict]) -> None:
+        with self._lock:
+            if len(self._entries) >= self.max_entries:
+                # Drop the oldest entry
+                oldest = min(self._entries, key=lambda k: self._entries[k][0])
+                del self._entries[oldest]
+            self._entries[key] = (time.monotonic(), rows)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# ================================================================
+# BACKENDS
+# ================================================================
+
+def _serialise(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _as_date(value: Any) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+class AnalyticsBackend(abc.ABC):
+    """
+    Minimal interface the analytics layer needs from a warehouse.
+    SQL uses @name parameters and only portable constructs.
+    """
+
+    @abc.abstractmethod
+    def table(self, name: str) -> str:
+        ...
+
+    @abc.abstractmethod
+    def query(self, sql: str, params: Dict[str, Any]) -> List[dict]:
+        ...
+
+    @abc.abstractmethod
+    def execute(self, sql: str, params: Dict[str, Any]) -> None:
+        ...
+
+    @abc.abstractmethod
+    def create_rollup_table(self) -> None:
+        ...
+
+
+class BigQueryBackend(AnalyticsBackend):
+    """google.cloud.bigquery client; query cache stays enabled on every job."""
+
+    _TYPES = ((bool, "BOOL"), (int, "INT64"), (float, "FLOAT64"), (datetime, "TIMESTAMP"), (date, "DATE"))
+
+    def __init__(self, client, project_id: str, dataset: str):
+        self.client = client
+        self.project_id = project_id
+        self.dataset = dataset
+
+    def table(self, name: str) -> str:
+        return f"`{self.project_id}.{self.dataset}.{name}`"
+
+    def _job_config(self, params: Dict[str, Any]):
+        from google.cloud import bigquery
+
+        query_parameters = []
+        for name, value in params.items():
+            bq_type = next((t for py, t in self._TYPES if isinstance(value, py)), "STRING")
+            query_parameters.append(bigquery.ScalarQueryParameter(name, bq_type, value))
+        return bigquery.QueryJobConfig(query_parameters=query_parameters, use_query_cache=True)
+
+    def query(self, sql: str, params: Dict[str, Any]) -> List[dict]:
+        rows = self.client.query(sql, job_config=self._job_config(params))
+        return [{k: _serialise(v) for k, v in dict(row).items()} for row in rows]
+
+    def execute(self, sql: str, params: Dict[str, Any]) -> None:
+        self.client.query(sql, job_config=self._job_config(params)).result()
+
+    def create_rollup_table(self) -> None:
+        self.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.table(ROLLUP_TABLE)} (
+              category STRING NOT NULL,
+              sale_date DATE NOT NULL,
+              revenue FLOAT64 NOT NULL,
+              sales_count INT64 NOT NULL
+            )
+            PARTITION BY sale_date
+            CLUSTER BY category
+        """, {})
+
+
+class SQLiteBackend(AnalyticsBackend):
+    """Local stand-in: same tables, dates stored as ISO-8601 text."""
+
+    def __init__(self, path: str = ":memory:"):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+    def table(self, name: str) -> str:
+        return name
+
+    @staticmethod
+    def _convert(sql: str, params: Dict[str, Any]):
+        return (
+            re.sub(r"@(\w+)", r":\1", sql),
+            {k: _serialise(v) for k, v in params.items()},
+        )
+
+    def query(self, sql: str, params: Dict[str, Any]) -> List[dict]:
+        sql, params = self._convert(sql, params)
+        with self._lock:
+            return [dict(row) for row in self.conn.execute(sql, params).fetchall()]
+
+    def execute(self, sql: str, params: Dict[str, Any]) -> None:
+        sql, params = self._convert(sql, params)
+        with self._lock:
+            self.conn.execute(sql, params)
+            self.conn.commit()
+
+    def create_rollup_table(self) -> None:
+        self.execute(f"""
+            CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+              category TEXT NOT NULL,
+              sale_date TEXT NOT NULL,
+              revenue REAL NOT NULL,
+              sales_count INTEGER NOT NULL,
+              PRIMARY KEY (category, sale_date)
+            )
+        """, {})
+
+
+# ================================================================
+# CATEGORY ANALYTICS
+# ================================================================
+
+class CategoryAnalytics:
+    """
+    get_category_performance() implementation over any AnalyticsBackend.
+
+    Args:
+        backend:                 Warehouse to query.
+        cache_ttl_seconds:       Result cache lifetime (0 disables caching).
+        use_rollups:             Read from category_daily_rollup instead of sales.
+        rollup_refresh_seconds:  Minimum time between incremental refreshes.
+        rollup_lookback_days:    Days before the watermark that are recomputed;
+                                 also the largest gap bridged when merging
+                                 touched dates into one recompute range.
+    """
+
+    def __init__(
+        self,
+        backend: AnalyticsBackend,
+        cache_ttl_seconds: float = 900,
+        use_rollups: bool = False,
+        rollup_refresh_seconds: float = 3600,
+        rollup_lookback_days: int = 3,
+    ):
+        self.backend = backend
+        self.cache = ResultCache(cache_ttl_seconds) if cache_ttl_seconds > 0 else None
+        self.use_rollups = use_rollups
+        self.rollup_refresh_seconds = rollup_refresh_seconds
+        self.rollup_lookback_days = rollup_lookback_days
+        self._rollup_refreshed_at: Optional[float] = None
+        self._rollup_lock = threading.Lock()
+        self._dirty_dates: Set[date] = set()
+        self._dirty_lock = threading.Lock()
+
+    # ── cached query ─────────────────────────────────────────────
+    def _query(self, sql: str, params: Dict[str, Any]) -> List[dict]:
+        if self.cache is None:
+            return self.backend.query(sql, params)
+        key = ResultCache.make_key(sql, params)
+        rows = self.cache.get(key)
+        if rows is None:
+            rows = self.backend.query(sql, params)
+            self.cache.put(key, rows)
+        return rows
+
+    def invalidate(self, sale_dates: Iterable[Any] = ()) -> None:
+        """
+        Forget cached results (call after any write to the source tables).
+
+        sale_dates are the days whose rollup rows the write may have
+        changed (old and new dates of edited sales, dates of sales of a
+        re-categorised product). They are recomputed before the next
+        rollup read; other days are left alone.
+        """
+        if self.cache is not None:
+            self.cache.clear()
+        dates = {_as_date(d) for d in sale_dates if d}
+        if dates:
+            with self._dirty_lock:
+                self._dirty_dates |= dates
+
+    # ── rollups ──────────────────────────────────────────────────
+    def _date_ranges(self, dates: Iterable[date]) -> List[Tuple[date, date]]:
+        """Merge dates into [start, end_exclusive) ranges, bridging short gaps."""
+        ranges: List[List[date]] = []
+        for day in sorted(set(dates)):
+            if ranges and (day - ranges[-1][1]).days <= self.rollup_lookback_days:
+                ranges[-1][1] = day + timedelta(days=1)
+            else:
+                ranges.append([day, day + timedelta(days=1)])
+        return [(start, end) for start, end in ranges]
+
+    def _recompute(self, since: date, until: Optional[date] = None) -> None:
+        b = self.backend
+        params: Dict[str, Any] = {"since": since}
+        bound = "sale_date >= @since"
+        if until is not None:
+            params["until"] = until
+            bound += " AND sale_date < @until"
+        b.execute(f"DELETE FROM {b.table(ROLLUP_TABLE)} WHERE {bound}", params)
+        b.execute(f"""
+            INSERT INTO {b.table(ROLLUP_TABLE)} (category, sale_date, revenue, sales_count)
+            SELECT p.category, s.sale_date, SUM(s.revenue), COUNT(*)
+            FROM {b.table("sales")} s
+            JOIN {b.table("products")} p ON s.product_id = p.product_id
+            WHERE s.{bound}
+            GROUP BY p.category, s.sale_date
+        """, params)
+
+    def refresh_rollups(self, full: bool = False, dates: Optional[Iterable[Any]] = None) -> Dict[str, Any]:
+        """
+        Recompute category_daily_rollup from the watermark (latest rolled-up
+        day minus rollup_lookback_days) onward, or everything when `full`.
+        With `dates`, recompute only those days (merged into ranges).
+        """
+        b = self.backend
+        with self._rollup_lock:
+            b.create_rollup_table()
+            if dates is not None and not full:
+                ranges = self._date_ranges(_as_date(d) for d in dates)
+                for start, end in ranges:
+                    self._recompute(start, end)
+                if self.cache is not None:
+                    self.cache.clear()
+                return {
+                    "status": "success",
+                    "refreshed_ranges": [
+                        [start.isoformat(), (end - timedelta(days=1)).isoformat()]
+                        for start, end in ranges
+                    ],
+                }
+
+            since = None
+            if not full:
+                row = b.query(f"SELECT MAX(sale_date) AS watermark FROM {b.table(ROLLUP_TABLE)}", {})
+                watermark = row[0]["watermark"] if row else None
+                if watermark:
+                    since = _as_date(watermark) - timedelta(days=self.rollup_lookback_days)
+
+            if since is None:
+                since = date(1970, 1, 1)
+            self._recompute(since)
+            self._rollup_refreshed_at = time.monotonic()
+            if self.cache is not None:
+                self.cache.clear()
+        return {"status": "success", "refreshed_from": since.isoformat()}
+
+    def _ensure_rollups_fresh(self) -> None:
+        stale = (
+            self._rollup_refreshed_at is None
+            or time.monotonic() - self._rollup_refreshed_at > self.rollup_refresh_seconds
+        )
+        if stale:
+            self.refresh_rollups()
+
+        # Days touched by writes, which may lie before the watermark window
+        with self._dirty_lock:
+            dirty, self._dirty_dates = self._dirty_dates, set()
+        if dirty:
+            try:
+                self.refresh_rollups(dates=dirty)
+            except Exception:
+                with self._dirty_lock:
+                    self._dirty_dates |= dirty
+                raise
+
+    # ── performance ──────────────────────────────────────────────
+    def _revenue_sql(self) -> str:
+        b = self.backend
+        if self.use_rollups:
+            return f"""
+            SELECT
+              SUM(CASE WHEN r.sale_date >= @start_date THEN r.revenue ELSE 0 END) AS revenue,
+              SUM(CASE WHEN r.sale_date < @start_date THEN r.revenue ELSE 0 END) AS previous_revenue,
+              SUM(CASE WHEN r.sale_date >= @start_date THEN r.sales_count ELSE 0 END) AS sales_count
+            FROM {b.table(ROLLUP_TABLE)} r
+            WHERE r.category = @category
+              AND r.sale_date >= @previous_start
+              AND r.sale_date < @end_date
+            """
+        return f"""
+        SELECT
+          SUM(CASE WHEN s.sale_date >= @start_date THEN s.revenue ELSE 0 END) AS revenue,
+          SUM(CASE WHEN s.sale_date < @start_date THEN s.revenue ELSE 0 END) AS previous_revenue,
+          SUM(CASE WHEN s.sale_date >= @start_date THEN 1 ELSE 0 END) AS sales_count
+        FROM {b.table("sales")} s
+        JOIN {b.table("products")} p ON s.product_id = p.product_id
+        WHERE p.category = @category
+          AND s.sale_date >= @previous_start
+          AND s.sale_date < @end_date
+        """
+
+    def _market_sql(self) -> str:
+        return f"""
+        SELECT growth_percent, report_date, source
+        FROM {self.backend.table("market_growth")}
+        WHERE category = @category
+        ORDER BY report_date DESC
+        LIMIT 1
+        """
+
+    def performance(
+        self,
+        category: str,
+        period: str = "30d",
+        metrics: Optional[Sequence[str]] = None,
+        today: Optional[date] = None,
+    ) -> Dict[str, Any]:
+        wanted = list(metrics or ALL_METRICS)
+        unknown = [m for m in wanted if m not in ALL_METRICS]
+        if unknown:
+            raise ValueError(f"Unknown metric(s) {unknown}. Use: {', '.join(ALL_METRICS)}")
+
+        previous_start, start, end = parse_period(period, today)
+        result: Dict[str, Any] = {
+            "category": category,
+            "period": period,
+            "period_from": start.isoformat(),
+            "period_to": (end - timedelta(days=1)).isoformat(),
+        }
+
+        if any(m != "market_growth" for m in wanted):
+            if self.use_rollups:
+                self._ensure_rollups_fresh()
+            rows = self._query(self._revenue_sql(), {
+                "category": category,
+                "previous_start": previous_start,
+                "start_date": start,
+                "end_date": end,
+            })
+            row = rows[0] if rows else {}
+            revenue = float(row.get("revenue") or 0)
+            previous = float(row.get("previous_revenue") or 0)
+            count = int(row.get("sales_count") or 0)
+
+            if previous > 0:
+                growth = (revenue - previous) / previous * 100
+            elif revenue > 0:
+                growth = 100.0   # grew from zero
+            else:
+                growth = 0.0
+
+            values = {
+                "revenue": round(revenue, 2),
+                "previous_revenue": round(previous, 2),
+                "growth_percent": round(growth, 2),
+                "sales_count": count,
+                "avg_sale": round(revenue / count, 2) if count else 0.0,
+            }
+            result.update({m: values[m] for m in wanted if m in values})
+
+        if "market_growth" in wanted:
+            rows = self._query(self._market_sql(), {"category": category})
+            if rows:
+                result["market_growth"] = rows[0]["growth_percent"]
+                result["market_growth_date"] = str(rows[0]["report_date"])[:10]
+                result["market_growth_source"] = rows[0]["source"]
+            else:
+                result["market_growth"] = None
+
+        return result
+
+
+__all__ = [
+    "ALL_METRICS",
+    "AnalyticsBackend",
+    "BigQueryBackend",
+    "CategoryAnalytics",
+    "ResultCache",
+    "SQLiteBackend",
+    "parse_period",
+]
@@ -25,7 +25,9 @@ OPTIMIZATIONS IMPLEMENTED:
    - batch_create_products()
    - batch_create_sales()
    - batch_create_market_growth()
-   - More efficient for bulk inserts
+   - Written through BigQueryLoader (see tools/bq_loader.py): streaming
+     inserts up to BQ_STREAM_MAX_ROWS rows, batch load jobs above that,
+     stable insert ids, in-batch dedupe and retry of failed rows only
 
 6. Partition Pruning - Enhanced date range filtering
    - Uses explicit date bounds for better partition elimination
@@ -35,9 +37,17 @@ OPTIMIZATIONS IMPLEMENTED:
    - BigQuery Row objects converted to dicts for JSON serialization
    - Compatible with Pydantic and ADK framework
    - Enables proper API response formatting
+
+8. Category Analytics - get_category_performance(category, period, metrics)
+   - One parameterised query for every category (see tools/analytics.py)
+   - In-process TTL result cache keyed by normalised SQL + parameters,
+     cleared by every write in this module
+   - Optional incrementally refreshed category x day rollup table; each
+     write also reports the sale dates it touches so they get recomputed
 """
 
-from datetime import date, datetime, timedelta
+import functools
+from datetime import date, datetime
 from typing import Optional, List
 from google.cloud import bigquery
 from google.cloud.bigquery import QueryJobConfig
@@ -45,8 +55,18 @@ from google.oauth2 import service_account
 from market_agent.config import (
     BQ_PROJECT_ID,
     BQ_DATASET,
-    SERVICE_ACCOUNT_FILE
+    SERVICE_ACCOUNT_FILE,
+    ANALYTICS_CACHE_TTL_SECONDS,
+    ANALYTICS_USE_ROLLUPS,
+    ANALYTICS_ROLLUP_REFRESH_SECONDS,
+    ANALYTICS_ROLLUP_LOOKBACK_DAYS,
+    BQ_STREAM_MAX_ROWS,
+    BQ_LOAD_FORMAT,
+    BQ_LOAD_MAX_RETRIES,
+    BQ_LOAD_JOB_TIMEOUT,
 )
+from market_agent.tools.analytics import BigQueryBackend, CategoryAnalytics
+from market_agent.tools.bq_loader import BigQueryLoader, describe
 
 # ================================================================
 # BIGQUERY CLIENT SETUP
@@ -64,6 +84,27 @@ client = bigquery.Client(
 # Default job config with query caching enabled
 DEFAULT_JOB_CONFIG = QueryJobConfig(use_query_cache=True)
 
+analytics = CategoryAnalytics(
+    BigQueryBackend(client, BQ_PROJECT_ID, BQ_DATASET),
+    cache_ttl_seconds=ANALYTICS_CACHE_TTL_SECONDS,
+    use_rollups=ANALYTICS_USE_ROLLUPS,
+    rollup_refresh_seconds=ANALYTICS_ROLLUP_REFRESH_SECONDS,
+    rollup_lookback_days=ANALYTICS_ROLLUP_LOOKBACK_DAYS,
+)
+
+loader = BigQueryLoader(
+    client,
+    stream_max_rows=BQ_STREAM_MAX_ROWS,
+    load_format=BQ_LOAD_FORMAT,
+    max_retries=BQ_LOAD_MAX_RETRIES,
+    job_timeout=BQ_LOAD_JOB_TIMEOUT,
+)
+
+# Insert ids / dedupe keys per table
+PRODUCT_KEY = ("product_id",)
+SALE_KEY = ("sale_id",)
+MARKET_GROWTH_KEY = ("report_date", "category")
+
 # ================================================================
 # HELPER FUNCTIONS
 # ================================================================
@@ -81,10 +122,45 @@ def row_to_dict(row) -> dict:
             result[key] = value
     return result
 
+def sale_dates_where(condition: str, params: list) -> List[str]:
+    """Distinct sale dates of the sales matching `condition`."""
+    query = f"""
+    SELECT DISTINCT s.sale_date FROM `{BQ_PROJECT_ID}.{BQ_DATASET}.sales` s
+    WHERE {condition}
+    """
+    job_config = QueryJobConfig(query_parameters=params)
+    return [str(row["sale_date"]) for row in client.query(query, job_config=job_config)]
+
+def product_sale_dates(product_ids: List[str]) -> List[str]:
+    return sale_dates_where(
+        "s.product_id IN UNNEST(@product_ids)",
+        [bigquery.ArrayQueryParameter("product_ids", "STRING", list(product_ids))],
+    )
+
+def invalidates_analytics(touched_dates=None):
+    """
+    Clear cached analytics results after a write to the source tables.
+
+    touched_dates(*args, **kwargs) runs before the write and returns the
+    sale dates whose rollup rows it can change; only needed (and only
+    called) when rollups are on.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            dates = touched_dates(*args, **kwargs) if touched_dates and analytics.use_rollups else ()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                analytics.invalidate(dates)
+        return wrapper
+    return decorator
+
 # ================================================================
 # PRODUCTS TABLE CRUD (DIMENSION)
 # ================================================================
 
+@invalidates_analytics(lambda product_id, product_name, category: product_sale_dates([product_id]))
 def create_product(product_id: str, product_name: str, category: str) -> str:
     """
     Create a new product entry.
@@ -95,11 +171,12 @@ def create_product(product_id: str, product_name: str, category: str) -> str:
         "product_name": product_name,
         "category": category
     }]
-    errors = client.insert_rows_json(table, rows)
-    if errors:
-        return f"Product creation failed: {errors}"
+    result = loader.load(table, rows, key_fields=PRODUCT_KEY)
+    if result["errors"]:
+        return f"Product creation failed: {result['errors']}"
     return "Product created successfully."
 
+@invalidates_analytics(lambda products: product_sale_dates([p["product_id"] for p in products or []]))
 def batch_create_products(products: List[dict]) -> str:
     """
     Create multiple products in a single batch operation.
@@ -109,10 +186,10 @@ def batch_create_products(products: List[dict]) -> str:
         return "Error: No products provided for batch creation."
     
     table = f"{BQ_PROJECT_ID}.{BQ_DATASET}.products"
-    errors = client.insert_rows_json(table, products)
-    if errors:
-        return f"Batch product creation failed: {errors}"
-    return f"Successfully created {len(products)} products."
+    result = loader.load(table, products, key_fields=PRODUCT_KEY)
+    if result["errors"]:
+        return f"Batch product creation failed: {describe(result)}"
+    return f"Successfully created {result['inserted']} products ({describe(result)})."
 
 def read_products(category: Optional[str] = None, limit: int = 1000) -> List[dict]:
     """
@@ -148,6 +225,9 @@ def read_products(category: Optional[str] = None, limit: int = 1000) -> List[dic
     
     return [row_to_dict(row) for row in client.query(query, job_config=job_config)]
 
+@invalidates_analytics(
+    lambda product_id, product_name=None, category=None: product_sale_dates([product_id]) if category else ()
+)
 def update_product(product_id: str, product_name: Optional[str] = None, category: Optional[str] = None) -> str:
     """
     Update product attributes using parameterized queries.
@@ -174,6 +254,7 @@ def update_product(product_id: str, product_name: Optional[str] = None, category
     client.query(query, job_config=job_config).result()
     return "Product updated successfully."
 
+@invalidates_analytics(lambda product_id: product_sale_dates([product_id]))
 def delete_product(product_id: str) -> str:
     """
     Delete a product by ID using parameterized query.
@@ -259,6 +340,7 @@ def product_tool(operation: str, product_id: Optional[str] = None, product_name:
 # SALES TABLE CRUD (FACT)
 # ================================================================
 
+@invalidates_analytics(lambda sale_id, product_id, sale_date, revenue: [sale_date])
 def create_sale(
     sale_id: str,
     product_id: str,
@@ -275,11 +357,12 @@ def create_sale(
         "sale_date": sale_date,
         "revenue": revenue
     }]
-    errors = client.insert_rows_json(table, rows)
-    if errors:
-        return f"Sale creation failed: {errors}"
+    result = loader.load(table, rows, key_fields=SALE_KEY)
+    if result["errors"]:
+        return f"Sale creation failed: {result['errors']}"
     return "Sale created successfully."
 
+@invalidates_analytics(lambda sales: [sale.get("sale_date") for sale in sales or []])
 def batch_create_sales(sales: List[dict]) -> str:
     """
     Create multiple sales in a single batch operation.
@@ -289,10 +372,10 @@ def batch_create_sales(sales: List[dict]) -> str:
         return "Error: No sales provided for batch creation."
     
     table = f"{BQ_PROJECT_ID}.{BQ_DATASET}.sales"
-    errors = client.insert_rows_json(table, sales)
-    if errors:
-        return f"Batch sale creation failed: {errors}"
-    return f"Successfully created {len(sales)} sales."
+    result = loader.load(table, sales, key_fields=SALE_KEY)
+    if result["errors"]:
+        return f"Batch sale creation failed: {describe(result)}"
+    return f"Successfully created {result['inserted']} sales ({describe(result)})."
 
 def read_sales(
     product_id: Optional[str] = None,
@@ -324,6 +407,15 @@ def read_sales(
     job_config = QueryJobConfig(query_parameters=params, use_query_cache=True)
     return [row_to_dict(row) for row in client.query(query, job_config=job_config)]
 
+def existing_sale_dates(sale_id: str) -> List[str]:
+    return sale_dates_where(
+        "s.sale_id = @sale_id",
+        [bigquery.ScalarQueryParameter("sale_id", "STRING", sale_id)],
+    )
+
+@invalidates_analytics(
+    lambda sale_id, product_id=None, sale_date=None, revenue=None: existing_sale_dates(sale_id) + [sale_date]
+)
 def update_sale(sale_id: str, product_id: Optional[str] = None, sale_date: Optional[str] = None, revenue: Optional[float] = None) -> str:
     """
     Update sale attributes using parameterized queries.
@@ -353,6 +445,7 @@ def update_sale(sale_id: str, product_id: Optional[str] = None, sale_date: Optio
     client.query(query, job_config=job_config).result()
     return "Sale updated successfully."
 
+@invalidates_analytics(lambda sale_id: existing_sale_dates(sale_id))
 def delete_sale(sale_id: str) -> str:
     """
     Delete a sale record using parameterized query.
@@ -438,6 +531,7 @@ def sale_tool(operation: str, sale_id: Optional[str] = None, product_id: Optiona
 # MARKET GROWTH TABLE CRUD (REFERENCE)
 # ================================================================
 
+@invalidates_analytics()
 def create_market_growth(
     report_date: str,
     category: str,
@@ -454,11 +548,12 @@ def create_market_growth(
         "growth_percent": growth_percent,
         "source": source
     }]
-    errors = client.insert_rows_json(table, rows)
-    if errors:
-        return f"Market growth record creation failed: {errors}"
+    result = loader.load(table, rows, key_fields=MARKET_GROWTH_KEY)
+    if result["errors"]:
+        return f"Market growth record creation failed: {result['errors']}"
     return "Market growth record created successfully."
 
+@invalidates_analytics()
 def batch_create_market_growth(records: List[dict]) -> str:
     """
     Create multiple market growth records in a single batch operation.
@@ -468,10 +563,10 @@ def batch_create_market_growth(records: List[dict]) -> str:
         return "Error: No market growth records provided for batch creation."
     
     table = f"{BQ_PROJECT_ID}.{BQ_DATASET}.market_growth"
-    errors = client.insert_rows_json(table, records)
-    if errors:
-        return f"Batch market growth creation failed: {errors}"
-    return f"Successfully created {len(records)} market growth records."
+    result = loader.load(table, records, key_fields=MARKET_GROWTH_KEY)
+    if result["errors"]:
+        return f"Batch market growth creation failed: {describe(result)}"
+    return f"Successfully created {result['inserted']} market growth records ({describe(result)})."
 
 def read_market_growth(category: Optional[str] = None, limit: int = 1000) -> List[dict]:
     """
@@ -507,6 +602,7 @@ def read_market_growth(category: Optional[str] = None, limit: int = 1000) -> Lis
     
     return [row_to_dict(row) for row in client.query(query, job_config=job_config)]
 
+@invalidates_analytics()
 def update_market_growth(
     report_date: str,
     category: str,
@@ -531,6 +627,7 @@ def update_market_growth(
     client.query(query, job_config=job_config).result()
     return "Market growth record updated successfully."
 
+@invalidates_analytics()
 def delete_market_growth(report_date: str, category: str) -> str:
     """
     Delete a market growth record using parameterized query.
@@ -619,54 +716,53 @@ def market_growth_tool(operation: str, report_date: Optional[str] = None, catego
 # ANALYTICAL QUERY (USED BY LLM AGENT)
 # ================================================================
 
+def get_category_performance(
+    category: str,
+    period: str = "30d",
+    metrics: Optional[List[str]] = None
+) -> dict:
+    """
+    Internal sales performance of one product category vs the previous
+    equal-length period, plus the latest external market benchmark.
+
+    Args:
+        category: Product category, e.g. "Cloud Security", "Electronics".
+        period:   "30d", "12w", "6m", "1y" (rolling, ending today) or
+                  "mtd", "qtd", "ytd" (calendar period to date). Default "30d".
+        metrics:  Subset of revenue, previous_revenue, growth_percent,
+                  sales_count, avg_sale, market_growth. Default: all.
+
+    Results are cached for a short TTL; repeated questions do not re-run
+    the BigQuery job.
+    """
+    try:
+        result = analytics.performance(category, period, metrics)
+    except ValueError as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        return {"status": "error", "message": f"Analytics query failed: {str(e)}"}
+    return {"status": "success", **result}
+
 def get_cloud_security_performance(days_back: int = 30) -> List[dict]:
     """
     Compare internal Cloud Security sales performance against
     the latest available market growth benchmark.
 
-    - Uses partition pruning on sales.sale_date
-    - Selects the most recent market_growth record
-    - Uses parameterized queries for security and performance
+    Kept for existing callers — delegates to get_category_performance().
     """
-    start_date = date.today() - timedelta(days=days_back)
-    end_date = date.today()
-
-    query = f"""
-    WITH latest_market_growth AS (
-      SELECT
-        category,
-        growth_percent
-      FROM `{BQ_PROJECT_ID}.{BQ_DATASET}.market_growth`
-      WHERE category = @category
-      QUALIFY ROW_NUMBER() OVER (
-        PARTITION BY category
-        ORDER BY report_date DESC
-      ) = 1
-    )
-    SELECT
-      SUM(s.revenue) AS total_revenue,
-      lmg.growth_percent AS market_growth
-    FROM `{BQ_PROJECT_ID}.{BQ_DATASET}.sales` s
-    JOIN `{BQ_PROJECT_ID}.{BQ_DATASET}.products` p
-      ON s.product_id = p.product_id
-    JOIN latest_market_growth lmg
-      ON p.category = lmg.category
-    WHERE p.category = @category
-      AND s.sale_date >= @start_date
-      AND s.sale_date < @end_date
-    GROUP BY lmg.growth_percent
-    """
-    
-    job_config = QueryJobConfig(
-        query_parameters=[
-            bigquery.ScalarQueryParameter("category", "STRING", "Cloud Security"),
-            bigquery.ScalarQueryParameter("start_date", "DATE", start_date),
-            bigquery.ScalarQueryParameter("end_date", "DATE", end_date)
-        ],
-        use_query_cache=True
+    result = analytics.performance(
+        "Cloud Security", f"{int(days_back)}d", ["revenue", "market_growth"]
     )
+    if not result["revenue"] or result.get("market_growth") is None:
+        return []
+    return [{"total_revenue": result["revenue"], "market_growth": result["market_growth"]}]
 
-    return [row_to_dict(row) for row in client.query(query, job_config=job_config)]
+def refresh_rollups(full: bool = False) -> dict:
+    """
+    Incrementally refresh the category_daily_rollup table
+    (full=True rebuilds it from scratch).
+    """
+    return analytics.refresh_rollups(full=full)
 
 if __name__ == "__main__":
     print("=== BigQuery Tool Smoke Test ===")
@@ -689,4 +785,4 @@ if __name__ == "__main__":
     print(read_market_growth("Cloud Security"))
 
     # Test analytics
-    print(get_cloud_security_performance(days_back=60))
+    print(get_category_performance("Cloud Security", period="60d"))
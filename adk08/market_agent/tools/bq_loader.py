@@ -0,0 +1,365 @@
+"""
+BigQuery Row Loader
+
+Every write in bigquery_tool goes through BigQueryLoader.load() instead
+of calling client.insert_rows_json directly:
+
+1. Method by Batch Size
+   - Up to stream_max_rows rows  -> streaming insert (visible immediately)
+   - Larger batches              -> one batch load job from newline-delimited
+     JSON (or Parquet); no streaming cost, no per-request row/byte limits,
+     and rows are not stuck in the streaming buffer for UPDATE / DELETE
+
+2. Buffered Streaming - streaming inserts are sent in chunks that stay
+   under the per-request limits (stream_chunk_rows / stream_chunk_bytes);
+   append() + flush() let callers accumulate trickled rows into one load
+
+3. Insert IDs + Dedupe
+   - Each row gets a stable insert id: its key fields when given,
+     otherwise a hash of the row
+   - Duplicate ids inside a batch are dropped before sending
+   - Retries resend the SAME ids, so BigQuery's best-effort dedupe
+     discards rows that already landed
+
+4. Retry on Partial Failure
+   - Streaming: only rows whose error reason is transient ("stopped",
+     "backendError", "timeout", ...) are resent, with exponential backoff;
+     "invalid" rows are reported, never retried
+   - Load jobs: a request that never got an answer is resent under the same
+     job id (Conflict = an earlier attempt was accepted, await that job);
+     a wait that times out or errors re-polls the same job with get_job;
+     only a job confirmed DONE with an error is retried as a new job, so a
+     slow job is never loaded twice
+
+5. Typed Parquet - Parquet loads carry the destination table's schema, so
+   ISO date strings are written as DATE / TIMESTAMP columns instead of
+   STRING ones BigQuery would reject
+
+The loader only touches client.insert_rows_json, client.load_table_from_file,
+client.get_job and (Parquet only) client.get_table, so it can be exercised
+against a small fake client.
+"""
+
+import io
+import json
+import time
+import uuid
+import random
+import hashlib
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+# Streaming-insert error reasons worth resending
+_RETRYABLE_REASONS = {"stopped", "backendError", "internalError", "timeout", "rateLimitExceeded"}
+
+LOAD_FORMATS = ("ndjson", "parquet")
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Unserialisable value: {value!r}")
+
+
+def _dumps(row: Dict[str, Any]) -> str:
+    return json.dumps(row, sort_keys=True, default=_json_default, separators=(",", ":"))
+
+
+class BigQueryLoader:
+    """
+    Args:
+        client:             google.cloud.bigquery.Client (or a fake with the
+                            same methods).
+        stream_max_rows:    Batches up to this size are streamed; larger ones
+                            go through a load job.
+        load_format:        "ndjson" or "parquet" (parquet needs pyarrow).
+        max_retries:        Retries per streaming chunk / load job.
+        job_timeout:        Seconds to wait on a load job per attempt before
+                            polling its state again.
+        base_backoff:       First retry delay in seconds (doubles each retry).
+        stream_chunk_rows:  Max rows per insert_rows_json request.
+        stream_chunk_bytes: Max JSON payload per insert_rows_json request.
+    """
+
+    def __init__(
+        self,
+        client,
+        stream_max_rows: int = 500,
+        load_format: str = "ndjson",
+        max_retries: int = 3,
+        job_timeout: float = 300,
+        base_backoff: float = 0.5,
+        stream_chunk_rows: int = 500,
+        stream_chunk_bytes: int = 9 * 1024 * 1024,
+    ):
+        if load_format not in LOAD_FORMATS:
+            raise ValueError(f"load_format must be one of {LOAD_FORMATS}, got {load_format!r}")
+        self.client = client
+        self.stream_max_rows = stream_max_rows
+        self.load_format = load_format
+        self.max_retries = max_retries
+        self.job_timeout = job_timeout
+        self.base_backoff = base_backoff
+        self.stream_chunk_rows = max(1, stream_chunk_rows)
+        self.stream_chunk_bytes = stream_chunk_bytes
+        self._buffers: Dict[str, List[dict]] = {}
+        self._buffer_keys: Dict[str, Optional[Sequence[str]]] = {}
+        self._schemas: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    # ── insert ids ─────────────────────────────────────────────
+    @staticmethod
+    def insert_id(row: Dict[str, Any], key_fields: Optional[Sequence[str]] = None) -> str:
+        """Stable id for `row`: its key fields joined, else a content hash."""
+        if key_fields:
+            return "|".join(str(row.get(field)) for field in key_fields)
+        return hashlib.sha256(_dumps(row).encode("utf-8")).hexdigest()[:32]
+
+    def _dedupe(self, rows: List[dict], key_fields: Optional[Sequence[str]]):
+        seen = set()
+        unique_rows, ids = [], []
+        for row in rows:
+            row_id = self.insert_id(row, key_fields)
+            if row_id in seen:
+                continue
+            seen.add(row_id)
+            unique_rows.append(row)
+            ids.append(row_id)
+        return unique_rows, ids
+
+    def _sleep(self, attempt: int) -> None:
+        time.sleep(self.base_backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+    # ── public API ─────────────────────────────────────────────
+    def load(
+        self,
+        table: str,
+        rows: List[dict],
+        key_fields: Optional[Sequence[str]] = None,
+        method: str = "auto",
+    ) -> Dict[str, Any]:
+        """
+        Write `rows` to `table` ("project.dataset.table").
+
+        method: "auto" (by batch size), "stream" or "load_job".
+        Returns {"method", "rows", "inserted", "duplicates", "errors", "attempts"};
+        "errors" lists the rows that could not be written.
+        """
+        unique_rows, ids = self._dedupe(list(rows), key_fields)
+        if method == "auto":
+            method = "stream" if len(unique_rows) <= self.stream_max_rows else "load_job"
+        if method not in ("stream", "load_job"):
+            raise ValueError(f"method must be 'auto', 'stream' or 'load_job', got {method!r}")
+
+        result = {
+            "method": method,
+            "rows": len(rows),
+            "inserted": 0,
+            "duplicates": len(rows) - len(unique_rows),
+            "errors": [],
+            "attempts": 0,
+        }
+        if not unique_rows:
+            return result
+        if method == "stream":
+            self._stream(table, unique_rows, ids, result)
+        else:
+            self._load_job(table, unique_rows, result)
+        return result
+
+    def append(self, table: str, rows: List[dict], key_fields: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Buffer rows for `table`; once more than stream_max_rows are waiting
+        they are written in one load job. Returns the load result when a
+        flush happened, else None.
+        """
+        with self._lock:
+            self._buffers.setdefault(table, []).extend(rows)
+            self._buffer_keys[table] = key_fields
+            if len(self._buffers[table]) <= self.stream_max_rows:
+                return None
+            pending = self._buffers.pop(table)
+        return self.load(table, pending, key_fields)
+
+    def flush(self) -> Dict[str, Dict[str, Any]]:
+        """Write every buffered table; returns {table: load result}."""
+        with self._lock:
+            buffers, self._buffers = self._buffers, {}
+        return {
+            table: self.load(table, rows, self._buffer_keys.get(table))
+            for table, rows in buffers.items()
+        }
+
+    # ── streaming ──────────────────────────────────────────────
+    def _chunks(self, rows: List[dict], ids: List[str]):
+        chunk_rows, chunk_ids, size = [], [], 0
+        for row, row_id in zip(rows, ids):
+            row_size = len(_dumps(row))
+            if chunk_rows and (
+                len(chunk_rows) >= self.stream_chunk_rows
+                or size + row_size > self.stream_chunk_bytes
+            ):
+                yield chunk_rows, chunk_ids
+                chunk_rows, chunk_ids, size = [], [], 0
+            chunk_rows.append(row)
+            chunk_ids.append(row_id)
+            size += row_size
+        if chunk_rows:
+            yield chunk_rows, chunk_ids
+
+    def _stream(self, table: str, rows: List[dict], ids: List[str], result: Dict[str, Any]) -> None:
+        for chunk_rows, chunk_ids in self._chunks(rows, ids):
+            pending_rows = [json.loads(_dumps(r)) for r in chunk_rows]
+            pending_ids = chunk_ids
+            for attempt in range(self.max_retries + 1):
+                result["attempts"] += 1
+                try:
+                    errors = self.client.insert_rows_json(table, pending_rows, row_ids=pending_ids)
+                except Exception as exc:
+                    if attempt >= self.max_retries:
+                        result["errors"].extend(
+                            {"insert_id": i, "errors": [{"reason": "request", "message": str(exc)}]}
+                            for i in pending_ids
+                        )
+                        break
+                    self._sleep(attempt)
+                    continue
+
+                failed = {e["index"]: e.get("errors", []) for e in errors or []}
+                retry_rows, retry_ids = [], []
+                for index, (row, row_id) in enumerate(zip(pending_rows, pending_ids)):
+                    row_errors = failed.get(index)
+                    if row_errors is None:
+                        result["inserted"] += 1
+                    elif all(e.get("reason") in _RETRYABLE_REASONS for e in row_errors) \
+                            and attempt < self.max_retries:
+                        retry_rows.append(row)
+                        retry_ids.append(row_id)
+                    else:
+                        result["errors"].append({"insert_id": row_id, "errors": row_errors})
+                if not retry_rows:
+                    break
+                pending_rows, pending_ids = retry_rows, retry_ids
+                self._sleep(attempt)
+
+    # ── load jobs ──────────────────────────────────────────────
+    def _schema(self, table: str) -> list:
+        if table not in self._schemas:
+            self._schemas[table] = list(self.client.get_table(table).schema)
+        return self._schemas[table]
+
+    def _parquet(self, table: str, rows: List[dict]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_types = {
+            "INTEGER": pa.int64(), "INT64": pa.int64(),
+            "FLOAT": pa.float64(), "FLOAT64": pa.float64(),
+            "BOOLEAN": pa.bool_(), "BOOL": pa.bool_(),
+            "DATE": pa.date32(),
+            "DATETIME": pa.timestamp("us"),
+            "TIMESTAMP": pa.timestamp("us", tz="UTC"),
+        }
+        schema = self._schema(table)
+        fields = [pa.field(f.name, arrow_types.get(f.field_type, pa.string())) for f in schema]
+        parse = {f.name: _PARSERS[f.field_type] for f in schema if f.field_type in _PARSERS}
+        typed = [
+            {k: parse[k](v) if k in parse and isinstance(v, str) else v for k, v in row.items()}
+            for row in rows
+        ]
+        buf = io.BytesIO()
+        pq.write_table(pa.Table.from_pylist(typed, schema=pa.schema(fields)), buf)
+        return buf, schema
+
+    def _payload(self, table: str, rows: List[dict]):
+        from google.cloud import bigquery
+
+        schema = None
+        if self.load_format == "parquet":
+            buf, schema = self._parquet(table, rows)
+            source_format = bigquery.SourceFormat.PARQUET
+        else:
+            buf = io.BytesIO("\n".join(_dumps(r) for r in rows).encode("utf-8"))
+            source_format = bigquery.SourceFormat.NEWLINE_DELIMITED_JSON
+        job_config = bigquery.LoadJobConfig(
+            source_format=source_format,
+            write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+            schema=schema,
+        )
+        return buf, job_config
+
+    def _load_job(self, table: str, rows: List[dict], result: Dict[str, Any]) -> None:
+        from google.api_core.exceptions import Conflict
+
+        buf, job_config = self._payload(table, rows)
+        # Every resend and re-poll uses the same job id, so a request whose
+        # answer was lost, or a job still running when the wait gave up, is
+        # never loaded twice. Only a job that finished with an error is
+        # retried, under a fresh id.
+        job_id = f"market_load_{uuid.uuid4().hex}"
+        job = None
+        for attempt in range(self.max_retries + 1):
+            result["attempts"] += 1
+            try:
+                if job is None:
+                    try:
+                        job = self.client.load_table_from_file(
+                            buf, table, rewind=True, job_id=job_id, job_config=job_config
+                        )
+                    except Conflict:
+                        job = self.client.get_job(job_id)
+                job.result(timeout=self.job_timeout)
+                result["inserted"] = len(rows)
+                return
+            except Exception as exc:
+                error = str(exc)
+
+            if job is not None:
+                try:
+                    job = self.client.get_job(job_id)
+                except Exception:
+                    pass    # state unknown: keep polling the same id
+                else:
+                    if job.state == "DONE" and job.error_result is None:
+                        result["inserted"] = len(rows)
+                        return
+                    if job.state == "DONE":
+                        error = str(job.error_result)
+                        if attempt < self.max_retries:
+                            job_id, job = f"market_load_{uuid.uuid4().hex}", None
+                    elif attempt >= self.max_retries:
+                        error = f"job still {job.state} after {attempt + 1} waits; it may still load"
+
+            if attempt >= self.max_retries:
+                result["errors"].append({"job_id": job_id, "message": error})
+                return
+            self._sleep(attempt)
+
+
+def _parse_timestamp(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+# Parsers for ISO strings bound for typed Parquet columns
+_PARSERS = {
+    "DATE": lambda value: date.fromisoformat(value[:10]),
+    "DATETIME": datetime.fromisoformat,
+    "TIMESTAMP": _parse_timestamp,
+}
+
+
+def describe(result: Dict[str, Any]) -> str:
+    """One-line summary of a load() result for tool responses."""
+    text = f"{result['inserted']} rows written via {result['method'].replace('_', ' ')}"
+    if result["duplicates"]:
+        text += f", {result['duplicates']} duplicates skipped"
+    if result["errors"]:
+        text += f", {len(result['errors'])} failed: {result['errors'][:5]}"
+    return text
+
+
+__all__ = ["BigQueryLoader", "describe", "LOAD_FORMATS"]
@@ -0,0 +1,33 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# market_agent is imported as a namespace package from the project root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from market_agent.tools.analytics import SQLiteBackend
+
+
+class CountingBackend(SQLiteBackend):
+    """SQLite stand-in that records every DML statement it runs."""
+
+    def __init__(self):
+        super().__init__()
+        self.statements = []
+
+    def execute(self, sql, params):
+        self.statements.append(sql.split()[0].upper())
+        super().execute(sql, params)
+
+
+@pytest.fixture
+def backend() -> CountingBackend:
+    backend = CountingBackend()
+    backend.conn.executescript("""
+        CREATE TABLE products (product_id TEXT PRIMARY KEY, product_name TEXT, category TEXT);
+        CREATE TABLE sales (sale_id TEXT PRIMARY KEY, product_id TEXT, sale_date TEXT, revenue REAL);
+        CREATE TABLE market_growth (report_date TEXT, category TEXT, growth_percent REAL, source TEXT);
+        INSERT INTO products VALUES ('P1', 'Shield', 'Cloud Security'), ('P2', 'Vault', 'Storage');
+    """)
+    return backend
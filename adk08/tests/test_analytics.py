@@ -0,0 +1,105 @@
+from datetime import date, timedelta
+
+import pytest
+
+from market_agent.tools.analytics import AnalyticsBackend, CategoryAnalytics, parse_period
+
+TODAY = date(2026, 3, 31)
+
+
+def day(offset: int) -> str:
+    return (TODAY - timedelta(days=offset)).isoformat()
+
+
+def add_sale(backend, sale_id, product_id, offset, revenue):
+    backend.conn.execute("INSERT INTO sales VALUES (?, ?, ?, ?)", (sale_id, product_id, day(offset), revenue))
+    backend.conn.commit()
+
+
+def revenue(analytics) -> float:
+    return analytics.performance("Cloud Security", "30d", ["revenue"], today=TODAY)["revenue"]
+
+
+@pytest.fixture
+def analytics(backend):
+    analytics = CategoryAnalytics(backend, use_rollups=True, rollup_lookback_days=3)
+    add_sale(backend, "S1", "P1", 1, 100.0)
+    add_sale(backend, "S2", "P2", 1, 999.0)
+    return analytics
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        AnalyticsBackend()
+
+
+def test_parse_period_previous_window_has_equal_length():
+    previous_start, start, end = parse_period("30d", TODAY)
+    assert end - start == start - previous_start == timedelta(days=30)
+
+
+def test_rollups_match_the_sales_table(backend, analytics):
+    direct = CategoryAnalytics(backend, cache_ttl_seconds=0)
+    add_sale(backend, "S3", "P1", 35, 40.0)
+    analytics.invalidate([day(35)])
+    assert analytics.performance("Cloud Security", "30d", today=TODAY) == \
+        direct.performance("Cloud Security", "30d", today=TODAY)
+
+
+def test_backdated_sale_reaches_the_rollup(backend, analytics):
+    """A sale older than the watermark lookback is picked up via its date."""
+    assert revenue(analytics) == 100.0
+    add_sale(backend, "S3", "P1", 10, 50.0)
+    analytics.invalidate([day(10)])
+    assert revenue(analytics) == 150.0
+
+
+def test_edits_and_deletes_of_old_sales_reach_the_rollup(backend, analytics):
+    add_sale(backend, "S3", "P1", 10, 50.0)
+    analytics.invalidate([day(10)])
+    assert revenue(analytics) == 150.0
+
+    # Moved out of the period: both the old and the new day change
+    backend.conn.execute("UPDATE sales SET sale_date = ? WHERE sale_id = 'S3'", (day(45),))
+    analytics.invalidate([day(10), day(45)])
+    assert revenue(analytics) == 100.0
+    assert analytics.performance("Cloud Security", "30d", ["previous_revenue"], today=TODAY)["previous_revenue"] == 50.0
+
+    backend.conn.execute("DELETE FROM sales WHERE sale_id = 'S3'")
+    analytics.invalidate([day(45)])
+    assert analytics.performance("Cloud Security", "30d", ["previous_revenue"], today=TODAY)["previous_revenue"] == 0.0
+
+
+def test_reads_after_a_write_run_dml_once(backend, analytics):
+    revenue(analytics)
+    backend.statements.clear()
+
+    add_sale(backend, "S3", "P1", 10, 50.0)
+    analytics.invalidate([day(10)])
+    for _ in range(3):
+        revenue(analytics)
+    assert backend.statements.count("DELETE") == 1
+    assert backend.statements.count("INSERT") == 1
+
+    # Writes that touch no sale dates (market benchmarks) cost no DML
+    backend.statements.clear()
+    analytics.invalidate()
+    revenue(analytics)
+    assert backend.statements.count("DELETE") == 0
+
+
+def test_nearby_dates_share_one_recompute(analytics):
+    touched = [day(20), day(18), day(2), day(60)]
+    result = analytics.refresh_rollups(dates=touched)
+    assert result["refreshed_ranges"] == [[day(60), day(60)], [day(20), day(18)], [day(2), day(2)]]
+
+
+def test_cache_is_cleared_by_invalidate(backend):
+    analytics = CategoryAnalytics(backend)
+    add_sale(backend, "S1", "P1", 1, 100.0)
+    assert revenue(analytics) == 100.0
+    add_sale(backend, "S2", "P1", 2, 25.0)
+    assert revenue(analytics) == 100.0   # served from the cache
+    analytics.invalidate()
+    assert revenue(analytics) == 125.0
+    assert analytics.cache.hits == 1
@@ -0,0 +1,95 @@
+import concurrent.futures
+from types import SimpleNamespace
+
+import pyarrow.parquet as pq
+from google.cloud import bigquery
+
+from market_agent.tools.bq_loader import BigQueryLoader
+
+SALES = "project.dataset.sales"
+
+
+class FakeJob:
+    def __init__(self, outcomes):
+        # One entry per result() call: "ok", "timeout" or "fail"
+        self.outcomes = list(outcomes)
+        self.state = "RUNNING"
+        self.error_result = None
+
+    def result(self, timeout=None):
+        outcome = self.outcomes.pop(0) if self.outcomes else "ok"
+        if outcome == "timeout":
+            raise concurrent.futures.TimeoutError("still running")
+        self.state = "DONE"
+        if outcome == "fail":
+            self.error_result = {"reason": "invalid", "message": "bad row"}
+            raise RuntimeError("load failed")
+
+
+class FakeClient:
+    """Just the client methods BigQueryLoader uses."""
+
+    def __init__(self, jobs):
+        self.jobs = list(jobs)
+        self.submitted = {}
+        self.payloads = []
+
+    def load_table_from_file(self, buf, table, rewind, job_id, job_config):
+        buf.seek(0)
+        self.payloads.append((buf.read(), job_config))
+        self.submitted[job_id] = self.jobs.pop(0)
+        return self.submitted[job_id]
+
+    def get_job(self, job_id):
+        return self.submitted[job_id]
+
+    def get_table(self, table):
+        return SimpleNamespace(schema=[
+            bigquery.SchemaField("sale_id", "STRING"),
+            bigquery.SchemaField("sale_date", "DATE"),
+            bigquery.SchemaField("revenue", "FLOAT64"),
+        ])
+
+
+def rows(n=3):
+    return [{"sale_id": f"S{i}", "sale_date": "2026-03-0%d" % (i % 9 + 1), "revenue": 10.0 * i} for i in range(n)]
+
+
+def load(client, **kwargs):
+    loader = BigQueryLoader(client, stream_max_rows=0, base_backoff=0, **kwargs)
+    return loader.load(SALES, rows(), key_fields=("sale_id",))
+
+
+def test_timeout_repolls_the_same_job():
+    """A slow job is awaited again, never submitted a second time."""
+    client = FakeClient([FakeJob(["timeout", "timeout", "ok"])])
+    result = load(client)
+    assert result["inserted"] == 3 and not result["errors"]
+    assert len(client.payloads) == 1
+
+
+def test_failed_job_is_resubmitted_under_a_new_id():
+    client = FakeClient([FakeJob(["fail"]), FakeJob(["ok"])])
+    result = load(client)
+    assert result["inserted"] == 3
+    assert len(client.submitted) == 2
+
+
+def test_job_still_running_after_all_retries_is_reported_not_resent():
+    client = FakeClient([FakeJob(["timeout"] * 10)])
+    result = load(client, max_retries=2)
+    assert result["inserted"] == 0
+    assert len(client.payloads) == 1
+    assert "may still load" in result["errors"][0]["message"]
+
+
+def test_parquet_load_uses_the_table_schema(tmp_path):
+    client = FakeClient([FakeJob(["ok"])])
+    load(client, load_format="parquet")
+    payload, job_config = client.payloads[0]
+
+    path = tmp_path / "rows.parquet"
+    path.write_bytes(payload)
+    table = pq.read_table(path)
+    assert str(table.schema.field("sale_date").type) == "date32[day]"
+    assert [f.field_type for f in job_config.schema] == ["STRING", "DATE", "FLOAT64"]
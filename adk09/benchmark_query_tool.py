@@ -0,0 +1,211 @@
+"""
+Benchmark for market_agent/tools/query_tool.py.
+
+Needs a reachable PostgreSQL server (same DB_* settings as the agent),
+for example a throw-away container:
+
+    docker run --rm -d -p 5432:5432 -e POSTGRES_PASSWORD=abcd1234 postgres:16
+    python benchmark_query_tool.py
+
+Everything runs in a scratch schema (BENCH_SCHEMA, default
+"market_bench") that is dropped at the end — the agent's own
+DB_SCHEMA is never touched.
+
+Reports:
+  ingest  — rows/s for row-by-row INSERT (the old create_sale path),
+            execute_values and COPY
+  queries — queries/s for the Cloud Security growth query:
+              before: fresh psycopg2.connect + plain SQL per call
+              after : pooled connection + prepared statement
+              after : same, from 8 threads
+              after : same, from 4 x DB_POOL_MAX threads (callers queue
+                      for a connection instead of getting PoolError)
+
+With no server at hand, an embedded one works too:
+
+    pip install pgserver
+    python -c "import pgserver; print(pgserver.get_server('/tmp/pg').get_uri())"
+    DB_HOST=/tmp/pg DB_PASSWORD= python benchmark_query_tool.py
+"""
+
+import os
+import time
+import random
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Point query_tool at the scratch schema before it reads its config.
+os.environ["DB_SCHEMA"] = os.getenv("BENCH_SCHEMA", "market_bench")
+
+import psycopg2  # noqa: E402
+
+from market_agent.config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD, DB_SCHEMA, DB_POOL_MAX  # noqa: E402
+from market_agent.tools import query_tool  # noqa: E402
+
+CATEGORIES = ["Cloud Security", "Endpoint Security", "Identity", "Network Security", "SIEM"]
+
+GROWTH_SQL = """
+    SELECT
+        COALESCE(SUM(CASE WHEN s.sale_date >= %s THEN s.revenue END), 0) AS current_revenue,
+        COALESCE(SUM(CASE WHEN s.sale_date >= %s
+                          AND s.sale_date < %s THEN s.revenue END), 0) AS previous_revenue
+    FROM sales s
+    JOIN products p ON s.product_id = p.product_id
+    WHERE p.category = 'Cloud Security'
+      AND s.sale_date >= %s
+"""
+
+
+def _connect():
+    return psycopg2.connect(
+        dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD,
+        host=DB_HOST, port=DB_PORT, options=f"-c search_path={DB_SCHEMA}",
+    )
+
+
+def setup_schema() -> None:
+    with _connect() as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {DB_SCHEMA} CASCADE")
+        cur.execute(f"CREATE SCHEMA {DB_SCHEMA}")
+        cur.execute("""
+            CREATE TABLE products (
+                product_id VARCHAR NOT NULL PRIMARY KEY,
+                product_name VARCHAR NOT NULL,
+                category VARCHAR NOT NULL
+            );
+            CREATE TABLE sales (
+                sale_id VARCHAR NOT NULL PRIMARY KEY,
+                product_id VARCHAR NOT NULL,
+                sale_date DATE NOT NULL,
+                revenue DOUBLE PRECISION NOT NULL
+            );
+            CREATE TABLE market_growth (
+                report_date DATE NOT NULL,
+                category VARCHAR NOT NULL,
+                growth_percent DOUBLE PRECISION NOT NULL,
+                source VARCHAR,
+                PRIMARY KEY (report_date, category)
+            );
+        """)
+
+
+def drop_schema() -> None:
+    query_tool.close_pool()
+    with _connect() as conn, conn.cursor() as cur:
+        cur.execute(f"DROP SCHEMA IF EXISTS {DB_SCHEMA} CASCADE")
+
+
+def _sales(prefix: str, n: int, rng: random.Random):
+    today = datetime.date.today()
+    return [
+        {
+            "sale_id": f"{prefix}{i}",
+            "product_id": f"P{rng.randrange(50):03d}",
+            "sale_date": today - datetime.timedelta(days=rng.randrange(730)),
+            "revenue": round(rng.uniform(100, 10_000), 2),
+        }
+        for i in range(n)
+    ]
+
+
+def bench_ingest(rows: int, row_by_row: int) -> None:
+    rng = random.Random(1)
+    products = [
+        {"product_id": f"P{i:03d}", "product_name": f"Product {i}", "category": CATEGORIES[i % len(CATEGORIES)]}
+        for i in range(50)
+    ]
+    query_tool.bulk_insert("products", products)
+
+    # before: one connection + one INSERT per row, as create_sale did
+    legacy = _sales("L", row_by_row, rng)
+    t0 = time.perf_counter()
+    for r in legacy:
+        with _connect() as conn, conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO sales (sale_id, product_id, sale_date, revenue) VALUES (%s, %s, %s, %s)",
+                (r["sale_id"], r["product_id"], r["sale_date"], r["revenue"]),
+            )
+        conn.close()
+    legacy_rate = row_by_row / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    query_tool.bulk_insert("sales", _sales("V", rows, rng), method="execute_values")
+    values_rate = rows / (time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    query_tool.bulk_insert("sales", _sales("C", rows, rng), method="copy")
+    copy_rate = rows / (time.perf_counter() - t0)
+
+    with _connect() as conn, conn.cursor() as cur:
+        cur.execute("ANALYZE")
+
+    print("\nIngest (rows/s)")
+    print(f"  row-by-row INSERT ({row_by_row:,} rows) : {legacy_rate:12,.0f}")
+    print(f"  execute_values    ({rows:,} rows) : {values_rate:12,.0f}")
+    print(f"  COPY              ({rows:,} rows) : {copy_rate:12,.0f}")
+
+
+def _legacy_growth(days: int = 30) -> None:
+    today = datetime.date.today()
+    start_current = today - datetime.timedelta(days=days)
+    start_prev = start_current - datetime.timedelta(days=days)
+    conn = _connect()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(GROWTH_SQL, (start_current, start_prev, start_current, start_prev))
+            cur.fetchone()
+    finally:
+        conn.close()
+
+
+def _qps(fn, calls: int, threads: int = 1) -> float:
+    t0 = time.perf_counter()
+    if threads == 1:
+        for _ in range(calls):
+            fn()
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            list(pool.map(lambda _: fn(), range(calls)))
+    return calls / (time.perf_counter() - t0)
+
+
+def _growth() -> None:
+    # The tool reports database errors (PoolError included) instead of raising
+    result = query_tool.get_cloud_security_sales_growth(30)
+    assert result["status"] == "success", result["message"]
+
+
+def bench_queries(calls: int) -> None:
+    _growth()  # warm the pool
+    before = _qps(_legacy_growth, calls)
+    after = _qps(_growth, calls)
+    after_threads = _qps(_growth, calls, threads=8)
+    crowded = 4 * DB_POOL_MAX
+    after_crowded = _qps(_growth, calls, threads=crowded)
+
+    print("\nCloud Security growth query (queries/s)")
+    print(f"  before: connect per call, plain SQL  : {before:10,.1f}")
+    print(f"  after : pooled + prepared            : {after:10,.1f}")
+    print(f"  after : pooled + prepared, 8 threads : {after_threads:10,.1f}")
+    print(f"  after : pooled + prepared, {crowded} threads: {after_crowded:10,.1f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000, help="rows per bulk-load method")
+    parser.add_argument("--row-by-row", type=int, default=500, help="rows for the row-by-row baseline")
+    parser.add_argument("--calls", type=int, default=500, help="growth queries per variant")
+    args = parser.parse_args()
+
+    print(f"PostgreSQL {DB_HOST}:{DB_PORT}/{DB_NAME}, scratch schema '{DB_SCHEMA}'")
+    setup_schema()
+    try:
+        bench_ingest(args.rows, args.row_by_row)
+        bench_queries(args.calls)
+    finally:
+        drop_schema()
+
+
+if __name__ == "__main__":
+    main()
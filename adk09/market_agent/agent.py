@@ -10,7 +10,7 @@ MODEL = LiteLlm(model="ollama_chat/llama3.2:3b")
 from market_agent.tools.search_tool import search
 
 # Query tool
-from market_agent.tools.query_tool import get_cloud_security_sales_growth, product_tool, sale_tool, market_growth_tool
+from market_agent.tools.query_tool import get_cloud_security_sales_growth, product_tool, sale_tool, market_growth_tool, bulk_insert_tool
 
 # ------------------------------------------------------------
 # Market Intelligence Agent
@@ -31,6 +31,7 @@ market_intelligence_agent = LlmAgent(
         product_tool,
         sale_tool,
         market_growth_tool,
+        bulk_insert_tool,
         get_cloud_security_sales_growth, # Internal sales analytics
         
     ]
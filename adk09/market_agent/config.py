@@ -13,3 +13,10 @@ DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "abcd1234")
 DB_SCHEMA = os.getenv("DB_SCHEMA", "market_intelligence")
 
+# ---- Connection pool / bulk load ----
+
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
+DB_POOL_HEALTHCHECK_SECONDS = float(os.getenv("DB_POOL_HEALTHCHECK_SECONDS", 30))
+DB_POOL_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", 30))
+DB_COPY_THRESHOLD = int(os.getenv("DB_COPY_THRESHOLD", 5000))
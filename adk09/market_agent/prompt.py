@@ -19,6 +19,7 @@ You have these tools:
 - product_tool        → manage products (create, read/list, update, delete)
 - sale_tool           → manage sales records (create, read/list, update, delete)
 - market_growth_tool  → manage external benchmark records (create, read/list, update, delete)
+- bulk_insert_tool    → add many products / sales / benchmark records in one call
 
 Follow these rules strictly:
 
@@ -38,6 +39,7 @@ Follow these rules strictly:
    - For create/add: provide all required fields
    - For update: provide at least one field to change + identifier
    - For delete: provide the identifier
+   - When adding more than a few records at once, use bulk_insert_tool instead
    - For list/read: use "read" or "list" operation, optionally with filter
 
 3. General rules:
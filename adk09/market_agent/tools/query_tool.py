@@ -1,8 +1,13 @@
 # query_tool.py
+import io
+import time
+import threading
 from datetime import date, timedelta
 from typing import Optional, List, Dict, Any, Union
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.extensions
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import PoolError, ThreadedConnectionPool
 from contextlib import contextmanager
 from market_agent.config import (
     DB_HOST,
@@ -11,22 +16,154 @@ from market_agent.config import (
     DB_USER,
     DB_PASSWORD,
     DB_SCHEMA,
+    DB_POOL_MIN,
+    DB_POOL_MAX,
+    DB_POOL_HEALTHCHECK_SECONDS,
+    DB_POOL_TIMEOUT_SECONDS,
+    DB_COPY_THRESHOLD,
 )
 
+# ================================================================
+# CONNECTION POOL
+# ================================================================
+#
+# One pool per process, created on first use. Connections are reused
+# across tool calls, so an agent question no longer pays the TCP + auth
+# handshake. A connection that has been idle longer than
+# DB_POOL_HEALTHCHECK_SECONDS is pinged with SELECT 1 before it is
+# handed out; a dead one is discarded and replaced.
+#
+# ThreadedConnectionPool raises PoolError instead of waiting when all
+# DB_POOL_MAX connections are out, so callers first take a slot from a
+# semaphore of the same size and queue there (up to
+# DB_POOL_TIMEOUT_SECONDS) when the pool is busy.
+
+class _PooledConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers its prepared statements and last use."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+        self.last_used = time.monotonic()
+
+
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_slots = threading.BoundedSemaphore(DB_POOL_MAX)
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ThreadedConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadedConnectionPool(
+                    DB_POOL_MIN,
+                    DB_POOL_MAX,
+                    dbname=DB_NAME,
+                    user=DB_USER,
+                    password=DB_PASSWORD,
+                    host=DB_HOST,
+                    port=DB_PORT,
+                    options=f"-c search_path={DB_SCHEMA}",
+                    connection_factory=_PooledConnection,
+                )
+    return _pool
+
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+
+def _is_healthy(conn: _PooledConnection) -> bool:
+    if conn.closed:
+        return False
+    if time.monotonic() - conn.last_used < DB_POOL_HEALTHCHECK_SECONDS:
+        return True
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+
 @contextmanager
 def get_connection():
-    conn = psycopg2.connect(
-        dbname=DB_NAME,
-        user=DB_USER,
-        password=DB_PASSWORD,
-        host=DB_HOST,
-        port=DB_PORT,
-        options=f"-c search_path={DB_SCHEMA}"
-    )
+    if not _pool_slots.acquire(timeout=DB_POOL_TIMEOUT_SECONDS):
+        raise PoolError(f"no database connection free after {DB_POOL_TIMEOUT_SECONDS:g}s")
     try:
-        yield conn
+        pool = _get_pool()
+        conn = pool.getconn()
+        # At most one retry: a second dead connection means the server is down.
+        if not _is_healthy(conn):
+            pool.putconn(conn, close=True)
+            conn = pool.getconn()
+        try:
+            yield conn
+        finally:
+            # Never hand an open / failed transaction to the next caller.
+            broken = bool(conn.closed)
+            if not broken:
+                try:
+                    if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                        conn.rollback()
+                except psycopg2.Error:
+                    broken = True
+            conn.last_used = time.monotonic()
+            pool.putconn(conn, close=broken)
     finally:
-        conn.close()
+        _pool_slots.release()
+
+
+# ================================================================
+# PREPARED STATEMENTS
+# ================================================================
+#
+# The fixed analytic / lookup queries are PREPAREd once per pooled
+# connection and then run with EXECUTE, so Postgres parses and plans
+# them once instead of on every tool call.
+
+_PREPARED_STATEMENTS = {
+    "category_revenue_growth": ("""
+        PREPARE category_revenue_growth (date, date, text) AS
+        SELECT
+            COALESCE(SUM(CASE WHEN s.sale_date >= $1 THEN s.revenue END), 0)
+                AS current_revenue,
+            COALESCE(SUM(CASE WHEN s.sale_date >= $2
+                              AND s.sale_date < $1 THEN s.revenue END), 0)
+                AS previous_revenue
+        FROM sales s
+        JOIN products p ON s.product_id = p.product_id
+        WHERE p.category = $3
+          AND s.sale_date >= $2
+    """, 3),
+    "products_by_category": (
+        "PREPARE products_by_category (text) AS "
+        "SELECT * FROM products WHERE category = $1 ORDER BY product_name",
+        1,
+    ),
+    "market_growth_by_category": (
+        "PREPARE market_growth_by_category (text) AS "
+        "SELECT * FROM market_growth WHERE category = $1 ORDER BY report_date DESC",
+        1,
+    ),
+}
+
+
+def _execute_prepared(conn: _PooledConnection, cur, name: str, params: tuple) -> None:
+    sql, arity = _PREPARED_STATEMENTS[name]
+    if name not in conn.prepared:
+        cur.execute(sql)
+        conn.prepared.add(name)
+    placeholders = ", ".join(["%s"] * arity)
+    cur.execute(f"EXECUTE {name} ({placeholders})", params)
+
 
 # ================================================================
 # PRODUCTS TABLE CRUD
@@ -44,16 +181,12 @@ def create_product(product_id: str, product_name: str, category: str) -> str:
 
 
 def read_products(category: Optional[str] = None) -> List[Dict[str, Any]]:
-    if category:
-        query = "SELECT * FROM products WHERE category = %s ORDER BY product_name"
-        params = (category,)
-    else:
-        query = "SELECT * FROM products ORDER BY product_name"
-        params = ()
-
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(query, params)
+            if category:
+                _execute_prepared(conn, cur, "products_by_category", (category,))
+            else:
+                cur.execute("SELECT * FROM products ORDER BY product_name")
             return cur.fetchall()
 
 
@@ -339,16 +472,12 @@ def create_market_growth(
 
 
 def read_market_growth(category: Optional[str] = None) -> List[Dict[str, Any]]:
-    if category:
-        query = "SELECT * FROM market_growth WHERE category = %s ORDER BY report_date DESC"
-        params = (category,)
-    else:
-        query = "SELECT * FROM market_growth ORDER BY report_date DESC"
-        params = ()
-
     with get_connection() as conn:
         with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute(query, params)
+            if category:
+                _execute_prepared(conn, cur, "market_growth_by_category", (category,))
+            else:
+                cur.execute("SELECT * FROM market_growth ORDER BY report_date DESC")
             return cur.fetchall()
 
 
@@ -449,6 +578,83 @@ def market_growth_tool(
             "Supported operations: create, read, update, delete"
         )
 
+# ================================================================
+# BULK INGEST
+# ================================================================
+#
+# Loads many rows in one round trip instead of one INSERT per row:
+# execute_values (multi-row INSERT, page_size rows per statement) for
+# small batches, COPY FROM STDIN for anything >= DB_COPY_THRESHOLD rows.
+#
+# In COPY's CSV format an unquoted empty field is NULL and a quoted one
+# ("") is an empty string, so every value is written quoted and only
+# None is left empty; both paths then store '' as '' and None as NULL.
+
+_BULK_COLUMNS = {
+    "products":      ("product_id", "product_name", "category"),
+    "sales":         ("sale_id", "product_id", "sale_date", "revenue"),
+    "market_growth": ("report_date", "category", "growth_percent", "source"),
+}
+
+
+def _csv_field(value: Any) -> str:
+    if value is None:
+        return ""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def bulk_insert(table: str, rows: List[Dict[str, Any]], method: str = "auto") -> Dict[str, Any]:
+    columns = _BULK_COLUMNS[table]
+    values = [tuple(row.get(c) for c in columns) for row in rows]
+    if method == "auto":
+        method = "copy" if len(values) >= DB_COPY_THRESHOLD else "execute_values"
+    col_list = ", ".join(columns)
+
+    with get_connection() as conn:
+        with conn.cursor() as cur:
+            if method == "copy":
+                buf = io.StringIO("".join(
+                    ",".join(_csv_field(v) for v in value) + "\n" for value in values
+                ))
+                cur.copy_expert(
+                    f"COPY {table} ({col_list}) FROM STDIN WITH (FORMAT csv)", buf
+                )
+            else:
+                execute_values(
+                    cur,
+                    f"INSERT INTO {table} ({col_list}) VALUES %s",
+                    values,
+                    page_size=1000,
+                )
+            conn.commit()
+    return {"status": "success", "table": table, "inserted": len(values), "method": method}
+
+
+def bulk_insert_tool(table: str, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Insert many records into one table in a single database round trip.
+
+    table: "products", "sales" or "market_growth"
+    rows:  list of records, each with every column of that table:
+      - products      → product_id, product_name, category
+      - sales         → sale_id, product_id, sale_date, revenue
+      - market_growth → report_date, category, growth_percent, source
+
+    All rows are inserted or none are.
+    """
+    if table not in _BULK_COLUMNS:
+        return {"status": "error", "message": f"Unknown table '{table}'. Use: {', '.join(_BULK_COLUMNS)}"}
+    if not rows:
+        return {"status": "error", "message": "No rows provided."}
+    missing = sorted({c for row in rows for c in _BULK_COLUMNS[table] if row.get(c) is None})
+    if missing:
+        return {"status": "error", "message": f"Missing column(s): {', '.join(missing)}"}
+    try:
+        return bulk_insert(table, rows)
+    except psycopg2.Error as db_err:
+        return {"status": "error", "message": f"Bulk insert failed: {str(db_err)}"}
+
+
 # ================================================================
 # ANALYTICAL QUERY – used by the agent
 # ================================================================
@@ -480,32 +686,14 @@ def get_cloud_security_sales_growth(days_back: Union[int, str] = 30) -> Dict[str
     start_current = today - timedelta(days=days)
     start_prev    = start_current - timedelta(days=days)
 
-    # ── SQL ──────────────────────────────────────────────────────────────────
-    query = """
-    SELECT
-        COALESCE(
-            SUM(CASE WHEN s.sale_date >= %s THEN s.revenue END),
-            0
-        ) AS current_revenue,
-
-        COALESCE(
-            SUM(CASE WHEN s.sale_date >= %s 
-                     AND s.sale_date < %s THEN s.revenue END),
-            0
-        ) AS previous_revenue
-    FROM sales s
-    JOIN products p ON s.product_id = p.product_id
-    WHERE p.category = 'Cloud Security'
-      AND s.sale_date >= %s
-    """
-
-    params = (start_current, start_prev, start_current, start_prev)
-
     # ── Execution with safety net ────────────────────────────────────────────
     try:
         with get_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(query, params)
+                _execute_prepared(
+                    conn, cur, "category_revenue_growth",
+                    (start_current, start_prev, "Cloud Security"),
+                )
                 row = cur.fetchone()
 
         # row can be None if zero rows → safe default
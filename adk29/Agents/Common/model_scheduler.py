@@ -0,0 +1,308 @@
+# model_scheduler.py
+# ─────────────────────────────────────────────────────────────
+# Process-wide Model Call Scheduler
+#
+# ParallelAgent starts every worker at once. With several user
+# sessions fanning out 6–8 google_search workers each, Gemini
+# answers with 429 RESOURCE_EXHAUSTED and workers come back empty.
+# Every search worker now runs its model call through ONE scheduler
+# per process:
+#
+#   • Global concurrency cap   — at most N model calls in flight.
+#   • Token bucket per model   — requests/minute limit per model id.
+#   • Priority                 — INTERACTIVE work (a user is waiting)
+#                                is admitted before BACKGROUND work.
+#   • Retry                    — 429 / 503 are retried with
+#                                exponential backoff + jitter; the
+#                                slot is released while backing off.
+#   • Metrics                  — queue depth, in-flight count and
+#                                wait-time stats via stats_line().
+#
+# Futures and locks belong to one event loop, so the admission
+# state (slots, waiters, buckets) is created lazily per running
+# loop; the limits apply per loop. adk web and the FastAPI app
+# each run a single loop, so in practice that is per process.
+# ─────────────────────────────────────────────────────────────
+
+import heapq
+import random
+import asyncio
+import logging
+import weakref
+import itertools
+from collections import deque
+from typing import AsyncGenerator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+
+T = TypeVar("T")
+
+# Lower value = admitted first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND  = 10
+
+_RETRYABLE_CODES   = {429, 503}
+_RETRYABLE_MARKERS = ("RESOURCE_EXHAUSTED", "429", "UNAVAILABLE", "503", "rate limit")
+
+
+def is_rate_limited(exc: BaseException) -> bool:
+    """True for quota / overload errors worth retrying (google.genai or HTTP)."""
+    code = getattr(exc, "code", None) or getattr(exc, "status_code", None)
+    if code in _RETRYABLE_CODES:
+        return True
+    text = str(exc)
+    return any(marker in text for marker in _RETRYABLE_MARKERS)
+
+
+# ─────────────────────────────────────────────────────────────
+# TOKEN BUCKET
+# ─────────────────────────────────────────────────────────────
+
+class TokenBucket:
+    """Classic token bucket: `rate_per_minute` refill, `capacity` burst."""
+
+    def __init__(self, rate_per_minute: float, capacity: int):
+        self.rate = max(rate_per_minute, 1.0) / 60.0     # tokens per second
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self._updated = None
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        async with self._lock:
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self.tokens = min(
+                        self.capacity, self.tokens + (now - self._updated) * self.rate
+                    )
+                self._updated = now
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self.tokens) / self.rate)
+
+
+# ─────────────────────────────────────────────────────────────
+# SCHEDULER
+# ─────────────────────────────────────────────────────────────
+
+class _LoopState:
+    """Slots, waiter futures and token buckets of one event loop."""
+
+    def __init__(self):
+        self.active = 0
+        self.waiters: List = []           # heap of (priority, seq, future)
+        self.buckets: Dict[str, TokenBucket] = {}
+
+
+class ModelScheduler:
+    """
+    Args:
+        max_concurrency:     Global cap on in-flight model calls.
+        requests_per_minute: Token-bucket refill rate, per model id.
+        max_retries:         Retries on 429 / 503 before giving up.
+        base_backoff:        First backoff delay in seconds (doubles each retry).
+        max_backoff:         Upper bound for a single backoff delay.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        requests_per_minute: float = 60,
+        max_retries: int = 4,
+        base_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.requests_per_minute = requests_per_minute
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.logger = logger or logging.getLogger("model_scheduler")
+
+        self._seq = itertools.count()
+        self._loops: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+        # metrics
+        self._waits = deque(maxlen=512)
+        self.total_calls = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    # ── admission ──────────────────────────────────────────────
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            state = self._loops[loop] = _LoopState()
+        return state
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(
+            1 for state in list(self._loops.values())
+            for _, _, fut in state.waiters if not fut.done()
+        )
+
+    @property
+    def in_flight(self) -> int:
+        return sum(state.active for state in list(self._loops.values()))
+
+    async def _acquire_slot(self, state: _LoopState, priority: int) -> None:
+        waiting = any(not fut.done() for _, _, fut in state.waiters)
+        if state.active < self.max_concurrency and not waiting:
+            state.active += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(state.waiters, (priority, next(self._seq), fut))
+        try:
+            await fut
+        except asyncio.CancelledError:
+            # Slot was already handed to us — pass it on.
+            if fut.done() and not fut.cancelled():
+                self._release_slot(state)
+            raise
+
+    def _release_slot(self, state: _LoopState) -> None:
+        # Hand the slot directly to the best waiter; active stays the same.
+        while state.waiters:
+            _, _, fut = heapq.heappop(state.waiters)
+            if not fut.done():
+                fut.set_result(None)
+                return
+        state.active -= 1
+
+    def _bucket(self, state: _LoopState, model: str) -> TokenBucket:
+        if model not in state.buckets:
+            state.buckets[model] = TokenBucket(self.requests_per_minute, self.max_concurrency)
+        return state.buckets[model]
+
+    # ── run ────────────────────────────────────────────────────
+    async def run(
+        self,
+        model: str,
+        call: Callable[[], Awaitable[T]],
+        priority: int = PRIORITY_INTERACTIVE,
+        label: str = "",
+    ) -> T:
+        """
+        Run `call()` (a fresh coroutine per attempt) inside a scheduler
+        slot, retrying rate-limit errors with jittered exponential backoff.
+        """
+        loop = asyncio.get_running_loop()
+        state = self._state()
+        attempt = 0
+        while True:
+            queued_at = loop.time()
+            depth = self.queue_depth
+            await self._acquire_slot(state, priority)
+            try:
+                await self._bucket(state, model).acquire()
+                waited = loop.time() - queued_at
+                self._waits.append(waited)
+                self.total_calls += 1
+                self.logger.debug(
+                    f"[Scheduler] {label or model} admitted after {waited:.2f}s "
+                    f"(queue_depth={depth}, in_flight={state.active})"
+                )
+                return await call()
+            except Exception as exc:
+                if not is_rate_limited(exc) or attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                self.rate_limited += 1
+                delay = min(self.max_backoff, self.base_backoff * (2 ** attempt))
+                delay *= random.uniform(0.5, 1.5)
+                attempt += 1
+                self.logger.warning(
+                    f"[Scheduler] {label or model} rate-limited "
+                    f"(attempt {attempt}/{self.max_retries}) — retrying in {delay:.1f}s"
+                )
+            finally:
+                self._release_slot(state)
+            await asyncio.sleep(delay)
+
+    # ── metrics ────────────────────────────────────────────────
+    def stats_line(self) -> str:
+        waits = sorted(self._waits)
+        avg = (sum(waits) / len(waits)) if waits else 0.0
+        p95 = waits[int(len(waits) * 0.95) - 1] if len(waits) >= 20 else (waits[-1] if waits else 0.0)
+        return (
+            f"queue_depth={self.queue_depth} in_flight={self.in_flight} "
+            f"calls={self.total_calls} rate_limited={self.rate_limited} "
+            f"failures={self.failures} wait_avg={avg:.2f}s wait_p95={p95:.2f}s "
+            f"wait_max={(waits[-1] if waits else 0.0):.2f}s"
+        )
+
+
+# ─────────────────────────────────────────────────────────────
+# SCHEDULED AGENT
+#
+# Wraps one LlmAgent (its only sub-agent) so its whole run happens
+# inside a scheduler slot. Inner events are buffered and re-yielded
+# after the call succeeds, so a retried attempt never leaks a
+# half-finished event stream — output_key state_delta still reaches
+# the session through the re-yielded final event. A call that still
+# fails after all retries yields nothing (the branch comes back empty).
+# ─────────────────────────────────────────────────────────────
+
+class ScheduledAgent(BaseAgent):
+
+    model: str
+    priority: int = PRIORITY_INTERACTIVE
+    model_config = {"arbitrary_types_allowed": True}
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        inner = self.sub_agents[0]
+
+        async def _call() -> List[Event]:
+            return [event async for event in inner.run_async(ctx)]
+
+        scheduler = get_scheduler()
+        try:
+            events = await scheduler.run(
+                self.model, _call, priority=self.priority, label=inner.name
+            )
+        except Exception as exc:
+            # One failed branch must not take down the whole ParallelAgent.
+            scheduler.logger.error(f"[Scheduler] {inner.name} failed: {exc}")
+            return
+        for event in events:
+            yield event
+
+
+# ─────────────────────────────────────────────────────────────
+# PROCESS-WIDE INSTANCE
+# ─────────────────────────────────────────────────────────────
+_scheduler: Optional[ModelScheduler] = None
+
+
+def configure_scheduler(**kwargs) -> ModelScheduler:
+    """Create the process-wide scheduler once; later calls return it unchanged."""
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ModelScheduler(**kwargs)
+    return _scheduler
+
+
+def get_scheduler() -> ModelScheduler:
+    return configure_scheduler()
+
+
+__all__ = [
+    "ModelScheduler",
+    "ScheduledAgent",
+    "TokenBucket",
+    "configure_scheduler",
+    "get_scheduler",
+    "is_rate_limited",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_BACKGROUND",
+]
@@ -10,7 +10,7 @@ import json
 import logging
 import datetime
 from pathlib import Path
-from typing import AsyncGenerator, ClassVar, List
+from typing import AsyncGenerator, ClassVar, List, Optional
 
 from google.adk.agents import LlmAgent, BaseAgent, SequentialAgent
 from google.adk.agents.parallel_agent import ParallelAgent
@@ -19,10 +19,13 @@ from google.adk.events import Event, EventActions
 from google.adk.tools.google_search_tool import google_search
 from google.adk.tools.mcp_tool import McpToolset
 from google.adk.tools.mcp_tool.mcp_session_manager import StdioConnectionParams
-from mcp import StdioServerParameters
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
 from google.genai import types
 
 from .config import config
+from Common.search_cache import shared_search_cache
+from Common.model_scheduler import PRIORITY_BACKGROUND, configure_scheduler
 
 # ─────────────────────────────────────────────────────────────
 # LOGGING
@@ -58,20 +61,36 @@ os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "0"
 
 PATH_TO_PYTHON = sys.executable
 
+_search_cache = shared_search_cache(config.SEARCH_CACHE_DB)
+
+# One scheduler per process — whichever agent imports first configures it.
+_scheduler = configure_scheduler(
+    max_concurrency=config.SCHEDULER_MAX_CONCURRENCY,
+    requests_per_minute=config.SCHEDULER_RPM,
+    max_retries=config.SCHEDULER_MAX_RETRIES,
+    logger=_pl_logger,
+)
+
 # ─────────────────────────────────────────────────────────────
 # FILE SYSTEM MCP TOOLSET
+# Same server params are used by the LLM fallback (McpToolset) and
+# by the direct bulk-write path in PlannerBuilderAgent.
 # ─────────────────────────────────────────────────────────────
+_FS_TIMEOUT_SECONDS = 60
+
+_FS_SERVER_PARAMS = StdioServerParameters(
+    command=PATH_TO_PYTHON,
+    args=[
+        "-u",
+        r"D:\Agent-Development-Kit\adk29\MCPServer\FileSystemMCP\file_system_mcp_server.py",
+    ],
+    cwd=r"D:\Agent-Development-Kit\adk29\MCPServer\FileSystemMCP",
+)
+
 _file_system_mcp = McpToolset(
     connection_params=StdioConnectionParams(
-        server_params=StdioServerParameters(
-            command=PATH_TO_PYTHON,
-            args=[
-                "-u",
-                r"D:\Agent-Development-Kit\adk29\MCPServer\FileSystemMCP\file_system_mcp_server.py",
-            ],
-            cwd=r"D:\Agent-Development-Kit\adk29\MCPServer\FileSystemMCP",
-        ),
-        timeout_in_seconds=60,
+        server_params=_FS_SERVER_PARAMS,
+        timeout_in_seconds=_FS_TIMEOUT_SECONDS,
     )
 )
 _pl_logger.debug("File System MCP toolset configured.")
@@ -523,7 +542,12 @@ _pl_logger.debug("pl_query_agent defined.")
 # ─────────────────────────────────────────────────────────────
 
 class PlannerSearchWorker(BaseAgent):
-    """Runs a single google_search query and saves the result to state."""
+    """
+    Runs a single google_search query and saves the result to state.
+    Scaffold research is a long batch step, so its model call goes
+    through the scheduler as BACKGROUND work: research and chat
+    searches that a user is waiting on are admitted first.
+    """
 
     worker_index: int
     query_key:    str
@@ -571,16 +595,26 @@ Output ONLY the summary — no preamble.
             tools=[google_search],
         )
 
-        result_text = ""
-        async for event in inner.run_async(ctx):
-            if (
-                event.is_final_response()
-                and event.content
-                and event.content.parts
-            ):
-                for part in event.content.parts:
-                    if getattr(part, "text", None):
-                        result_text += part.text
+        async def _search() -> str:
+            text = ""
+            async for event in inner.run_async(ctx):
+                if (
+                    event.is_final_response()
+                    and event.content
+                    and event.content.parts
+                ):
+                    for part in event.content.parts:
+                        if getattr(part, "text", None):
+                            text += part.text
+            return text
+
+        try:
+            result_text = await _scheduler.run(
+                MODEL, _search, priority=PRIORITY_BACKGROUND, label=self.name
+            )
+        except Exception as e:
+            _pl_logger.error(f"[{self.name}] Search failed after retries: {e}")
+            result_text = ""
 
         _pl_logger.info(f"[{self.name}] Result length: {len(result_text)} chars")
 
@@ -597,7 +631,11 @@ Output ONLY the summary — no preamble.
 
 
 class PlannerFanOutAgent(BaseAgent):
-    """Parses query plan, writes queries to state, runs parallel searches."""
+    """
+    Parses query plan, writes queries to state, runs parallel searches.
+    Near-duplicate queries are collapsed and cached results are written
+    straight to state — workers only run for the remaining queries.
+    """
 
     MAX_WORKERS: ClassVar[int] = 6
 
@@ -628,6 +666,8 @@ class PlannerFanOutAgent(BaseAgent):
 
         queries: List[str] = parsed.get("queries", [])
         queries      = queries[: self.MAX_WORKERS]
+        plan         = _search_cache.plan(queries, label="planner", logger=_pl_logger)
+        queries      = plan.unique
         project_type = parsed.get("project_type", "unknown")
         language     = parsed.get("language", "unknown")
         tech_stack   = parsed.get("tech_stack", [])
@@ -663,31 +703,63 @@ class PlannerFanOutAgent(BaseAgent):
         }
         for i, q in enumerate(queries):
             state_delta[f"pl:query:{i}"] = q
+            if q in plan.cached:
+                state_delta[PL_KEY_RESULT_PREFIX + str(i)] = plan.cached[q]
+
+        worker_query_map = {
+            f"pl_search_worker_{i}": q
+            for i, q in enumerate(queries)
+            if q in plan.pending
+        }
 
         yield Event(
             author=self.name,
             content=types.Content(
                 role="model",
-                parts=[types.Part(text=f"Launching {len(queries)} parallel research searches...")],
+                parts=[types.Part(
+                    text=(
+                        f"Launching {len(worker_query_map)} parallel research searches "
+                        f"({len(plan.cached)} served from cache)..."
+                    )
+                )],
             ),
             actions=EventActions(state_delta=state_delta),
         )
 
+        if not worker_query_map:
+            _pl_logger.info("[PlannerFanOutAgent] All queries served from cache.")
+            return
+
         workers = [
             PlannerSearchWorker(
-                name=f"pl_search_worker_{i}",
-                worker_index=i,
-                query_key=f"pl:query:{i}",
+                name=name,
+                worker_index=queries.index(q),
+                query_key=f"pl:query:{queries.index(q)}",
             )
-            for i in range(len(queries))
+            for name, q in worker_query_map.items()
         ]
 
         parallel = ParallelAgent(name="pl_parallel_search_agent", sub_agents=workers)
 
+        fresh_results: dict = {}
         _pl_logger.info(f"[PlannerFanOutAgent] Running ParallelAgent with {len(workers)} workers.")
         async for event in parallel.run_async(ctx):
+            if (
+                event.author in worker_query_map
+                and event.content
+                and event.content.parts
+            ):
+                text = "".join(
+                    part.text for part in event.content.parts
+                    if getattr(part, "text", None)
+                ).strip()
+                if text:
+                    fresh_results[worker_query_map[event.author]] = text
             yield event
         _pl_logger.info("[PlannerFanOutAgent] All parallel workers completed.")
+        _pl_logger.info(f"[PlannerFanOutAgent] Scheduler: {_scheduler.stats_line()}")
+
+        _search_cache.store(fresh_results)
 
 
 _pl_logger.debug("PlannerFanOutAgent defined.")
@@ -783,9 +855,12 @@ def _build_fs_instruction(
     project_name: str,
     directories: list,
     files_with_content: list,
-    project_md: str,
+    project_md: Optional[str],
 ) -> str:
-    """Fixed version with explicit tool-calling instructions to prevent hallucination."""
+    """
+    Fixed version with explicit tool-calling instructions to prevent hallucination.
+    project_md=None skips the PROJECT.md step (it is already on disk).
+    """
 
     available_tools = """
 AVAILABLE TOOLS (you MUST use these EXACT names only):
@@ -852,17 +927,18 @@ AVAILABLE TOOLS (you MUST use these EXACT names only):
         ]
         step += 1
 
-    lines += [
-        f"STEP {step}: Create PROJECT.md with full documentation.",
-        f"Make a function call to write_file_tool with:",
-        f"  file_path = \"{project_name}/PROJECT.md\"",
-        f"  content = EXACTLY the text between ===BEGIN PROJECT.md=== and ===END PROJECT.md=== below",
-        "===BEGIN PROJECT.md===",
-        project_md,
-        "===END PROJECT.md===",
-        "",
-    ]
-    step += 1
+    if project_md is not None:
+        lines += [
+            f"STEP {step}: Create PROJECT.md with full documentation.",
+            f"Make a function call to write_file_tool with:",
+            f"  file_path = \"{project_name}/PROJECT.md\"",
+            f"  content = EXACTLY the text between ===BEGIN PROJECT.md=== and ===END PROJECT.md=== below",
+            "===BEGIN PROJECT.md===",
+            project_md,
+            "===END PROJECT.md===",
+            "",
+        ]
+        step += 1
 
     lines += [
         f"STEP {step}: Verify the entire project structure.",
@@ -880,6 +956,72 @@ AVAILABLE TOOLS (you MUST use these EXACT names only):
     return "\n".join(lines)
 
 
+# ─────────────────────────────────────────────────────────────
+# HELPER: Deterministic scaffold write (no LLM)
+#
+# Every directory and every file's content is already computed in
+# Python, so the whole scaffold is written with ONE call to the
+# File System MCP write_files_bulk_tool. Returns the tool's result
+# dict; raises on transport / protocol failure or when the server
+# does not answer within _FS_TIMEOUT_SECONDS.
+# ─────────────────────────────────────────────────────────────
+async def _bulk_write_scaffold(
+    project_name: str,
+    directories: list,
+    files_with_content: list,
+    project_md: str,
+) -> dict:
+    bulk_dirs = [project_name] + [f"{project_name}/{d['path']}" for d in directories]
+    bulk_files = [
+        {"path": f"{project_name}/{f['path']}", "content": f["content"]}
+        for f in files_with_content
+    ]
+    bulk_files.append({"path": f"{project_name}/PROJECT.md", "content": project_md})
+
+    async with stdio_client(_FS_SERVER_PARAMS) as (read_stream, write_stream):
+        async with ClientSession(
+            read_stream,
+            write_stream,
+            read_timeout_seconds=datetime.timedelta(seconds=_FS_TIMEOUT_SECONDS),
+        ) as session:
+            await session.initialize()
+            result = await session.call_tool(
+                "write_files_bulk_tool",
+                {"files": bulk_files, "directories": bulk_dirs},
+            )
+
+    text = "".join(
+        getattr(c, "text", "") for c in (result.content or [])
+    )
+    return json.loads(text) if text else {"status": "error", "message": "Empty tool result."}
+
+
+# ─────────────────────────────────────────────────────────────
+# HELPER: What the LLM fallback still has to write
+#
+# After a "partial" bulk write only the paths the tool reported
+# as failed are left; anything else (an error, or the project
+# root itself failing) means the whole scaffold.
+# Returns (directories, files_with_content, project_md or None).
+# ─────────────────────────────────────────────────────────────
+def _unwritten_scaffold(
+    bulk_result: dict,
+    project_name: str,
+    directories: list,
+    files_with_content: list,
+    project_md: str,
+) -> tuple:
+    failed = {e.get("path") for e in bulk_result.get("errors", [])}
+    if bulk_result.get("status") != "partial" or project_name in failed:
+        return directories, files_with_content, project_md
+
+    return (
+        [d for d in directories if f"{project_name}/{d['path']}" in failed],
+        [f for f in files_with_content if f"{project_name}/{f['path']}" in failed],
+        project_md if f"{project_name}/PROJECT.md" in failed else None,
+    )
+
+
 # ─────────────────────────────────────────────────────────────
 # STEP 4 — PLANNER BUILDER AGENT
 # ─────────────────────────────────────────────────────────────
@@ -888,6 +1030,11 @@ class PlannerBuilderAgent(BaseAgent):
     Builds the project on disk using File System MCP tools.
     Source files contain comment-only placeholders — no code.
     PROJECT.md is the only file with real content.
+
+    Primary path writes the precomputed scaffold with a single bulk
+    MCP call (no model turns). The pl_fs_executor LlmAgent is only
+    used as a fallback when the bulk write fails, or for the paths
+    it could not write when it is incomplete.
     """
 
     model_config = {"arbitrary_types_allowed": True}
@@ -973,39 +1120,86 @@ class PlannerBuilderAgent(BaseAgent):
             generated_at=generated_at,
         )
 
-        fs_instruction = _build_fs_instruction(
-            project_name=project_name,
-            directories=directories,
-            files_with_content=files_with_content,
-            project_md=project_md,
-        )
+        # ── Primary: deterministic bulk write ─────────────────
+        build_output = ""
+        started = datetime.datetime.now()
+        try:
+            bulk_result = await _bulk_write_scaffold(
+                project_name=project_name,
+                directories=directories,
+                files_with_content=files_with_content,
+                project_md=project_md,
+            )
+        except Exception as e:
+            _pl_logger.error(f"[PlannerBuilderAgent] Bulk write failed: {e}", exc_info=True)
+            bulk_result = {"status": "error", "message": str(e)}
 
-        _pl_logger.debug(
-            f"[PlannerBuilderAgent] FS instruction: {len(fs_instruction)} chars"
+        elapsed_ms = (datetime.datetime.now() - started).total_seconds() * 1000
+        _pl_logger.info(
+            f"[PlannerBuilderAgent] Bulk write status='{bulk_result.get('status')}' "
+            f"dirs={bulk_result.get('directories_created', 0)} "
+            f"files={bulk_result.get('files_written', 0)} "
+            f"errors={len(bulk_result.get('errors', []))} "
+            f"in {elapsed_ms:.0f} ms"
         )
 
-        builder_llm = LlmAgent(
-            name="pl_fs_executor",
-            model=MODEL,
-            instruction=fs_instruction,
-            tools=[_file_system_mcp],
-        )
+        if bulk_result.get("status") == "ok":
+            build_output = (
+                f"Direct build: {bulk_result['directories_created']} directories and "
+                f"{bulk_result['files_written']} files written in {elapsed_ms:.0f} ms."
+            )
 
-        build_output = ""
-        async for event in builder_llm.run_async(ctx):
-            if (
-                event.is_final_response()
-                and event.content
-                and event.content.parts
-            ):
-                for part in event.content.parts:
-                    if getattr(part, "text", None):
-                        build_output += part.text
+        # ── Fallback: LLM-driven tool loop ────────────────────
+        else:
+            retry_dirs, retry_files, retry_md = _unwritten_scaffold(
+                bulk_result=bulk_result,
+                project_name=project_name,
+                directories=directories,
+                files_with_content=files_with_content,
+                project_md=project_md,
+            )
+            _pl_logger.warning(
+                f"[PlannerBuilderAgent] Falling back to pl_fs_executor LLM for "
+                f"dirs={len(retry_dirs)} files={len(retry_files) + (retry_md is not None)}."
+            )
+            if bulk_result.get("status") == "partial":
+                build_output = (
+                    f"Direct build: {bulk_result.get('directories_created', 0)} directories and "
+                    f"{bulk_result.get('files_written', 0)} files written; "
+                    f"retrying {len(bulk_result.get('errors', []))} failed paths.\n"
+                )
+            fs_instruction = _build_fs_instruction(
+                project_name=project_name,
+                directories=retry_dirs,
+                files_with_content=retry_files,
+                project_md=retry_md,
+            )
 
-        _pl_logger.info(
-            f"[PlannerBuilderAgent] FS executor done. "
-            f"Output: {build_output[:300]}"
-        )
+            _pl_logger.debug(
+                f"[PlannerBuilderAgent] FS instruction: {len(fs_instruction)} chars"
+            )
+
+            builder_llm = LlmAgent(
+                name="pl_fs_executor",
+                model=MODEL,
+                instruction=fs_instruction,
+                tools=[_file_system_mcp],
+            )
+
+            async for event in builder_llm.run_async(ctx):
+                if (
+                    event.is_final_response()
+                    and event.content
+                    and event.content.parts
+                ):
+                    for part in event.content.parts:
+                        if getattr(part, "text", None):
+                            build_output += part.text
+
+            _pl_logger.info(
+                f"[PlannerBuilderAgent] FS executor done. "
+                f"Output: {build_output[:300]}"
+            )
 
         build_report = (
             f"✅ Project '{project_name}' scaffolded successfully.\n\n"
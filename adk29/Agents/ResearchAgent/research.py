@@ -9,6 +9,8 @@
 #   4. Generate 2–8 search queries via LLM — output captured directly from
 #      events (NOT via output_key / SequentialAgent — unreliable in this ADK version)
 #   5. Run all queries in parallel → collect results into a Python list
+#      (each search runs through Common.model_scheduler: global
+#       concurrency cap, per-model token bucket, 429 retry/backoff)
 #   6. Synthesiser combines search results list + own knowledge → markdown report
 # ─────────────────────────────────────────────────────────────
 
@@ -27,6 +29,7 @@ from google.adk.tools.google_search_tool import google_search
 from google.genai import types
 
 from .config import config
+from Common.model_scheduler import PRIORITY_INTERACTIVE, configure_scheduler
 
 # ─────────────────────────────────────────────────────────────
 # LOGGING
@@ -69,6 +72,14 @@ os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "0"
 MIN_QUERIES = 2
 MAX_QUERIES = 8
 
+# One scheduler per process — whichever agent imports first configures it.
+_scheduler = configure_scheduler(
+    max_concurrency=config.SCHEDULER_MAX_CONCURRENCY,
+    requests_per_minute=config.SCHEDULER_RPM,
+    max_retries=config.SCHEDULER_MAX_RETRIES,
+    logger=logger,
+)
+
 # ─────────────────────────────────────────────────────────────
 # SESSION STATE KEYS
 # ─────────────────────────────────────────────────────────────
@@ -92,6 +103,9 @@ def get_current_datetime() -> str:
 
 # ─────────────────────────────────────────────────────────────
 # SEARCH WORKER
+# The model call waits for a scheduler slot and is retried on 429,
+# instead of every worker hitting Gemini at the same instant.
+# A user is waiting on the report, so it is admitted as interactive.
 # ─────────────────────────────────────────────────────────────
 class SearchWorker(BaseAgent):
     """Runs a single google_search query and saves the result to state."""
@@ -122,12 +136,22 @@ Output ONLY the factual summary — no preamble, no opinions.
             tools=[google_search],
         )
 
-        result_text = ""
-        async for event in inner.run_async(ctx):
-            if event.is_final_response() and event.content and event.content.parts:
-                for part in event.content.parts:
-                    if getattr(part, "text", None):
-                        result_text += part.text
+        async def _search() -> str:
+            text = ""
+            async for event in inner.run_async(ctx):
+                if event.is_final_response() and event.content and event.content.parts:
+                    for part in event.content.parts:
+                        if getattr(part, "text", None):
+                            text += part.text
+            return text
+
+        try:
+            result_text = await _scheduler.run(
+                RESEARCH_MODEL, _search, priority=PRIORITY_INTERACTIVE, label=self.name
+            )
+        except Exception as e:
+            logger.error(f"[{self.name}] Search failed after retries: {e}")
+            result_text = ""
 
         logger.info(f"[{self.name}] Result length: {len(result_text)} chars")
 
@@ -302,6 +326,7 @@ Output ONLY a numbered list — nothing else, no explanation, no preamble:
                     logger.info(
                         f"[ResearchAgent] Captured result from {event.author}: {len(text)} chars"
                     )
+        logger.info(f"[ResearchAgent] Scheduler: {_scheduler.stats_line()}")
 
         # Build ordered results list
         results_list: List[str] = []
@@ -119,9 +119,15 @@ DELEGATION RULES:
 
 3. Expense Tracking:
    Use expense_tracker tools when the user wants to add or check expenses.
+   For totals, breakdowns (per category / day / week / month) or the biggest
+   expenses, use summarize_expenses_tool or top_expenses_tool — never list
+   every expense and add them up yourself.
 
 4. Task Management:
    Use to_do tools when the user wants to manage tasks or reminders.
+   Add or update several tasks at once with bulk_add_tasks_tool /
+   bulk_update_status_tool. search_tasks_tool returns one page — pass its
+   next_after_id as after_id to fetch more.
 
 5. File System:
    Use file_system tools when the user wants to read, write, list, move,
@@ -1,13 +1,13 @@
 """
 File MCP Module
 ===============
-Strictly file operations: read, write, edit, append, clear, copy, move, delete.
+Strictly file operations: read, write, bulk write, edit, append, clear, copy, move, delete.
 """
 
 import base64
 import os
 import shutil
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 from .utils import (
     logger,
@@ -62,18 +62,8 @@ async def write_file_tool(file_path: str, content: str) -> Dict[str, Any]:
         logger.warning(f"write_file_tool | invalid path '{file_path}': {e}")
         return {"status": "error", "message": str(e)}
 
-    ext = get_ext(fp)
     try:
-        if ext in WRITE_DISPATCH:
-            WRITE_DISPATCH[ext](fp, content)
-        elif ext in TEXT_EXTENSIONS or ext == "":
-            _write_text(fp, content)
-        else:
-            try:
-                base64.b64decode(content, validate=True)
-                _write_binary_b64(fp, content)
-            except Exception:
-                _write_text(fp, content)
+        _write_by_ext(fp, content)
     except Exception as exc:
         logger.error(f"write_file_tool | failed to write '{fp}': {exc}", exc_info=True)
         return {"status": "error", "message": str(exc)}
@@ -82,6 +72,73 @@ async def write_file_tool(file_path: str, content: str) -> Dict[str, Any]:
     return {"status": "ok", "message": f"File written: {fp}"}
 
 
+async def write_files_bulk_tool(
+    files: List[Dict[str, str]],
+    directories: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Create many directories and write many files in a single call.
+
+    files:       list of {"path": "...", "content": "..."} objects.
+    directories: optional list of folder paths to create first (empty ones included).
+
+    Each entry is handled independently — one bad path does not abort the
+    rest. Returns per-entry errors so the caller can retry only what failed.
+    """
+    directories = directories or []
+    logger.debug(
+        f"write_files_bulk_tool called | dirs={len(directories)} files={len(files)}"
+    )
+
+    errors: List[Dict[str, str]] = []
+    dirs_created = 0
+    files_written = 0
+
+    for folder_path in directories:
+        try:
+            os.makedirs(safe_path(folder_path), exist_ok=True)
+            dirs_created += 1
+        except Exception as exc:
+            logger.warning(f"write_files_bulk_tool | directory '{folder_path}' failed: {exc}")
+            errors.append({"path": folder_path, "message": str(exc)})
+
+    for entry in files:
+        file_path = entry.get("path", "")
+        try:
+            _write_by_ext(safe_path(file_path), entry.get("content", ""))
+            files_written += 1
+        except Exception as exc:
+            logger.warning(f"write_files_bulk_tool | file '{file_path}' failed: {exc}")
+            errors.append({"path": file_path, "message": str(exc)})
+
+    status = "ok" if not errors else "partial"
+    logger.info(
+        f"write_files_bulk_tool | {status} | dirs={dirs_created} "
+        f"files={files_written} errors={len(errors)}"
+    )
+    return {
+        "status":              status,
+        "directories_created": dirs_created,
+        "files_written":       files_written,
+        "errors":              errors,
+    }
+
+
+def _write_by_ext(fp: str, content: str) -> None:
+    """Format-aware write shared by write_file_tool and write_files_bulk_tool."""
+    ext = get_ext(fp)
+    if ext in WRITE_DISPATCH:
+        WRITE_DISPATCH[ext](fp, content)
+    elif ext in TEXT_EXTENSIONS or ext == "":
+        _write_text(fp, content)
+    else:
+        try:
+            base64.b64decode(content, validate=True)
+            _write_binary_b64(fp, content)
+        except Exception:
+            _write_text(fp, content)
+
+
 async def edit_file_tool(file_path: str, old_text: str, new_text: str) -> Dict[str, Any]:
     logger.debug(f"edit_file_tool called | file_path='{file_path}'")
     try:
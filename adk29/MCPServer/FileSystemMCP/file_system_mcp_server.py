@@ -24,7 +24,7 @@ from google.adk.tools.mcp_tool.conversion_utils import adk_to_mcp_tool_type
 # utils import triggers: config.py load → BASE_DIR resolved → logging initialised
 from FileSystem.utils import logger, BASE_DIR
 from FileSystem.file_mcp import (
-    read_file_tool, write_file_tool, edit_file_tool, append_file_tool,
+    read_file_tool, write_file_tool, write_files_bulk_tool, edit_file_tool, append_file_tool,
     copy_file_tool, move_file_tool, delete_file_tool, clear_file_tool,
 )
 from FileSystem.directory_mcp import (
@@ -38,7 +38,7 @@ from FileSystem.metadata_mcp import file_info_tool, supported_formats_tool
 # =============================================================================
 all_tool_functions = [
     # File operations
-    read_file_tool, write_file_tool, edit_file_tool, append_file_tool,
+    read_file_tool, write_file_tool, write_files_bulk_tool, edit_file_tool, append_file_tool,
     copy_file_tool, move_file_tool, delete_file_tool, clear_file_tool,
     # Directory operations
     create_directory_tool, delete_directory_tool, rename_directory_tool,
@@ -64,9 +64,25 @@ async def list_mcp_tools() -> list[mcp_types.Tool]:
     return [adk_to_mcp_tool_type(t) for t in adk_tools]
 
 
+# File bodies are logged as their size; paths and options as-is.
+_CONTENT_KEYS = {"content", "old_text", "new_text"}
+
+
+def _loggable_args(value):
+    if isinstance(value, dict):
+        return {
+            key: f"<{len(item)} chars>" if key in _CONTENT_KEYS and isinstance(item, str)
+            else _loggable_args(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_loggable_args(item) for item in value]
+    return value
+
+
 @app.call_tool()
 async def call_mcp_tool(name: str, arguments: dict) -> list[mcp_types.Content]:
-    logger.info(f"MCP call_tool: '{name}' | args: {arguments}")
+    logger.info(f"MCP call_tool: '{name}' | args: {_loggable_args(arguments)}")
     tool = next((t for t in adk_tools if t.name == name), None)
     if not tool:
         logger.warning(f"Tool not found: '{name}'")
@@ -0,0 +1,237 @@
+"""
+Expense tracker DB benchmark.
+
+Seeds a throw-away SQLite file with N expense rows (default 1M) and
+reports p50 / p99 latency per tool for:
+
+  before — the original access pattern: a fresh aiosqlite connection per
+           call, no secondary indexes, `category LIKE '%x%'`
+  after  — expense_tracker_mcp_server's pooled WAL connections, the
+           covering (date, category, amount) / (category, date, amount)
+           indexes and the category IN (...) rewrite
+
+Usage:
+    python benchmark_expense_db.py                  # 1,000,000 rows, 200 calls per tool
+    python benchmark_expense_db.py --rows 200000 --iterations 50
+"""
+
+import os
+import time
+import random
+import shutil
+import asyncio
+import sqlite3
+import argparse
+import datetime
+import tempfile
+from typing import Awaitable, Callable, Dict, List
+
+import aiosqlite
+
+import expense_tracker_mcp_server as server
+
+CATEGORIES = [
+    "Food", "Groceries", "Rent", "Utilities", "Transport", "Fuel",
+    "Entertainment", "Health", "Insurance", "Education", "Shopping", "Travel",
+]
+START_DATE = datetime.date(2023, 1, 1)
+DAYS = 3 * 365
+
+
+def _random_date(rng: random.Random) -> str:
+    return (START_DATE + datetime.timedelta(days=rng.randrange(DAYS))).isoformat()
+
+
+def seed(path: str, rows: int, batch: int = 50_000) -> None:
+    rng = random.Random(42)
+    db = sqlite3.connect(path)
+    db.execute("""
+        CREATE TABLE expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            subcategory TEXT DEFAULT '',
+            note TEXT DEFAULT ''
+        )
+    """)
+    done = 0
+    while done < rows:
+        n = min(batch, rows - done)
+        db.executemany(
+            "INSERT INTO expenses (date, amount, category, subcategory, note) VALUES (?, ?, ?, ?, ?)",
+            (
+                (_random_date(rng), round(rng.uniform(1, 500), 2),
+                 rng.choice(CATEGORIES), "", "seed")
+                for _ in range(n)
+            ),
+        )
+        done += n
+    db.commit()
+    db.close()
+
+
+# --- "before": the original per-call connection + LIKE queries ---
+
+async def legacy_add(path, date, amount, category):
+    async with aiosqlite.connect(path) as db:
+        cursor = await db.execute(
+            "INSERT INTO expenses (date, amount, category, subcategory, note) VALUES (?, ?, ?, ?, ?)",
+            (date, amount, category, "", "bench"),
+        )
+        await db.commit()
+        return cursor.lastrowid
+
+
+async def legacy_edit(path, expense_id, amount):
+    async with aiosqlite.connect(path) as db:
+        await db.execute("UPDATE expenses SET amount = ? WHERE id = ?", (amount, expense_id))
+        await db.commit()
+
+
+async def legacy_delete(path, expense_id):
+    async with aiosqlite.connect(path) as db:
+        await db.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
+        await db.commit()
+
+
+async def legacy_search(path, category=None, start_date=None, end_date=None):
+    async with aiosqlite.connect(path) as db:
+        db.row_factory = aiosqlite.Row
+        conditions, params = [], []
+        if category:
+            conditions.append("category LIKE ?")
+            params.append(f"%{category}%")
+        if start_date:
+            conditions.append("date >= ?")
+            params.append(start_date)
+        if end_date:
+            conditions.append("date <= ?")
+            params.append(end_date)
+        query = "SELECT * FROM expenses"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY date DESC"
+        cursor = await db.execute(query, params)
+        return [dict(row) for row in await cursor.fetchall()]
+
+
+# --- measurement ---
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[k]
+
+
+async def _measure(fn: Callable[[int], Awaitable], iterations: int) -> List[float]:
+    samples = []
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        await fn(i)
+        samples.append((time.perf_counter() - t0) * 1000)
+    return samples
+
+
+def _window(rng: random.Random, days: int):
+    start = START_DATE + datetime.timedelta(days=rng.randrange(DAYS - days))
+    return start.isoformat(), (start + datetime.timedelta(days=days)).isoformat()
+
+
+async def run_before(path: str, iterations: int) -> Dict[str, List[float]]:
+    rng = random.Random(7)
+    added: List[int] = []
+
+    async def add(i):
+        added.append(await legacy_add(path, _random_date(rng), 12.5, rng.choice(CATEGORIES)))
+
+    async def search_range(i):
+        s, e = _window(rng, 7)
+        await legacy_search(path, start_date=s, end_date=e)
+
+    async def search_category_month(i):
+        s, e = _window(rng, 30)
+        await legacy_search(path, category=rng.choice(CATEGORIES)[:4].lower(), start_date=s, end_date=e)
+
+    results = {"add_expense": await _measure(add, iterations)}
+    results["edit_expense"] = await _measure(lambda i: legacy_edit(path, added[i], 99.0), iterations)
+    results["search_expenses (7-day range)"] = await _measure(search_range, iterations)
+    results["search_expenses (category + month)"] = await _measure(search_category_month, iterations)
+    results["delete_expense"] = await _measure(lambda i: legacy_delete(path, added[i]), iterations)
+    return results
+
+
+async def run_after(path: str, iterations: int) -> Dict[str, List[float]]:
+    rng = random.Random(7)
+    added: List[int] = []
+    server.DB_PATH = path
+
+    t0 = time.perf_counter()
+    await server._ensure_db()
+    print(f"  pool open + index build: {(time.perf_counter() - t0):.1f}s")
+
+    async def add(i):
+        res = await server.add_expense_tool(_random_date(rng), 12.5, rng.choice(CATEGORIES))
+        added.append(res["id"])
+
+    async def search_range(i):
+        s, e = _window(rng, 7)
+        await server.search_expenses_tool(start_date=s, end_date=e)
+
+    async def search_category_month(i):
+        s, e = _window(rng, 30)
+        await server.search_expenses_tool(
+            category=rng.choice(CATEGORIES)[:4].lower(), start_date=s, end_date=e
+        )
+
+    try:
+        results = {"add_expense": await _measure(add, iterations)}
+        results["edit_expense"] = await _measure(
+            lambda i: server.edit_expense_tool(added[i], amount=99.0), iterations
+        )
+        results["search_expenses (7-day range)"] = await _measure(search_range, iterations)
+        results["search_expenses (category + month)"] = await _measure(search_category_month, iterations)
+        results["delete_expense"] = await _measure(
+            lambda i: server.delete_expense_tool(added[i]), iterations
+        )
+    finally:
+        await server.close_db()
+    return results
+
+
+def _report(before: Dict[str, List[float]], after: Dict[str, List[float]]) -> None:
+    print()
+    print(f"{'tool':38} {'before p50':>11} {'before p99':>11} {'after p50':>10} {'after p99':>10}")
+    print("-" * 84)
+    for name in before:
+        b, a = before[name], after[name]
+        print(
+            f"{name:38} {_percentile(b, 50):9.2f}ms {_percentile(b, 99):9.2f}ms "
+            f"{_percentile(a, 50):8.2f}ms {_percentile(a, 99):8.2f}ms"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="expense_bench_")
+    path = os.path.join(workdir, "expenses.db")
+    try:
+        t0 = time.perf_counter()
+        seed(path, args.rows)
+        print(f"Seeded {args.rows:,} rows in {time.perf_counter() - t0:.1f}s → {path}")
+
+        print("Running BEFORE (per-call connect, no indexes, LIKE) ...")
+        before = await run_before(path, args.iterations)
+        print("Running AFTER (pooled WAL connections, indexes) ...")
+        after = await run_after(path, args.iterations)
+        _report(before, after)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
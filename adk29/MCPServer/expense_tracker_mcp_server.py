@@ -3,7 +3,8 @@ import json
 import os
 import sys
 import logging
-from typing import Any, Dict, List, Optional
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
 
 # --- MCP Server Imports ---
 from mcp import types as mcp_types
@@ -22,49 +23,183 @@ logging.basicConfig(level=logging.INFO, stream=sys.stderr)
 logger = logging.getLogger("expense_tracker_server")
 
 DB_PATH = os.path.join(os.path.dirname(__file__), "expenses.db")
-_db_initialized = False
+
+# Long-lived connections opened once at server startup. Each tool call
+# borrows one instead of paying for connect + schema check per call;
+# sqlite3 keeps a per-connection cache of prepared statements, so the
+# fixed SQL strings below are compiled once per connection.
+POOL_SIZE = int(os.getenv("EXPENSE_DB_POOL_SIZE", "4"))
+STATEMENT_CACHE_SIZE = 256
+
+_pool: Optional[asyncio.Queue] = None
+_pool_lock: Optional[asyncio.Lock] = None
+
+# Distinct category names, kept in memory so a substring category
+# filter becomes `category IN (...)` (index seek) instead of
+# `category LIKE '%x%'` (full table scan). Reloaded whenever a
+# connection's PRAGMA data_version shows that another connection or
+# another process has committed since that connection last loaded it.
+_categories: set = set()
+_categories_version: Dict[int, int] = {}   # id(connection) → data_version at last load
 
 app = Server("ExpenseTracker-ADK-MCP")
 
 
 # --- Database Logic ---
 
-async def init_db() -> None:
-    async with aiosqlite.connect(DB_PATH) as db:
-        await db.execute("""
-            CREATE TABLE IF NOT EXISTS expenses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                date TEXT NOT NULL,
-                amount REAL NOT NULL,
-                category TEXT NOT NULL,
-                subcategory TEXT DEFAULT '',
-                note TEXT DEFAULT ''
-            )
-        """)
-        await db.commit()
+async def _open_connection() -> aiosqlite.Connection:
+    db = await aiosqlite.connect(DB_PATH, cached_statements=STATEMENT_CACHE_SIZE)
+    db.row_factory = aiosqlite.Row
+    await db.execute("PRAGMA journal_mode=WAL")
+    await db.execute("PRAGMA synchronous=NORMAL")
+    await db.execute("PRAGMA busy_timeout=5000")
+    await db.execute("PRAGMA temp_store=MEMORY")
+    return db
+
+
+async def init_db(db: aiosqlite.Connection) -> None:
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS expenses (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            date TEXT NOT NULL,
+            amount REAL NOT NULL,
+            category TEXT NOT NULL,
+            subcategory TEXT DEFAULT '',
+            note TEXT DEFAULT ''
+        )
+    """)
+    # Covering indexes: date-range scans (optionally narrowed by category)
+    # and category lookups (optionally narrowed by date range). Carrying
+    # `amount` lets summarize_expenses aggregate from the index alone.
+    await db.execute("DROP INDEX IF EXISTS idx_expenses_date_category")
+    await db.execute("DROP INDEX IF EXISTS idx_expenses_category_date")
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_expenses_date_category_amount "
+        "ON expenses (date, category, amount)"
+    )
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category_date_amount "
+        "ON expenses (category, date, amount)"
+    )
+    await db.commit()
+    await _refresh_categories(db)
 
 
 async def _ensure_db() -> None:
-    global _db_initialized
-    if not _db_initialized:
-        await init_db()
-        _db_initialized = True
-        logger.info("Database initialized.")
+    global _pool, _pool_lock
+    if _pool is not None:
+        return
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    async with _pool_lock:
+        if _pool is not None:
+            return
+        pool: asyncio.Queue = asyncio.Queue()
+        for i in range(max(1, POOL_SIZE)):
+            db = await _open_connection()
+            if i == 0:
+                await init_db(db)
+            pool.put_nowait(db)
+        _pool = pool
+        logger.info(f"Database initialized (WAL, pool_size={pool.qsize()}).")
+
+
+async def close_db() -> None:
+    global _pool
+    if _pool is None:
+        return
+    pool, _pool = _pool, None
+    _categories_version.clear()
+    while not pool.empty():
+        db = pool.get_nowait()
+        try:
+            await db.execute("PRAGMA optimize")
+            await db.close()
+        except Exception as e:
+            logger.warning(f"Error closing database connection: {e}")
+
+
+@asynccontextmanager
+async def _connection() -> AsyncIterator[aiosqlite.Connection]:
+    """Borrow a pooled connection; any open transaction is rolled back on return."""
+    await _ensure_db()
+    db = await _pool.get()
+    try:
+        yield db
+    finally:
+        if db.in_transaction:
+            await db.rollback()
+        _pool.put_nowait(db)
+
+
+async def _refresh_categories(db: aiosqlite.Connection) -> None:
+    """Reload _categories if the database changed outside this connection."""
+    async with db.execute("PRAGMA data_version") as cursor:
+        version = (await cursor.fetchone())[0]
+    if _categories_version.get(id(db)) == version:
+        return
+    async with db.execute("SELECT DISTINCT category FROM expenses") as cursor:
+        names = {row[0] for row in await cursor.fetchall()}
+    _categories.clear()
+    _categories.update(names)
+    _categories_version[id(db)] = version
+
+
+async def _matching_categories(db: aiosqlite.Connection, category: str) -> List[str]:
+    """Known categories containing `category` (case-insensitive), like LIKE '%x%'."""
+    await _refresh_categories(db)
+    needle = category.lower()
+    return sorted(c for c in _categories if needle in c.lower())
+
+
+# group_by dimension → SQL expression (dates are stored as YYYY-MM-DD)
+_GROUP_EXPRESSIONS = {
+    "category": "category",
+    "day":      "date",
+    "week":     "strftime('%Y-W%W', date)",
+    "month":    "substr(date, 1, 7)",
+    "year":     "substr(date, 1, 4)",
+}
+MAX_SUMMARY_GROUPS = 200
+
+
+async def _filters(db: aiosqlite.Connection, category: Optional[str], start_date: Optional[str],
+                   end_date: Optional[str]) -> Optional[tuple]:
+    """(conditions, params) for the shared filters; None when no category matches."""
+    conditions = []
+    params: List[Any] = []
+    if category:
+        matches = await _matching_categories(db, category)
+        if not matches:
+            return None
+        conditions.append(f"category IN ({', '.join('?' * len(matches))})")
+        params.extend(matches)
+    if start_date:
+        conditions.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        conditions.append("date <= ?")
+        params.append(end_date)
+    return conditions, params
+
+
+def _where(conditions: List[str]) -> str:
+    return (" WHERE " + " AND ".join(conditions)) if conditions else ""
 
 
 # --- Tool Functions ---
 
 async def add_expense_tool(date: str, amount: float, category: str, subcategory: str = '', note: str = '') -> Dict[str, Any]:
     """Adds a new expense record."""
-    await _ensure_db()
     if amount <= 0:
         return {"status": "error", "error": "Amount must be > 0"}
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connection() as db:
         cursor = await db.execute(
             "INSERT INTO expenses (date, amount, category, subcategory, note) VALUES (?, ?, ?, ?, ?)",
             (date, amount, category, subcategory, note)
         )
         await db.commit()
+        _categories.add(category)
         return {"status": "ok", "id": cursor.lastrowid}
 
 
@@ -72,7 +207,6 @@ async def edit_expense_tool(expense_id: int, date: Optional[str] = None, amount:
                             category: Optional[str] = None, subcategory: Optional[str] = None,
                             note: Optional[str] = None) -> Dict[str, Any]:
     """Updates an existing expense record by its ID."""
-    await _ensure_db()
     updates = []
     params = []
     if date: updates.append("date = ?"); params.append(date)
@@ -85,19 +219,20 @@ async def edit_expense_tool(expense_id: int, date: Optional[str] = None, amount:
         return {"status": "error", "message": "No fields provided for update"}
 
     params.append(expense_id)
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connection() as db:
         query = f"UPDATE expenses SET {', '.join(updates)} WHERE id = ?"
         cursor = await db.execute(query, params)
         await db.commit()
         if cursor.rowcount == 0:
             return {"status": "error", "message": "Expense ID not found"}
+        if category:
+            _categories.add(category)
         return {"status": "ok", "message": f"Updated record {expense_id}"}
 
 
 async def delete_expense_tool(expense_id: int) -> Dict[str, Any]:
     """Deletes an expense record by its ID."""
-    await _ensure_db()
-    async with aiosqlite.connect(DB_PATH) as db:
+    async with _connection() as db:
         cursor = await db.execute("DELETE FROM expenses WHERE id = ?", (expense_id,))
         await db.commit()
         if cursor.rowcount == 0:
@@ -111,22 +246,11 @@ async def search_expenses_tool(category: Optional[str] = None,
                                min_amount: Optional[float] = None,
                                max_amount: Optional[float] = None) -> List[Dict[str, Any]]:
     """Search expenses with flexible filters (category, date range, or amount range)."""
-    await _ensure_db()
-    async with aiosqlite.connect(DB_PATH) as db:
-        db.row_factory = aiosqlite.Row
-        query = "SELECT * FROM expenses"
-        conditions = []
-        params = []
-
-        if category:
-            conditions.append("category LIKE ?")
-            params.append(f"%{category}%")
-        if start_date:
-            conditions.append("date >= ?")
-            params.append(start_date)
-        if end_date:
-            conditions.append("date <= ?")
-            params.append(end_date)
+    async with _connection() as db:
+        filters = await _filters(db, category, start_date, end_date)
+        if filters is None:
+            return []
+        conditions, params = filters
         if min_amount:
             conditions.append("amount >= ?")
             params.append(min_amount)
@@ -134,15 +258,102 @@ async def search_expenses_tool(category: Optional[str] = None,
             conditions.append("amount <= ?")
             params.append(max_amount)
 
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-
-        query += " ORDER BY date DESC"
-        cursor = await db.execute(query, params)
-        rows = await cursor.fetchall()
+        query = f"SELECT * FROM expenses{_where(conditions)} ORDER BY date DESC"
+        async with db.execute(query, params) as cursor:
+            rows = await cursor.fetchall()
         return [dict(row) for row in rows]
 
 
+async def summarize_expenses_tool(group_by: str = "category",
+                                  start_date: Optional[str] = None,
+                                  end_date: Optional[str] = None,
+                                  category: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Aggregate expenses in the database: total, count, avg, min and max per group.
+    group_by is one dimension or a comma-separated combination of:
+    category, day, week, month, year (e.g. "month" or "category,month").
+    Optional filters: date range (YYYY-MM-DD, inclusive) and category.
+    The overall total and count cover every matching row, even when the
+    group list is truncated.
+    Use this instead of listing rows whenever the user asks for totals or breakdowns.
+    """
+    dims = [d.strip().lower() for d in group_by.split(",") if d.strip()]
+    unknown = [d for d in dims if d not in _GROUP_EXPRESSIONS]
+    if not dims or unknown:
+        return {
+            "status": "error",
+            "error": f"group_by must use: {', '.join(_GROUP_EXPRESSIONS)}",
+        }
+
+    async with _connection() as db:
+        filters = await _filters(db, category, start_date, end_date)
+        if filters is None:
+            return {"status": "ok", "group_by": dims, "groups": [], "total": 0.0, "count": 0}
+        conditions, params = filters
+
+        keys = ", ".join(f"{_GROUP_EXPRESSIONS[d]} AS {d}" for d in dims)
+        # Pure category breakdowns read best largest-first; anything
+        # with a time dimension reads best chronologically.
+        order = "total DESC" if dims == ["category"] else ", ".join(dims)
+        query = (
+            f"SELECT {keys}, COUNT(*) AS count, SUM(amount) AS total, "
+            f"AVG(amount) AS avg, MIN(amount) AS min, MAX(amount) AS max "
+            f"FROM expenses{_where(conditions)} GROUP BY {', '.join(dims)} ORDER BY {order} "
+            f"LIMIT {MAX_SUMMARY_GROUPS + 1}"
+        )
+        async with db.execute(query, params) as cursor:
+            rows = await cursor.fetchall()
+        # Overall figures from their own aggregate, so they stay exact
+        # when the group list is cut at MAX_SUMMARY_GROUPS.
+        async with db.execute(
+            f"SELECT COUNT(*) AS count, COALESCE(SUM(amount), 0) AS total "
+            f"FROM expenses{_where(conditions)}", params
+        ) as cursor:
+            overall = await cursor.fetchone()
+
+    groups = [
+        {
+            **{d: row[d] for d in dims},
+            "count": row["count"],
+            "total": round(row["total"], 2),
+            "avg":   round(row["avg"], 2),
+            "min":   round(row["min"], 2),
+            "max":   round(row["max"], 2),
+        }
+        for row in rows[:MAX_SUMMARY_GROUPS]
+    ]
+    result = {
+        "status": "ok",
+        "group_by": dims,
+        "groups": groups,
+        "total": round(overall["total"], 2),
+        "count": overall["count"],
+    }
+    if len(rows) > MAX_SUMMARY_GROUPS:
+        result["truncated"] = True
+    return result
+
+
+async def top_expenses_tool(limit: int = 10,
+                            start_date: Optional[str] = None,
+                            end_date: Optional[str] = None,
+                            category: Optional[str] = None) -> Dict[str, Any]:
+    """Return the largest individual expenses, optionally within a date range (YYYY-MM-DD) and/or category."""
+    limit = max(1, min(int(limit), 100))
+    async with _connection() as db:
+        filters = await _filters(db, category, start_date, end_date)
+        if filters is None:
+            return {"status": "ok", "expenses": []}
+        conditions, params = filters
+        query = (
+            f"SELECT id, date, amount, category, note FROM expenses{_where(conditions)} "
+            f"ORDER BY amount DESC LIMIT ?"
+        )
+        async with db.execute(query, [*params, limit]) as cursor:
+            rows = await cursor.fetchall()
+    return {"status": "ok", "expenses": [dict(row) for row in rows]}
+
+
 # --- Wrap Tools ---
 
 adk_tools = [
@@ -150,6 +361,8 @@ adk_tools = [
     FunctionTool(edit_expense_tool),
     FunctionTool(delete_expense_tool),
     FunctionTool(search_expenses_tool),
+    FunctionTool(summarize_expenses_tool),
+    FunctionTool(top_expenses_tool),
 ]
 
 
@@ -174,6 +387,7 @@ async def call_mcp_tool(name: str, arguments: dict) -> list[mcp_types.Content]:
 
 
 async def run_mcp_stdio_server():
+    await _ensure_db()
     try:
         async with mcp.server.stdio.stdio_server() as (read_stream, write_stream):
             await app.run(
@@ -198,6 +412,8 @@ async def run_mcp_stdio_server():
             logger.info("Expense Tracker MCP server shutting down (suppressed anyio noise).")
         else:
             raise
+    finally:
+        await close_db()
 
 
 if __name__ == "__main__":
@@ -1,6 +1,7 @@
 import asyncio
 import json
 import os
+import re
 import sys
 import logging
 from typing import Any, Dict, List, Optional
@@ -24,6 +25,10 @@ logger = logging.getLogger("todo_tracker_server")
 DB_PATH = os.path.join(os.path.dirname(__file__), "todo.db")
 _db_initialized = False
 
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+TITLE_WEIGHT = 2.0          # bm25 column weight: title matches outrank description
+
 app = Server("ToDoTracker-ADK-MCP")
 
 
@@ -43,6 +48,37 @@ async def init_db() -> None:
                 status TEXT DEFAULT 'pending'
             )
         """)
+        # Keyset listing by status walks this index newest-first.
+        await db.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status_id ON tasks (status, id)")
+
+        # Full-text index over title + description. External-content FTS5
+        # table (no duplicate copy of the text), kept in sync by triggers.
+        cursor = await db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+        )
+        fts_exists = await cursor.fetchone() is not None
+        await db.executescript("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+                title, description, content='tasks', content_rowid='id'
+            );
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_ai AFTER INSERT ON tasks BEGIN
+                INSERT INTO tasks_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_ad AFTER DELETE ON tasks BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END;
+            CREATE TRIGGER IF NOT EXISTS tasks_fts_au AFTER UPDATE OF title, description ON tasks BEGIN
+                INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO tasks_fts (rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END;
+        """)
+        if not fts_exists:
+            # Existing databases: index the tasks created before FTS existed.
+            await db.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')")
         await db.commit()
 
 
@@ -131,30 +167,145 @@ async def complete_task_tool(task_id: int) -> Dict[str, Any]:
         return {"status": "ok", "message": f"Task {task_id} marked completed"}
 
 
+def _page_limit(limit: int) -> int:
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def _fts_query(text: str) -> str:
+    """Free text → safe FTS5 query: every word must match (prefix match)."""
+    words = re.findall(r"\w+", text or "")
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def _page(rows: List[aiosqlite.Row], limit: int) -> Dict[str, Any]:
+    """One page of tasks; next_after_id is None on the last page."""
+    tasks = [dict(row) for row in rows[:limit]]
+    has_more = len(rows) > limit
+    return {
+        "status": "ok",
+        "tasks": tasks,
+        "next_after_id": tasks[-1]["id"] if has_more else None,
+    }
+
+
 async def search_tasks_tool(
+    query: Optional[str] = None,
     status: Optional[str] = None,
     priority: Optional[str] = None,
-    due_date: Optional[str] = None
-) -> List[Dict[str, Any]]:
-    """Search tasks using filters."""
+    due_date: Optional[str] = None,
+    after_id: Optional[int] = None,
+    limit: int = DEFAULT_PAGE_SIZE
+) -> Dict[str, Any]:
+    """
+    List or search tasks, one page at a time.
+    query: optional free text matched against title and description; results are
+    ranked by relevance. Without query, tasks are listed newest first.
+    status / priority / due_date: optional exact-match filters.
+    Pagination: pass the returned next_after_id as after_id to get the next page.
+    """
     await _ensure_db()
+    limit = _page_limit(limit)
+    conditions = []
+    params: List[Any] = []
+
+    if status: conditions.append("t.status = ?"); params.append(status)
+    if priority: conditions.append("t.priority = ?"); params.append(priority)
+    if due_date: conditions.append("t.due_date = ?"); params.append(due_date)
+
     async with aiosqlite.connect(DB_PATH) as db:
         db.row_factory = aiosqlite.Row
-        query = "SELECT * FROM tasks"
-        conditions = []
-        params = []
-
-        if status: conditions.append("status = ?"); params.append(status)
-        if priority: conditions.append("priority = ?"); params.append(priority)
-        if due_date: conditions.append("due_date = ?"); params.append(due_date)
 
+        if not query:
+            if after_id is not None:
+                conditions.append("t.id < ?"); params.append(after_id)
+            sql = "SELECT t.* FROM tasks t"
+            if conditions:
+                sql += " WHERE " + " AND ".join(conditions)
+            sql += " ORDER BY t.id DESC LIMIT ?"
+            cursor = await db.execute(sql, [*params, limit + 1])
+            return _page(await cursor.fetchall(), limit)
+
+        match = _fts_query(query)
+        if not match:
+            return {"status": "error", "message": "query has no searchable words"}
+
+        # Ranked order is (bm25 rank ASC, id DESC); the keyset cursor is
+        # the rank of the after_id task under this same query.
+        if after_id is not None:
+            cursor = await db.execute(
+                f"SELECT bm25(tasks_fts, {TITLE_WEIGHT}, 1.0) FROM tasks_fts "
+                f"WHERE tasks_fts MATCH ? AND rowid = ?",
+                (match, after_id),
+            )
+            row = await cursor.fetchone()
+            if row is None:
+                return {"status": "error", "message": f"after_id {after_id} is not in these results"}
+            conditions.append("(f.rank > ? OR (f.rank = ? AND t.id < ?))")
+            params.extend([row[0], row[0], after_id])
+
+        sql = (
+            f"SELECT t.*, f.rank AS rank FROM "
+            f"(SELECT rowid, bm25(tasks_fts, {TITLE_WEIGHT}, 1.0) AS rank "
+            f" FROM tasks_fts WHERE tasks_fts MATCH ?) f "
+            f"JOIN tasks t ON t.id = f.rowid"
+        )
         if conditions:
-            query += " WHERE " + " AND ".join(conditions)
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY f.rank, t.id DESC LIMIT ?"
+        cursor = await db.execute(sql, [match, *params, limit + 1])
+        page = _page(await cursor.fetchall(), limit)
+        for task in page["tasks"]:
+            task.pop("rank", None)
+        return page
+
+
+async def bulk_add_tasks_tool(tasks: List[Dict[str, str]]) -> Dict[str, Any]:
+    """
+    Add many tasks in one transaction.
+    tasks: list of {"title": ..., "description": ..., "priority": ..., "due_date": ...};
+    only title is required. Either every task is added or none is.
+    """
+    await _ensure_db()
+    missing = [i for i, t in enumerate(tasks) if not (t.get("title") or "").strip()]
+    if missing:
+        return {"status": "error", "message": f"title is required (items {missing})"}
 
-        query += " ORDER BY id DESC"
-        cursor = await db.execute(query, params)
-        rows = await cursor.fetchall()
-        return [dict(row) for row in rows]
+    async with aiosqlite.connect(DB_PATH) as db:
+        task_ids = []
+        try:
+            for t in tasks:
+                cursor = await db.execute(
+                    "INSERT INTO tasks (title, description, priority, due_date) VALUES (?, ?, ?, ?)",
+                    (t["title"], t.get("description", ""),
+                     t.get("priority", "medium"), t.get("due_date", "")),
+                )
+                task_ids.append(cursor.lastrowid)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            raise
+        return {"status": "ok", "task_ids": task_ids}
+
+
+async def bulk_update_status_tool(task_ids: List[int], status: str) -> Dict[str, Any]:
+    """Set the same status (e.g. 'completed', 'pending') on many tasks in one statement."""
+    await _ensure_db()
+    if not task_ids:
+        return {"status": "error", "message": "No task IDs given"}
+    ids = sorted(set(int(i) for i in task_ids))
+    marks = ", ".join("?" * len(ids))
+
+    async with aiosqlite.connect(DB_PATH) as db:
+        cursor = await db.execute(f"SELECT id FROM tasks WHERE id IN ({marks})", ids)
+        found = {row[0] for row in await cursor.fetchall()}
+        await db.execute(f"UPDATE tasks SET status = ? WHERE id IN ({marks})", [status, *ids])
+        await db.commit()
+
+    result = {"status": "ok", "updated": len(found)}
+    not_found = [i for i in ids if i not in found]
+    if not_found:
+        result["not_found"] = not_found
+    return result
 
 
 # ---------------------------
@@ -167,6 +318,8 @@ adk_tools = [
     FunctionTool(delete_task_tool),
     FunctionTool(complete_task_tool),
     FunctionTool(search_tasks_tool),
+    FunctionTool(bulk_add_tasks_tool),
+    FunctionTool(bulk_update_status_tool),
 ]
 
 
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+ADK29 = Path(__file__).resolve().parent.parent
+
+
+def import_in(cwd: Path, module: str, tmp_path, prelude: str = "") -> subprocess.CompletedProcess:
+    """Import `module` in a fresh interpreter started from `cwd`."""
+    env = {
+        **os.environ,
+        "GOOGLE_API_KEY": os.environ.get("GOOGLE_API_KEY", "test-key"),
+        "GOOGLE_APPLICATION_CREDENTIALS": os.environ.get("GOOGLE_APPLICATION_CREDENTIALS", os.devnull),
+        "BUCKET_NAME": os.environ.get("BUCKET_NAME", "test-bucket"),
+        "SEARCH_CACHE_DB": str(tmp_path / "search_cache.db"),
+    }
+    return subprocess.run(
+        [sys.executable, "-c", f"{prelude}import {module}"],
+        cwd=cwd, env=env, capture_output=True, text=True, timeout=120,
+    )
+
+
+@pytest.mark.parametrize("module", ["ResearchAgent.research", "PlannerAgent.planner"])
+def test_imports_as_root_agent_does(module, tmp_path):
+    """adk web runs from Agents/; RootAgent imports the agents as top-level packages."""
+    result = import_in(ADK29 / "Agents", module, tmp_path)
+    assert result.returncode == 0, result.stderr
+
+
+@pytest.mark.parametrize("module", ["Agents.ResearchAgent.research", "Agents.PlannerAgent.planner"])
+def test_imports_as_chatbot_does(module, tmp_path):
+    """chatbot.py runs from adk29/ and puts Agents/ on sys.path first."""
+    prelude = "import sys; sys.path.insert(0, 'Agents'); "
+    result = import_in(ADK29, module, tmp_path, prelude)
+    assert result.returncode == 0, result.stderr
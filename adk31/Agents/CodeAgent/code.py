@@ -15,6 +15,8 @@
 #      • If NO  → proceed to Step 3.
 #   3. KB Classifier LLM
 #      • Decide which knowledge-base .md files are relevant.
+#   (Steps 2, 3 and 5 are memoised by Common.llm_cache — a repeat
+#    request with the same KB catalogue and model skips the LLM.)
 #   4. Load KB files from disk (Python — no LLM).
 #   5. Task Planner LLM
 #      • Ordered FILE MANIFEST — every file to create or modify.
@@ -49,6 +51,12 @@ from google.adk.apps import App
 from google.genai import types
 
 from .config import config
+from Common.llm_cache import LlmCallCache, catalogue_version
+from Common.session_index import (
+    context_since_marker,
+    index_after_agent,
+    latest_context_request,
+)
 
 # ─────────────────────────────────────────────────────────────
 # LOGGING
@@ -106,6 +114,22 @@ if KB_FILES:
 else:
     logger.warning(f"No knowledge base files found in: {_KB_DIR}")
 
+# Fingerprint of the KB catalogue — part of every classifier/planner
+# cache key, so editing or adding a KB file invalidates old answers.
+KB_VERSION: str = catalogue_version(_KB_DIR / name for name in KB_FILES.values())
+
+# ─────────────────────────────────────────────────────────────
+# LLM CALL CACHE
+# Classifiers and the task planner only — writers are never cached.
+# ─────────────────────────────────────────────────────────────
+_llm_cache = LlmCallCache(
+    name="code",
+    logger=logger,
+    max_entries=config.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.LLM_CACHE_TTL_SECONDS,
+    db_path=config.LLM_CACHE_DB,
+)
+
 # ─────────────────────────────────────────────────────────────
 # STATE KEYS
 # ─────────────────────────────────────────────────────────────
@@ -243,66 +267,6 @@ def _parse_file_manifest(raw: str) -> List[dict]:
     return files
 
 
-# ─────────────────────────────────────────────────────────────
-# HELPER — extract file contents from session events
-#
-# When root agent reads files via file_system_mcp and then calls
-# code_agent, the file contents live in the session event stream
-# as function_response parts — NOT in user_content. This helper
-# scans all session events and assembles a ## PROVIDED CONTEXT block
-# so CodeAgent is never dependent on root agent assembling the
-# combined string correctly.
-# ─────────────────────────────────────────────────────────────
-def _extract_context_from_session(ctx: InvocationContext) -> str:
-    file_sections = []
-    for event in ctx.session.events:
-        if not (event.content and event.content.parts):
-            continue
-        for part in event.content.parts:
-            fr = getattr(part, "function_response", None)
-            if fr is None:
-                continue
-            tool_name = getattr(fr, "name", "") or ""
-            if not any(k in tool_name.lower() for k in ("read", "list", "get")):
-                continue
-            response = getattr(fr, "response", None)
-            if not response:
-                continue
-
-            text_content = ""
-            file_path = tool_name
-
-            if isinstance(response, dict):
-                raw = response.get(
-                    "content",
-                    response.get("result", response.get("output", "")),
-                )
-                if isinstance(raw, list):
-                    for item in raw:
-                        if isinstance(item, dict) and item.get("type") == "text":
-                            text_content += item.get("text", "")
-                elif isinstance(raw, str):
-                    text_content = raw
-                file_path = str(
-                    response.get("path", response.get("file", tool_name))
-                )
-            elif isinstance(response, str):
-                text_content = response
-
-            text_content = text_content.strip()
-            if text_content and len(text_content) > 20:
-                file_sections.append(
-                    f"### File: {file_path}\n```\n{text_content}\n```"
-                )
-                logger.debug(
-                    f"[extract_context] Found '{file_path}': {len(text_content)} chars"
-                )
-
-    if not file_sections:
-        return ""
-    return "## PROVIDED CONTEXT\n\n" + "\n\n".join(file_sections)
-
-
 # ─────────────────────────────────────────────────────────────
 # CODE AGENT
 # ─────────────────────────────────────────────────────────────
@@ -339,6 +303,7 @@ class CodeAgent(BaseAgent):
                 "files from root agent when needed. Returns an action plan for root agent "
                 "to write all files to disk via file_system_mcp."
             ),
+            after_agent_callback=index_after_agent,
         )
 
     async def _run_async_impl(
@@ -379,17 +344,8 @@ class CodeAgent(BaseAgent):
                     raw_input += part.text
 
         # Detect whether WE already sent a CONTEXT_REQUEST this session
-        prior_context_request_text = ""
-        for event in ctx.session.events:
-            if (
-                event.author == self.name
-                and event.content
-                and event.content.parts
-            ):
-                for part in event.content.parts:
-                    txt = getattr(part, "text", None) or ""
-                    if txt.startswith(CONTEXT_REQUEST_PREFIX):
-                        prior_context_request_text = txt
+        # (incremental index — only events since the last lookup are scanned)
+        prior_context_request_text = latest_context_request(ctx.session, self.name)
 
         context_request_sent = bool(prior_context_request_text)
 
@@ -421,7 +377,7 @@ class CodeAgent(BaseAgent):
                 f"({len(user_request)} chars). user_content was: '{raw_input[:80]}'"
             )
 
-            project_context = _extract_context_from_session(ctx)
+            project_context = context_since_marker(ctx.session, self.name)
             if project_context:
                 logger.info(
                     f"[CodeAgent] Context extracted from session events "
@@ -517,12 +473,9 @@ class CodeAgent(BaseAgent):
                 include_contents="none",
             )
 
-            classifier_output = ""
-            async for event in ctx_classifier.run_async(ctx):
-                if event.is_final_response() and event.content and event.content.parts:
-                    for part in event.content.parts:
-                        if getattr(part, "text", None):
-                            classifier_output += part.text
+            classifier_output = await _llm_cache.run(
+                "context_classifier", ctx_classifier, ctx, classifier_prompt
+            )
 
             logger.debug(f"[CodeAgent] Context classifier:\n{classifier_output}")
 
@@ -616,12 +569,9 @@ class CodeAgent(BaseAgent):
             include_contents="none",
         )
 
-        raw_kb_tokens = ""
-        async for event in kb_classifier.run_async(ctx):
-            if event.is_final_response() and event.content and event.content.parts:
-                for part in event.content.parts:
-                    if getattr(part, "text", None):
-                        raw_kb_tokens += part.text
+        raw_kb_tokens = await _llm_cache.run(
+            "kb_classifier", kb_classifier, ctx, kb_classifier_prompt, KB_VERSION
+        )
 
         logger.debug(f"[CodeAgent] KB classifier raw output: {raw_kb_tokens!r}")
 
@@ -689,12 +639,9 @@ class CodeAgent(BaseAgent):
             include_contents="none",
         )
 
-        raw_manifest = ""
-        async for event in planner.run_async(ctx):
-            if event.is_final_response() and event.content and event.content.parts:
-                for part in event.content.parts:
-                    if getattr(part, "text", None):
-                        raw_manifest += part.text
+        raw_manifest = await _llm_cache.run(
+            "planner", planner, ctx, planner_prompt, KB_VERSION
+        )
 
         logger.debug(f"[CodeAgent] Raw manifest:\n{raw_manifest}")
 
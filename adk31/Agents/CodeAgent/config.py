@@ -14,6 +14,11 @@ class Config:
     RESEARCH_MODEL: str = os.getenv("RESEARCH_MODEL", "gemini-2.0-flash")
     CODE_MODEL: str = os.getenv("CODE_MODEL", "gemini-2.0-flash")
     KNOWLEDGE_BASE: str = os.getenv("KNOWLEDGE_BASE", "")
+
+    # ── LLM call cache (classifiers / planners only) ──────────
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "256"))
+    LLM_CACHE_TTL_SECONDS: int = int(os.getenv("LLM_CACHE_TTL_SECONDS", "3600"))
+    LLM_CACHE_DB: str = os.getenv("LLM_CACHE_DB", "")
     
     # -----------------------------
     # Gemini (API Key Mode)
@@ -0,0 +1,244 @@
+# llm_cache.py
+# ─────────────────────────────────────────────────────────────
+# LLM Call Cache (shared by CodeAgent / SolutionAgent)
+#
+# Memoises the text output of deterministic-purpose LlmAgent calls
+# (context classifiers, KB classifier, task planner) so that a
+# re-invocation with the same request — e.g. root agent calling
+# code_agent again after a CONTEXT_REQUEST round trip — does not pay
+# for the same model call twice.
+#
+# Key   = sha256(purpose | model id | KB catalogue version |
+#                normalised prompt text)
+# Store = in-process LRU (OrderedDict) + optional SQLite backing
+#         file, both honouring the same TTL.
+#
+# Creative calls (file writers, solution writer, action plans) are
+# NEVER cached — only purposes listed in DETERMINISTIC_PURPOSES.
+# Hit rate and saved latency are written to the caller's logger.
+# ─────────────────────────────────────────────────────────────
+
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from google.adk.agents import LlmAgent
+from google.adk.agents.invocation_context import InvocationContext
+
+# Only these purposes are safe to memoise — their output is a
+# decision / plan derived purely from the prompt text.
+DETERMINISTIC_PURPOSES = frozenset({
+    "context_classifier",
+    "kb_classifier",
+    "planner",
+})
+
+
+# ─────────────────────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────────────────────
+
+def normalise_text(text: str) -> str:
+    """Collapse runs of whitespace so cosmetic differences share a key."""
+    return re.sub(r"\s+", " ", text or "").strip()
+
+
+def catalogue_version(paths: Iterable[Path]) -> str:
+    """
+    Short fingerprint of a set of files (name, size, mtime).
+    Changes whenever a KB file is added, removed, or edited, which
+    invalidates every cached KB-classifier / planner answer.
+    """
+    digest = hashlib.sha256()
+    for p in sorted(paths):
+        try:
+            st = p.stat()
+        except OSError:
+            continue
+        digest.update(f"{p.name}:{st.st_size}:{int(st.st_mtime)}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+# ─────────────────────────────────────────────────────────────
+# CACHE
+# ─────────────────────────────────────────────────────────────
+
+class LlmCallCache:
+    """
+    LRU + optional SQLite memo for deterministic LlmAgent outputs.
+
+    Args:
+        name:        Label used in log lines (e.g. "code", "solution").
+        logger:      Logger of the owning agent — stats land in its log file.
+        max_entries: In-process LRU capacity.
+        ttl_seconds: Entry lifetime; 0 disables expiry.
+        db_path:     SQLite file for persistence across restarts ("" = memory only).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        logger: logging.Logger,
+        max_entries: int = 256,
+        ttl_seconds: int = 3600,
+        db_path: str = "",
+    ):
+        self.name = name
+        self.logger = logger
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._lru: "OrderedDict[str, Tuple[str, float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.saved_seconds = 0.0
+
+        self._db: Optional[sqlite3.Connection] = None
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " latency REAL NOT NULL,"
+                " created REAL NOT NULL)"
+            )
+            self._db.commit()
+            self.logger.info(f"[LlmCache:{self.name}] SQLite backing store → {db_path}")
+
+    # ── keys ───────────────────────────────────────────────────
+    @staticmethod
+    def make_key(purpose: str, model: str, prompt: str, kb_version: str = "") -> str:
+        raw = "\x1f".join((purpose, model, kb_version, normalise_text(prompt)))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _expired(self, created: float) -> bool:
+        return bool(self.ttl_seconds) and (time.time() - created) > self.ttl_seconds
+
+    # ── get / put ──────────────────────────────────────────────
+    def get(self, key: str) -> Optional[Tuple[str, float]]:
+        """Return (value, original_latency) or None on miss / expiry."""
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                value, latency, created = entry
+                if not self._expired(created):
+                    self._lru.move_to_end(key)
+                    return value, latency
+                del self._lru[key]
+
+            if self._db is None:
+                return None
+
+            row = self._db.execute(
+                "SELECT value, latency, created FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, latency, created = row
+            if self._expired(created):
+                self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+
+            self._remember(key, value, latency, created)
+            return value, latency
+
+    def put(self, key: str, value: str, latency: float) -> None:
+        if not value:
+            return  # never cache a failed / empty call
+        created = time.time()
+        with self._lock:
+            self._remember(key, value, latency, created)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, latency, created) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, value, latency, created),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, value: str, latency: float, created: float) -> None:
+        self._lru[key] = (value, latency, created)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    # ── stats ──────────────────────────────────────────────────
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return (self.hits / total) if total else 0.0
+
+    def stats_line(self) -> str:
+        return (
+            f"hits={self.hits} misses={self.misses} "
+            f"hit_rate={self.hit_rate:.0%} saved={self.saved_seconds:.2f}s"
+        )
+
+    # ── run ────────────────────────────────────────────────────
+    async def run(
+        self,
+        purpose: str,
+        agent: LlmAgent,
+        ctx: InvocationContext,
+        prompt: str,
+        kb_version: str = "",
+    ) -> str:
+        """
+        Run `agent` and return its final-response text, serving the
+        answer from cache when an identical call was made before.
+
+        Non-deterministic purposes bypass the cache entirely.
+        """
+        if purpose not in DETERMINISTIC_PURPOSES:
+            return await _collect_final_text(agent, ctx)
+
+        key = self.make_key(purpose, str(agent.model), prompt, kb_version)
+        cached = self.get(key)
+        if cached is not None:
+            value, latency = cached
+            self.hits += 1
+            self.saved_seconds += latency
+            self.logger.info(
+                f"[LlmCache:{self.name}] HIT  {purpose} "
+                f"(saved {latency:.2f}s) | {self.stats_line()}"
+            )
+            return value
+
+        started = time.perf_counter()
+        value = await _collect_final_text(agent, ctx)
+        latency = time.perf_counter() - started
+        self.misses += 1
+        self.put(key, value, latency)
+        self.logger.info(
+            f"[LlmCache:{self.name}] MISS {purpose} "
+            f"({latency:.2f}s) | {self.stats_line()}"
+        )
+        return value
+
+
+async def _collect_final_text(agent: LlmAgent, ctx: InvocationContext) -> str:
+    text = ""
+    async for event in agent.run_async(ctx):
+        if event.is_final_response() and event.content and event.content.parts:
+            for part in event.content.parts:
+                if getattr(part, "text", None):
+                    text += part.text
+    return text
+
+
+__all__ = [
+    "LlmCallCache",
+    "DETERMINISTIC_PURPOSES",
+    "catalogue_version",
+    "normalise_text",
+]
@@ -0,0 +1,247 @@
+# search_cache.py
+# ─────────────────────────────────────────────────────────────
+# Shared Search-Result Cache + Query De-duplication
+#
+# Used by every google_search fan-out (ResearchAgent, SolutionAgent,
+# PlannerFanOutAgent) before it builds its ParallelAgent workers:
+#
+#   1. Collapse near-duplicate queries (Jaccard over content-word
+#      tokens) so "react hooks useEffect cleanup" and "useEffect
+#      cleanup React hooks" are searched once. Queries whose numbers
+#      differ ("python 3.11" / "python 3.12") are never merged, and
+#      words are compared whole ("install" / "uninstall").
+#   2. Serve any query already searched within its TTL from the
+#      persistent SQLite store — no worker is created for it.
+#   3. After the fan-out, store the fresh summaries back.
+#
+# TTL depends on recency sensitivity: queries that ask for news,
+# "latest", prices, or the current year expire quickly; evergreen
+# technical queries are kept for days.
+#
+# No ADK imports — the cache is plain Python so it can be driven by
+# any search callable (including a local fake in tests).
+# ─────────────────────────────────────────────────────────────
+
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import datetime
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent / "search_cache.db"
+
+RECENT_TTL_SECONDS    = 60 * 60              # 1 hour  — news / latest / prices
+EVERGREEN_TTL_SECONDS = 7 * 24 * 60 * 60     # 7 days  — docs, how-to, errors
+
+DUPLICATE_THRESHOLD = 0.9                    # Jaccard over content-word tokens
+
+# Version numbers stay one token ("3.11"), words are whole words.
+_TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)*|[^\W\d_]+(?:\d+\w*)?")
+_STOPWORDS = frozenset(
+    "a an the of for to in on at by with and or how what is are do does "
+    "i my me using use".split()
+)
+
+_RECENCY_PATTERN = re.compile(
+    r"\b(latest|today|news|current|currently|now|recent|recently|breaking|"
+    r"price|prices|stock|live|score|updates?|announced|this week|this month|"
+    r"release date)\b"
+)
+
+# Results that mean "search failed" — never cached.
+_EMPTY_RESULTS = {"", "no result."}
+
+
+# ─────────────────────────────────────────────────────────────
+# HELPERS
+# ─────────────────────────────────────────────────────────────
+
+def normalise_query(query: str) -> str:
+    """Lower-case, drop punctuation, collapse whitespace."""
+    q = re.sub(r"[^\w\s]", " ", (query or "").lower())
+    return re.sub(r"\s+", " ", q).strip()
+
+
+def query_key(query: str) -> str:
+    return hashlib.sha256(normalise_query(query).encode("utf-8")).hexdigest()
+
+
+def _tokens(query: str) -> set:
+    tokens = set(_TOKEN_PATTERN.findall((query or "").lower()))
+    return (tokens - _STOPWORDS) or tokens
+
+
+def similarity(a: str, b: str) -> float:
+    """
+    Jaccard similarity of content-word tokens (0.0 – 1.0), word order
+    ignored. 0.0 when either query has a number the other lacks.
+    """
+    sa, sb = _tokens(a), _tokens(b)
+    if not sa or not sb:
+        return 0.0
+    if any(t[0].isdigit() for t in sa ^ sb):
+        return 0.0
+    return len(sa & sb) / len(sa | sb)
+
+
+def ttl_for(query: str) -> int:
+    """Short TTL for recency-sensitive queries, long TTL otherwise."""
+    q = normalise_query(query)
+    if _RECENCY_PATTERN.search(q):
+        return RECENT_TTL_SECONDS
+    if str(datetime.datetime.now().year) in q:
+        return RECENT_TTL_SECONDS
+    return EVERGREEN_TTL_SECONDS
+
+
+def dedupe_queries(queries: List[str], threshold: float = DUPLICATE_THRESHOLD) -> List[str]:
+    """Keep the first query of every near-duplicate group, order preserved."""
+    unique: List[str] = []
+    for q in queries:
+        if not normalise_query(q):
+            continue
+        if any(similarity(q, u) >= threshold for u in unique):
+            continue
+        unique.append(q)
+    return unique
+
+
+# ─────────────────────────────────────────────────────────────
+# SEARCH PLAN — one per fan-out run
+# ─────────────────────────────────────────────────────────────
+
+@dataclass
+class SearchPlan:
+    """
+    unique   — de-duplicated queries, in original order
+    cached   — query → cached summary (subset of unique)
+    pending  — queries that still need a live search (subset of unique)
+    """
+    requested: int
+    unique:    List[str]
+    cached:    Dict[str, str] = field(default_factory=dict)
+    pending:   List[str]      = field(default_factory=list)
+
+    @property
+    def collapsed(self) -> int:
+        return self.requested - len(self.unique)
+
+    def summary(self) -> str:
+        return (
+            f"requested={self.requested} unique={len(self.unique)} "
+            f"collapsed={self.collapsed} cache_hits={len(self.cached)} "
+            f"to_search={len(self.pending)}"
+        )
+
+
+# ─────────────────────────────────────────────────────────────
+# SEARCH CACHE
+# ─────────────────────────────────────────────────────────────
+
+class SearchCache:
+    """Persistent (SQLite) query → summary cache with per-query TTL."""
+
+    def __init__(self, db_path: str = "", logger: Optional[logging.Logger] = None):
+        self.db_path = str(db_path or DEFAULT_DB_PATH)
+        self.logger = logger or logging.getLogger("search_cache")
+        self._lock = threading.Lock()
+
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS search_cache ("
+            " key TEXT PRIMARY KEY,"
+            " query TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " ttl INTEGER NOT NULL)"
+        )
+        self._db.commit()
+
+        self.total_hits = 0
+        self.total_misses = 0
+
+    # ── get / put ──────────────────────────────────────────────
+    def get(self, query: str) -> Optional[str]:
+        key = query_key(query)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT result, created, ttl FROM search_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            result, created, ttl = row
+            if time.time() - created > ttl:
+                self._db.execute("DELETE FROM search_cache WHERE key = ?", (key,))
+                self._db.commit()
+                return None
+            return result
+
+    def put(self, query: str, result: str) -> None:
+        if (result or "").strip().lower() in _EMPTY_RESULTS:
+            return
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO search_cache (key, query, result, created, ttl) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (query_key(query), query, result, time.time(), ttl_for(query)),
+            )
+            self._db.commit()
+
+    # ── planning ───────────────────────────────────────────────
+    def plan(
+        self,
+        queries: List[str],
+        label: str = "search",
+        logger: Optional[logging.Logger] = None,
+    ) -> SearchPlan:
+        """
+        Collapse near-duplicates, then split into cached vs. pending.
+        `logger` lets each agent record the per-run hit report in its own log.
+        """
+        plan = SearchPlan(requested=len(queries), unique=dedupe_queries(queries))
+        for q in plan.unique:
+            hit = self.get(q)
+            if hit is not None:
+                plan.cached[q] = hit
+            else:
+                plan.pending.append(q)
+
+        self.total_hits += len(plan.cached)
+        self.total_misses += len(plan.pending)
+        (logger or self.logger).info(f"[SearchCache:{label}] {plan.summary()}")
+        return plan
+
+    def store(self, results: Dict[str, str]) -> None:
+        """Persist fresh query → summary results after a fan-out."""
+        for q, text in results.items():
+            self.put(q, text)
+
+
+# One shared instance per database file for the whole process.
+_instances: Dict[str, SearchCache] = {}
+_instances_lock = threading.Lock()
+
+
+def shared_search_cache(db_path: str = "", logger: Optional[logging.Logger] = None) -> SearchCache:
+    path = str(db_path or DEFAULT_DB_PATH)
+    with _instances_lock:
+        if path not in _instances:
+            _instances[path] = SearchCache(path, logger=logger)
+        return _instances[path]
+
+
+__all__ = [
+    "SearchCache",
+    "SearchPlan",
+    "shared_search_cache",
+    "dedupe_queries",
+    "normalise_query",
+    "similarity",
+    "ttl_for",
+]
@@ -12,6 +12,14 @@ class Config:
     # because the root agent uses NO tools (no function calling needed).
     MODEL: str = os.getenv("MODEL", "gemini-2.5-flash")
     RESEARCH_MODEL: str = os.getenv("RESEARCH_MODEL", "gemini-2.0-flash")
+
+    # ── Shared search-result cache (Common/search_cache.py) ────
+    SEARCH_CACHE_DB: str = os.getenv("SEARCH_CACHE_DB", "")
+
+    # ── Model call scheduler (Common/model_scheduler.py) ───────
+    SCHEDULER_MAX_CONCURRENCY: int = int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "4"))
+    SCHEDULER_RPM: float = float(os.getenv("SCHEDULER_RPM", "60"))
+    SCHEDULER_MAX_RETRIES: int = int(os.getenv("SCHEDULER_MAX_RETRIES", "4"))
     
     # -----------------------------
     # Gemini (API Key Mode)
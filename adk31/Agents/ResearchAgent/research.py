@@ -10,6 +10,10 @@
 #       which is unreliable in this ADK version)
 #   4. Parallel Search → one SearchWorker per query
 #      (results captured from event stream — NOT from state after the fact)
+#      Near-duplicate queries are collapsed and cached results served
+#      by Common.search_cache — only the remainder is searched live.
+#      Each live search runs through Common.model_scheduler (global
+#      concurrency cap, per-model token bucket, 429 retry/backoff).
 #   5. Synthesiser LLM → search block injected directly into prompt
 #      → structured markdown report
 # ─────────────────────────────────────────────────────────────
@@ -30,6 +34,8 @@ from google.adk.apps import App
 from google.genai import types
 
 from .config import config
+from Common.search_cache import shared_search_cache
+from Common.model_scheduler import configure_scheduler
 
 # ─────────────────────────────────────────────────────────────
 # LOGGING
@@ -66,6 +72,16 @@ os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "0"
 MIN_QUERIES = 2
 MAX_QUERIES = 8
 
+_search_cache = shared_search_cache(config.SEARCH_CACHE_DB)
+
+# One scheduler per process — whichever agent imports first configures it.
+_scheduler = configure_scheduler(
+    max_concurrency=config.SCHEDULER_MAX_CONCURRENCY,
+    requests_per_minute=config.SCHEDULER_RPM,
+    max_retries=config.SCHEDULER_MAX_RETRIES,
+    logger=logger,
+)
+
 # ─────────────────────────────────────────────────────────────
 # STATE KEYS
 # ─────────────────────────────────────────────────────────────
@@ -89,6 +105,8 @@ def get_current_datetime() -> str:
 # ─────────────────────────────────────────────────────────────
 # SEARCH WORKER
 # Runs one google_search query; captures result from event stream.
+# The model call waits for a scheduler slot and is retried on 429,
+# instead of every worker hitting Gemini at the same instant.
 # ─────────────────────────────────────────────────────────────
 class SearchWorker(BaseAgent):
 
@@ -115,12 +133,20 @@ Output ONLY the factual summary — no preamble, no opinions.
 """,
         )
 
-        result_text = ""
-        async for event in inner.run_async(ctx):
-            if event.is_final_response() and event.content and event.content.parts:
-                for part in event.content.parts:
-                    if getattr(part, "text", None):
-                        result_text += part.text
+        async def _search() -> str:
+            text = ""
+            async for event in inner.run_async(ctx):
+                if event.is_final_response() and event.content and event.content.parts:
+                    for part in event.content.parts:
+                        if getattr(part, "text", None):
+                            text += part.text
+            return text
+
+        try:
+            result_text = await _scheduler.run(RESEARCH_MODEL, _search, label=self.name)
+        except Exception as e:
+            logger.error(f"[{self.name}] Search failed after retries: {e}")
+            result_text = ""
 
         logger.info(f"[{self.name}] Result: {len(result_text)} chars")
 
@@ -250,34 +276,49 @@ Output ONLY a numbered list — no explanation, no preamble:
             logger.info(f"  [{i}] {q}")
 
         # ── STEP 5: Parallel search (event-stream capture) ───
-        workers = [
-            SearchWorker(name=f"search_worker_{i}", worker_index=i, query=q)
-            for i, q in enumerate(queries)
-        ]
-        parallel = ParallelAgent(name="parallel_search_agent", sub_agents=workers)
+        # Collapse near-duplicates and serve cached results first;
+        # workers are only created for the queries still pending.
+        plan = _search_cache.plan(queries, label="research", logger=logger)
+        queries = plan.unique
 
-        worker_query_map = {f"search_worker_{i}": q for i, q in enumerate(queries)}
+        worker_query_map = {
+            f"search_worker_{i}": q
+            for i, q in enumerate(queries)
+            if q in plan.pending
+        }
         worker_results: dict = {}
 
-        logger.info(f"[ResearchAgent] Running {len(workers)} parallel searches.")
-        async for event in parallel.run_async(ctx):
-            if (
-                event.author in worker_query_map
-                and event.is_final_response()
-                and event.content
-                and event.content.parts
-            ):
-                text = "".join(
-                    part.text for part in event.content.parts
-                    if getattr(part, "text", None)
-                ).strip()
-                if text and text != "No result.":
-                    worker_results[event.author] = text
-                    logger.info(f"[ResearchAgent] Captured {event.author}: {len(text)} chars")
+        if worker_query_map:
+            workers = [
+                SearchWorker(name=name, worker_index=queries.index(q), query=q)
+                for name, q in worker_query_map.items()
+            ]
+            parallel = ParallelAgent(name="parallel_search_agent", sub_agents=workers)
+
+            logger.info(f"[ResearchAgent] Running {len(workers)} parallel searches.")
+            async for event in parallel.run_async(ctx):
+                if (
+                    event.author in worker_query_map
+                    and event.is_final_response()
+                    and event.content
+                    and event.content.parts
+                ):
+                    text = "".join(
+                        part.text for part in event.content.parts
+                        if getattr(part, "text", None)
+                    ).strip()
+                    if text and text != "No result.":
+                        worker_results[event.author] = text
+                        logger.info(f"[ResearchAgent] Captured {event.author}: {len(text)} chars")
+
+            _search_cache.store({
+                worker_query_map[name]: text for name, text in worker_results.items()
+            })
+            logger.info(f"[ResearchAgent] Scheduler: {_scheduler.stats_line()}")
 
         results_list: List[str] = []
         for i, q in enumerate(queries):
-            text = worker_results.get(f"search_worker_{i}", "")
+            text = plan.cached.get(q) or worker_results.get(f"search_worker_{i}", "")
             if text:
                 results_list.append(f"[Search {i+1}: {q}]\n{text}")
 
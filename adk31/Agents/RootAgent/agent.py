@@ -13,6 +13,7 @@ from .prompts import ROOT_AGENT_INSTRUCTION
 from ResearchAgent.research import research_agent, get_current_datetime
 from CodeAgent.code import code_agent
 from SolutionAgent.solution import solution_agent
+from Common.session_index import index_after_tool
 
 MODEL = config.MODEL
 os.environ["GOOGLE_API_KEY"] = config.GOOGLE_API_KEY
@@ -53,5 +54,8 @@ root_agent = LlmAgent(
         get_current_datetime,
         file_system_mcp,
     ],
+    # Keeps the session-event index current as file reads come in,
+    # so sub-agents look up context without rescanning history.
+    after_tool_callback=index_after_tool,
 )
 
@@ -12,10 +12,16 @@
 #        and STOP. Root agent reads files via file_system_mcp and
 #        calls this agent again with problem + fetched context.
 #      • If NO  → proceed directly to Step 4.
+#      • Memoised by Common.llm_cache — the same problem text is
+#        never classified twice within the cache TTL.
 #   4. Query Builder LLM → 2–8 targeted Google search queries
 #      (captured from event stream — NOT output_key/SequentialAgent)
 #   5. Parallel Search → one LlmAgent worker per query
 #      (results stored in state via output_key — NOT from event stream)
+#      Near-duplicate queries are collapsed and cached results served
+#      by Common.search_cache — only the remainder is searched live.
+#      Each worker runs through Common.model_scheduler (global
+#      concurrency cap, per-model token bucket, 429 retry/backoff).
 #   6. Solution LLM → problem + context + search results injected
 #      → structured markdown solution report
 #   7. Action Plan LLM → converts solution into a machine-readable
@@ -42,6 +48,14 @@ from google.adk.apps import App
 from google.genai import types
 
 from .config import config
+from Common.llm_cache import LlmCallCache
+from Common.search_cache import shared_search_cache
+from Common.model_scheduler import ScheduledAgent, configure_scheduler
+from Common.session_index import (
+    context_since_marker,
+    index_after_agent,
+    latest_context_request,
+)
 
 # ─────────────────────────────────────────────────────────────
 # LOGGING
@@ -82,6 +96,26 @@ os.environ["GOOGLE_GENAI_USE_VERTEXAI"] = "0"
 MIN_QUERIES = 2
 MAX_QUERIES = 8
 
+# Classifier only — the query builder embeds the current minute and
+# every later step is creative output, so neither is worth caching.
+_llm_cache = LlmCallCache(
+    name="solution",
+    logger=logger,
+    max_entries=config.LLM_CACHE_MAX_ENTRIES,
+    ttl_seconds=config.LLM_CACHE_TTL_SECONDS,
+    db_path=config.LLM_CACHE_DB,
+)
+
+_search_cache = shared_search_cache(config.SEARCH_CACHE_DB)
+
+# One scheduler per process — whichever agent imports first configures it.
+_scheduler = configure_scheduler(
+    max_concurrency=config.SCHEDULER_MAX_CONCURRENCY,
+    requests_per_minute=config.SCHEDULER_RPM,
+    max_retries=config.SCHEDULER_MAX_RETRIES,
+    logger=logger,
+)
+
 # ─────────────────────────────────────────────────────────────
 # STATE KEYS
 # ─────────────────────────────────────────────────────────────
@@ -108,81 +142,19 @@ def _make_instruction(text: str):
     return _fn
 
 
-# ─────────────────────────────────────────────────────────────
-# HELPER — extract file contents from session events
-#
-# When root agent reads files via file_system_mcp and then calls
-# solution_agent, the file contents live in the session event stream
-# as function_response parts — NOT in user_content. This helper
-# scans all session events and assembles a ## PROVIDED CONTEXT block
-# so SolutionAgent is never dependent on root agent assembling the
-# combined string correctly.
-# ─────────────────────────────────────────────────────────────
-def _extract_context_from_session(ctx: InvocationContext) -> str:
-    file_sections = []
-    for event in ctx.session.events:
-        if not (event.content and event.content.parts):
-            continue
-        for part in event.content.parts:
-            fr = getattr(part, "function_response", None)
-            if fr is None:
-                continue
-            tool_name = getattr(fr, "name", "") or ""
-            # Only file read / directory list responses
-            if not any(k in tool_name.lower() for k in ("read", "list", "get")):
-                continue
-            response = getattr(fr, "response", None)
-            if not response:
-                continue
-
-            text_content = ""
-            file_path = tool_name
-
-            if isinstance(response, dict):
-                # Shape A: {'content': [{'type': 'text', 'text': '...'}], 'path': '...'}
-                # Shape B: {'content': '...', 'path': '...'}
-                # Shape C: {'result': '...'}
-                raw = response.get(
-                    "content",
-                    response.get("result", response.get("output", "")),
-                )
-                if isinstance(raw, list):
-                    for item in raw:
-                        if isinstance(item, dict) and item.get("type") == "text":
-                            text_content += item.get("text", "")
-                elif isinstance(raw, str):
-                    text_content = raw
-                file_path = str(
-                    response.get("path", response.get("file", tool_name))
-                )
-            elif isinstance(response, str):
-                text_content = response
-
-            text_content = text_content.strip()
-            if text_content and len(text_content) > 20:
-                file_sections.append(
-                    f"### File: {file_path}\n```\n{text_content}\n```"
-                )
-                logger.debug(
-                    f"[extract_context] Found '{file_path}': {len(text_content)} chars"
-                )
-
-    if not file_sections:
-        return ""
-    return "## PROVIDED CONTEXT\n\n" + "\n\n".join(file_sections)
-
-
 # ─────────────────────────────────────────────────────────────
 # SEARCH WORKER FACTORY
 #
-# Returns a plain LlmAgent for one search query.
+# Returns an LlmAgent for one search query, wrapped in a
+# ScheduledAgent so its model call waits for a process-wide
+# scheduler slot and is retried on 429.
 # Using include_contents="none" so the worker only sees its own
 # instruction — no accumulated session history from previous inner
 # agents. Results are written to state via output_key so the parent
 # reads them from state after the parallel run completes, avoiding
 # unreliable event-stream capture across parallel branches.
 # ─────────────────────────────────────────────────────────────
-def _make_search_worker(index: int, query: str) -> LlmAgent:
+def _make_search_worker(index: int, query: str) -> ScheduledAgent:
     prompt = (
         "You are a technical debugging research assistant.\n\n"
         "Use the google_search tool to search for:\n"
@@ -198,7 +170,7 @@ def _make_search_worker(index: int, query: str) -> LlmAgent:
         "Include source names, exact commands or code snippets, and solution steps.\n"
         "Output ONLY the factual summary — no preamble, no opinions.\n"
     )
-    return LlmAgent(
+    worker = LlmAgent(
         name=f"solution_search_worker_{index}",
         model=RESEARCH_MODEL,
         tools=[google_search],
@@ -206,6 +178,11 @@ def _make_search_worker(index: int, query: str) -> LlmAgent:
         include_contents="none",
         output_key=f"solution:result:{index}",
     )
+    return ScheduledAgent(
+        name=f"solution_search_slot_{index}",
+        model=RESEARCH_MODEL,
+        sub_agents=[worker],
+    )
 
 
 # ─────────────────────────────────────────────────────────────
@@ -235,6 +212,7 @@ class SolutionAgent(BaseAgent):
                 "Returns a structured solution report + an action plan for root agent to "
                 "execute using code_agent and file_system_mcp."
             ),
+            after_agent_callback=index_after_agent,
         )
 
     async def _run_async_impl(
@@ -281,20 +259,10 @@ class SolutionAgent(BaseAgent):
                 if getattr(part, "text", None):
                     raw_input += part.text
 
-        # Detect whether WE already sent a CONTEXT_REQUEST this session
-        # by scanning session events for our own prior response.
-        prior_context_request_text = ""
-        for event in ctx.session.events:
-            if (
-                event.author == self.name
-                and event.content
-                and event.content.parts
-            ):
-                for part in event.content.parts:
-                    txt = getattr(part, "text", None) or ""
-                    if txt.startswith(CONTEXT_REQUEST_PREFIX):
-                        prior_context_request_text = txt
-                        # Keep scanning — take the LAST one
+        # Detect whether WE already sent a CONTEXT_REQUEST this session.
+        # The session index holds our LAST one — only events appended
+        # since the previous lookup are scanned.
+        prior_context_request_text = latest_context_request(ctx.session, self.name)
 
         context_request_sent = bool(prior_context_request_text)
 
@@ -327,7 +295,7 @@ class SolutionAgent(BaseAgent):
                 f"({len(problem)} chars). user_content was: '{raw_input[:80]}'"
             )
 
-            project_context = _extract_context_from_session(ctx)
+            project_context = context_since_marker(ctx.session, self.name)
             if project_context:
                 logger.info(
                     f"[SolutionAgent] Context extracted from session events "
@@ -406,12 +374,9 @@ class SolutionAgent(BaseAgent):
                 include_contents="none",
             )
 
-            classifier_output = ""
-            async for event in classifier.run_async(ctx):
-                if event.is_final_response() and event.content and event.content.parts:
-                    for part in event.content.parts:
-                        if getattr(part, "text", None):
-                            classifier_output += part.text
+            classifier_output = await _llm_cache.run(
+                "context_classifier", classifier, ctx, classifier_prompt
+            )
 
             logger.debug(f"[SolutionAgent] Classifier output:\n{classifier_output}")
 
@@ -543,19 +508,38 @@ class SolutionAgent(BaseAgent):
         # Workers are plain LlmAgents (no BaseAgent wrapper).
         # Each worker uses include_contents="none" + output_key so results
         # are written directly to state — no fragile event-stream capture.
-        workers = [_make_search_worker(i, q) for i, q in enumerate(queries)]
-        parallel = ParallelAgent(
-            name="solution_parallel_search_agent", sub_agents=workers
-        )
+        # Near-duplicates are collapsed and cache hits skip their worker.
+        plan = _search_cache.plan(queries, label="solution", logger=logger)
+        queries = plan.unique
+
+        workers = [
+            _make_search_worker(i, q)
+            for i, q in enumerate(queries)
+            if q in plan.pending
+        ]
+        if workers:
+            parallel = ParallelAgent(
+                name="solution_parallel_search_agent", sub_agents=workers
+            )
+
+            logger.info(f"[SolutionAgent] Running {len(workers)} parallel searches.")
+            async for _ in parallel.run_async(ctx):
+                pass  # Results stored in state via each worker's output_key
+            logger.info(f"[SolutionAgent] Scheduler: {_scheduler.stats_line()}")
 
-        logger.info(f"[SolutionAgent] Running {len(workers)} parallel searches.")
-        async for _ in parallel.run_async(ctx):
-            pass  # Results stored in state via each worker's output_key
+            _search_cache.store({
+                q: ctx.session.state.get(f"solution:result:{i}", "").strip()
+                for i, q in enumerate(queries)
+                if q in plan.pending
+            })
 
-        # Read all search results from state after parallel run completes
+        # Read all search results (cache or state) after parallel run completes
         results_list: List[str] = []
         for i, q in enumerate(queries):
-            text = ctx.session.state.get(f"solution:result:{i}", "").strip()
+            text = (
+                plan.cached.get(q)
+                or ctx.session.state.get(f"solution:result:{i}", "").strip()
+            )
             if text:
                 results_list.append(f"[Search {i + 1}: {q}]\n{text}")
                 logger.info(
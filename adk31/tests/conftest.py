@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Agents import each other as top-level packages (Common.*, ResearchAgent.*)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Agents"))
@@ -0,0 +1,92 @@
+import asyncio
+
+from Common.model_scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    ModelScheduler,
+)
+
+
+class FakeModel:
+    """Stands in for a Gemini call: records concurrency and call order."""
+
+    def __init__(self, delay: float = 0.01):
+        self.delay = delay
+        self.running = 0
+        self.peak = 0
+        self.order = []
+
+    def call(self, label: str):
+        async def _call():
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+            self.order.append(label)
+            await asyncio.sleep(self.delay)
+            self.running -= 1
+            return label
+        return _call
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+def test_concurrency_is_capped():
+    scheduler = ModelScheduler(max_concurrency=2, requests_per_minute=6000)
+    model = FakeModel()
+
+    async def fan_out():
+        return await asyncio.gather(*(scheduler.run("m", model.call(str(i))) for i in range(8)))
+
+    assert asyncio.run(fan_out()) == [str(i) for i in range(8)]
+    assert model.peak == 2
+    assert scheduler.in_flight == 0
+
+
+def test_interactive_work_is_admitted_before_background():
+    scheduler = ModelScheduler(max_concurrency=1, requests_per_minute=6000)
+    model = FakeModel()
+
+    async def fan_out():
+        first = asyncio.create_task(scheduler.run("m", model.call("first")))
+        await asyncio.sleep(0)
+        background = [
+            asyncio.create_task(scheduler.run("m", model.call(f"bg{i}"), priority=PRIORITY_BACKGROUND))
+            for i in range(2)
+        ]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(scheduler.run("m", model.call("user"), priority=PRIORITY_INTERACTIVE))
+        await asyncio.gather(first, interactive, *background)
+
+    asyncio.run(fan_out())
+    assert model.order == ["first", "user", "bg0", "bg1"]
+
+
+def test_rate_limit_errors_are_retried():
+    scheduler = ModelScheduler(max_concurrency=1, requests_per_minute=6000, base_backoff=0.001)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimited("429 RESOURCE_EXHAUSTED")
+        return "ok"
+
+    assert asyncio.run(scheduler.run("m", flaky)) == "ok"
+    assert len(attempts) == 3
+    assert scheduler.rate_limited == 2
+
+
+def test_scheduler_survives_a_new_event_loop():
+    """The process-wide instance outlives loops (tests, adk web reloads)."""
+    # A small bucket so later calls queue on its lock, not just for a slot
+    scheduler = ModelScheduler(max_concurrency=4, requests_per_minute=600)
+    model = FakeModel()
+
+    async def fan_out(tag):
+        return await asyncio.gather(*(scheduler.run("m", model.call(f"{tag}{i}")) for i in range(6)))
+
+    assert asyncio.run(fan_out("a")) == [f"a{i}" for i in range(6)]
+    assert asyncio.run(fan_out("b")) == [f"b{i}" for i in range(6)]
+    assert model.peak <= 4
+    assert scheduler.total_calls == 12
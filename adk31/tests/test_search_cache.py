@@ -0,0 +1,65 @@
+import pytest
+
+from Common.search_cache import SearchCache, dedupe_queries, similarity
+
+
+class FakeSearch:
+    """Stands in for google_search: records every query it is asked."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, query: str) -> str:
+        self.calls.append(query)
+        return f"summary of {query}"
+
+
+def fan_out(cache: SearchCache, search: FakeSearch, queries):
+    """What the agents do: plan, search only what is pending, store it."""
+    plan = cache.plan(queries)
+    fresh = {q: search(q) for q in plan.pending}
+    cache.store(fresh)
+    return {**plan.cached, **fresh}
+
+
+@pytest.fixture
+def cache(tmp_path) -> SearchCache:
+    return SearchCache(str(tmp_path / "search_cache.db"))
+
+
+@pytest.mark.parametrize("a, b", [
+    ("python 3.11 release notes", "python 3.12 release notes"),
+    ("django 4", "django 5 migration guide"),
+    ("install numpy", "uninstall numpy"),
+    ("jsonb operators", "json operators"),
+    ("h264 encoder", "h265 encoder"),
+])
+def test_different_queries_are_not_merged(a, b):
+    assert dedupe_queries([a, b]) == [a, b]
+
+
+@pytest.mark.parametrize("a, b", [
+    ("react hooks useEffect cleanup", "useEffect cleanup React hooks"),
+    ("How to install numpy?", "install numpy"),
+    ("Python 3.11 release notes", "python 3.11 release-notes"),
+])
+def test_reworded_queries_are_merged(a, b):
+    assert similarity(a, b) == 1.0
+    assert dedupe_queries([a, b]) == [a]
+
+
+def test_each_distinct_query_is_searched_once(cache):
+    search = FakeSearch()
+    queries = ["python 3.11 release notes", "python 3.12 release notes", "release notes python 3.11"]
+    results = fan_out(cache, search, queries)
+    assert search.calls == queries[:2]
+    assert results["python 3.12 release notes"] == "summary of python 3.12 release notes"
+
+    again = fan_out(cache, search, ["python 3.12 release notes", "django 5 migration guide"])
+    assert search.calls == queries[:2] + ["django 5 migration guide"]
+    assert again["python 3.12 release notes"] == "summary of python 3.12 release notes"
+
+
+def test_failed_searches_are_not_cached(cache):
+    cache.store({"flaky query": "No result."})
+    assert cache.get("flaky query") is None
@@ -0,0 +1,41 @@
+from types import SimpleNamespace
+
+from Common.session_index import CONTEXT_REQUEST_PREFIX, context_since_marker, index_after_agent, update_index
+
+BODY = "def add(a, b):\n    return a + b\n"
+
+
+def read_event(path: str, body: str = BODY):
+    fr = SimpleNamespace(name="read_file", response={"path": path, "content": body})
+    return SimpleNamespace(author="tool", content=SimpleNamespace(parts=[SimpleNamespace(text=None, function_response=fr)]))
+
+
+def text_event(author: str, text: str):
+    return SimpleNamespace(author=author, content=SimpleNamespace(parts=[SimpleNamespace(text=text, function_response=None)]))
+
+
+def session_with(events):
+    return SimpleNamespace(events=list(events), state={})
+
+
+def test_files_with_identical_bodies_are_both_indexed():
+    session = session_with([
+        text_event("code_agent", CONTEXT_REQUEST_PREFIX + " need a.py and a2.py"),
+        read_event("a.py"),
+        read_event("a2.py"),
+    ])
+    block = context_since_marker(session, "code_agent")
+    assert "### File: a.py" in block and "### File: a2.py" in block
+
+
+def test_rereading_the_same_file_is_indexed_once():
+    session = session_with([read_event("a.py"), read_event("a.py")])
+    assert [s["path"] for s in update_index(session)["sections"]] == ["a.py"]
+    assert context_since_marker(session, "code_agent").count("### File: a.py") == 1
+
+
+def test_after_agent_callback_uses_the_public_session():
+    session = session_with([read_event("a.py")])
+    callback_context = SimpleNamespace(session=session, state={})
+    index_after_agent(callback_context)
+    assert callback_context.state["ctx_index"]["scanned"] == 1
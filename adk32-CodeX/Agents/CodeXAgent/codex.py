@@ -57,6 +57,11 @@ from .promptsx import (
     file_writer_prompt,
     action_plan_prompt,
 )
+from Common.session_index import (
+    context_since_marker,
+    index_after_agent,
+    latest_context_request,
+)
 
 # ─────────────────────────────────────────────────────────────
 # LOGGING
@@ -176,55 +181,6 @@ def _parse_file_manifest(raw: str) -> List[dict]:
     return files
 
 
-def _extract_context_from_session(ctx: InvocationContext, start_index: int = 0) -> str:
-    """
-    Scans session events from start_index onward for file_system_mcp
-    function_response parts and assembles a ## PROVIDED CONTEXT block.
-    start_index = index of the CONTEXT_REQUEST event so we only pick
-    up file reads that belong to THIS task.
-    """
-    file_sections = []
-    for event in ctx.session.events[start_index:]:
-        if not (event.content and event.content.parts):
-            continue
-        for part in event.content.parts:
-            fr = getattr(part, "function_response", None)
-            if fr is None:
-                continue
-            tool_name = getattr(fr, "name", "") or ""
-            if not any(k in tool_name.lower() for k in ("read", "list", "get")):
-                continue
-            response = getattr(fr, "response", None)
-            if not response:
-                continue
-
-            text_content = ""
-            file_path    = tool_name
-
-            if isinstance(response, dict):
-                raw = response.get("content",
-                      response.get("result",
-                      response.get("output", "")))
-                if isinstance(raw, list):
-                    for item in raw:
-                        if isinstance(item, dict) and item.get("type") == "text":
-                            text_content += item.get("text", "")
-                elif isinstance(raw, str):
-                    text_content = raw
-                file_path = str(response.get("path", response.get("file", tool_name)))
-            elif isinstance(response, str):
-                text_content = response
-
-            text_content = text_content.strip()
-            if text_content and len(text_content) > 20:
-                file_sections.append(f"### File: {file_path}\n```\n{text_content}\n```")
-                logger.debug(f"[extract_context] {file_path}: {len(text_content)} chars")
-
-    if not file_sections:
-        return ""
-    return "## PROVIDED CONTEXT\n\n" + "\n\n".join(file_sections)
-
-
 # ─────────────────────────────────────────────────────────────
 # CODE AGENT
 # ─────────────────────────────────────────────────────────────
@@ -257,6 +213,7 @@ class CodeXAgent(BaseAgent):
                 "project files from root agent when needed. Returns complete file content "
                 "and a file_system_mcp-only Action Plan for root agent to execute."
             ),
+            after_agent_callback=index_after_agent,
         )
 
     async def _llm(self, ctx: InvocationContext, name: str, prompt: str,
@@ -301,16 +258,9 @@ class CodeXAgent(BaseAgent):
                 if getattr(part, "text", None):
                     raw_input += part.text
 
-        # Scan session events for our own prior CONTEXT_REQUEST
-        prior_cr_text  = ""
-        cr_event_index = 0
-        for idx, event in enumerate(ctx.session.events):
-            if event.author == self.name and event.content and event.content.parts:
-                for part in event.content.parts:
-                    txt = getattr(part, "text", None) or ""
-                    if txt.startswith(CONTEXT_REQUEST_PREFIX):
-                        prior_cr_text  = txt
-                        cr_event_index = idx  # keep last occurrence
+        # Our own prior CONTEXT_REQUEST (last occurrence) — from the
+        # incremental session index, not a rescan of every event
+        prior_cr_text = latest_context_request(ctx.session, self.name)
 
         context_request_sent = bool(prior_cr_text)
         request         = raw_input
@@ -334,7 +284,7 @@ class CodeXAgent(BaseAgent):
                 f"[CodeXAgent] Request from CONTEXT_REQUEST event ({len(request)} chars). "
                 f"raw_input was: '{raw_input[:80]}'"
             )
-            project_context = _extract_context_from_session(ctx, cr_event_index)
+            project_context = context_since_marker(ctx.session, self.name)
             if project_context:
                 logger.info(f"[CodeXAgent] Context from session events ({len(project_context)} chars).")
             else:
@@ -0,0 +1,266 @@
+# session_index.py
+# ─────────────────────────────────────────────────────────────
+# Incremental Session-Event Index
+#
+# CodeXAgent used to walk the whole of
+# ctx.session.events on every invocation — once to find its own
+# last ##CONTEXT_REQUEST## and once more to collect file_system_mcp
+# read results — so each call cost O(total history).
+#
+# This module keeps a small index in session state instead:
+#
+#   ctx_index = {
+#     "scanned":  number of events already indexed,
+#     "markers":  author → last CONTEXT_REQUEST position,
+#     "sections": [file read references, in event order],
+#     "hashes":   "path|content hash" → position of its latest section,
+#   }
+#
+# Only events appended since the last update are scanned. The index
+# stores REFERENCES (event index, part index, path, content hash) —
+# never the file text itself — so session state stays small; text is
+# read back from the referenced event when the context block is built.
+#
+# The same file read twice with the same content after a marker is
+# indexed once; different files with identical bodies are kept apart.
+#
+# update_index() is driven by after_tool / after_agent callbacks on
+# the root agent and sub-agents, and lazily by the getters, so the
+# lookups below only ever process the tail of new events:
+#   latest_context_request(session, author) → text or ""
+#   context_since_marker(session, author)   → "## PROVIDED CONTEXT" block
+# ─────────────────────────────────────────────────────────────
+
+import hashlib
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+CONTEXT_REQUEST_PREFIX = "##CONTEXT_REQUEST##"
+
+STATE_KEY = "ctx_index"
+
+# function_response tools whose output counts as project context
+_CONTEXT_TOOL_KEYWORDS = ("read", "list", "get")
+_MIN_CONTEXT_CHARS = 20
+
+logger = logging.getLogger("session_index")
+
+
+# ─────────────────────────────────────────────────────────────
+# PART DECODING
+# ─────────────────────────────────────────────────────────────
+
+def _function_response_text(fr: Any) -> Tuple[str, str]:
+    """
+    Return (file_path, text) for one function_response part, or
+    ("", "") when it is not a usable file read.
+
+    Response shapes handled:
+      A: {'content': [{'type': 'text', 'text': '...'}], 'path': '...'}
+      B: {'content': '...', 'path': '...'}
+      C: {'result': '...'}  /  {'output': '...'}
+      D: plain string
+    """
+    tool_name = getattr(fr, "name", "") or ""
+    if not any(k in tool_name.lower() for k in _CONTEXT_TOOL_KEYWORDS):
+        return "", ""
+    response = getattr(fr, "response", None)
+    if not response:
+        return "", ""
+
+    text_parts: List[str] = []
+    file_path = tool_name
+
+    if isinstance(response, dict):
+        raw = response.get(
+            "content",
+            response.get("result", response.get("output", "")),
+        )
+        if isinstance(raw, list):
+            for item in raw:
+                if isinstance(item, dict) and item.get("type") == "text":
+                    text_parts.append(item.get("text", ""))
+        elif isinstance(raw, str):
+            text_parts.append(raw)
+        file_path = str(response.get("path", response.get("file", tool_name)))
+    elif isinstance(response, str):
+        text_parts.append(response)
+
+    text = "".join(text_parts).strip()
+    if len(text) <= _MIN_CONTEXT_CHARS:
+        return "", ""
+    return file_path, text
+
+
+def _part_at(session: Any, event_idx: int, part_idx: int) -> Any:
+    events = session.events
+    if event_idx >= len(events):
+        return None
+    content = events[event_idx].content
+    if not (content and content.parts) or part_idx >= len(content.parts):
+        return None
+    return content.parts[part_idx]
+
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _read_key(path: str, digest: str) -> str:
+    # Session state must stay JSON, so no tuple keys.
+    return f"{path}|{digest}"
+
+
+# ─────────────────────────────────────────────────────────────
+# INDEX MAINTENANCE
+# ─────────────────────────────────────────────────────────────
+
+def _empty_index() -> Dict[str, Any]:
+    return {"scanned": 0, "markers": {}, "sections": [], "hashes": {}}
+
+
+def update_index(session: Any, state: Optional[Any] = None) -> Dict[str, Any]:
+    """
+    Index every event appended since the last call and return the index.
+
+    `state` defaults to session.state; callbacks pass their own
+    delta-tracked CallbackContext.state so the update is persisted.
+    """
+    state = session.state if state is None else state
+    index = state.get(STATE_KEY) or _empty_index()
+    events = session.events
+
+    # Session was rewound / replaced — rebuild from scratch.
+    if index["scanned"] > len(events):
+        index = _empty_index()
+
+    start = index["scanned"]
+    if start == len(events):
+        return index
+
+    markers  = dict(index["markers"])
+    sections = list(index["sections"])
+    hashes   = dict(index["hashes"])
+    # Sections at or after this position belong to the newest task.
+    newest_marker = max((m["section_start"] for m in markers.values()), default=0)
+
+    for event_idx in range(start, len(events)):
+        event = events[event_idx]
+        if not (event.content and event.content.parts):
+            continue
+        for part_idx, part in enumerate(event.content.parts):
+            text = getattr(part, "text", None) or ""
+            if text.startswith(CONTEXT_REQUEST_PREFIX):
+                markers[event.author] = {
+                    "event": event_idx,
+                    "part": part_idx,
+                    "section_start": len(sections),
+                }
+                newest_marker = len(sections)
+                continue
+
+            fr = getattr(part, "function_response", None)
+            if fr is None:
+                continue
+            file_path, body = _function_response_text(fr)
+            if not body:
+                continue
+            digest = _content_hash(body)
+            key = _read_key(file_path, digest)
+            if hashes.get(key, -1) >= newest_marker:
+                logger.debug(f"[session_index] Duplicate read skipped: {file_path}")
+                continue
+            hashes[key] = len(sections)
+            sections.append({
+                "event": event_idx,
+                "part": part_idx,
+                "path": file_path,
+                "hash": digest,
+            })
+
+    index = {
+        "scanned": len(events),
+        "markers": markers,
+        "sections": sections,
+        "hashes": hashes,
+    }
+    state[STATE_KEY] = index
+    logger.debug(
+        f"[session_index] Indexed events {start}..{len(events) - 1} "
+        f"(sections={len(sections)}, markers={len(markers)})"
+    )
+    return index
+
+
+# ─────────────────────────────────────────────────────────────
+# LOOKUPS
+# ─────────────────────────────────────────────────────────────
+
+def latest_context_request(session: Any, author: str) -> str:
+    """Text of `author`'s most recent CONTEXT_REQUEST, or ""."""
+    marker = update_index(session)["markers"].get(author)
+    if marker is None:
+        return ""
+    part = _part_at(session, marker["event"], marker["part"])
+    return (getattr(part, "text", None) or "") if part is not None else ""
+
+
+def context_since_marker(session: Any, author: str) -> str:
+    """
+    "## PROVIDED CONTEXT" block built from the file reads that followed
+    `author`'s latest CONTEXT_REQUEST (all reads when there is none),
+    each distinct (path, content) read injected once.
+    """
+    index = update_index(session)
+    marker = index["markers"].get(author)
+    start = marker["section_start"] if marker else 0
+
+    seen = set()
+    file_sections = []
+    for ref in index["sections"][start:]:
+        key = _read_key(ref["path"], ref["hash"])
+        if key in seen:
+            continue
+        part = _part_at(session, ref["event"], ref["part"])
+        fr = getattr(part, "function_response", None) if part is not None else None
+        if fr is None:
+            continue
+        _, text = _function_response_text(fr)
+        if not text:
+            continue
+        seen.add(key)
+        file_sections.append(f"### File: {ref['path']}\n```\n{text}\n```")
+
+    if not file_sections:
+        return ""
+    return "## PROVIDED CONTEXT\n\n" + "\n\n".join(file_sections)
+
+
+# ─────────────────────────────────────────────────────────────
+# ADK CALLBACKS
+# ─────────────────────────────────────────────────────────────
+
+def _session_of(callback_context: Any) -> Any:
+    return callback_context.session
+
+
+def index_after_tool(tool, args, tool_context, tool_response):
+    """after_tool_callback — keep the index current while tools run."""
+    update_index(_session_of(tool_context), tool_context.state)
+    return None
+
+
+def index_after_agent(callback_context):
+    """after_agent_callback — index the events an agent just produced."""
+    update_index(_session_of(callback_context), callback_context.state)
+    return None
+
+
+__all__ = [
+    "CONTEXT_REQUEST_PREFIX",
+    "update_index",
+    "latest_context_request",
+    "context_since_marker",
+    "index_after_tool",
+    "index_after_agent",
+]
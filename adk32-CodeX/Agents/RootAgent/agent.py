@@ -12,6 +12,7 @@ from .config import config
 from .prompts import ROOT_AGENT_INSTRUCTION
 from ResearchAgent.research import research_agent, get_current_datetime
 from CodeXAgent.codex import codex_agent
+from Common.session_index import index_after_tool
 
 MODEL = config.MODEL
 os.environ["GOOGLE_API_KEY"] = config.GOOGLE_API_KEY
@@ -51,5 +52,8 @@ root_agent = LlmAgent(
         get_current_datetime,
         file_system_mcp,
     ],
+    # Keeps the session-event index current as file reads come in,
+    # so sub-agents look up context without rescanning history.
+    after_tool_callback=index_after_tool,
 )
 
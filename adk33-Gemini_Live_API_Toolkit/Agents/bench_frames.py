@@ -0,0 +1,160 @@
+"""
+CPU cost of streaming one minute of audio: base64-in-JSON vs binary frames.
+
+    python bench_frames.py            # codec only
+    python bench_frames.py --socket   # also through a local websocket connection
+
+One minute of conversation in 20 ms chunks:
+  upstream    microphone, 16 kHz s16le mono  -> 3000 chunks x  640 bytes
+  downstream  model speech, 24 kHz s16le mono -> 3000 chunks x  960 bytes
+
+For each encoding the benchmark encodes on the sending side and decodes
+on the receiving side, and reports CPU seconds per minute of audio and
+bytes on the wire. "adk event json" is what main.py used to send
+downstream: the whole Event dumped to JSON, audio included as base64.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+
+from frames import (
+    KIND_AUDIO_PCM_16K,
+    KIND_AUDIO_PCM_24K,
+    FrameReader,
+    FrameWriter,
+)
+
+CHUNKS_PER_MINUTE = 3000  # 20 ms chunks
+UP_CHUNK = os.urandom(640)
+DOWN_CHUNK = os.urandom(960)
+
+
+# ── encodings ──────────────────────────────────────────────────────────
+def json_b64_encode(chunk: bytes, mime: str) -> str:
+    encoded = base64.b64encode(chunk).decode("utf-8")
+    return json.dumps({"type": "audio", "data": f"data:{mime};base64,{encoded}"})
+
+
+def json_b64_decode(message: str) -> bytes:
+    data = json.loads(message)["data"]
+    return base64.b64decode(data[data.index(",") + 1:])
+
+
+def make_adk_event_codec():
+    try:
+        from google.adk.events import Event
+        from google.genai import types
+    except ImportError:
+        return None
+
+    def encode(chunk: bytes, mime: str) -> str:
+        event = Event(
+            author="google_search_agent",
+            content=types.Content(role="model", parts=[
+                types.Part(inline_data=types.Blob(data=chunk, mime_type=mime))
+            ]),
+        )
+        return event.model_dump_json(exclude_none=True, by_alias=True)
+
+    def decode(message: str) -> bytes:
+        # genai dumps bytes as URL-safe base64 without padding
+        data = json.loads(message)["content"]["parts"][0]["inlineData"]["data"]
+        return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+    return encode, decode
+
+
+def binary_codec(kind: int):
+    writer, reader = FrameWriter(), FrameReader()
+
+    def encode(chunk: bytes, mime: str) -> bytes:
+        return writer.pack(kind, chunk)
+
+    def decode(message: bytes) -> bytes:
+        return reader.parse(message).payload
+
+    return encode, decode
+
+
+# ── measurement ────────────────────────────────────────────────────────
+def cpu_per_minute(encode, decode, chunk: bytes, mime: str, minutes: int):
+    wire = 0
+    start = time.process_time()
+    for _ in range(CHUNKS_PER_MINUTE * minutes):
+        message = encode(chunk, mime)
+        wire += len(message)
+        assert len(decode(message)) == len(chunk)
+    return (time.process_time() - start) / minutes, wire // minutes
+
+
+async def socket_cpu_per_minute(binary: bool, minutes: int):
+    """Send a minute of mic audio through a real local websocket, both ends in this process."""
+    import websockets
+
+    received = asyncio.Event()
+    count = 0
+    total = CHUNKS_PER_MINUTE * minutes
+
+    async def handler(ws):
+        nonlocal count
+        reader = FrameReader()
+        async for message in ws:
+            if binary:
+                reader.parse(message)
+            else:
+                json_b64_decode(message)
+            count += 1
+            if count == total:
+                received.set()
+
+    async with websockets.serve(handler, "127.0.0.1", 0, max_size=None) as server:
+        port = server.sockets[0].getsockname()[1]
+        async with websockets.connect(f"ws://127.0.0.1:{port}", max_size=None) as ws:
+            writer = FrameWriter()
+            start = time.process_time()
+            for _ in range(total):
+                if binary:
+                    await ws.send(writer.pack(KIND_AUDIO_PCM_16K, UP_CHUNK))
+                else:
+                    await ws.send(json_b64_encode(UP_CHUNK, "audio/pcm;rate=16000"))
+            await received.wait()
+            return (time.process_time() - start) / minutes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=int, default=5, help="minutes of audio to push through each codec")
+    parser.add_argument("--socket", action="store_true", help="also measure through a local websocket")
+    args = parser.parse_args()
+
+    rows = []
+    for direction, chunk, mime, kind in (
+        ("upstream", UP_CHUNK, "audio/pcm;rate=16000", KIND_AUDIO_PCM_16K),
+        ("downstream", DOWN_CHUNK, "audio/pcm;rate=24000", KIND_AUDIO_PCM_24K),
+    ):
+        codecs = [("json + base64", (json_b64_encode, json_b64_decode))]
+        adk = make_adk_event_codec()
+        if adk and direction == "downstream":
+            codecs.append(("adk event json", adk))
+        codecs.append(("binary frames", binary_codec(kind)))
+        for name, (encode, decode) in codecs:
+            cpu, wire = cpu_per_minute(encode, decode, chunk, mime, args.minutes)
+            rows.append((direction, name, cpu, wire, len(chunk) * CHUNKS_PER_MINUTE))
+
+    print(f"{'direction':10} {'encoding':15} {'CPU ms/min':>10} {'wire KiB/min':>13} {'overhead':>9}")
+    for direction, name, cpu, wire, raw in rows:
+        print(f"{direction:10} {name:15} {cpu * 1000:>10.1f} {wire / 1024:>13.0f} {wire / raw - 1:>8.1%}")
+
+    if args.socket:
+        print("\nthrough a local websocket (upstream, client + server CPU):")
+        for binary in (False, True):
+            cpu = asyncio.run(socket_cpu_per_minute(binary, args.minutes))
+            print(f"  {'binary frames' if binary else 'json + base64':15} {cpu * 1000:>10.1f} CPU ms per minute of audio")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Downstream loop under load: inline sends (+ the old per-event sleep) vs pipeline.py.
+
+    python bench_pipeline.py
+    python bench_pipeline.py --turns 20 --send-ms 2 --stall-ms 150
+
+A simulated model answers each user turn with `--audio-ms` of 24 kHz
+speech in 20 ms chunks (released in real time, as the Live API does),
+a camera echo of 15 JPEG frames per second and a turn_complete marker.
+The simulated socket takes `--send-ms` per send and stalls for
+`--stall-ms` once per turn (a congested mobile link).
+
+Reported per strategy: events handled per second of wall time, first
+audio byte and whole-turn latency (from the end of the user turn), and
+how many video frames were coalesced/dropped instead of sent late.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+from frames import KIND_AUDIO_PCM_24K, KIND_IMAGE_JPEG, FrameWriter
+from pipeline import (
+    TURN_COMPLETE,
+    Outbound,
+    OutboundQueue,
+    PipelineClosed,
+    SessionMetrics,
+    run_sender,
+)
+
+AUDIO_CHUNK = os.urandom(960)   # 20 ms at 24 kHz s16le
+VIDEO_FRAME = os.urandom(12_000)
+
+
+async def model_turn(audio_ms: int):
+    """Events of one model answer, paced like a live stream."""
+    start = time.monotonic()
+    chunks = audio_ms // 20
+    for i in range(chunks):
+        # Audio is generated in real time; the model is never the bottleneck here
+        due = start + i * 0.02
+        delay = due - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        yield Outbound(KIND_AUDIO_PCM_24K, AUDIO_CHUNK)
+        if i % 4 == 0:  # ~12 fps of video alongside
+            yield Outbound(KIND_IMAGE_JPEG, VIDEO_FRAME)
+    yield Outbound(None, '{"turnComplete": true}', TURN_COMPLETE)
+
+
+class SlowSocket:
+    def __init__(self, send_ms: float, stall_ms: float):
+        self.send_s = send_ms / 1000
+        self.stall_s = stall_ms / 1000
+        self.sent = 0
+        self.stall_pending = False
+
+    async def send(self, message):
+        if self.stall_pending:
+            self.stall_pending = False
+            await asyncio.sleep(self.stall_s)
+        await asyncio.sleep(self.send_s)
+        self.sent += 1
+
+
+async def run_inline(args):
+    """The old loop: await each send, then sleep 50 ms after every event."""
+    socket = SlowSocket(args.send_ms, args.stall_ms)
+    metrics = SessionMetrics()
+    writer = FrameWriter()
+    events = 0
+    t0 = time.perf_counter()
+    for _ in range(args.turns):
+        metrics.user_input(end_of_turn=True)
+        socket.stall_pending = True
+        async for item in model_turn(args.audio_ms):
+            events += 1
+            if item.kind is None:
+                await socket.send(item.payload)
+            else:
+                await socket.send(writer.pack(item.kind, item.payload))
+            metrics.sent(item)
+            await asyncio.sleep(0.05)
+    return events, time.perf_counter() - t0, metrics, socket
+
+
+async def run_pipeline(args):
+    socket = SlowSocket(args.send_ms, args.stall_ms)
+    queue = OutboundQueue(args.queue_size, args.packet_ms)
+    metrics = SessionMetrics(queue)
+    events = 0
+    t0 = time.perf_counter()
+    sender = asyncio.create_task(run_sender(queue, socket.send, socket.send, metrics))
+    try:
+        for _ in range(args.turns):
+            metrics.user_input(end_of_turn=True)
+            socket.stall_pending = True
+            async for item in model_turn(args.audio_ms):
+                events += 1
+                await queue.put(item)
+            # The next user turn starts once this answer has been played out
+            while metrics.turn_started is not None:
+                await asyncio.sleep(0.005)
+    except PipelineClosed:
+        pass
+    finally:
+        queue.close()
+        await sender
+    return events, time.perf_counter() - t0, metrics, socket
+
+
+def report(name, events, elapsed, metrics, socket):
+    snap = metrics.snapshot()
+    fab, turn = snap["first_audio_byte"], snap["turn_latency"]
+    queue = snap.get("queue", {})
+    print(f"{name:10} {events / elapsed:>8.0f} {socket.sent:>7} "
+          f"{fab['p50_ms']:>8.0f} {turn['p50_ms']:>9.0f} {turn['max_ms']:>9.0f} "
+          f"{queue.get('coalesced_frames', 0):>6} {queue.get('dropped_frames', 0):>6} "
+          f"{queue.get('merged_audio_chunks', 0):>7}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--audio-ms", type=int, default=3000, help="length of each spoken answer")
+    parser.add_argument("--send-ms", type=float, default=1.0, help="time per websocket send")
+    parser.add_argument("--stall-ms", type=float, default=300.0, help="one network stall per turn")
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--packet-ms", type=int, default=40)
+    args = parser.parse_args()
+
+    audio_s = args.turns * args.audio_ms / 1000
+    print(f"{args.turns} turns x {args.audio_ms} ms of speech ({audio_s:.0f} s of audio), "
+          f"send {args.send_ms} ms, stall {args.stall_ms:.0f} ms per turn")
+    print(f"{'strategy':10} {'events/s':>8} {'sends':>7} {'FAB p50':>8} {'turn p50':>9} {'turn max':>9} "
+          f"{'coal.':>6} {'drop':>6} {'merged':>7}")
+    report("inline", *await run_inline(args))
+    report("pipeline", *await run_pipeline(args))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
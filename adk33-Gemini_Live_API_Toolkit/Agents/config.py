@@ -20,6 +20,14 @@ class Config:
     # "AUDIO" — required for native-audio models; also supported by half-cascade models
     MODALITY: str = os.getenv("LIVE_MODALITY", "TEXT")
 
+    # ── Live streaming pipeline ───────────────────────────────────────────────
+    # Messages buffered between the live runner and the websocket per session.
+    LIVE_QUEUE_SIZE: int = int(os.getenv("LIVE_QUEUE_SIZE", "64"))
+    # Queued audio chunks are merged into packets of up to this many ms.
+    LIVE_AUDIO_PACKET_MS: int = int(os.getenv("LIVE_AUDIO_PACKET_MS", "40"))
+    # Log one live event in this many at INFO (all of them at DEBUG).
+    LIVE_LOG_EVERY: int = int(os.getenv("LIVE_LOG_EVERY", "100"))
+
     # ── Gemini / Google AI Studio (API Key Mode) ──────────────────────────────
     # Set GOOGLE_GENAI_USE_VERTEXAI=0 for Gemini Live API (development).
     # Set GOOGLE_GENAI_USE_VERTEXAI=1 for Vertex AI Live API (production).
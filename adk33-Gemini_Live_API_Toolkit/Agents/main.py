@@ -1,11 +1,27 @@
 import asyncio
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+import logging
+from typing import Dict
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from google.adk.runners import Runner
 from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.agents.live_request_queue import LiveRequestQueue
 from google.adk.sessions import InMemorySessionService
 from google.genai import types
 from agent import agent
+from config import config
+from frames import FLAG_END_OF_TURN, FrameError, FrameReader, kind_for_mime
+from pipeline import (
+    TURN_COMPLETE,
+    TURN_INTERRUPTED,
+    Outbound,
+    OutboundQueue,
+    PipelineClosed,
+    SampledLogger,
+    SessionMetrics,
+    run_sender,
+)
+
+logger = logging.getLogger(__name__)
 
 # ========================================
 # Phase 1: Application Initialization (once at startup)
@@ -25,6 +41,68 @@ runner = Runner(
     session_service=session_service
 )
 
+# Latency histograms and queue counters of the sessions currently streaming
+SESSION_METRICS: Dict[str, SessionMetrics] = {}
+
+# ========================================
+# Media framing
+# ========================================
+#
+# Audio and images go over the socket as binary frames (frames.py): an
+# 8-byte header plus the raw bytes. Text frames carry user text upstream
+# and event JSON downstream, with the media bytes taken out.
+
+def split_media(event):
+    """
+    Pull inline audio/image parts out of an event.
+    Returns (blobs, exclude) where `exclude` drops their bytes from the JSON dump.
+    """
+    if not event.content or not event.content.parts:
+        return [], None
+    blobs, excluded_parts = [], {}
+    for index, part in enumerate(event.content.parts):
+        blob = part.inline_data
+        if blob and blob.data and kind_for_mime(blob.mime_type or "") is not None:
+            blobs.append(blob)
+            excluded_parts[index] = {"inline_data": {"data"}}
+    if not blobs:
+        return [], None
+    return blobs, {"content": {"parts": excluded_parts}}
+
+
+def is_media_only(event, blobs) -> bool:
+    """True when an event is nothing but media chunks (the common case while speaking)."""
+    return (
+        len(blobs) == len(event.content.parts)
+        and not event.input_transcription
+        and not event.output_transcription
+        and not event.turn_complete
+        and not event.interrupted
+        and not event.error_code
+    )
+
+
+def turn_marker(event):
+    if event.interrupted:
+        return TURN_INTERRUPTED
+    if event.turn_complete:
+        return TURN_COMPLETE
+    return None
+
+
+# ========================================
+# Metrics Endpoint
+# ========================================
+
+@app.get("/sessions/{session_id}/metrics")
+async def session_metrics(session_id: str) -> dict:
+    """First-audio-byte and turn latency histograms plus queue counters for a live session."""
+    metrics = SESSION_METRICS.get(session_id)
+    if metrics is None:
+        raise HTTPException(status_code=404, detail="Session is not streaming")
+    return metrics.snapshot()
+
+
 # ========================================
 # WebSocket Endpoint
 # ========================================
@@ -63,42 +141,86 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str, session_id: str
     # Create LiveRequestQueue
     live_request_queue = LiveRequestQueue()
 
+    # Bounded queue between run_live() and the socket (see pipeline.py)
+    outbound = OutboundQueue(config.LIVE_QUEUE_SIZE, config.LIVE_AUDIO_PACKET_MS)
+    metrics = SessionMetrics(outbound)
+    SESSION_METRICS[session_id] = metrics
+    event_log = SampledLogger(logger, every=config.LIVE_LOG_EVERY)
+
     # ========================================
     # Phase 3: Active Session (concurrent bidirectional communication)
     # ========================================
 
     async def upstream_task() -> None:
         """Receives messages from WebSocket and sends to LiveRequestQueue."""
+        reader = FrameReader()
         try:
             while True:
-                # Receive text message from WebSocket
-                data: str = await websocket.receive_text()
-
-                # Send to LiveRequestQueue
-                content = types.Content(parts=[types.Part(text=data)])
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    raise WebSocketDisconnect(message.get("code", 1000))
+
+                # Binary frame: microphone PCM / camera JPEG, straight to the model
+                if message.get("bytes") is not None:
+                    try:
+                        frame = reader.parse(message["bytes"])
+                    except FrameError as e:
+                        logger.warning(f"Dropping malformed frame: {e}")
+                        continue
+                    metrics.user_input(end_of_turn=bool(frame.flags & FLAG_END_OF_TURN))
+                    live_request_queue.send_realtime(
+                        types.Blob(data=frame.payload, mime_type=frame.mime_type)
+                    )
+                    continue
+
+                # Text message: send to LiveRequestQueue
+                metrics.user_input(end_of_turn=True)
+                content = types.Content(parts=[types.Part(text=message["text"])])
                 live_request_queue.send_content(content)
         except WebSocketDisconnect:
             # Client disconnected - signal queue to close
-            pass
+            if reader.gaps:
+                logger.info(f"{reader.gaps} audio/video frames missing upstream")
 
     async def downstream_task() -> None:
-        """Receives Events from run_live() and sends to WebSocket."""
-        async for event in runner.run_live(
-            user_id=user_id,
-            session_id=session_id,
-            live_request_queue=live_request_queue,
-            run_config=run_config
-        ):
-            # Send event as JSON to WebSocket
-            await websocket.send_text(
-                event.model_dump_json(exclude_none=True, by_alias=True)
-            )
-
-    # Run both tasks concurrently
+        """Receives Events from run_live() and queues them for the sender."""
+        try:
+            async for event in runner.run_live(
+                user_id=user_id,
+                session_id=session_id,
+                live_request_queue=live_request_queue,
+                run_config=run_config
+            ):
+                metrics.events += 1
+                event_log.log(event)
+                if event.input_transcription and event.input_transcription.finished:
+                    metrics.user_input(end_of_turn=True)
+
+                # Audio / images as binary frames
+                blobs, exclude = split_media(event)
+                for blob in blobs:
+                    await outbound.put(Outbound(kind_for_mime(blob.mime_type), blob.data))
+                if blobs and is_media_only(event, blobs):
+                    continue
+
+                # Everything else as JSON, minus the media bytes already sent
+                await outbound.put(Outbound(
+                    None,
+                    event.model_dump_json(exclude_none=True, by_alias=True, exclude=exclude),
+                    turn_marker(event),
+                ))
+        except PipelineClosed:
+            # Sender stopped (client gone); stop pulling events from the model
+            pass
+        finally:
+            outbound.close()
+
+    # Run all tasks concurrently
     try:
         await asyncio.gather(
             upstream_task(),
             downstream_task(),
+            run_sender(outbound, websocket.send_bytes, websocket.send_text, metrics),
             return_exceptions=True
         )
     finally:
@@ -108,4 +230,8 @@ async def websocket_endpoint(websocket: WebSocket, user_id: str, session_id: str
 
         # Always close the queue, even if exceptions occurred
         live_request_queue.close()
+        outbound.close()
+        if SESSION_METRICS.get(session_id) is metrics:
+            del SESSION_METRICS[session_id]
+        logger.info(f"Session {session_id} metrics: {metrics.snapshot()}")
 
@@ -1,19 +1,27 @@
-import os
-import faiss
-import numpy as np
 from pathlib import Path
 from concurrent.futures import ProcessPoolExecutor
 from pypdf import PdfReader
 from docx import Document # pip install python-docx
-from sentence_transformers import SentenceTransformer
 from google.adk.agents import Agent
 from google.adk.tools import FunctionTool
+from chunk_store import ChunkStore, chunk_document, format_citations, hf_token_spans
+from embedding_service import sentence_transformer_service
+from rag_index import IncrementalIndex, index_factory
 
 # --- CONFIG ---
 SOURCE_DIR = "./my_knowledge_base"
-DB_PATH = "vector_store.index"
-MAP_PATH = "text_map.txt"
-embed_model = SentenceTransformer('all-MiniLM-L6-v2')
+DB_PATH = "vector_store.index"  # written as vector_store.index.<generation>
+STORE_PATH = "chunks.sqlite"    # chunk text + source metadata + ingestion manifest
+CHUNK_TOKENS = 200            # all-MiniLM-L6-v2 truncates input at 256 word pieces
+CHUNK_OVERLAP = 30
+# "Flat" is exact but scans every vector; past ~100k chunks use an ANN index,
+# e.g. "HNSW32" (SEARCH_PARAMS = "efSearch=128") or "IVF4096,Flat" / "IVF4096,PQ48"
+# (SEARCH_PARAMS = "nprobe=32"). Delete the index files after changing it.
+INDEX_SPEC = "Flat"
+SEARCH_PARAMS = ""
+MMAP_INDEX = True               # IVF specs are paged in from disk instead of read into RAM
+EMBED_CACHE = "embeddings.sqlite"  # float16 vectors keyed by text hash; repeats skip the model
+embedder = sentence_transformer_service('all-MiniLM-L6-v2', EMBED_CACHE)  # loaded once, batches concurrent callers
 
 # --- 1. MULTI-FORMAT FILE EXTRACTORS ---
 def extract_text(file_path):
@@ -33,58 +41,43 @@ def extract_text(file_path):
         print(f"Error reading {file_path}: {e}")
     return ""
 
-def load_directory_parallel(directory):
-    path = Path(directory)
-    files = [f for f in path.glob("**/*") if f.is_file()]
-    
-    print(f"Found {len(files)} files. Extracting text in parallel...")
+def extract_parallel(paths):
+    """Text of the given files, extracted across all CPU cores."""
+    print(f"Extracting text from {len(paths)} new or changed files in parallel...")
     with ProcessPoolExecutor() as executor:
-        results = list(executor.map(extract_text, files))
-    
-    return " ".join(results)
+        return list(executor.map(extract_text, map(Path, paths)))
 
-# --- 2. THE RECURSIVE SPLITTER ---
-def smart_split(text, chunk_size=1000, overlap=150):
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        # Try to find a sentence end nearby to avoid cutting mid-sentence
-        actual_end = text.find(". ", end - 100, end + 100)
-        if actual_end == -1: actual_end = end
-        
-        chunks.append(text[start:actual_end].strip())
-        start = actual_end - overlap
-    return [c for c in chunks if len(c) > 50]
+# --- 2. PER-DOCUMENT CHUNKING ---
+token_spans = hf_token_spans(embedder.model.tokenizer)
+
+def chunk(path, text):
+    """Token-aware chunks of one document, keeping their source."""
+    return chunk_document(path, text, token_spans, CHUNK_TOKENS, CHUNK_OVERLAP)
 
 # --- 3. VECTOR DB INITIALIZATION ---
 def init_rag():
-    if os.path.exists(DB_PATH):
-        return faiss.read_index(DB_PATH), open(MAP_PATH, "r").read().split("|||")
-
-    raw_text = load_directory_parallel(SOURCE_DIR)
-    chunks = smart_split(raw_text)
-    
-    print(f"Embedding {len(chunks)} chunks...")
-    embeddings = embed_model.encode(chunks, show_progress_bar=True)
-    
-    index = faiss.IndexFlatL2(embeddings.shape[1])
-    index.add(np.array(embeddings).astype('float32'))
-    
-    faiss.write_index(index, DB_PATH)
-    with open(MAP_PATH, "w") as f: f.write("|||".join(chunks))
-    return index, chunks
+    """Load the index and embed only files that are new or changed since the last run."""
+    rag = IncrementalIndex(
+        ChunkStore(STORE_PATH),
+        DB_PATH,
+        embed=embedder,
+        chunker=chunk,
+        make_index=index_factory(INDEX_SPEC),
+        search_params=SEARCH_PARAMS,
+        mmap=MMAP_INDEX,
+    )
+    files = [str(f) for f in Path(SOURCE_DIR).glob("**/*") if f.is_file()]
+    print(f"Syncing {len(files)} files: {rag.sync(files, extract_parallel)}")
+    return rag
 
-index, all_chunks = init_rag()
+rag = init_rag()
 
 # --- 4. ADK TOOL & AGENT ---
 def retrieval_tool(query: str) -> str:
-    """Searches the entire directory for the most relevant information."""
-    query_vec = embed_model.encode([query]).astype('float32')
+    """Searches the entire directory for the most relevant information, with sources."""
+    query_vec = embedder.embed([query])
     # Retrieve top 5 chunks
-    _, indices = index.search(query_vec, k=5)
-    results = [all_chunks[i] for i in indices[0] if i < len(all_chunks)]
-    return "\n---\n".join(results)
+    return format_citations(rag.search(query_vec, k=5))
 
 knowledge_tool = FunctionTool(retrieval_tool)
 
@@ -1,19 +1,24 @@
-import os
-import faiss
-import numpy as np
 from pathlib import Path
 from concurrent.futures import ProcessPoolExecutor
 from pypdf import PdfReader
 from docx import Document
-from sentence_transformers import SentenceTransformer
 from google.adk.agents import Agent
 from google.adk.tools import tool
+from chunk_store import ChunkStore, chunk_document, format_citations, hf_token_spans
+from embedding_service import sentence_transformer_service
+from rag_index import IncrementalIndex, index_factory
 
 # --- CONFIGURATION ---
 DATA_DIR = "./my_books"  # Put your 3 huge books here
-DB_PATH = "rag_index.index"
-MAP_PATH = "rag_map.txt"
-embed_model = SentenceTransformer('all-MiniLM-L6-v2')
+DB_PATH = "rag_index.index"       # written as rag_index.index.<generation>
+STORE_PATH = "rag_chunks.sqlite"  # chunk text + source metadata + ingestion manifest
+CHUNK_TOKENS = 200                # all-MiniLM-L6-v2 truncates input at 256 word pieces
+CHUNK_OVERLAP = 30
+INDEX_SPEC = "HNSW32"             # 23k pages is ~100k chunks: approximate search; "Flat" for exact
+SEARCH_PARAMS = "efSearch=128"    # or "nprobe=32" for IVF specs (see rag_index.py)
+MMAP_INDEX = False                # only IVF specs are memory-mapped
+EMBED_CACHE = "embeddings.sqlite"  # float16 vectors keyed by text hash; repeats skip the model
+embedder = sentence_transformer_service('all-MiniLM-L6-v2', EMBED_CACHE)  # loaded once, batches concurrent callers
 
 # --- SECTION 1: HIGH-SPEED DIRECTORY LOADING ---
 def extract_text(file_path):
@@ -30,38 +35,35 @@ def extract_text(file_path):
     except Exception as e: print(f"Error {file_path}: {e}")
     return text
 
-def init_vector_db():
-    if os.path.exists(DB_PATH):
-        return faiss.read_index(DB_PATH), open(MAP_PATH, "r", encoding="utf-8").read().split("|||")
-
-    # Multiprocessing: Read 23k pages across all CPU cores
-    files = list(Path(DATA_DIR).glob("**/*.*"))
+def extract_parallel(paths):
+    # Multiprocessing: Read 23k pages across all CPU cores (only new/changed files)
     with ProcessPoolExecutor() as executor:
-        texts = list(executor.map(extract_text, files))
-    
-    # Recursive Chunking logic (Pure Python)
-    full_text = " ".join(texts)
-    chunks = [full_text[i:i+1000] for i in range(0, len(full_text), 850)] # 150 char overlap
-    
-    print(f"Indexing {len(chunks)} chunks. This is a one-time process...")
-    embeddings = embed_model.encode(chunks, show_progress_bar=True)
-    index = faiss.IndexFlatL2(embeddings.shape[1])
-    index.add(np.array(embeddings).astype('float32'))
-    
-    faiss.write_index(index, DB_PATH)
-    with open(MAP_PATH, "w", encoding="utf-8") as f: f.write("|||".join(chunks))
-    return index, chunks
+        return list(executor.map(extract_text, paths))
+
+def init_vector_db():
+    # Token-aware chunking, one document at a time (chunks keep their source)
+    token_spans = hf_token_spans(embedder.model.tokenizer)
+    rag = IncrementalIndex(
+        ChunkStore(STORE_PATH),
+        DB_PATH,
+        embed=embedder,
+        chunker=lambda path, text: chunk_document(path, text, token_spans, CHUNK_TOKENS, CHUNK_OVERLAP),
+        make_index=index_factory(INDEX_SPEC),
+        search_params=SEARCH_PARAMS,
+        mmap=MMAP_INDEX,
+    )
+    files = [str(f) for f in Path(DATA_DIR).glob("**/*.*") if f.is_file()]
+    print(f"Indexing: {rag.sync(files, extract_parallel)}")
+    return rag
 
-index, all_chunks = init_vector_db()
+rag = init_vector_db()
 
 # --- SECTION 2: SPECIALIZED TOOLS ---
 @tool
 def fetch_book_data(query: str) -> str:
-    """Retrieves specific technical facts from the 23,000-page library."""
-    query_vec = embed_model.encode([query]).astype('float32')
-    _, indices = index.search(query_vec, k=5)
-    results = [all_chunks[i] for i in indices[0] if i < len(all_chunks)]
-    return "\n---\n".join(results)
+    """Retrieves specific technical facts from the 23,000-page library, citing book and position."""
+    query_vec = embedder.embed([query])
+    return format_citations(rag.search(query_vec, k=5))
 
 # --- SECTION 3: MULTI-AGENT ORCHESTRATION ---
 
@@ -7,6 +7,7 @@ from langchain_community.document_loaders import DirectoryLoader, UnstructuredFi
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
+from langchain_core.embeddings import Embeddings
 
 # 2. LangGraph & Orchestration
 from langgraph.graph import StateGraph, END
@@ -14,11 +15,38 @@ from langgraph.graph import StateGraph, END
 # 3. Google ADK for the "Agent Brains"
 from google.adk.agents import Agent
 
+from embedding_service import EmbeddingService
+
 # --- CONFIG ---
 DATA_DIR = "./my_massive_library"
 DB_PATH = "faiss_index_2026"
+EMBED_CACHE = "embeddings.sqlite"  # float16 vectors keyed by text hash; repeats skip the API
+EMBED_MODEL = "models/text-embedding-004"
 # Ensure your GOOGLE_API_KEY is in environment variables
-embeddings = GoogleGenerativeAIEmbeddings(model="models/text-embedding-004")
+gemini = GoogleGenerativeAIEmbeddings(model=EMBED_MODEL)
+
+
+class CachedEmbeddings(Embeddings):
+    """LangChain view of two EmbeddingServices: Gemini embeds documents and queries with different task types."""
+
+    def __init__(self, documents: EmbeddingService, queries: EmbeddingService):
+        self.documents = documents
+        self.queries = queries
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.documents.embed(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.queries.embed([text])[0].tolist()
+
+
+embeddings = CachedEmbeddings(
+    # 100 texts per request is the embedding API's batch limit
+    EmbeddingService(lambda texts: gemini.embed_documents(texts, task_type="RETRIEVAL_DOCUMENT"),
+                     f"{EMBED_MODEL}:document", EMBED_CACHE, max_batch=100),
+    EmbeddingService(lambda texts: gemini.embed_documents(texts, task_type="RETRIEVAL_QUERY"),
+                     f"{EMBED_MODEL}:query", EMBED_CACHE, max_batch=100),
+)
 
 # --- STEP 1: PARALLEL DIRECTORY LOADING ---
 def get_vector_store():
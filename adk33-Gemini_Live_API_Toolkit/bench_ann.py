@@ -0,0 +1,126 @@
+"""
+Recall@k vs query latency of the ANN index options in rag_index.py,
+against exact search (Flat), on a synthetic embedding set.
+
+    python bench_ann.py                                  # 1M x 384, all specs
+    python bench_ann.py --n 200000 --specs Flat HNSW32
+
+The vectors are a Gaussian mixture (many topics) in a low-dimensional
+latent space, randomly projected up to --dim and normalised: sentence
+embeddings have a low intrinsic dimension, and isotropic noise in all
+384 dimensions would make every neighbour nearly equidistant. Queries
+come from the same distribution and are not in the base set. Ground
+truth is exact k-NN.
+
+For every spec it prints build time, size on disk, load time and
+resident memory growth for a normal and a memory-mapped load, then
+recall@k and single-query latency (one query per call, as the RAG tool
+issues them) for a sweep of nprobe / efSearch.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from rag_index import index_factory
+
+SWEEPS = {
+    "IVF": ("nprobe", [1, 8, 32, 128]),
+    "HNSW": ("efSearch", [16, 64, 256]),
+}
+
+
+def synthetic(n, dim, topics, rng, spread=0.5, latent=32, seed=0, block=100_000):
+    # Topics and projection depend on `seed` only, so base and queries share them
+    model = np.random.default_rng(seed)
+    centers = model.standard_normal((topics, latent), dtype=np.float32)
+    projection = model.standard_normal((latent, dim), dtype=np.float32)
+    out = np.empty((n, dim), dtype=np.float32)
+    for i in range(0, n, block):
+        m = min(block, n - i)
+        z = centers[rng.integers(0, topics, m)] + spread * rng.standard_normal((m, latent), dtype=np.float32)
+        x = z @ projection + 0.05 * rng.standard_normal((m, dim), dtype=np.float32)
+        out[i:i + m] = x / np.linalg.norm(x, axis=1, keepdims=True)
+    return out
+
+
+def rss_mib():
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def measure(index, queries, truth, k):
+    latencies, hits = [], 0
+    for q, expected in zip(queries, truth):
+        started = time.perf_counter()
+        _, ids = index.search(q.reshape(1, -1), k)
+        latencies.append(time.perf_counter() - started)
+        hits += len(set(ids[0].tolist()) & set(expected.tolist()))
+    ms = np.asarray(latencies) * 1000
+    return hits / truth.size, float(np.percentile(ms, 50)), float(np.percentile(ms, 99))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--dim", type=int, default=384, help="all-MiniLM-L6-v2 is 384")
+    parser.add_argument("--topics", type=int, default=2000)
+    parser.add_argument("--spread", type=float, default=0.5, help="within-topic noise; higher is harder for ANN")
+    parser.add_argument("--latent", type=int, default=32, help="intrinsic dimension of the data")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--train-size", type=int, default=100_000)
+    parser.add_argument("--specs", nargs="+", default=["Flat", "IVF4096,Flat", "HNSW32", "IVF4096,PQ48"])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    base = synthetic(args.n, args.dim, args.topics, rng, args.spread, args.latent)
+    queries = synthetic(args.queries, args.dim, args.topics, np.random.default_rng(1), args.spread, args.latent)
+    ids = np.arange(args.n, dtype="int64")
+    print(f"{args.n} x {args.dim} vectors, {args.queries} queries, recall@{args.k}")
+    started = time.perf_counter()
+    _, truth = faiss.knn(queries, base, args.k)
+    print(f"exact ground truth in {time.perf_counter() - started:.1f}s\n")
+
+    print(f"{'index':16} {'param':>14} {'recall':>7} {'p50 ms':>8} {'p99 ms':>8}")
+    work = tempfile.mkdtemp(prefix="bench_ann_")
+    for spec in args.specs:
+        started = time.perf_counter()
+        sample = base[rng.choice(args.n, min(args.train_size, args.n), replace=False)]
+        index = index_factory(spec)(sample)
+        index.add_with_ids(base, ids)
+        built = time.perf_counter() - started
+        path = os.path.join(work, "index")
+        faiss.write_index(index, path)
+        del index
+
+        loads = {}
+        for label, flags in (("read", 0), ("mmap", faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)):
+            before = rss_mib()
+            started = time.perf_counter()
+            index = faiss.read_index(path, flags)
+            loads[label] = (time.perf_counter() - started, rss_mib() - before)
+            if label == "read":
+                del index
+        print(f"{spec:16} built {built:.0f}s, {os.path.getsize(path) / 2**20:.0f} MiB on disk; "
+              f"load {loads['read'][0]:.2f}s +{loads['read'][1]:.0f} MiB RSS, "
+              f"mmap {loads['mmap'][0]:.2f}s +{loads['mmap'][1]:.0f} MiB RSS")
+
+        name, values = next((sweep for prefix, sweep in SWEEPS.items() if spec.startswith(prefix)), (None, [None]))
+        for value in values:
+            if name:
+                faiss.ParameterSpace().set_index_parameter(index, name, value)
+            recall, p50, p99 = measure(index, queries, truth, args.k)
+            param = f"{name}={value}" if name else "exact"
+            print(f"{'':16} {param:>14} {recall:>7.3f} {p50:>8.2f} {p99:>8.2f}")
+        del index
+        os.remove(path)
+    os.rmdir(work)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Re-ingest cost of the incremental RAG index (rag_index.py).
+
+    python bench_ingest.py                   # 400 synthetic documents, hashing embedder
+    python bench_ingest.py --docs 2000 --model all-MiniLM-L6-v2
+
+Builds the index over a synthetic corpus, then times a re-sync after:
+nothing changed, every file touched (mtime only), 1% / 10% of the files
+edited, 5% deleted and 5% added. Every step should cost in proportion
+to the documents that actually changed; the "full rebuild" row is what
+every start-up used to cost.
+
+Without --model the embedder is a hashing bag-of-words (no model
+download; much cheaper per chunk than sentence-transformers on CPU, so
+real savings are larger than shown).
+"""
+
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+import zlib
+
+import numpy as np
+
+from chunk_store import ChunkStore, chunk_document
+from rag_index import IncrementalIndex
+
+WORDS = ("automation robot line sensor control factory throughput quality worker shift "
+         "machine learning model data pipeline latency batch schedule maintenance failure "
+         "inspection vision camera torque motor conveyor warehouse order picking").split()
+
+
+def hashing_embed(texts, dim=384):
+    vectors = np.zeros((len(texts), dim), dtype="float32")
+    for row, text in enumerate(texts):
+        ids = [zlib.crc32(w.encode()) % dim for w in text.lower().split()]
+        vectors[row] = np.bincount(ids, minlength=dim)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+def write_doc(path, rng, words=1500):
+    sentences = []
+    while sum(len(s.split()) for s in sentences) < words:
+        sentences.append(" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 18))).capitalize() + ".")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(" ".join(sentences))
+
+
+def read_texts(paths):
+    texts = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            texts.append(f.read())
+    return texts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, default=400)
+    parser.add_argument("--words", type=int, default=1500, help="words per document")
+    parser.add_argument("--model", help="sentence-transformers model name instead of the hashing embedder")
+    args = parser.parse_args()
+
+    embed = hashing_embed
+    if args.model:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(args.model)
+        embed = model.encode
+
+    rng = random.Random(7)
+    work = tempfile.mkdtemp(prefix="bench_ingest_")
+    corpus = os.path.join(work, "docs")
+    os.makedirs(corpus)
+    try:
+        paths = [os.path.join(corpus, f"doc{i:05d}.txt") for i in range(args.docs)]
+        for path in paths:
+            write_doc(path, rng, args.words)
+
+        def open_index():
+            store = ChunkStore(os.path.join(work, "chunks.sqlite"))
+            chunker = lambda path, text: chunk_document(path, text, max_tokens=200, overlap=30)
+            return IncrementalIndex(store, os.path.join(work, "vectors.index"), embed, chunker)
+
+        def step(label, index):
+            report = index.sync(paths, read_texts)
+            changed = report.added + report.changed + report.removed
+            print(f"{label:22} {changed:>8} {report.chunks_embedded:>9} {report.chunks_removed:>8} "
+                  f"{report.seconds:>9.2f} {index.index.ntotal:>9}")
+
+        print(f"{args.docs} documents x {args.words} words, embedder: {args.model or 'hashing'}")
+        print(f"{'step':22} {'changed':>8} {'embedded':>9} {'dropped':>8} {'seconds':>9} {'vectors':>9}")
+        step("full build", open_index())
+
+        # Each step reopens the index, as a restarted script would
+        step("no change", open_index())
+
+        time.sleep(0.01)
+        for path in paths:
+            os.utime(path)
+        step("all touched", open_index())
+
+        for fraction in (0.01, 0.10):
+            for path in rng.sample(paths, max(1, int(len(paths) * fraction))):
+                write_doc(path, rng, args.words)
+            step(f"{fraction:.0%} edited", open_index())
+
+        for path in rng.sample(paths, max(1, len(paths) // 20)):
+            os.remove(path)
+            paths.remove(path)
+        step("5% deleted", open_index())
+
+        for i in range(max(1, args.docs // 20)):
+            path = os.path.join(corpus, f"new{i:05d}.txt")
+            write_doc(path, rng, args.words)
+            paths.append(path)
+        step("5% added", open_index())
+
+        os.remove(os.path.join(work, "chunks.sqlite"))
+        step("full rebuild", open_index())
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
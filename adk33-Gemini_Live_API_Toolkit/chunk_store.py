@@ -0,0 +1,260 @@
+"""
+Per-document chunks with source metadata, for the agentic RAG scripts.
+
+Every document is chunked on its own (token windows with overlap, cut at
+a sentence end where possible) and stored in a SQLite file next to the
+FAISS index:
+
+    documents  path, content hash, mtime, size
+    chunks     chunk_id, path, ordinal, start/end (character offsets
+               into the extracted text), token count, content hash, text
+
+chunk_id is also the vector id in the FAISS index (IndexIDMap), so a
+search hit maps straight to its chunk and source without a parallel
+text file to split.
+
+The documents table doubles as the ingestion manifest (path -> mtime,
+size, hash -> chunk ids); see rag_index.py.
+"""
+
+import hashlib
+import re
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+Span = Tuple[int, int]
+TokenSpans = Callable[[str], List[Span]]
+
+_WORD = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_END = ".!?"
+
+
+@dataclass
+class Chunk:
+    path: str
+    ordinal: int
+    start: int
+    end: int
+    text: str
+    token_count: int
+    content_hash: str
+    chunk_id: Optional[int] = None
+
+    def citation(self) -> str:
+        return f"{self.path} [chars {self.start}-{self.end}]"
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# ── tokenisation ───────────────────────────────────────────────────────
+def regex_token_spans(text: str) -> List[Span]:
+    """Words and punctuation; close enough to word pieces when no tokenizer is loaded."""
+    return [m.span() for m in _WORD.finditer(text)]
+
+
+def hf_token_spans(tokenizer, block_chars: int = 100_000) -> TokenSpans:
+    """
+    Token spans from a Hugging Face fast tokenizer (e.g. SentenceTransformer.tokenizer),
+    so chunk sizes are counted in the embedding model's own tokens.
+    """
+    def spans(text: str) -> List[Span]:
+        result: List[Span] = []
+        pos = 0
+        while pos < len(text):
+            # Tokenise in blocks cut at whitespace; whole books in one call are slow
+            end = min(len(text), pos + block_chars)
+            if end < len(text):
+                cut = text.rfind(" ", pos, end)
+                end = cut if cut > pos else end
+            offsets = tokenizer(
+                text[pos:end], add_special_tokens=False, return_offsets_mapping=True, verbose=False
+            )["offset_mapping"]
+            result.extend((pos + a, pos + b) for a, b in offsets if b > a)
+            pos = end
+        return result
+
+    return spans
+
+
+# ── chunking ───────────────────────────────────────────────────────────
+def chunk_spans(text: str, tokens: Sequence[Span], max_tokens: int = 200, overlap: int = 30) -> List[Tuple[int, int, int]]:
+    """
+    (start, end, token_count) windows of at most max_tokens tokens, each
+    overlapping the previous by about `overlap` tokens. A window ends at
+    the last sentence end in its second half, if there is one.
+    """
+    if max_tokens <= overlap:
+        raise ValueError("max_tokens must be larger than overlap")
+    windows = []
+    i, n = 0, len(tokens)
+    while i < n:
+        j = min(i + max_tokens, n)
+        if j < n:
+            for k in range(j, i + max_tokens // 2, -1):
+                last = tokens[k - 1]
+                if text[last[1] - 1] in _SENTENCE_END or "\n\n" in text[last[1]:tokens[k][0]]:
+                    j = k
+                    break
+        windows.append((tokens[i][0], tokens[j - 1][1], j - i))
+        if j == n:
+            break
+        i = max(j - overlap, i + 1)
+    return windows
+
+
+def chunk_document(path: str, text: str, token_spans: TokenSpans = regex_token_spans,
+                   max_tokens: int = 200, overlap: int = 30) -> List[Chunk]:
+    chunks = []
+    for start, end, count in chunk_spans(text, token_spans(text), max_tokens, overlap):
+        body = text[start:end]
+        chunks.append(Chunk(path, len(chunks), start, end, body, count, content_hash(body)))
+    return chunks
+
+
+# ── storage ────────────────────────────────────────────────────────────
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS chunks (
+    chunk_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL REFERENCES documents(path),
+    ordinal INTEGER NOT NULL,
+    start INTEGER NOT NULL,
+    "end" INTEGER NOT NULL,
+    token_count INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_chunks_path ON chunks(path, ordinal);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+_CHUNK_COLUMNS = 'chunk_id, path, ordinal, start, "end", token_count, content_hash, text'
+
+
+def _row_to_chunk(row) -> Chunk:
+    chunk_id, path, ordinal, start, end, token_count, digest, text = row
+    return Chunk(path, ordinal, start, end, text, token_count, digest, chunk_id)
+
+
+@dataclass
+class DocumentRecord:
+    path: str
+    content_hash: str
+    mtime: float
+    size: int
+
+
+class ChunkStore:
+    def __init__(self, path: str):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.executescript(_SCHEMA)
+        self._in_transaction = False
+
+    @contextmanager
+    def transaction(self):
+        """Group several writes into one commit; nested uses join the outer transaction."""
+        if self._in_transaction:
+            yield
+            return
+        self._in_transaction = True
+        try:
+            with self.db:
+                yield
+        finally:
+            self._in_transaction = False
+
+    def close(self) -> None:
+        self.db.close()
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def put_document(self, path: str, text: str, chunks: Iterable[Chunk], mtime: float = 0.0,
+                     size: Optional[int] = None, doc_hash: Optional[str] = None) -> List[Chunk]:
+        """
+        Replace everything stored for `path`; returns the chunks with their new ids.
+        size/doc_hash describe the source file and default to the extracted text's.
+        """
+        chunks = list(chunks)
+        with self.transaction():
+            self.db.execute("DELETE FROM chunks WHERE path = ?", (path,))
+            self.db.execute(
+                "INSERT OR REPLACE INTO documents (path, content_hash, mtime, size) VALUES (?, ?, ?, ?)",
+                (path, doc_hash or content_hash(text), mtime, len(text) if size is None else size),
+            )
+            for chunk in chunks:
+                cursor = self.db.execute(
+                    'INSERT INTO chunks (path, ordinal, start, "end", token_count, content_hash, text) '
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (path, chunk.ordinal, chunk.start, chunk.end, chunk.token_count, chunk.content_hash, chunk.text),
+                )
+                chunk.chunk_id = cursor.lastrowid
+        return chunks
+
+    def remove_document(self, path: str) -> None:
+        with self.transaction():
+            self.db.execute("DELETE FROM chunks WHERE path = ?", (path,))
+            self.db.execute("DELETE FROM documents WHERE path = ?", (path,))
+
+    def touch_document(self, path: str, mtime: float) -> None:
+        """Record a new mtime for a file whose content did not change."""
+        with self.transaction():
+            self.db.execute("UPDATE documents SET mtime = ? WHERE path = ?", (mtime, path))
+
+    def documents(self) -> Dict[str, DocumentRecord]:
+        rows = self.db.execute("SELECT path, content_hash, mtime, size FROM documents")
+        return {row[0]: DocumentRecord(*row) for row in rows}
+
+    def chunk_ids_for(self, paths: Iterable[str]) -> List[int]:
+        ids: List[int] = []
+        for path in paths:
+            ids.extend(row[0] for row in self.db.execute("SELECT chunk_id FROM chunks WHERE path = ?", (path,)))
+        return ids
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self.transaction():
+            self.db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def get(self, chunk_ids: Sequence[int]) -> List[Chunk]:
+        """Chunks for `chunk_ids`, in the same order; unknown ids are skipped."""
+        ids = [int(i) for i in chunk_ids]
+        if not ids:
+            return []
+        marks = ",".join("?" * len(ids))
+        rows = self.db.execute(f"SELECT {_CHUNK_COLUMNS} FROM chunks WHERE chunk_id IN ({marks})", ids)
+        by_id = {row[0]: _row_to_chunk(row) for row in rows}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def iter_chunks(self, batch_size: int = 1000) -> Iterable[List[Chunk]]:
+        last = 0
+        while True:
+            rows = self.db.execute(
+                f"SELECT {_CHUNK_COLUMNS} FROM chunks WHERE chunk_id > ? ORDER BY chunk_id LIMIT ?",
+                (last, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield [_row_to_chunk(row) for row in rows]
+            last = rows[-1][0]
+
+
+def format_citations(chunks: Sequence[Chunk]) -> str:
+    """Numbered passages with their sources, for a tool result."""
+    return "\n---\n".join(f"[{n}] {chunk.citation()}\n{chunk.text}" for n, chunk in enumerate(chunks, 1))
@@ -0,0 +1,252 @@
+"""
+Batched, cached text embeddings for the RAG scripts and retrieval tools.
+
+    embedder = sentence_transformer_service("all-MiniLM-L6-v2", cache_path="embeddings.sqlite")
+    vectors = embedder.embed(["first chunk", "second chunk"])   # float32, L2-normalised
+    vector = await embedder.aembed(["a query"])                  # from async code
+
+EmbeddingService wraps any `encode(texts) -> array` callable (a local
+model, or a remote API such as Gemini embeddings) with:
+
+    dynamic batching  one worker thread owns the model; requests from
+                      concurrent callers (tool calls, threads, tasks)
+                      that arrive within max_wait are encoded together,
+                      up to max_batch texts per model call
+    on-disk cache     SQLite keyed by (model id, sha256 of the text), so
+                      unchanged chunks and repeated queries are never
+                      re-encoded, across runs and processes
+    float16 storage   vectors are L2-normalised and stored as float16
+                      (half the bytes; cosine error ~1e-3). Results are
+                      always the float16 values widened to float32, so a
+                      cached and a fresh result are identical
+
+sentence_transformer_service() loads a model once and keeps it (and its
+worker) for the life of the process: every caller asking for the same
+model gets the same warm service.
+
+The cache key includes the model id, so a different model (or a
+different task type of the same API) never reads another's vectors.
+"""
+
+import asyncio
+import atexit
+import functools
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+from chunk_store import content_hash
+
+Encode = Callable[[List[str]], Any]
+
+
+# ── cache ──────────────────────────────────────────────────────────────
+class EmbeddingCache:
+    """float16 vectors in SQLite, keyed by (model id, text hash). Use from one thread."""
+
+    def __init__(self, path: str, model_id: str):
+        self.path = path
+        self.model_id = model_id
+        self.db = sqlite3.connect(path, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")  # readers in other processes don't block the writer
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, key TEXT NOT NULL, dim INTEGER NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, key))"
+        )
+
+    def get_many(self, keys: Sequence[str], chunk: int = 500) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        for i in range(0, len(keys), chunk):
+            part = keys[i:i + chunk]
+            rows = self.db.execute(
+                f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({','.join('?' * len(part))})",
+                (self.model_id, *part),
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float16)
+        return found
+
+    def put_many(self, items: Dict[str, np.ndarray]) -> None:
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, key, dim, vector) VALUES (?, ?, ?, ?)",
+                [(self.model_id, key, len(v), np.asarray(v, dtype=np.float16).tobytes()) for key, v in items.items()],
+            )
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (self.model_id,)).fetchone()[0]
+
+    def close(self) -> None:
+        self.db.close()
+
+
+# ── service ────────────────────────────────────────────────────────────
+@dataclass
+class _Request:
+    texts: List[str]
+    keys: List[str]
+    future: Future = field(default_factory=Future)
+
+
+_STOP = object()
+
+
+class EmbeddingService:
+    def __init__(
+        self,
+        encode: Encode,
+        model_id: str,
+        cache_path: Optional[str] = None,
+        max_batch: int = 64,
+        max_wait: float = 0.002,
+        normalize: bool = True,
+        model: Any = None,
+    ):
+        """
+        encode: texts -> (n, dim) array; called only from the worker thread.
+        model_id: names the vectors in the cache; change it when the model changes.
+        model: the loaded model object, if callers need it (e.g. its tokenizer).
+        """
+        self.encode = encode
+        self.model_id = model_id
+        self.cache_path = cache_path
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.normalize = normalize
+        self.model = model
+        self.stats = {"requests": 0, "texts": 0, "cache_hits": 0, "encoded": 0, "model_calls": 0, "groups": 0}
+        self._requests: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._cache: Optional[EmbeddingCache] = None  # opened and used by the worker thread only
+        self._closed = False
+
+    # ── public API ─────────────────────────────────────────────────────
+    def submit(self, texts: Iterable[str]) -> Future:
+        """Queue `texts`; the Future resolves to a float32 (n, dim) array."""
+        texts = list(texts)
+        request = _Request(texts, [content_hash(t) for t in texts])
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("EmbeddingService is closed")
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name=f"embed-{self.model_id}", daemon=True)
+                self._worker.start()
+            self._requests.put(request)
+        return request.future
+
+    def embed(self, texts: Iterable[str]) -> np.ndarray:
+        return self.submit(texts).result()
+
+    async def aembed(self, texts: Iterable[str]) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(texts))
+
+    __call__ = embed
+
+    def close(self) -> None:
+        """Finish queued requests and stop the worker."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            worker = self._worker
+            self._requests.put(_STOP)
+        if worker is not None:
+            worker.join()
+
+    # ── worker ─────────────────────────────────────────────────────────
+    def _run(self) -> None:
+        try:
+            stopping = False
+            while not stopping:
+                first = self._requests.get()
+                if first is _STOP:
+                    break
+                group, count = [first], len(first.texts)
+                deadline = time.monotonic() + self.max_wait
+                while count < self.max_batch:
+                    try:
+                        request = self._requests.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                    if request is _STOP:
+                        stopping = True
+                        break
+                    group.append(request)
+                    count += len(request.texts)
+                self._serve(group)
+        finally:
+            if self._cache is not None:
+                self._cache.close()
+
+    def _serve(self, group: List[_Request]) -> None:
+        # Drop requests whose async caller gave up; the rest can no longer be cancelled
+        group = [request for request in group if request.future.set_running_or_notify_cancel()]
+        if not group:
+            return
+        try:
+            if self.cache_path and self._cache is None:
+                self._cache = EmbeddingCache(self.cache_path, self.model_id)
+            store = self._cache
+            wanted: Dict[str, str] = {}
+            for request in group:
+                wanted.update(zip(request.keys, request.texts))
+            vectors = store.get_many(list(wanted)) if store is not None else {}
+            hits = sum(1 for request in group for key in request.keys if key in vectors)
+            missing = [key for key in wanted if key not in vectors]
+            fresh: Dict[str, np.ndarray] = {}
+            for i in range(0, len(missing), self.max_batch):
+                keys = missing[i:i + self.max_batch]
+                fresh.update(zip(keys, self._encode([wanted[key] for key in keys])))
+            if fresh and store is not None:
+                store.put_many(fresh)
+            vectors.update(fresh)
+        except BaseException as e:
+            for request in group:
+                request.future.set_exception(e)
+            return
+
+        self.stats["groups"] += 1
+        self.stats["requests"] += len(group)
+        self.stats["texts"] += sum(len(request.texts) for request in group)
+        self.stats["cache_hits"] += hits
+        self.stats["encoded"] += len(fresh)
+        for request in group:
+            if request.keys:
+                result = np.stack([vectors[key] for key in request.keys]).astype(np.float32)
+            else:
+                result = np.zeros((0, 0), dtype=np.float32)
+            request.future.set_result(result)
+
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        self.stats["model_calls"] += 1
+        vectors = np.asarray(self.encode(texts), dtype=np.float32)
+        if self.normalize:
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors.astype(np.float16)
+
+
+# ── warm models ────────────────────────────────────────────────────────
+@functools.lru_cache(maxsize=None)
+def sentence_transformer_service(model_name: str, cache_path: Optional[str] = None,
+                                 device: Optional[str] = None, max_batch: int = 64) -> EmbeddingService:
+    """One loaded SentenceTransformer and its worker per (model, cache) for the whole process."""
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device=device)
+    service = EmbeddingService(
+        lambda texts: model.encode(texts, batch_size=max_batch, convert_to_numpy=True),
+        f"sentence-transformers/{model_name}",
+        cache_path,
+        max_batch=max_batch,
+        model=model,
+    )
+    atexit.register(service.close)
+    return service
@@ -0,0 +1,302 @@
+"""
+Incremental FAISS index over a ChunkStore.
+
+The store's documents table is the manifest: path -> mtime/size/hash ->
+chunk ids. IncrementalIndex.sync(paths, extract) compares the files on
+disk with it:
+
+    same mtime and size     skipped without reading the file
+    same bytes (sha256)     mtime refreshed, nothing re-embedded
+    new or changed          re-chunked and embedded; the old chunk ids
+                            are removed from the IndexIDMap
+    no longer on disk       chunk ids removed, manifest entry dropped
+
+so a re-ingest costs in proportion to what changed.
+
+The index file and the manifest are committed together. A sync writes
+the index to a new generation file ("<index_path>.<n>") and fsyncs it,
+and only then commits the SQLite transaction that updates the manifest
+and records that file name. A crash before the commit leaves the
+previous index and manifest in place; stray generation files are
+deleted on the next load.
+
+Index types (index_factory):
+
+    "Flat"              exact brute force; every query scans all n vectors,
+                        memory n * dim * 4 bytes
+    "IVF4096,Flat"      vectors bucketed by k-means centroid; a query scans
+                        the nprobe nearest buckets. Same memory as Flat
+    "HNSW32"            graph search, fastest at high recall; memory of Flat
+                        plus ~M * 8 bytes per vector. HNSW cannot delete, so
+                        a sync that removes chunks rebuilds the graph from
+                        the vectors it stores (no re-embedding)
+    "IVF4096,PQ48"      IVF over product-quantised codes: 48 bytes per vector
+                        instead of dim * 4, approximate distances
+
+IVF and PQ are trained on a random sample of the first build's vectors;
+later additions reuse those centroids. Set search-time knobs with
+search_params ("nprobe=32", "efSearch=128"). With mmap=True the
+committed index is loaded with faiss.IO_FLAG_MMAP; a sync that changes
+it reads it into RAM, writes the new generation and maps that. faiss
+maps the inverted lists of IVF indexes only: an IVF index opens
+instantly and its pages stay in the OS page cache, shared between
+processes, while Flat and HNSW are still read into RAM whole.
+"""
+
+import hashlib
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional
+
+import faiss
+import numpy as np
+
+from chunk_store import Chunk, ChunkStore
+
+Embed = Callable[[List[str]], np.ndarray]
+Extract = Callable[[List[str]], List[str]]
+Chunker = Callable[[str, str], List[Chunk]]
+MakeIndex = Callable[[np.ndarray], faiss.Index]
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_KEY = "index_file"
+GENERATION_KEY = "index_generation"
+EMBEDDER_KEY = "embedder"
+
+
+def index_factory(spec: str = "Flat", metric: int = faiss.METRIC_L2) -> MakeIndex:
+    """
+    A MakeIndex for a faiss index_factory string (see the module docstring).
+    It is given the vectors of the first build and trains on them if the
+    index needs training.
+    """
+    def make(sample: np.ndarray) -> faiss.Index:
+        dim = sample.shape[1]
+        # IVF indexes keep their own ids; the others need an id map
+        index = faiss.index_factory(dim, spec if spec.startswith("IVF") else "IDMap," + spec, metric)
+        if not index.is_trained:
+            centroids = faiss.extract_index_ivf(index).nlist if spec.startswith("IVF") else 0
+            if len(sample) < centroids:
+                logger.warning(f"{len(sample)} vectors are too few to train {spec}; using an exact index")
+                return faiss.index_factory(dim, "IDMap,Flat", metric)
+            index.train(sample)
+        return index
+
+    return make
+
+
+def rebuild_without(index: faiss.Index, ids: np.ndarray, make_index: MakeIndex) -> faiss.Index:
+    """Copy of an IndexIDMap minus `ids`, for inner indexes without remove_ids (HNSW)."""
+    inner = faiss.downcast_index(index.index)
+    vectors = inner.reconstruct_n(0, inner.ntotal)
+    id_map = faiss.vector_to_array(index.id_map)
+    keep = ~np.isin(id_map, ids)
+    rebuilt = make_index(vectors[keep])
+    rebuilt.add_with_ids(vectors[keep], id_map[keep])
+    return rebuilt
+
+
+def file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class SyncReport:
+    unchanged: int = 0
+    touched: int = 0
+    added: int = 0
+    changed: int = 0
+    removed: int = 0
+    chunks_embedded: int = 0
+    chunks_removed: int = 0
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.added} new, {self.changed} changed, {self.removed} removed, "
+            f"{self.unchanged + self.touched} unchanged documents; "
+            f"{self.chunks_embedded} chunks embedded, {self.chunks_removed} dropped in {self.seconds:.2f}s"
+        )
+
+
+class IncrementalIndex:
+    def __init__(self, store: ChunkStore, index_path: str, embed: Embed, chunker: Chunker,
+                 make_index: MakeIndex = index_factory("Flat"), batch_size: int = 256,
+                 train_size: int = 100_000, search_params: str = "", mmap: bool = False,
+                 embed_id: Optional[str] = None):
+        """
+        embed_id names the embedding model (default: embed.model_id, as on an
+        EmbeddingService). When it differs from the one the index was built
+        with, the next sync rebuilds the index rather than mix vector spaces.
+        """
+        self.store = store
+        self.index_path = index_path
+        self.embed = embed
+        self.embed_id = embed_id if embed_id is not None else getattr(embed, "model_id", None)
+        self.chunker = chunker
+        self.make_index = make_index
+        self.batch_size = batch_size
+        self.train_size = train_size
+        self.search_params = search_params
+        self.mmap = mmap
+        self.index: Optional[faiss.Index] = None
+        self.mapped = False
+        self.load()
+
+    # ── persistence ────────────────────────────────────────────────────
+    def _resolve(self, name: str) -> str:
+        return os.path.join(os.path.dirname(self.index_path), name)
+
+    def load(self, mmap: Optional[bool] = None) -> Optional[faiss.Index]:
+        """(Re)load the committed index and delete generation files nothing points at."""
+        mmap = self.mmap if mmap is None else mmap
+        name = self.store.get_meta(INDEX_FILE_KEY)
+        current = self._resolve(name) if name else None
+        self.index, self.mapped = None, False
+        if current and os.path.exists(current):
+            flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+            self.index, self.mapped = faiss.read_index(current, flags), mmap
+            self._apply_search_params()
+        self._prune(name)
+        return self.index
+
+    def _apply_search_params(self) -> None:
+        if self.index is not None and self.search_params:
+            faiss.ParameterSpace().set_index_parameters(self.index, self.search_params)
+
+    def _prune(self, keep: Optional[str]) -> None:
+        prefix = os.path.basename(self.index_path) + "."
+        directory = os.path.dirname(self.index_path) or "."
+        for entry in os.listdir(directory):
+            if entry.startswith(prefix) and entry[len(prefix):].isdigit() and entry != keep:
+                os.remove(os.path.join(directory, entry))
+
+    def _write_generation(self) -> str:
+        generation = int(self.store.get_meta(GENERATION_KEY, "0")) + 1
+        name = f"{os.path.basename(self.index_path)}.{generation}"
+        path = self._resolve(name)
+        faiss.write_index(self.index, path)
+        with open(path, "rb+") as f:
+            os.fsync(f.fileno())
+        self.store.set_meta(GENERATION_KEY, str(generation))
+        self.store.set_meta(INDEX_FILE_KEY, name)
+        return path
+
+    # ── ingestion ──────────────────────────────────────────────────────
+    def sync(self, paths: Iterable[str], extract: Extract) -> SyncReport:
+        """Bring index and manifest in line with `paths`; `extract` reads the text of new/changed files."""
+        started = time.perf_counter()
+        report = SyncReport()
+        manifest = self.store.documents()
+        stale: List[str] = []
+        if self.index is None and manifest:
+            # Manifest without its index (deleted by hand?): rebuild from scratch
+            stale, manifest = list(manifest), {}
+        elif manifest and self.embed_id and self.store.get_meta(EMBEDDER_KEY) != self.embed_id:
+            logger.warning(f"Index was built with another embedder; re-embedding with {self.embed_id}")
+            stale, manifest = list(manifest), {}
+            self.index, self.mapped = None, False
+
+        seen, touched, todo = set(), [], []
+        for path in map(str, paths):
+            seen.add(path)
+            stat = os.stat(path)
+            record = manifest.get(path)
+            if record and record.mtime == stat.st_mtime and record.size == stat.st_size:
+                report.unchanged += 1
+                continue
+            digest = file_hash(path)
+            if record and record.content_hash == digest:
+                touched.append((path, stat.st_mtime))
+                report.touched += 1
+                continue
+            todo.append((path, stat, digest))
+            if record:
+                report.changed += 1
+            else:
+                report.added += 1
+        gone = [path for path in manifest if path not in seen]
+        report.removed = len(gone)
+
+        if todo or gone or touched or stale:
+            texts = extract([path for path, _, _ in todo]) if todo else []
+            old_ids = self.store.chunk_ids_for([path for path, _, _ in todo if path in manifest] + gone)
+            if self.mapped and (todo or gone):
+                self.load(mmap=False)  # mapped indexes are read-only
+            try:
+                with self.store.transaction():
+                    for path in stale:
+                        self.store.remove_document(path)
+                    for path, mtime in touched:
+                        self.store.touch_document(path, mtime)
+                    new_chunks: List[Chunk] = []
+                    for (path, stat, digest), text in zip(todo, texts):
+                        chunks = self.chunker(path, text) if text and text.strip() else []
+                        new_chunks.extend(self.store.put_document(
+                            path, text or "", chunks, stat.st_mtime, stat.st_size, digest
+                        ))
+                    for path in gone:
+                        self.store.remove_document(path)
+                    if todo or gone or stale:
+                        if old_ids and self.index is not None:
+                            report.chunks_removed = self._remove(np.asarray(old_ids, dtype="int64"))
+                        self._add(new_chunks)
+                        report.chunks_embedded = len(new_chunks)
+                        if self.index is not None:
+                            self._write_generation()
+                        if self.embed_id:
+                            self.store.set_meta(EMBEDDER_KEY, self.embed_id)
+            except BaseException:
+                # The in-memory index may hold uncommitted changes
+                self.load()
+                raise
+            if self.mmap and not self.mapped:
+                self.load()
+            else:
+                self._prune(self.store.get_meta(INDEX_FILE_KEY))
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def _remove(self, ids: np.ndarray) -> int:
+        before = self.index.ntotal
+        try:
+            return int(self.index.remove_ids(ids))
+        except RuntimeError:
+            self.index = rebuild_without(self.index, ids, self.make_index)
+            self._apply_search_params()
+            return before - self.index.ntotal
+
+    def _add(self, chunks: List[Chunk]) -> None:
+        # The first build embeds everything before creating the index, so
+        # IVF/PQ train on a sample of the whole corpus, not its first files
+        pending: List[np.ndarray] = []
+        for i in range(0, len(chunks), self.batch_size):
+            batch = chunks[i:i + self.batch_size]
+            vectors = np.ascontiguousarray(self.embed([c.text for c in batch]), dtype="float32")
+            if self.index is None:
+                pending.append(vectors)
+            else:
+                self.index.add_with_ids(vectors, np.asarray([c.chunk_id for c in batch], dtype="int64"))
+        if pending:
+            vectors = np.concatenate(pending)
+            sample = vectors
+            if len(vectors) > self.train_size:
+                sample = vectors[np.random.default_rng(0).choice(len(vectors), self.train_size, replace=False)]
+            self.index = self.make_index(sample)
+            self._apply_search_params()
+            self.index.add_with_ids(vectors, np.asarray([c.chunk_id for c in chunks], dtype="int64"))
+
+    # ── retrieval ──────────────────────────────────────────────────────
+    def search(self, query_vector: np.ndarray, k: int = 5) -> List[Chunk]:
+        """Best `k` chunks for one query vector, nearest first."""
+        if self.index is None or self.index.ntotal == 0:
+            return []
+        _, ids = self.index.search(np.ascontiguousarray(query_vector, dtype="float32").reshape(1, -1), k)
+        return self.store.get([i for i in ids[0] if i != -1])
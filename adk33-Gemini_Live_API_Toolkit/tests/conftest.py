@@ -0,0 +1,41 @@
+import sys
+import threading
+import zlib
+from pathlib import Path
+from typing import List
+
+import numpy as np
+import pytest
+
+# The RAG modules live next to the scripts, not in a package
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+class TinyEmbedder:
+    """Deterministic hashing bag-of-words; records every call it gets."""
+
+    def __init__(self, dim: int = 16, gate: threading.Event = None):
+        self.dim = dim
+        self.calls: List[List[str]] = []
+        self.gate = gate
+
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        if self.gate is not None:
+            self.gate.wait(5)
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                vectors[row, zlib.crc32(word.encode()) % self.dim] += 1.0
+            vectors[row, 0] += 0.5  # no all-zero vectors
+        return vectors
+
+
+@pytest.fixture
+def tiny_embedder() -> TinyEmbedder:
+    return TinyEmbedder()
+
+
+@pytest.fixture
+def cache_path(tmp_path) -> str:
+    return str(tmp_path / "embeddings.sqlite")
@@ -0,0 +1,176 @@
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from chunk_store import ChunkStore, chunk_document
+from conftest import TinyEmbedder
+from embedding_service import EmbeddingCache, EmbeddingService
+from rag_index import IncrementalIndex
+
+
+def expected(embedder: TinyEmbedder, texts):
+    """What the service should return: normalised, rounded through float16."""
+    vectors = TinyEmbedder(embedder.dim)(texts)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype(np.float16).astype(np.float32)
+
+
+def test_embed_returns_normalised_float16_values(tiny_embedder):
+    """Vectors come back float32, unit length, with float16 precision."""
+    service = EmbeddingService(tiny_embedder, "tiny")
+    texts = ["robots on the line", "conveyor torque", "robots on the line again"]
+    vectors = service.embed(texts)
+    service.close()
+
+    assert vectors.dtype == np.float32
+    assert vectors.shape == (3, tiny_embedder.dim)
+    np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, atol=1e-3)
+    np.testing.assert_array_equal(vectors, expected(tiny_embedder, texts))
+
+
+def test_duplicate_texts_are_encoded_once(tiny_embedder):
+    service = EmbeddingService(tiny_embedder, "tiny")
+    vectors = service.embed(["same", "other", "same"])
+    service.close()
+
+    assert sorted(t for call in tiny_embedder.calls for t in call) == ["other", "same"]
+    np.testing.assert_array_equal(vectors[0], vectors[2])
+
+
+def test_cache_survives_restart(tiny_embedder, cache_path):
+    """A new service over the same cache file answers without calling the model."""
+    texts = ["first chunk", "second chunk"]
+    first = EmbeddingService(tiny_embedder, "tiny", cache_path)
+    cold = first.embed(texts)
+    first.close()
+
+    model = TinyEmbedder()
+    second = EmbeddingService(model, "tiny", cache_path)
+    warm = second.embed(texts + ["new query"])
+    stats = dict(second.stats)
+    second.close()
+
+    assert model.calls == [["new query"]]
+    assert stats["cache_hits"] == 2 and stats["encoded"] == 1
+    np.testing.assert_array_equal(warm[:2], cold)
+
+    cache = EmbeddingCache(cache_path, "tiny")
+    assert len(cache) == 3
+    assert cache.get_many(["unknown"]) == {}
+    cache.close()
+
+
+def test_cache_is_keyed_by_model(tiny_embedder, cache_path):
+    first = EmbeddingService(tiny_embedder, "tiny-a", cache_path)
+    first.embed(["shared text"])
+    first.close()
+
+    other = TinyEmbedder()
+    second = EmbeddingService(other, "tiny-b", cache_path)
+    second.embed(["shared text"])
+    second.close()
+
+    assert other.calls == [["shared text"]]
+
+
+def test_concurrent_callers_share_model_calls(cache_path):
+    """Requests queued while the model is busy are encoded in one batch."""
+    gate = threading.Event()
+    model = TinyEmbedder(gate=gate)
+    service = EmbeddingService(model, "tiny", cache_path, max_batch=64)
+    first = service.submit(["warm up"])
+    time.sleep(0.05)  # the worker is now blocked inside the model
+    futures = [service.submit([f"query {i}", "common words"]) for i in range(10)]
+    gate.set()
+
+    results = [f.result(timeout=5) for f in futures]
+    first.result(timeout=5)
+    service.close()
+
+    assert len(model.calls) == 2
+    assert len(model.calls[1]) == 11  # ten distinct queries plus the shared text, once
+    for i, vectors in enumerate(results):
+        np.testing.assert_array_equal(vectors, expected(model, [f"query {i}", "common words"]))
+
+
+def test_large_requests_are_split_into_model_batches(tiny_embedder):
+    service = EmbeddingService(tiny_embedder, "tiny", max_batch=8)
+    vectors = service.embed([f"chunk {i}" for i in range(20)])
+    service.close()
+
+    assert [len(call) for call in tiny_embedder.calls] == [8, 8, 4]
+    assert vectors.shape == (20, tiny_embedder.dim)
+
+
+def test_aembed_batches_async_callers():
+    gate = threading.Event()
+    model = TinyEmbedder(gate=gate)
+    service = EmbeddingService(model, "tiny")
+
+    async def main():
+        first = asyncio.ensure_future(service.aembed(["warm up"]))
+        await asyncio.sleep(0.05)
+        queries = [asyncio.ensure_future(service.aembed([f"query {i}"])) for i in range(5)]
+        await asyncio.sleep(0.01)
+        gate.set()
+        await first
+        return await asyncio.gather(*queries)
+
+    results = asyncio.run(main())
+    service.close()
+
+    assert len(model.calls) == 2
+    assert all(r.shape == (1, model.dim) for r in results)
+
+
+def test_model_errors_reach_every_caller_and_service_recovers(tiny_embedder):
+    failing = {"on": True}
+
+    def encode(texts):
+        if failing["on"]:
+            raise RuntimeError("model crashed")
+        return tiny_embedder(texts)
+
+    service = EmbeddingService(encode, "tiny")
+    with pytest.raises(RuntimeError, match="model crashed"):
+        service.embed(["anything"])
+    failing["on"] = False
+    assert service.embed(["anything"]).shape == (1, tiny_embedder.dim)
+    service.close()
+
+    with pytest.raises(RuntimeError, match="closed"):
+        service.submit(["too late"])
+
+
+def test_index_rebuilds_when_the_embedder_changes(tmp_path, cache_path):
+    """Vectors from two models must not share an index."""
+    doc = tmp_path / "doc.txt"
+    doc.write_text("Robots move parts along the conveyor. Sensors check the torque of every motor.")
+
+    def read(paths):
+        return [open(p, encoding="utf-8").read() for p in paths]
+
+    def open_index(model_id):
+        service = EmbeddingService(TinyEmbedder(), model_id, cache_path)
+        store = ChunkStore(str(tmp_path / "chunks.sqlite"))
+        index = IncrementalIndex(store, str(tmp_path / "vectors.index"), service,
+                                 lambda path, text: chunk_document(path, text, max_tokens=8, overlap=2))
+        return service, index
+
+    service, index = open_index("tiny-a")
+    first = index.sync([str(doc)], read)
+    service.close()
+    service, index = open_index("tiny-a")
+    again = index.sync([str(doc)], read)
+    service.close()
+    service, index = open_index("tiny-b")
+    switched = index.sync([str(doc)], read)
+    service.close()
+
+    assert first.chunks_embedded > 0
+    assert again.chunks_embedded == 0
+    assert switched.chunks_embedded == first.chunks_embedded
+    assert index.index.ntotal == first.chunks_embedded